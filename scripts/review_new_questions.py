@@ -166,5 +166,26 @@ def review_new_questions():
     print(f"   ❌ Hylätyt: {len(rejected_questions)}")
     print(f"   ⏳ Odottavat: {len(remaining_questions)}")
 
+def show_duplicate_clusters(threshold=0.7):
+    """Näytä koko jonon duplikaattiklusterit ennen tarkistusta"""
+    from src.core.question_duplicate_checker import QuestionDuplicateChecker
+    
+    current_election = get_current_election()
+    checker = QuestionDuplicateChecker(current_election, verbose=False, data_path=Path("data/elections"))
+    report = checker.cluster_new_questions(threshold=threshold)
+    
+    print("🧩 DUPLIKAATTIKLUSTERIT")
+    print("=" * 50)
+    for i, cluster in enumerate(report['clusters'], 1):
+        representative = cluster['representative']
+        print(f"{i}. ⭐ {representative['question_fi']}")
+        for member in cluster['members']:
+            print(f"   - [{member['queue_index'] + 1}] {member['question_fi']}")
+    print(f"\n📊 {len(report['clusters'])} klusteria, {report['unique_questions']} uniikkia kysymystä "
+          f"({report['total_pending']} odottavaa)")
+    print()
+
 if __name__ == '__main__':
+    if '--cluster' in sys.argv:
+        show_duplicate_clusters()
     review_new_questions()
@@ -17,10 +17,10 @@ from typing import Dict, List
 
 # KORJATTU: Käytetään yhteisiä file_utils-funktioita
 try:
-    from core.file_utils import read_json_file
+    from core.data import read_json_cached, load_question_texts
     from core.validators import validate_candidate_id, validate_question_id
 except ImportError:
-    from core.file_utils import read_json_file
+    from core.data import read_json_cached, load_question_texts
     from core.validators import validate_candidate_id, validate_question_id
 
 class AnswerReports:
@@ -39,7 +39,7 @@ class AnswerReports:
             return False
         
         try:
-            candidates_data = read_json_file(self.candidates_file, {"candidates": []})
+            candidates_data = read_json_cached(self.candidates_file, {"candidates": []})
         except Exception as e:
             click.echo(f"❌ Ehdokasrekisterin lukuvirhe: {e}")
             return False
@@ -78,7 +78,7 @@ class AnswerReports:
             return False
         
         try:
-            candidates_data = read_json_file(self.candidates_file, {"candidates": []})
+            candidates_data = read_json_cached(self.candidates_file, {"candidates": []})
         except Exception as e:
             click.echo(f"❌ Ehdokasrekisterin lukuvirhe: {e}")
             return False
@@ -115,7 +115,7 @@ class AnswerReports:
         """Näytä kaikkien ehdokkaiden vastausyhteenveto"""
         
         try:
-            candidates_data = read_json_file(self.candidates_file, {"candidates": []})
+            candidates_data = read_json_cached(self.candidates_file, {"candidates": []})
         except Exception as e:
             click.echo(f"❌ Ehdokasrekisterin lukuvirhe: {e}")
             return False
@@ -151,8 +151,7 @@ class AnswerReports:
         """Lataa kysymysten mappaus ID -> teksti"""
         questions_map = {}
         try:
-            questions_data = read_json_file(self.questions_file, {"questions": []})
-            questions_map = {q["local_id"]: q["content"]["question"]["fi"] for q in questions_data.get("questions", [])}
+            questions_map = load_question_texts(self.questions_file, "fi")
         except Exception:
             # Jos kysymysrekisteriä ei voi lukea, käytetään ID:itä suoraan
             pass
@@ -12,6 +12,7 @@ sys.path.insert(0, str(Path(__file__).parent.parent.parent))
 try:
     from src.cli.answers.commands import (
         add_command,
+        import_command,
         list_command,
         remove_command,
         update_command
@@ -32,6 +33,7 @@ cli.add_command(add_command, name='add')
 cli.add_command(list_command, name='list')
 cli.add_command(remove_command, name='remove')
 cli.add_command(update_command, name='update')
+cli.add_command(import_command, name='import')
 
 
 if __name__ == '__main__':
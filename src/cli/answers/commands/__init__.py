@@ -1,6 +1,7 @@
 from .add_command import add_command
+from .import_command import import_command
 from .list_command import list_command
 from .remove_command import remove_command
 from .update_command import update_command
 
-__all__ = ['add_command', 'list_command', 'remove_command', 'update_command']
+__all__ = ['add_command', 'import_command', 'list_command', 'remove_command', 'update_command']
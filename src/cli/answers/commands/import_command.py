@@ -0,0 +1,69 @@
+"""
+Import answers -komento.
+"""
+import click
+import json
+import sys
+from pathlib import Path
+
+# Lisää projektin juuri Python-polkuun
+sys.path.insert(0, str(Path(__file__).parent.parent.parent.parent))
+
+from core import get_election_id
+from core.error_handling import ElectionSystemError
+from src.cli.answers.managers import AnswerImporter
+from src.cli.answers.managers.answer_importer import DEFAULT_CHUNK_SIZE
+
+
+@click.command()
+@click.option('--election', required=False, help='Vaalin tunniste (valinnainen, käytetään configista)')
+@click.option('--file', 'file_path', required=True, type=click.Path(exists=True, dir_okay=False),
+              help='JSONL-tiedosto, yksi vastaus per rivi')
+@click.option('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE, show_default=True,
+              help='Validointi- ja commit-erän koko')
+@click.option('--replace', is_flag=True, help='Korvaa olemassa olevat vastaukset (oletus: ohita)')
+@click.option('--dry-run', is_flag=True, help='Vain validointi, ei tallennusta')
+@click.option('--no-reference-check', is_flag=True, help='Älä tarkista ehdokkaiden ja kysymysten olemassaoloa')
+@click.option('--rejects-file', type=click.Path(dir_okay=False), help='Tallenna hylätyt rivit JSONL-tiedostoon')
+@click.option('--json-output', is_flag=True, help='Tulosta raportti JSON-muodossa')
+def import_command(election, file_path, chunk_size, replace, dry_run, no_reference_check,
+                   rejects_file, json_output):
+    """Tuo vastaukset massana JSONL-tiedostosta"""
+    election_id = get_election_id(election)
+    if not election_id:
+        click.echo("❌ Vaali-ID:tä ei annettu eikä config tiedostoa löydy.")
+        return
+    
+    importer = AnswerImporter(election_id, chunk_size=chunk_size, replace=replace,
+                              check_references=not no_reference_check)
+    try:
+        report = importer.import_file(file_path, dry_run=dry_run, rejects_file=rejects_file)
+    except ElectionSystemError as e:
+        click.echo(f"❌ Tuonti epäonnistui: {e}")
+        sys.exit(1)
+    finally:
+        importer.close()
+    
+    if json_output:
+        click.echo(json.dumps(report, indent=2, ensure_ascii=False))
+        return
+    
+    title = "🧪 VASTAUSTEN TUONTI (KUIVAHARJOITUS)" if dry_run else "📥 VASTAUSTEN TUONTI"
+    click.echo(title)
+    click.echo("=" * 50)
+    click.echo(f"📄 Rivejä: {report['total']}")
+    click.echo(f"✅ Tuotu: {report['imported']}")
+    if replace:
+        click.echo(f"🔁 Korvattu: {report['replaced']}")
+    else:
+        click.echo(f"⏭️  Ohitettu (jo olemassa): {report['duplicates']}")
+    click.echo(f"❌ Hylätty: {report['rejected']}")
+    click.echo(f"⏱️  Aika: {report['elapsed_seconds']} s ({report['records_per_second']} riviä/s)")
+    
+    if report["rejects"]:
+        click.echo("\n🔍 HYLÄTYT RIVIT:")
+        for entry in report["rejects"][:20]:
+            click.echo(f"   rivi {entry['line']}: {entry['reason']}")
+        if report["rejected"] > 20:
+            hint = f" (kaikki: {rejects_file})" if rejects_file else " (käytä --rejects-file)"
+            click.echo(f"   ... ja {report['rejected'] - 20} muuta{hint}")
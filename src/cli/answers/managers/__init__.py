@@ -1,4 +1,6 @@
+from .answer_store import AnswerStore
 from .base_manager import BaseAnswerManager
 from .answer_manager import AnswerManager
+from .answer_importer import AnswerImporter
 
-__all__ = ['BaseAnswerManager', 'AnswerManager']
+__all__ = ['AnswerStore', 'BaseAnswerManager', 'AnswerManager', 'AnswerImporter']
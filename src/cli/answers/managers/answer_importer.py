@@ -0,0 +1,204 @@
+"""
+Vastausten massatuonti JSONL-tiedostosta.
+
+Tiedosto luetaan rivi kerrallaan ja validoidaan paloissa olemassa olevilla
+validaattoreilla. Jo tallennetut vastaukset tunnistetaan varaston indeksistä,
+ja jokainen pala commitoidaan omana transaktionaan. candidate_answers.json
+viedään vasta koko tuonnin lopussa.
+"""
+import json
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Set, Tuple
+
+# Lisää src hakemisto Python-polkuun
+sys.path.insert(0, str(Path(__file__).parent.parent.parent.parent))
+
+from core.file_utils import read_json_file
+from core.data_validator import validate_answer_value, validate_confidence_level
+from core.error_handling import ElectionSystemError
+
+from ..models import Answer
+from .base_manager import BaseAnswerManager
+
+DEFAULT_CHUNK_SIZE = 5000
+
+# Raporttiin tallennettavien hylkäysten enimmäismäärä (kaikki menevät rejects-tiedostoon)
+MAX_REPORTED_REJECTS = 100
+
+_OPTIONAL_FIELDS = ("explanation_fi", "explanation_en")
+
+
+def iter_jsonl(file_path: Path) -> Iterator[Tuple[int, Any, Optional[str]]]:
+    """
+    Lue JSONL-tiedosto rivi kerrallaan
+
+    Yields:
+        (rivinumero, data, virheviesti) - virheellisellä rivillä data on None
+    """
+    with open(file_path, 'r', encoding='utf-8') as f:
+        for line_number, line in enumerate(f, 1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                yield line_number, json.loads(line), None
+            except json.JSONDecodeError as e:
+                yield line_number, None, f"Virheellinen JSON: {e.msg}"
+
+
+class AnswerImporter(BaseAnswerManager):
+    """Vastausten eräkohtainen tuonti ja validointi"""
+
+    def __init__(self, election_id: str = None, chunk_size: int = DEFAULT_CHUNK_SIZE,
+                 replace: bool = False, check_references: bool = True):
+        super().__init__(election_id)
+        self.chunk_size = max(1, int(chunk_size))
+        self.replace = replace
+        self.check_references = check_references
+        self._candidate_ids: Optional[Set[str]] = None
+        self._question_ids: Optional[Set[str]] = None
+
+    def _load_references(self):
+        """Lataa tunnetut ehdokkaat ja kysymykset (None = ei tarkisteta)"""
+        if not self.check_references:
+            return
+        candidates_file = Path(self.data_path) / "candidates.json"
+        questions_file = Path(self.data_path) / "questions.json"
+        if candidates_file.exists():
+            candidates = read_json_file(candidates_file, {"candidates": []}).get("candidates", [])
+            self._candidate_ids = {c.get("id") or c.get("candidate_id") for c in candidates}
+        if questions_file.exists():
+            questions = read_json_file(questions_file, {"questions": []}).get("questions", [])
+            self._question_ids = {q.get("id") or q.get("local_id") for q in questions}
+
+    def validate_record(self, record: Any) -> Tuple[Optional[Dict[str, Any]], Optional[str]]:
+        """
+        Validoi ja normalisoi yksittäinen vastaus
+
+        Returns:
+            (vastaus, None) tai (None, hylkäyksen syy)
+        """
+        if not isinstance(record, dict):
+            return None, "Rivi ei ole JSON-objekti"
+
+        candidate_id = record.get("candidate_id")
+        question_id = record.get("question_id")
+        if not candidate_id or not question_id:
+            return None, "candidate_id ja question_id vaaditaan"
+        if self._candidate_ids is not None and candidate_id not in self._candidate_ids:
+            return None, f"Tuntematon ehdokas: {candidate_id}"
+        if self._question_ids is not None and question_id not in self._question_ids:
+            return None, f"Tuntematon kysymys: {question_id}"
+
+        value = record.get("value", record.get("answer_value"))
+        if (isinstance(value, bool) or not validate_answer_value(value)
+                or (isinstance(value, float) and not value.is_integer())):
+            return None, f"Virheellinen vastausarvo: {value}"
+
+        confidence = record.get("confidence")
+        if confidence is not None and (isinstance(confidence, bool) or not validate_confidence_level(confidence)):
+            return None, f"Virheellinen varmuusarvo: {confidence}"
+
+        answer = Answer.create_new(
+            candidate_id=str(candidate_id),
+            question_id=str(question_id),
+            value=int(value),
+            confidence=int(confidence) if confidence is not None else None,
+            **{field: record.get(field) for field in _OPTIONAL_FIELDS}
+        ).to_dict()
+        for field in ("id", "created_at"):
+            if record.get(field):
+                answer[field] = record[field]
+        return answer, None
+
+    def import_file(self, file_path: str, dry_run: bool = False,
+                    rejects_file: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Tuo vastaukset JSONL-tiedostosta
+
+        Args:
+            dry_run: vain validointi, ei tallennusta
+            rejects_file: kirjoita hylätyt rivit syineen JSONL-tiedostoon
+
+        Returns:
+            Raportti: määrät, hylkäykset ja läpäisynopeus
+        """
+        file_path = Path(file_path)
+        if not file_path.exists():
+            raise ElectionSystemError(f"Tiedostoa ei löydy: {file_path}")
+
+        started = time.perf_counter()
+        self._load_references()
+
+        report = {
+            "file": str(file_path),
+            "total": 0,
+            "imported": 0,
+            "replaced": 0,
+            "duplicates": 0,
+            "rejected": 0,
+            "rejects": [],
+            "dry_run": dry_run
+        }
+        rejects_out = open(rejects_file, 'w', encoding='utf-8') if rejects_file else None
+        seen: Set[Tuple[str, str]] = set()
+
+        def reject(line_number: int, reason: str, record: Any = None):
+            report["rejected"] += 1
+            entry = {"line": line_number, "reason": reason}
+            if len(report["rejects"]) < MAX_REPORTED_REJECTS:
+                report["rejects"].append(entry)
+            if rejects_out:
+                rejects_out.write(json.dumps(dict(entry, record=record), ensure_ascii=False) + "\n")
+
+        def flush(chunk: List[Dict[str, Any]]):
+            existing = self.store.existing_keys((a["candidate_id"], a["question_id"]) for a in chunk)
+            if self.replace:
+                report["replaced"] += len(existing)
+                fresh = chunk
+            else:
+                report["duplicates"] += len(existing)
+                fresh = [a for a in chunk if (a["candidate_id"], a["question_id"]) not in existing]
+            report["imported"] += len(fresh) - (len(existing) if self.replace else 0)
+            if not dry_run and fresh:
+                self.store.insert_many(fresh, replace=self.replace)
+
+        try:
+            chunk: List[Dict[str, Any]] = []
+            for line_number, record, error in iter_jsonl(file_path):
+                report["total"] += 1
+                if error:
+                    reject(line_number, error)
+                    continue
+
+                answer, error = self.validate_record(record)
+                if error:
+                    reject(line_number, error, record)
+                    continue
+
+                key = (answer["candidate_id"], answer["question_id"])
+                if key in seen:
+                    reject(line_number, "Sama vastaus esiintyy tiedostossa useasti", record)
+                    continue
+                seen.add(key)
+
+                chunk.append(answer)
+                if len(chunk) >= self.chunk_size:
+                    flush(chunk)
+                    chunk = []
+            if chunk:
+                flush(chunk)
+        finally:
+            if rejects_out:
+                rejects_out.close()
+            if not dry_run and self._store is not None:
+                self.store.export_json()
+
+        elapsed = time.perf_counter() - started
+        report["elapsed_seconds"] = round(elapsed, 3)
+        report["records_per_second"] = round(report["total"] / elapsed) if elapsed > 0 else 0
+        report["timestamp"] = datetime.now().isoformat()
+        return report
@@ -2,6 +2,7 @@
 Päämanageri vastausten CRUD-toiminnoille.
 """
 import sys
+from datetime import datetime
 from pathlib import Path
 from typing import Tuple, Optional, List, Dict, Any
 import click
@@ -27,14 +28,6 @@ class AnswerManager(BaseAnswerManager):
                    explanation_fi: Optional[str] = None,
                    explanation_en: Optional[str] = None) -> Tuple[bool, Any]:
         """Lisää uusi vastaus."""
-        answers_data = self.load_answers()
-        
-        # Tarkista onko vastaus jo olemassa
-        for answer_dict in answers_data["answers"]:
-            if (answer_dict.get("candidate_id") == candidate_id and 
-                answer_dict.get("question_id") == question_id):
-                return False, "Ehdokkaalla on jo vastaus kysymykseen"
-        
         # Luo uusi vastaus
         new_answer = Answer.create_new(
             candidate_id=candidate_id,
@@ -43,28 +36,21 @@ class AnswerManager(BaseAnswerManager):
             confidence=confidence,
             explanation_fi=explanation_fi,
             explanation_en=explanation_en
-        )
+        ).to_dict()
         
-        # Lisää vastaus dataan
-        answers_data["answers"].append(new_answer.to_dict())
-        self.save_answers(answers_data)
+        # Pääavain (candidate_id, question_id) estää kaksoisvastaukset
+        with self.batch():
+            if not self.store.insert(new_answer):
+                return False, "Ehdokkaalla on jo vastaus kysymykseen"
         
-        return True, new_answer.to_dict()
+        return True, new_answer
     
     def remove_answer(self, candidate_id: str, question_id: str) -> Tuple[bool, str]:
         """Poista vastaus."""
-        answers_data = self.load_answers()
-        
-        initial_count = len(answers_data["answers"])
-        answers_data["answers"] = [
-            answer for answer in answers_data["answers"]
-            if not (answer.get("candidate_id") == candidate_id and 
-                   answer.get("question_id") == question_id)
-        ]
+        with self.batch():
+            removed_count = self.store.delete(candidate_id, question_id)
         
-        removed_count = initial_count - len(answers_data["answers"])
         if removed_count > 0:
-            self.save_answers(answers_data)
             return True, f"Poistettu {removed_count} vastaus"
         else:
             return False, "Vastausta ei löytynyt"
@@ -75,53 +61,44 @@ class AnswerManager(BaseAnswerManager):
                       explanation_fi: Optional[str] = None,
                       explanation_en: Optional[str] = None) -> Tuple[bool, str]:
         """Päivitä olemassa oleva vastaus."""
-        answers_data = self.load_answers()
-        updated = False
+        changes = {
+            field: new_value for field, new_value in (
+                ("value", value),
+                ("confidence", confidence),
+                ("explanation_fi", explanation_fi),
+                ("explanation_en", explanation_en),
+            ) if new_value is not None
+        }
         
-        for answer in answers_data["answers"]:
-            if (answer.get("candidate_id") == candidate_id and 
-                answer.get("question_id") == question_id):
-                
-                if value is not None:
-                    answer["value"] = value
-                    updated = True
-                if confidence is not None:
-                    answer["confidence"] = confidence
-                    updated = True
-                if explanation_fi is not None:
-                    answer["explanation_fi"] = explanation_fi
-                    updated = True
-                if explanation_en is not None:
-                    answer["explanation_en"] = explanation_en
-                    updated = True
-                
-                if updated:
-                    answer["updated_at"] = datetime.now().isoformat()
+        updated = None
+        if changes:
+            changes["updated_at"] = datetime.now().isoformat()
+            with self.batch():
+                updated = self.store.update(candidate_id, question_id, changes)
         
         if updated:
-            self.save_answers(answers_data)
             return True, "Vastaus päivitetty"
         else:
             return False, "Vastausta ei löytynyt tai ei muutoksia"
     
-    def list_answers(self, candidate_id: Optional[str] = None) -> List[Dict[str, Any]]:
+    def list_answers(self, candidate_id: Optional[str] = None,
+                     question_id: Optional[str] = None) -> List[Dict[str, Any]]:
         """Listaa vastaukset."""
-        answers_data = self.load_answers()
-        
+        if candidate_id and question_id:
+            answer = self.store.get(candidate_id, question_id)
+            return [answer] if answer else []
         if candidate_id:
-            answers = [a for a in answers_data["answers"] if a.get("candidate_id") == candidate_id]
-        else:
-            answers = answers_data["answers"]
-        
-        return answers
+            return self.store.by_candidate(candidate_id)
+        if question_id:
+            return self.store.by_question(question_id)
+        return self.store.all()
     
     def get_answer_stats(self) -> Dict[str, Any]:
         """Hae vastaustilastot."""
-        answers_data = self.load_answers()
-        answers = answers_data["answers"]
+        total_answers = self.store.count()
         
         # Ehdokkaat joilla on vastauksia
-        candidates_with_answers = set(a["candidate_id"] for a in answers)
+        candidates_with_answers = self.store.candidate_ids()
         
         # Lataa ehdokkaat yhteensä
         candidates_file = Path(self.data_path) / "candidates.json"
@@ -131,7 +108,7 @@ class AnswerManager(BaseAnswerManager):
             total_candidates = len(candidates_data.get("candidates", []))
         
         return {
-            "total_answers": len(answers),
+            "total_answers": total_answers,
             "candidates_with_answers": len(candidates_with_answers),
             "total_candidates": total_candidates,
             "answer_coverage": round((len(candidates_with_answers) / total_candidates * 100) if total_candidates > 0 else 0, 1)
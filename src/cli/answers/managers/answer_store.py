@@ -0,0 +1,305 @@
+"""
+Indeksoitu vastausvarasto (SQLite, WAL-tila).
+
+candidate_answers.json säilyy julkaistavana muotona (IPFS), mutta muokkaukset
+tehdään SQLite-tietokantaan, jossa on pääavain (candidate_id, question_id) sekä
+indeksit ehdokkaan ja kysymyksen mukaan. JSON viedään kerran transaktion
+(esim. koko CLI-komennon tai eräajon) lopussa eikä jokaisen vastauksen jälkeen.
+
+Jos JSON-tiedostoa on muokattu tietokannan ohi (git checkout, synkronointi),
+tietokanta rakennetaan siitä uudelleen seuraavalla avauksella.
+"""
+import json
+import sqlite3
+import sys
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+# Lisää src hakemisto Python-polkuun
+sys.path.insert(0, str(Path(__file__).parent.parent.parent.parent))
+
+from core.file_utils import read_json_file, write_json_file
+
+STORE_SUFFIX = ".db"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS answers (
+    seq INTEGER PRIMARY KEY,
+    candidate_id TEXT NOT NULL,
+    question_id TEXT NOT NULL,
+    value INTEGER,
+    confidence REAL,
+    record TEXT NOT NULL
+);
+CREATE UNIQUE INDEX IF NOT EXISTS idx_answers_key ON answers (candidate_id, question_id);
+CREATE INDEX IF NOT EXISTS idx_answers_question ON answers (question_id);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+_INSERT_SQL = ("INSERT INTO answers (candidate_id, question_id, value, confidence, record) "
+               "VALUES (?, ?, ?, ?, ?) ON CONFLICT (candidate_id, question_id) DO ")
+_INSERT_SKIP = _INSERT_SQL + "NOTHING"
+_INSERT_REPLACE = (_INSERT_SQL + "UPDATE SET value = excluded.value, "
+                   "confidence = excluded.confidence, record = excluded.record")
+
+
+def _row(answer: Dict[str, Any]) -> Tuple:
+    return (answer["candidate_id"], answer["question_id"], answer.get("value"),
+            answer.get("confidence"), json.dumps(answer, ensure_ascii=False))
+
+
+def _file_signature(path: Path) -> str:
+    """Tiedoston tunniste (mtime_ns:koko) ulkoisten muutosten havaitsemiseen"""
+    try:
+        stat = path.stat()
+    except FileNotFoundError:
+        return "missing"
+    return f"{stat.st_mtime_ns}:{stat.st_size}"
+
+
+class AnswerStore:
+    """Vastausten tallennus SQLite-tietokantaan JSON-viennillä"""
+
+    def __init__(self, answers_file: Path, db_file: Optional[Path] = None):
+        self.answers_file = Path(answers_file)
+        self.db_file = Path(db_file) if db_file else self.answers_file.with_suffix(STORE_SUFFIX)
+        self._conn: Optional[sqlite3.Connection] = None
+        self._depth = 0
+        self._extra: Dict[str, Any] = {}
+
+    # ------------------------------------------------------------------
+    # Yhteys ja transaktiot
+    # ------------------------------------------------------------------
+
+    @property
+    def conn(self) -> sqlite3.Connection:
+        """Avaa tietokanta ensimmäisellä käytöllä ja synkronoi JSON:n kanssa"""
+        if self._conn is None:
+            self.db_file.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(str(self.db_file), isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.executescript(_SCHEMA)
+            self._conn = conn
+            self._sync_from_json()
+        return self._conn
+
+    def close(self):
+        """Vie muutokset JSON:iin ja sulje yhteys"""
+        if self._conn is not None:
+            self.export_json()
+            self._conn.close()
+            self._conn = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    @contextmanager
+    def transaction(self):
+        """
+        Kirjoitustransaktio; sisäkkäiset kutsut liittyvät uloimpaan
+
+        Uloin taso commitoi (tai perui virheessä) kaikki muutokset kerralla.
+        """
+        conn = self.conn
+        if self._depth == 0:
+            conn.execute("BEGIN IMMEDIATE")
+        self._depth += 1
+        try:
+            yield self
+        except BaseException:
+            self._depth -= 1
+            if self._depth == 0:
+                conn.execute("ROLLBACK")
+            raise
+        self._depth -= 1
+        if self._depth == 0:
+            conn.execute("COMMIT")
+
+    @property
+    def in_transaction(self) -> bool:
+        """Onko kirjoitustransaktio auki"""
+        return self._depth > 0
+
+    def _get_meta(self, key: str) -> Optional[str]:
+        row = self.conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def _set_meta(self, key: str, value: str):
+        self.conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, value))
+
+    def _mark_dirty(self):
+        self._set_meta("dirty", "1")
+
+    @property
+    def dirty(self) -> bool:
+        """Onko tietokannassa JSON:iin viemättömiä muutoksia"""
+        return self._get_meta("dirty") == "1"
+
+    # ------------------------------------------------------------------
+    # JSON-synkronointi
+    # ------------------------------------------------------------------
+
+    def _sync_from_json(self):
+        """Rakenna tietokanta JSON:sta, jos tiedosto on muuttunut viime viennin jälkeen"""
+        extra = self._get_meta("extra")
+        self._extra = json.loads(extra) if extra else {}
+
+        signature = _file_signature(self.answers_file)
+        if signature == self._get_meta("json_signature"):
+            # Edellinen ajo kaatui ennen vientiä
+            if self.dirty:
+                self.export_json()
+            return
+
+        data = read_json_file(self.answers_file, {"answers": []})
+        answers = data.get("answers", []) if isinstance(data, dict) else []
+        self._extra = {k: v for k, v in data.items() if k != "answers"} if isinstance(data, dict) else {}
+
+        with self.transaction():
+            self._conn.execute("DELETE FROM answers")
+            self._conn.executemany(
+                _INSERT_SKIP,
+                (_row(a) for a in answers if a.get("candidate_id") and a.get("question_id"))
+            )
+            self._set_meta("extra", json.dumps(self._extra, ensure_ascii=False))
+            self._set_meta("json_signature", signature)
+            self._set_meta("dirty", "0")
+
+    def export_json(self, force: bool = False) -> bool:
+        """
+        Kirjoita vastaukset candidate_answers.json-tiedostoon lisäysjärjestyksessä
+
+        Returns:
+            True jos tiedosto kirjoitettiin
+        """
+        if not (force or self.dirty):
+            return False
+
+        write_json_file(self.answers_file, self.to_dict())
+
+        with self.transaction():
+            self._set_meta("json_signature", _file_signature(self.answers_file))
+            self._set_meta("dirty", "0")
+        return True
+
+    # ------------------------------------------------------------------
+    # Haut
+    # ------------------------------------------------------------------
+
+    def _records(self, sql: str, params: Tuple = ()) -> List[Dict[str, Any]]:
+        return [json.loads(row[0]) for row in self.conn.execute(sql, params)]
+
+    def get(self, candidate_id: str, question_id: str) -> Optional[Dict[str, Any]]:
+        """Hae yksittäinen vastaus pääavaimella"""
+        row = self.conn.execute(
+            "SELECT record FROM answers WHERE candidate_id = ? AND question_id = ?",
+            (candidate_id, question_id)
+        ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Koko sisältö candidate_answers.json-muodossa"""
+        data = {"answers": self.all()}
+        data.update(self._extra)
+        return data
+
+    def all(self) -> List[Dict[str, Any]]:
+        """Kaikki vastaukset lisäysjärjestyksessä"""
+        return self._records("SELECT record FROM answers ORDER BY seq")
+
+    def by_candidate(self, candidate_id: str) -> List[Dict[str, Any]]:
+        """Ehdokkaan vastaukset"""
+        return self._records("SELECT record FROM answers WHERE candidate_id = ? ORDER BY seq",
+                             (candidate_id,))
+
+    def by_question(self, question_id: str) -> List[Dict[str, Any]]:
+        """Kysymyksen vastaukset"""
+        return self._records("SELECT record FROM answers WHERE question_id = ? ORDER BY seq",
+                             (question_id,))
+
+    def count(self) -> int:
+        """Vastausten kokonaismäärä"""
+        return self.conn.execute("SELECT COUNT(*) FROM answers").fetchone()[0]
+
+    def candidate_ids(self) -> Set[str]:
+        """Ehdokkaat, joilla on vähintään yksi vastaus"""
+        return {row[0] for row in self.conn.execute("SELECT DISTINCT candidate_id FROM answers")}
+
+    def existing_keys(self, keys: Iterable[Tuple[str, str]]) -> Set[Tuple[str, str]]:
+        """Palauta annetuista (candidate_id, question_id) -avaimista jo tallennetut"""
+        # Pääavainhaut uudelleenkäytettävällä lauseella ovat nopeampia kuin suuri IN (VALUES ...) -lista
+        query = "SELECT 1 FROM answers WHERE candidate_id = ? AND question_id = ?"
+        execute = self.conn.execute
+        return {key for key in keys if execute(query, key).fetchone() is not None}
+
+    # ------------------------------------------------------------------
+    # Muokkaukset
+    # ------------------------------------------------------------------
+
+    def insert(self, answer: Dict[str, Any]) -> bool:
+        """Lisää vastaus; False jos avain on jo olemassa"""
+        return self.insert_many([answer]) == 1
+
+    def insert_many(self, answers: Iterable[Dict[str, Any]], replace: bool = False) -> int:
+        """
+        Lisää vastaukset yhdessä transaktiossa
+
+        Args:
+            replace: korvaa olemassa olevat vastaukset (muuten ne ohitetaan)
+
+        Returns:
+            Lisättyjen tai korvattujen rivien määrä
+        """
+        with self.transaction():
+            before = self.conn.total_changes
+            self.conn.executemany(_INSERT_REPLACE if replace else _INSERT_SKIP,
+                                  (_row(a) for a in answers))
+            changed = self.conn.total_changes - before
+            if changed:
+                self._mark_dirty()
+        return changed
+
+    def update(self, candidate_id: str, question_id: str,
+               changes: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Päivitä vastauksen kenttiä; palauttaa päivitetyn vastauksen tai None"""
+        with self.transaction():
+            answer = self.get(candidate_id, question_id)
+            if answer is None:
+                return None
+            answer.update(changes)
+            self.conn.execute(
+                "UPDATE answers SET value = ?, confidence = ?, record = ? "
+                "WHERE candidate_id = ? AND question_id = ?",
+                (answer.get("value"), answer.get("confidence"),
+                 json.dumps(answer, ensure_ascii=False), candidate_id, question_id)
+            )
+            self._mark_dirty()
+        return answer
+
+    def delete(self, candidate_id: str, question_id: str) -> int:
+        """Poista vastaus; palauttaa poistettujen määrän"""
+        with self.transaction():
+            removed = self.conn.execute(
+                "DELETE FROM answers WHERE candidate_id = ? AND question_id = ?",
+                (candidate_id, question_id)
+            ).rowcount
+            if removed:
+                self._mark_dirty()
+        return removed
+
+    def replace_all(self, data: Dict[str, Any]):
+        """Korvaa koko sisältö (yhteensopivuus save_answers-kutsulle)"""
+        self._extra = {k: v for k, v in data.items() if k != "answers"}
+        with self.transaction():
+            self.conn.execute("DELETE FROM answers")
+            self.conn.executemany(_INSERT_SKIP, (_row(a) for a in data.get("answers", [])))
+            self._set_meta("extra", json.dumps(self._extra, ensure_ascii=False))
+            self._mark_dirty()
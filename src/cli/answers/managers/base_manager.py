@@ -2,6 +2,7 @@
 Perusmanageri tiedostokäsittelylle.
 """
 import sys
+from contextlib import contextmanager
 from pathlib import Path
 from typing import Dict, Any
 
@@ -9,7 +10,9 @@ from typing import Dict, Any
 sys.path.insert(0, str(Path(__file__).parent.parent.parent.parent))
 
 from core import get_election_id, get_data_path
-from core.file_utils import read_json_file, write_json_file, ensure_directory
+from core.file_utils import ensure_directory
+
+from .answer_store import AnswerStore
 
 
 class BaseAnswerManager:
@@ -19,14 +22,38 @@ class BaseAnswerManager:
         self.election_id = election_id or get_election_id()
         self.data_path = get_data_path(self.election_id)
         self.answers_file = Path(self.data_path) / "candidate_answers.json"
+        self._store = None
+    
+    @property
+    def store(self) -> AnswerStore:
+        """Indeksoitu vastausvarasto (avataan ensimmäisellä käytöllä)."""
+        if self._store is None:
+            ensure_directory(self.answers_file.parent)
+            self._store = AnswerStore(self.answers_file)
+        return self._store
+    
+    @contextmanager
+    def batch(self):
+        """
+        Eräkirjoitus: kaikki muutokset yhdessä transaktiossa ja
+        JSON-vienti vasta uloimman erän lopussa.
+        """
+        with self.store.transaction():
+            yield self
+        if not self.store.in_transaction:
+            self.store.export_json()
+    
+    def close(self) -> None:
+        """Vie muutokset JSON:iin ja sulje varasto."""
+        if self._store is not None:
+            self._store.close()
+            self._store = None
     
     def load_answers(self) -> Dict[str, Any]:
-        """Lataa vastaukset JSON-tiedostosta."""
-        if not self.answers_file.exists():
-            return {"answers": []}
-        return read_json_file(self.answers_file)
+        """Lataa vastaukset varastosta JSON-muodossa."""
+        return self.store.to_dict()
     
     def save_answers(self, answers_data: Dict[str, Any]) -> None:
-        """Tallenna vastaukset JSON-tiedostoon."""
-        ensure_directory(self.answers_file.parent)
-        write_json_file(self.answers_file, answers_data)
+        """Korvaa vastaukset ja vie ne JSON-tiedostoon."""
+        with self.batch():
+            self.store.replace_all(answers_data)
@@ -8,6 +8,7 @@ from pathlib import Path
 from datetime import datetime
 
 from src.core.file_utils import read_json_file, write_json_file, ensure_directory
+from src.core.data import get_document_cache
 
 class CandidateManager:
     """Core candidate data management functionality"""
@@ -32,7 +33,8 @@ class CandidateManager:
             return {"candidates": [], "metadata": {"last_updated": datetime.now().isoformat()}}
         
         try:
-            return read_json_file(candidates_file, {"candidates": [], "metadata": {}})
+            # Kopio, koska kutsujat muokkaavat ja tallentavat datan
+            return get_document_cache().load_copy(candidates_file, {"candidates": [], "metadata": {}})
         except Exception as e:
             print(f"❌ Virhe ladattaessa ehdokkaita: {e}")
             return {"candidates": [], "metadata": {}}
@@ -12,90 +12,83 @@ sys.path.insert(0, str(Path(__file__).parent.parent))
 from core import get_election_id, get_data_path
 from core.file_utils import read_json_file, write_json_file
 
+from core.elo_store import ELORatingStore, calculate_expected
+from core.elo_batch import recompute_ratings, METHODS
+
+# Yksityiskohtainen tuloste vain pienille kierrosmäärille
+AUTO_COMPARE_VERBOSE_LIMIT = 100
+
 # KORJATTU: Käytetään aina fallback ELOManageria
 class ELOManager:
     def __init__(self, election_id: str):
         self.election_id = election_id
         self.k_factor = 32
+        self._store = None
+    
+    @property
+    def store(self) -> ELORatingStore:
+        # KORJATTU: Käytä config-järjestelmän data-polkua
+        if self._store is None:
+            data_path = get_data_path(self.election_id or get_election_id())
+            questions_file = Path(data_path) / "questions.json"
+            self._store = ELORatingStore(questions_file, k_factor=self.k_factor)
+        return self._store
     
     def calculate_expected(self, rating_a: int, rating_b: int) -> float:
-        return 1 / (1 + 10 ** ((rating_b - rating_a) / 400))
+        return calculate_expected(rating_a, rating_b)
     
     def update_ratings(self, question_a_id: str, question_b_id: str, winner: str):
-        # KORJATTU: Käytä config-järjestelmän data-polkua
-        election_id = get_election_id()
-        data_path = get_data_path(election_id)
-        questions_file = Path(data_path) / "questions.json"
-        
-        data = read_json_file(questions_file)
-        
-        # KORJATTU: Etsi kysymykset id:n perusteella
-        q_a = next((q for q in data["questions"] if q.get("id") == question_a_id), None)
-        q_b = next((q for q in data["questions"] if q.get("id") == question_b_id), None)
-        
-        if not q_a or not q_b:
-            raise ValueError(f"Kysymyksiä ei löydy: {question_a_id} tai {question_b_id}")
-        
-        # KORJATTU: elo_rating on kokonaisluku, ei dictionary
-        rating_a = q_a["elo_rating"]  # Suoraan kokonaisluku
-        rating_b = q_b["elo_rating"]  # Suoraan kokonaisluku
-        
-        expected_a = self.calculate_expected(rating_a, rating_b)
-        expected_b = self.calculate_expected(rating_b, rating_a)
-        
-        if winner == "a":
-            actual_a, actual_b = 1.0, 0.0
-        elif winner == "b":
-            actual_a, actual_b = 0.0, 1.0
-        else:
-            actual_a, actual_b = 0.5, 0.5
-        
-        new_rating_a = rating_a + self.k_factor * (actual_a - expected_a)
-        new_rating_b = rating_b + self.k_factor * (actual_b - expected_b)
-        
-        # KORJATTU: Päivitä suoraan kokonaislukuna
-        q_a["elo_rating"] = int(new_rating_a)
-        q_b["elo_rating"] = int(new_rating_b)
-        
-        write_json_file(questions_file, data)
-        
-        return {
-            "question_a": {"old": rating_a, "new": new_rating_a, "delta": new_rating_a - rating_a},
-            "question_b": {"old": rating_b, "new": new_rating_b, "delta": new_rating_b - rating_b}
-        }
+        # Päivitys muistissa + lokirivi; questions.json kirjoitetaan snapshotina
+        return self.store.record_comparison(question_a_id, question_b_id, winner)
+    
+    def close(self):
+        if self._store is not None:
+            self._store.close()
 
 def auto_compare(election_id: str, rounds: int):
     """Suorita automaattinen ELO-vertailu ilman käyttäjän syötettä"""
     elo_manager = ELOManager(election_id)
     
-    # KORJATTU: Käytä config-järjestelmän data-polkua
-    data_path = get_data_path(election_id)
-    questions_file = Path(data_path) / "questions.json"
-    
-    data = read_json_file(questions_file)
+    try:
+        questions = elo_manager.store.load().questions()
+    except Exception as e:
+        click.echo(f"❌ Kysymysten lataus epäonnistui: {e}")
+        return
     
-    if len(data["questions"]) < 2:
+    if len(questions) < 2:
         click.echo("❌ Tarvitaan vähintään 2 kysymystä automaattiseen vertailuun")
         return
     
+    verbose = rounds <= AUTO_COMPARE_VERBOSE_LIMIT
+    progress_step = max(1, rounds // 10)
+    
     click.echo(f"🤖 SUORITETAAN {rounds} AUTOMAATTISTA VERTAILUA...")
     click.echo("-" * 50)
     
-    for i in range(rounds):
-        # Valitse kaksi satunnaista kysymystä
-        q1, q2 = random.sample(data["questions"], 2)
-        
-        # Simuloi satunnainen tulos: 45% q1 voittaa, 45% q2 voittaa, 10% tasapeli
-        rand = random.random()
-        if rand < 0.45:
-            winner = "a"
-        elif rand < 0.90:
-            winner = "b"
-        else:
-            winner = "t"
-        
-        try:
-            result = elo_manager.update_ratings(q1["id"], q2["id"], winner)
+    try:
+        for i in range(rounds):
+            # Valitse kaksi satunnaista kysymystä
+            q1, q2 = random.sample(questions, 2)
+            
+            # Simuloi satunnainen tulos: 45% q1 voittaa, 45% q2 voittaa, 10% tasapeli
+            rand = random.random()
+            if rand < 0.45:
+                winner = "a"
+            elif rand < 0.90:
+                winner = "b"
+            else:
+                winner = "t"
+            
+            try:
+                result = elo_manager.update_ratings(q1["id"], q2["id"], winner)
+            except Exception as e:
+                click.echo(f"{i+1:2d}. ❌ Virhe ELO-päivityksessä: {e}")
+                continue
+            
+            if not verbose:
+                if (i + 1) % progress_step == 0:
+                    click.echo(f"   ... {i+1}/{rounds} vertailua")
+                continue
             
             winner_text = {"a": "A", "b": "B", "t": "TASAPELI"}[winner]
             # KORJATTU: Käytä oikeaa kysymyskenttää
@@ -108,13 +101,40 @@ def auto_compare(election_id: str, rounds: int):
             click.echo(f"{i+1:2d}. {winner_text} | {question_a_text} vs {question_b_text}")
             click.echo(f"      A: {result['question_a']['old']} → {result['question_a']['new']} ({result['question_a']['delta']:+.0f})")
             click.echo(f"      B: {result['question_b']['old']} → {result['question_b']['new']} ({result['question_b']['delta']:+.0f})")
-        
-        except Exception as e:
-            click.echo(f"{i+1:2d}. ❌ Virhe ELO-päivityksessä: {e}")
-            continue
+    finally:
+        elo_manager.close()
     
     click.echo(f"\n✅ {rounds} automaattista ELO-vertailua suoritettu!")
 
+def recompute_history(election_id: str, method: str, k_factor: float, exclude_seqs, apply: bool):
+    """Laske luokitukset uudelleen koko vertailuhistoriasta ajamatta vertailuja uudelleen"""
+    data_path = get_data_path(election_id)
+    questions_file = Path(data_path) / "questions.json"
+    
+    try:
+        summary = recompute_ratings(questions_file, method=method, k_factor=k_factor,
+                                    exclude_seqs=exclude_seqs, apply=apply)
+    except Exception as e:
+        click.echo(f"❌ Uudelleenlaskenta epäonnistui: {e}")
+        return
+    
+    click.echo(f"🔁 UUDELLEENLASKENTA ({summary['method']}): {summary['comparisons']} vertailua")
+    if summary["excluded"]:
+        click.echo(f"   Poissuljetut vertailut: {', '.join(str(s) for s in summary['excluded'])}")
+    if not summary["complete"]:
+        click.echo("⚠️  Vertailuloki ei ala alusta - aiemmat vertailut puuttuvat tuloksesta")
+    click.echo("-" * 50)
+    
+    ranked = sorted(summary["ratings"].items(), key=lambda item: item[1]["new"], reverse=True)
+    for question_id, change in ranked:
+        delta = change["new"] - change["old"]
+        click.echo(f"   {question_id}: {change['old']} → {change['new']} ({delta:+d})")
+    
+    if apply:
+        click.echo("\n✅ Uudet luokitukset tallennettu")
+    else:
+        click.echo("\nℹ️  Esikatselu - tallenna käyttämällä --apply")
+
 def get_questions_data(election_id=None):
     """Hae kysymysten data config-järjestelmän kautta"""
     try:
@@ -137,7 +157,11 @@ def get_questions_data(election_id=None):
 @click.option('--election', help='Vaalin tunniste (valinnainen, käytetään configista)')
 @click.option('--auto', type=int, help='Automaattisten vertailukierrosten määrä (esim. 5)')
 @click.option('--choice', help='Valinta (a/b/t) - jos annettu, ei kysy interaktiivisesti')
-def compare_questions(election, auto, choice):
+@click.option('--recompute', type=click.Choice(METHODS), help='Laske luokitukset uudelleen vertailuhistoriasta')
+@click.option('--k-factor', type=float, help='Uusi K-kerroin uudelleenlaskentaan (elo)')
+@click.option('--exclude-seq', type=int, multiple=True, help='Kiistetyn vertailun järjestysnumero (voi toistaa)')
+@click.option('--apply', is_flag=True, help='Tallenna uudelleenlasketut luokitukset')
+def compare_questions(election, auto, choice, recompute, k_factor, exclude_seq, apply):
     """Vertaa kysymyksiä ELO-järjestelmällä (interaktiivisesti tai automaattisesti)"""
     
     # KORJATTU: Käytä config-järjestelmää
@@ -149,6 +173,10 @@ def compare_questions(election, auto, choice):
     
     click.echo(f"🎯 ELO-vertailu vaalille: {election_id}")
     
+    if recompute:
+        recompute_history(election_id, recompute, k_factor, exclude_seq, apply)
+        return
+    
     if auto is not None:
         if auto <= 0:
             click.echo("❌ --auto arvon tulee olla positiivinen kokonaisluku")
@@ -192,6 +220,7 @@ def compare_questions(election, auto, choice):
     elo_manager = ELOManager(election_id)
     try:
         result = elo_manager.update_ratings(q1["id"], q2["id"], user_choice)
+        elo_manager.close()
         
         click.echo("\n✅ Luokitukset päivitetty!")
         click.echo(f"📊 A: {result['question_a']['old']} → {result['question_a']['new']} ({result['question_a']['delta']:+.0f})")
@@ -26,8 +26,8 @@ def elo_admin():
 @click.option('--election', required=True, help='Vaalin tunniste')
 def stats(election):
     """Näytä ELO-tilastot"""
-    elo = ELOManager(election)
-    stats = elo.get_question_stats()
+    with ELOManager(election) as elo:
+        stats = elo.get_question_stats()
     
     click.echo("📊 ELO-LUOKITUSTILASTOT")
     click.echo("=" * 50)
@@ -46,8 +46,8 @@ def stats(election):
 @click.option('--election', required=True, help='Vaalin tunniste')
 def leaderboard(election):
     """Näytä ranking-lista"""
-    elo = ELOManager(election)
-    leaderboard = elo.get_leaderboard()
+    with ELOManager(election) as elo:
+        leaderboard = elo.get_leaderboard()
     
     click.echo("🏆 ELO-RANKINGLISTA")
     click.echo("=" * 50)
@@ -61,8 +61,8 @@ def leaderboard(election):
 @click.confirmation_option(prompt='Haluatko varmasti nollata kaikki ELO-luokitukset?')
 def reset(election):
     """Nollaa kaikki ELO-luokitukset"""
-    elo = ELOManager(election)
-    count = elo.reset_ratings()
+    with ELOManager(election) as elo:
+        count = elo.reset_ratings()
     
     click.echo(f"✅ ELO-luokitukset nollattu {count} kysymykselle")
     click.echo("📊 Kaikki kysymykset palautettu 1000 pisteen luokitukseen")
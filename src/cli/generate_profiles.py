@@ -13,25 +13,17 @@ import sys
 project_root = Path(__file__).parent.parent.parent
 sys.path.insert(0, str(project_root))
 
+from src.core.data import get_repository
+
 
 
 def load_parties() -> List[Dict]:
-    """Lataa puolueet JSON-tiedostosta"""
-    parties_file = Path("data/runtime/parties.json")
-    if parties_file.exists():
-        with open(parties_file, 'r', encoding='utf-8') as f:
-            data = json.load(f)
-            return data.get("parties", [])
-    return []
+    """Lataa puolueet JSON-tiedostosta (jaettu välimuisti)"""
+    return get_repository().parties()
 
 def load_candidates() -> List[Dict]:
-    """Lataa ehdokkaat JSON-tiedostosta"""
-    candidates_file = Path("data/runtime/candidates.json")
-    if candidates_file.exists():
-        with open(candidates_file, 'r', encoding='utf-8') as f:
-            data = json.load(f)
-            return data.get("candidates", [])
-    return []
+    """Lataa ehdokkaat JSON-tiedostosta (jaettu välimuisti)"""
+    return get_repository().candidates()
 
 def load_theme(theme_name: str) -> Optional[Dict]:
     """Lataa väriteema"""
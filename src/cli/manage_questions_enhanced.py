@@ -4,6 +4,7 @@ Parannettu kysymysten hallinta duplikaattitarkistuksella
 """
 import sys
 import json
+import time
 import click
 from pathlib import Path
 
@@ -205,5 +206,46 @@ def check_duplicates(check_all):
     else:
         print(f"🚨 LÖYDETTY {duplicates_found} DUPLIKAATTIA")
 
+@cli.command()
+@click.option('--similarity-threshold', default=0.7, help='Samankaltaisuusraja (0.0-1.0)')
+@click.option('--json-output', is_flag=True, help='Tulosta klusterit JSON-muodossa')
+def cluster_new(similarity_threshold, json_output):
+    """Ryhmittele koko new_questions.json -jonon lähes-duplikaatit kerralla"""
+    
+    current_election = get_current_election()
+    
+    if not current_election:
+        print("❌ EI AKTIIVISTA VAAILIA")
+        return
+    
+    checker = QuestionDuplicateChecker(current_election, verbose=False)
+    started = time.perf_counter()
+    report = checker.cluster_new_questions(threshold=similarity_threshold)
+    elapsed = time.perf_counter() - started
+    
+    if json_output:
+        print(json.dumps(report, ensure_ascii=False, indent=2))
+        return
+    
+    print(f"🔍 UUSIEN KYSYMYSTEN KLUSTEROINTI - {current_election}")
+    print("=" * 60)
+    print(f"📊 Odottavia kysymyksiä: {report['total_pending']}")
+    
+    for i, cluster in enumerate(report['clusters'], 1):
+        representative = cluster['representative']
+        source = "hyväksytty " + representative['id'] if representative['source'] == 'accepted' else "uusi"
+        print(f"{i}. 🧩 Klusteri ({len(cluster['members'])} uutta, max {int(cluster['max_similarity'] * 100)}%)")
+        print(f"   ⭐ Edustaja ({source}): {representative['question_fi']}")
+        for member in cluster['members']:
+            print(f"   - [{member['queue_index'] + 1}] {member['question_fi']}")
+        for match in cluster['accepted_matches'][1:]:
+            print(f"   ≈ {match['id']} ({int(match['similarity'] * 100)}%): {match['question_fi']}")
+        print("   " + "-" * 40)
+    
+    print(f"🧩 Klustereita: {len(report['clusters'])}")
+    print(f"🚨 Hyväksyttyjen kysymysten duplikaatteja: {report['duplicates_of_accepted']}")
+    print(f"✅ Uniikkeja kysymyksiä: {report['unique_questions']}")
+    print(f"⏱️  Kesto: {elapsed:.2f} s")
+
 if __name__ == '__main__':
     cli()
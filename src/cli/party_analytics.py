@@ -19,8 +19,10 @@ from typing import Dict
 # KORJATTU: Käytetään yhteisiä file_utils-funktioita
 try:
     from core.file_utils import read_json_file
+    from core.data import read_json_cached
 except ImportError:
     from core.file_utils import read_json_file
+    from core.data import read_json_cached
 
 class PartyAnalytics:
     """Puolueiden tilastot ja analytiikka"""
@@ -37,7 +39,7 @@ class PartyAnalytics:
             return False
         
         try:
-            data = read_json_file(self.parties_file, {"parties": []})
+            data = read_json_cached(self.parties_file, {"parties": []})
         except Exception as e:
             click.echo(f"❌ Puoluerekisterin lukuvirhe: {e}")
             return False
@@ -1,11 +1,16 @@
 #!/usr/bin/env python3
 """
 Julkaise vaalikonfiguraatiot IPFS:ään
+
+Julkaisu etenee lehdistä juureen: vaalin datatiedostot, vaalin asetukset
+ja lopuksi vaalilista. Jokaiseen viittaukseen kirjoitetaan julkaistun
+dokumentin CID ja sha256 (data_sources[*].sha256, config_sha256), joita
+vasten worker node tarkistaa haetut tiedostot ennen asennusta.
 """
 import json
 import click
 from pathlib import Path
-from typing import Dict
+from typing import Dict, Tuple
 import sys
 import os
 
@@ -15,7 +20,7 @@ project_root = current_dir.parent.parent  # src/cli/ -> src/ -> project root
 sys.path.insert(0, str(project_root))
 
 try:
-    from core.ipfs_client import IPFSClient
+    from src.core.ipfs_client import IPFSClient
     print("✅ IPFS-client ladattu onnistuneesti")
 except ImportError as e:
     print(f"❌ Import error: {e}")
@@ -24,6 +29,65 @@ except ImportError as e:
     print(f"💡 Python path: {sys.path}")
     sys.exit(1)
 
+
+def _read_json(path: Path) -> Dict:
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def publish_election(client, election_id: str, election_config: Dict,
+                     elections_path: Path = Path("data/elections")) -> Tuple[str, str]:
+    """
+    Julkaise vaalin paikalliset datatiedostot ja asetukset
+
+    Data-lähteet, joiden tiedosto löytyy hakemistosta elections_path/<vaali>,
+    julkaistaan ja niiden cid ja sha256 päivitetään asetuksiin.
+
+    Returns:
+        Asetusdokumentin (CID, sha256)
+    """
+    for source_name, data_source in election_config.get('data_sources', {}).items():
+        data_file = elections_path / election_id / data_source.get('filename', '')
+        if not data_file.is_file():
+            print(f"⚠️ Datatiedostoa ei löydy, viittaus jätetään ennalleen: {data_file}")
+            continue
+        cid, digest = client.publish_document(f"{election_id}_{source_name}", _read_json(data_file))
+        data_source['cid'] = cid
+        data_source['sha256'] = digest
+
+    return client.publish_document(f"config_{election_id}", election_config)
+
+
+def publish_registry(client, registry: Dict, config_dir: Path = Path("config"),
+                     elections_path: Path = Path("data/elections")) -> Dict[str, Tuple[str, str]]:
+    """
+    Julkaise vaalilistan vaalit ja lopuksi itse vaalilista
+
+    Jokaisen vaalin asetukset luetaan tiedostosta config_dir/election_<vaali>.json,
+    ja vaalilistan config_cid ja config_sha256 päivitetään julkaistuiksi.
+
+    Returns:
+        nimi -> (CID, sha256); vaalilista avaimella "election_registry"
+    """
+    published = {}
+    for election_id, entry in registry.get('elections', {}).items():
+        config_file = config_dir / f"election_{election_id}.json"
+        if not config_file.exists():
+            print(f"⚠️ Vaalin {election_id} asetuksia ei löydy: {config_file}")
+            continue
+        try:
+            cid, digest = publish_election(client, election_id, _read_json(config_file), elections_path)
+        except Exception as e:
+            print(f"❌ {election_id} julkaisu epäonnistui: {e}")
+            continue
+        entry['config_cid'] = cid
+        entry['config_sha256'] = digest
+        published[election_id] = (cid, digest)
+
+    published["election_registry"] = client.publish_document("config_election_registry", registry)
+    return published
+
+
 @click.group()
 def config_publisher():
     """Vaalikonfiguraatioiden julkaisutyökalu IPFS:ään"""
@@ -35,51 +99,49 @@ def publish_all():
     print("🚀 Aloitetaan konfiguraatioiden julkaisu IPFS:ään...")
     client = IPFSClient.get_client("config_publisher")
     
-    config_files = {
-        "worker_config": "config/worker_config.json",
-        "election_registry": "config/election_registry.json", 
-        "jumaltenvaalit2026": "config/election_jumaltenvaalit2026.json"
-    }
+    published = {}
     
-    published_cids = {}
+    worker_config = Path("config/worker_config.json")
+    registry_file = Path("config/election_registry.json")
+    try:
+        if worker_config.exists():
+            print("📤 Julkaistaan worker_config IPFS:ään...")
+            published["worker_config"] = client.publish_document("config_worker_config",
+                                                                 _read_json(worker_config))
+        else:
+            print(f"⚠️ Tiedostoa ei löydy: {worker_config}")
     
-    for config_name, config_path in config_files.items():
-        config_file = Path(config_path)
-        if config_file.exists():
-            try:
-                print(f"📖 Luetaan {config_name}...")
-                with open(config_file, 'r', encoding='utf-8') as f:
-                    config_data = json.load(f)
-                
-                print(f"📤 Julkaistaan {config_name} IPFS:ään...")
-                # Julkaise IPFS:ään
-                cid = client.publish_election_data(f"config_{config_name}", config_data)
-                published_cids[config_name] = cid
-                print(f"✅ {config_name} julkaistu: {cid}")
-                
-            except Exception as e:
-                print(f"❌ {config_name} julkaisu epäonnistui: {e}")
-                import traceback
-                traceback.print_exc()
+        if registry_file.exists():
+            print("📤 Julkaistaan vaalit ja vaalilista IPFS:ään...")
+            published.update(publish_registry(client, _read_json(registry_file)))
         else:
-            print(f"⚠️ Tiedostoa ei löydy: {config_path}")
+            print(f"⚠️ Tiedostoa ei löydy: {registry_file}")
+    except Exception as e:
+        print(f"❌ Julkaisu epäonnistui: {e}")
+        import traceback
+        traceback.print_exc()
     
-    # Tallenna CID:t tiedostoon
-    if published_cids:
+    # Tallenna CID:t ja tiivisteet tiedostoihin
+    if published:
         cid_file = Path("config/published_cids.json")
+        hash_file = Path("config/published_hashes.json")
         cid_file.parent.mkdir(exist_ok=True)
         
         with open(cid_file, 'w', encoding='utf-8') as f:
-            json.dump(published_cids, f, indent=2, ensure_ascii=False)
+            json.dump({name: cid for name, (cid, _) in published.items()}, f, indent=2, ensure_ascii=False)
+        with open(hash_file, 'w', encoding='utf-8') as f:
+            json.dump({name: digest for name, (_, digest) in published.items()}, f, indent=2, ensure_ascii=False)
         
         print(f"📄 CID:t tallennettu: {cid_file}")
+        print(f"📄 Tiivisteet tallennettu: {hash_file}")
         
         # Näytä käyttöohjeet
         print("\n🎯 KÄYTTÖOHJEET:")
-        registry_cid = published_cids.get('election_registry', 'REPLACE_WITH_ACTUAL_CID')
+        registry_cid, registry_sha256 = published.get('election_registry', ('REPLACE_WITH_ACTUAL_CID', ''))
         print(f"1. Worker node voi nyt ladata konfiguraatiot:")
         print(f"   python src/nodes/worker/election_installer.py --list --registry {registry_cid}")
-        print("   python src/nodes/worker/election_installer.py --install jumaltenvaalit2026")
+        print(f"   python src/nodes/worker/election_installer.py --install-all --registry {registry_cid} "
+              f"--registry-sha256 {registry_sha256}")
     else:
         print("❌ Yhtään konfiguraatiota ei julkaistu")
 
@@ -0,0 +1,11 @@
+"""
+Jaettu datakerros: välimuistitetut JSON-dokumentit ja tyypitetyt accessorit
+"""
+from .repository import (
+    DataRepository, JSONDocumentCache, get_document_cache, get_repository,
+    get_candidate_id, get_question_id, get_question_text, load_question_texts, read_json_cached
+)
+
+__all__ = ['DataRepository', 'JSONDocumentCache', 'get_document_cache', 'get_repository',
+           'get_candidate_id', 'get_question_id', 'get_question_text', 'load_question_texts',
+           'read_json_cached']
@@ -0,0 +1,245 @@
+#!/usr/bin/env python3
+"""
+Jaettu välimuistitettu datakerros data/runtime- ja data/elections-tiedostoille
+
+Jäsennetyt JSON-dokumentit pidetään LRU-välimuistissa avaimella
+(polku, inode, mtime, koko), joten yksi CLI-ajo tai pitkäkestoinen solmu
+jäsentää kunkin tiedoston vain kerran niin kauan kuin se ei muutu.
+Välimuistista palautetut dokumentit ovat jaettuja: niitä ei saa muokata
+(käytä load_copy-kutsua, jos dataa muutetaan ja tallennetaan).
+"""
+import copy
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from ..file_utils import read_json_file, add_write_listener
+
+DEFAULT_MAX_ENTRIES = 64
+
+_MISSING = object()
+
+
+def _signature(path: Path) -> Optional[Tuple[int, int, int]]:
+    """Tiedoston versio (inode, mtime_ns, koko) tai None jos tiedostoa ei ole"""
+    try:
+        stat = path.stat()
+    except OSError:
+        return None
+    return (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+
+
+class _Entry:
+    __slots__ = ("signature", "document", "derived")
+
+    def __init__(self, signature, document):
+        self.signature = signature
+        self.document = document
+        self.derived: Dict[Any, Any] = {}
+
+
+class JSONDocumentCache:
+    """Jäsennettyjen JSON-tiedostojen LRU-välimuisti"""
+
+    def __init__(self, max_entries: int = DEFAULT_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, _Entry]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def _key(path) -> str:
+        return str(Path(path).resolve())
+
+    def _entry(self, path, default: Any = _MISSING) -> Optional[_Entry]:
+        path = Path(path)
+        key = self._key(path)
+        signature = _signature(path)
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and signature is not None and entry.signature == signature:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry
+
+        if signature is None:
+            self.invalidate(path)
+            if default is _MISSING:
+                # read_json_file nostaa ElectionSystemErrorin
+                read_json_file(path)
+            return None
+
+        # Jäsennys lukon ulkopuolella; rinnakkainen lataus tuottaa saman tuloksen
+        entry = _Entry(signature, read_json_file(path))
+        with self._lock:
+            self.misses += 1
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return entry
+
+    def load(self, path, default: Any = _MISSING) -> Any:
+        """
+        Lataa dokumentti välimuistista (jaettu, vain luku)
+
+        Args:
+            default: palautetaan jos tiedostoa ei ole (muuten ElectionSystemError)
+        """
+        entry = self._entry(path, default)
+        return default if entry is None else entry.document
+
+    def load_copy(self, path, default: Any = _MISSING) -> Any:
+        """Lataa dokumentista muokattava kopio"""
+        return copy.deepcopy(self.load(path, default))
+
+    def derive(self, path, name: str, builder: Callable[[Any], Any], default: Any = _MISSING) -> Any:
+        """
+        Laske dokumentista johdettu rakenne (esim. ID -> teksti) kerran per versio
+
+        Args:
+            name: johdetun rakenteen tunniste
+            builder: funktio dokumentista rakenteeseen
+        """
+        entry = self._entry(path, default)
+        if entry is None:
+            return default
+        value = entry.derived.get(name, _MISSING)
+        if value is _MISSING:
+            value = builder(entry.document)
+            entry.derived[name] = value
+        return value
+
+    def invalidate(self, path=None):
+        """Poista yksi tiedosto (tai kaikki) välimuistista"""
+        with self._lock:
+            if path is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(self._key(path), None)
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, path) -> bool:
+        return self._key(path) in self._entries
+
+
+_default_cache = JSONDocumentCache()
+add_write_listener(_default_cache.invalidate)
+
+
+def get_document_cache() -> JSONDocumentCache:
+    """Prosessin yhteinen dokumenttivälimuisti"""
+    return _default_cache
+
+
+def read_json_cached(file_path, default: Any = None) -> Any:
+    """
+    read_json_file-yhteensopiva luku jaetusta välimuistista (vain luku)
+
+    Kuten read_json_file, puuttuva tiedosto nostaa virheen jos default on None.
+    """
+    return _default_cache.load(file_path, _MISSING if default is None else default)
+
+
+def load_question_texts(questions_file, lang: str = "fi",
+                        cache: Optional[JSONDocumentCache] = None) -> Dict[str, str]:
+    """Kysymysten ID -> teksti -hakemisto (lasketaan kerran per tiedostoversio)"""
+    def build(data):
+        texts = {}
+        for question in data.get("questions", []):
+            question_id = get_question_id(question)
+            if question_id:
+                texts[question_id] = get_question_text(question, lang) or question_id
+        return texts
+    return (cache or _default_cache).derive(questions_file, f"question_texts:{lang}", build, {})
+
+
+def get_question_id(question: Dict) -> Optional[str]:
+    """Kysymyksen tunniste (vaalidatan 'id' tai runtime-datan 'local_id')"""
+    return question.get("id") or question.get("local_id")
+
+
+def get_question_text(question: Dict, lang: str = "fi") -> Optional[str]:
+    """Kysymyksen teksti kummastakin tallennusmuodosta"""
+    text = question.get(f"question_{lang}")
+    if text is None:
+        text = question.get("content", {}).get("question", {}).get(lang)
+    return text
+
+
+def get_candidate_id(candidate: Dict) -> Optional[str]:
+    """Ehdokkaan tunniste (vaalidatan 'id' tai runtime-datan 'candidate_id')"""
+    return candidate.get("id") or candidate.get("candidate_id")
+
+
+class DataRepository:
+    """Tyypitetyt lukuaccessorit yhden datahakemiston JSON-tiedostoille"""
+
+    def __init__(self, data_dir="data/runtime", cache: Optional[JSONDocumentCache] = None):
+        self.data_dir = Path(data_dir)
+        self.cache = cache or _default_cache
+
+    @classmethod
+    def for_election(cls, election_id: str, cache: Optional[JSONDocumentCache] = None) -> "DataRepository":
+        """Repository data/elections/<vaali>-hakemistolle"""
+        try:
+            from src.core import get_data_path
+        except ImportError:
+            from core import get_data_path
+        return cls(get_data_path(election_id), cache)
+
+    def path(self, filename: str) -> Path:
+        return self.data_dir / filename
+
+    def document(self, filename: str, default: Any = None) -> Any:
+        """Koko dokumentti (jaettu, vain luku)"""
+        return self.cache.load(self.path(filename), default)
+
+    def document_copy(self, filename: str, default: Any = None) -> Any:
+        """Muokattava kopio dokumentista"""
+        return self.cache.load_copy(self.path(filename), default)
+
+    def _list(self, filename: str, key: str) -> List[Dict]:
+        return self.document(filename, {}).get(key, [])
+
+    def questions(self) -> List[Dict]:
+        return self._list("questions.json", "questions")
+
+    def candidates(self) -> List[Dict]:
+        return self._list("candidates.json", "candidates")
+
+    def parties(self) -> List[Dict]:
+        return self._list("parties.json", "parties")
+
+    def answers(self) -> List[Dict]:
+        return self._list("candidate_answers.json", "answers")
+
+    def meta(self) -> Dict:
+        return self.document("meta.json", {})
+
+    def question_texts(self, lang: str = "fi") -> Dict[str, str]:
+        """Kysymysten ID -> teksti -hakemisto"""
+        return load_question_texts(self.path("questions.json"), lang, self.cache)
+
+    def candidates_by_id(self) -> Dict[str, Dict]:
+        """Ehdokkaat tunnisteen mukaan"""
+        def build(data):
+            return {get_candidate_id(c): c for c in data.get("candidates", []) if get_candidate_id(c)}
+        return self.cache.derive(self.path("candidates.json"), "candidates_by_id", build, {})
+
+
+_repositories: Dict[str, DataRepository] = {}
+
+
+def get_repository(data_dir="data/runtime") -> DataRepository:
+    """Jaettu repository hakemistolle (oletus data/runtime)"""
+    key = str(data_dir)
+    repository = _repositories.get(key)
+    if repository is None:
+        repository = _repositories[key] = DataRepository(data_dir)
+    return repository
@@ -0,0 +1,237 @@
+#!/usr/bin/env python3
+"""
+ELO-luokitusten eräuudelleenlaskenta koko vertailuhistoriasta
+
+Vertailuloki (elo_comparisons.jsonl) luetaan NumPy-taulukoiksi (a, b, tulos),
+ja kaikkien kysymysten luokitukset lasketaan yhdellä läpikäynnillä joko
+perinteisellä peräkkäisellä ELO-päivityksellä (esim. uudella K-kertoimella)
+tai sovittamalla Bradley–Terry-malli koko historiaan iteratiivisesti.
+
+ELO-toisto alkaa lokin alkua edeltävistä luokituksista (base_ratings_file).
+Uudelleenlaskentaa ei tallenneta, jos loki ei ala järjestysnumerosta 1,
+koska sitä edeltäneet vertailut puuttuisivat tuloksesta.
+"""
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+
+from .elo_store import (
+    COMPARISON_LOG_FILENAME, DEFAULT_K_FACTOR, DEFAULT_RATING, OUTCOMES,
+    base_ratings_file, calculate_expected, comparison_log_lock, get_question_id,
+    get_question_rating, iter_comparison_log, set_question_rating
+)
+from .file_utils import read_json_file, write_json_file
+from .error_handling import ElectionSystemError
+
+METHOD_ELO = "elo"
+METHOD_BRADLEY_TERRY = "bradley_terry"
+METHODS = (METHOD_ELO, METHOD_BRADLEY_TERRY)
+
+
+class ComparisonHistory:
+    """Vertailuhistoria taulukkomuodossa: indeksit a, b, tulos A:n näkökulmasta ja K"""
+
+    def __init__(self, question_ids: List[str], a, b, outcome, k, seq, first_seq: Optional[int] = None):
+        self.question_ids = list(question_ids)
+        self.a = np.asarray(a, dtype=np.int64)
+        self.b = np.asarray(b, dtype=np.int64)
+        self.outcome = np.asarray(outcome, dtype=np.float64)
+        self.k = np.asarray(k, dtype=np.float64)
+        self.seq = np.asarray(seq, dtype=np.int64)
+        # Lokin ensimmäinen järjestysnumero (myös ohitetut rivit); None = tyhjä loki
+        self.first_seq = first_seq
+
+    def __len__(self):
+        return int(self.a.shape[0])
+
+    @classmethod
+    def from_log(cls, log_file: Path, question_ids: Iterable[str],
+                 exclude_seqs: Iterable[int] = ()) -> "ComparisonHistory":
+        """
+        Lue vertailuloki taulukoiksi
+
+        Tuntemattomiin kysymyksiin viittaavat ja poissuljetut (kiistetyt)
+        vertailut ohitetaan.
+        """
+        question_ids = list(question_ids)
+        index = {qid: i for i, qid in enumerate(question_ids)}
+        excluded = set(int(s) for s in exclude_seqs)
+
+        a, b, outcome, k, seq = [], [], [], [], []
+        first_seq = None
+        for entry in iter_comparison_log(log_file):
+            entry_seq = int(entry.get("seq", 0))
+            first_seq = entry_seq if first_seq is None else min(first_seq, entry_seq)
+            if entry_seq in excluded:
+                continue
+            ia = index.get(entry.get("a"))
+            ib = index.get(entry.get("b"))
+            if ia is None or ib is None or ia == ib:
+                continue
+            a.append(ia)
+            b.append(ib)
+            outcome.append(OUTCOMES.get(entry.get("winner"), 0.5))
+            k.append(entry.get("k", DEFAULT_K_FACTOR))
+            seq.append(entry_seq)
+
+        return cls(question_ids, a, b, outcome, k, seq, first_seq)
+
+    def is_complete(self, snapshot_seq: int = 0) -> bool:
+        """Kattaako loki koko historian: alkaa seq 1:stä tai on tyhjä eikä snapshotissa ole vertailuja"""
+        if self.first_seq is None:
+            return snapshot_seq == 0
+        return self.first_seq == 1
+
+
+def replay_elo(history: ComparisonHistory, k_factor: Optional[float] = None,
+               initial_rating: float = DEFAULT_RATING, truncate: bool = True,
+               initial_ratings: Optional[Dict[str, float]] = None) -> np.ndarray:
+    """
+    Toista koko historia peräkkäisillä ELO-päivityksillä
+
+    Args:
+        k_factor: uusi K-kerroin kaikille vertailuille (oletus: lokiin tallennettu K)
+        truncate: pyöristä luokitukset alaspäin kuten ELORatingStore jokaisen vertailun jälkeen
+        initial_ratings: lähtöluokitukset tunnisteittain (puuttuville initial_rating)
+
+    Returns:
+        Luokitukset kysymysjärjestyksessä
+    """
+    initial_ratings = initial_ratings or {}
+    ratings = [float(initial_ratings.get(qid, initial_rating)) for qid in history.question_ids]
+    ks = [float(k_factor)] * len(history) if k_factor is not None else history.k.tolist()
+
+    # ELO on luonnostaan peräkkäinen; listat ovat tässä nopeampia kuin skalaari-indeksointi
+    for ia, ib, actual_a, k in zip(history.a.tolist(), history.b.tolist(), history.outcome.tolist(), ks):
+        rating_a = ratings[ia]
+        rating_b = ratings[ib]
+        new_a = rating_a + k * (actual_a - calculate_expected(rating_a, rating_b))
+        new_b = rating_b + k * ((1.0 - actual_a) - calculate_expected(rating_b, rating_a))
+        if truncate:
+            new_a, new_b = float(int(new_a)), float(int(new_b))
+        ratings[ia] = new_a
+        ratings[ib] = new_b
+
+    return np.asarray(ratings, dtype=np.float64)
+
+
+def fit_bradley_terry(history: ComparisonHistory, base_rating: float = DEFAULT_RATING,
+                      prior_games: float = 1.0, max_iterations: int = 1000,
+                      tolerance: float = 1e-6) -> np.ndarray:
+    """
+    Sovita Bradley–Terry-malli koko historiaan (MM-algoritmi)
+
+    Tasapeli lasketaan puoleksi voitoksi kummallekin. prior_games lisää jokaiselle
+    kysymykselle virtuaalisen tasapelin keskivahvaa vastustajaa vastaan, jotta
+    pelkkiä voittoja tai tappioita saaneiden vahvuus pysyy äärellisenä.
+
+    Returns:
+        Luokitukset ELO-asteikolla (geometrinen keskiarvo = base_rating)
+    """
+    n = len(history.question_ids)
+    if n == 0:
+        return np.zeros(0, dtype=np.float64)
+
+    wins = (np.bincount(history.a, weights=history.outcome, minlength=n)
+            + np.bincount(history.b, weights=1.0 - history.outcome, minlength=n)
+            + prior_games / 2.0)
+    strength = np.ones(n, dtype=np.float64)
+
+    for _ in range(max_iterations):
+        pair = 1.0 / (strength[history.a] + strength[history.b])
+        denominator = (np.bincount(history.a, weights=pair, minlength=n)
+                       + np.bincount(history.b, weights=pair, minlength=n)
+                       + prior_games / (strength + 1.0))
+        updated = wins / denominator
+        updated /= np.exp(np.mean(np.log(updated)))
+
+        change = np.max(np.abs(np.log(updated) - np.log(strength)))
+        strength = updated
+        if change < tolerance:
+            break
+
+    return base_rating + 400.0 * np.log10(strength)
+
+
+def recompute_ratings(questions_file: str, method: str = METHOD_ELO,
+                      k_factor: Optional[float] = None,
+                      exclude_seqs: Iterable[int] = (),
+                      log_file: Optional[str] = None,
+                      apply: bool = False) -> Dict:
+    """
+    Laske kaikkien kysymysten luokitukset uudelleen vertailuhistoriasta
+
+    Args:
+        method: 'elo' (peräkkäinen toisto) tai 'bradley_terry' (koko historian sovitus)
+        k_factor: uusi K-kerroin ELO-toistolle
+        exclude_seqs: kiistettyjen vertailujen järjestysnumerot
+        apply: kirjoita tulokset questions.json-snapshotiin (vain koko historiasta)
+
+    Returns:
+        Yhteenveto: {question_id: {"old", "new"}}, historian koko ja kattavuus
+    """
+    if method not in METHODS:
+        raise ElectionSystemError(f"Tuntematon laskentatapa: {method}")
+
+    questions_file = Path(questions_file)
+    log_file = Path(log_file) if log_file else questions_file.parent / COMPARISON_LOG_FILENAME
+
+    # Lukko: avoimet ELORatingStoret eivät lisää vertailuja laskennan aikana
+    with comparison_log_lock(log_file):
+        return _recompute(questions_file, log_file, method, k_factor, exclude_seqs, apply)
+
+
+def _recompute(questions_file: Path, log_file: Path, method: str, k_factor: Optional[float],
+               exclude_seqs: Iterable[int], apply: bool) -> Dict:
+    data = read_json_file(questions_file)
+    questions = [q for q in data.get("questions", []) if get_question_id(q)]
+    question_ids = [get_question_id(q) for q in questions]
+
+    metadata = data.setdefault("metadata", {})
+    excluded = sorted(set(metadata.get("elo_excluded_seqs", [])) | set(int(s) for s in exclude_seqs))
+
+    history = ComparisonHistory.from_log(log_file, question_ids, excluded)
+    complete = history.is_complete(metadata.get("elo_log_seq", 0))
+    if apply and not complete:
+        raise ElectionSystemError(
+            f"Vertailuloki alkaa järjestysnumerosta {history.first_seq}, ei 1: "
+            "aiempia vertailuja ei voi toistaa, joten tuloksia ei tallenneta")
+
+    if method == METHOD_BRADLEY_TERRY:
+        ratings = fit_bradley_terry(history)
+    else:
+        base_file = base_ratings_file(log_file)
+        base_ratings = read_json_file(base_file) if base_file.exists() else None
+        ratings = replay_elo(history, k_factor, initial_ratings=base_ratings)
+
+    changes = {}
+    for question, question_id, rating in zip(questions, question_ids, ratings.tolist()):
+        new_rating = int(round(rating))
+        changes[question_id] = {"old": get_question_rating(question), "new": new_rating}
+
+    if apply:
+        for question, question_id in zip(questions, question_ids):
+            change = changes[question_id]
+            set_question_rating(question, change["new"], change["new"] - change["old"])
+
+        last_seq = max((e.get("seq", 0) for e in iter_comparison_log(log_file)), default=0)
+        metadata["elo_log_seq"] = max(metadata.get("elo_log_seq", 0), last_seq)
+        metadata["elo_excluded_seqs"] = excluded
+        metadata["elo_recomputed"] = {
+            "method": method,
+            "k_factor": k_factor,
+            "comparisons": len(history),
+            "timestamp": datetime.now().isoformat()
+        }
+        metadata["last_updated"] = datetime.now().isoformat()
+        write_json_file(questions_file, data)
+
+    return {
+        "method": method,
+        "comparisons": len(history),
+        "excluded": excluded,
+        "complete": complete,
+        "ratings": changes
+    }
@@ -0,0 +1,319 @@
+#!/usr/bin/env python3
+"""
+ELO-luokitusten inkrementaalinen tallennus
+
+Kysymysten luokitukset pidetään muistissa id → kysymys -indeksissä. Jokainen
+vertailu lisätään append-only vertailulokiin (JSON lines), ja questions.json
+kirjoitetaan tiivistettynä snapshotina vain määräajoin. Snapshot tallentaa
+viimeisen sisältämänsä lokirivin järjestysnumeron, joten käynnistyksessä
+toistetaan vain sitä uudemmat vertailut. Ensimmäistä vertailua edeltävät
+luokitukset tallennetaan lokin viereen (base_ratings_file) uudelleenlaskentaa
+varten.
+
+Jokainen lokirivi tyhjennetään käyttöjärjestelmälle heti kirjoituksen
+jälkeen (fsync=True myös levylle), joten kaatuminen ei hävitä snapshotin
+jälkeisiä vertailuja.
+
+Samaa tiedostoa voi käyttää useampi istunto: lisäys ja snapshot tehdään
+lokin lukon (comparison_log_lock) alla. Ennen lisäystä toistetaan muiden
+istuntojen lisäämät rivit, joten järjestysnumerot pysyvät yksilöllisinä,
+ja snapshot lataa tiedostot uudelleen ennen kirjoitusta, jottei toisen
+istunnon tulos (tai uudelleenlaskenta) jää viimeisen kirjoittajan alle.
+"""
+import json
+import os
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional
+
+from .file_utils import read_json_file, write_json_file
+from .error_handling import ElectionSystemError
+
+try:
+    import fcntl
+except ImportError:
+    # Windows: ei tiedostolukkoa, vain yksi istunto kerrallaan
+    fcntl = None
+
+DEFAULT_RATING = 1000
+DEFAULT_K_FACTOR = 32
+DEFAULT_SNAPSHOT_INTERVAL = 1000
+COMPARISON_LOG_FILENAME = "elo_comparisons.jsonl"
+
+# Vertailun tulos kysymyksen A näkökulmasta
+OUTCOMES = {"a": 1.0, "b": 0.0, "t": 0.5}
+
+
+def calculate_expected(rating_a: float, rating_b: float) -> float:
+    """Laske odotettu tulos kahden kysymyksen välillä"""
+    return 1 / (1 + 10 ** ((rating_b - rating_a) / 400))
+
+
+def get_question_id(question: Dict) -> Optional[str]:
+    """Kysymyksen tunniste (uusi 'id' tai vanha 'local_id')"""
+    return question.get("id") or question.get("local_id")
+
+
+def get_question_rating(question: Dict) -> int:
+    """Lue luokitus kummastakin formaatista (kokonaisluku tai {'current_rating': ...})"""
+    rating = question.get("elo_rating", DEFAULT_RATING)
+    if isinstance(rating, dict):
+        rating = rating.get("current_rating", DEFAULT_RATING)
+    return rating
+
+
+def set_question_rating(question: Dict, rating: int, delta: Optional[int] = None):
+    """Kirjoita luokitus kysymyksen alkuperäisessä formaatissa"""
+    current = question.get("elo_rating")
+    if isinstance(current, dict):
+        current["current_rating"] = rating
+        if delta is not None:
+            current["comparison_delta"] = delta
+    else:
+        question["elo_rating"] = rating
+
+
+def base_ratings_file(log_file: Path) -> Path:
+    """Lokin alkua edeltävien luokitusten tiedosto (elo_comparisons.base.json)"""
+    return Path(log_file).with_suffix(".base.json")
+
+
+@contextmanager
+def comparison_log_lock(log_file: Path):
+    """Yksinoikeus vertailulokiin ja snapshotiin (flock tiedostoon <loki>.lock)"""
+    lock_file = Path(log_file).with_suffix(".lock")
+    lock_file.parent.mkdir(parents=True, exist_ok=True)
+    with open(lock_file, "a") as handle:
+        if fcntl is not None:
+            fcntl.flock(handle.fileno(), fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(handle.fileno(), fcntl.LOCK_UN)
+
+
+def iter_comparison_log(log_file: Path) -> Iterator[Dict]:
+    """Käy vertailuloki läpi rivi kerrallaan (viallinen viimeinen rivi ohitetaan)"""
+    log_file = Path(log_file)
+    if not log_file.exists():
+        return
+    with open(log_file, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError:
+                # Kesken jäänyt kirjoitus kaatumisen jälkeen
+                continue
+
+
+class ELORatingStore:
+    """Muistissa pidettävä ELO-indeksi, vertailuloki ja määräaikaiset snapshotit"""
+
+    def __init__(self, questions_file: str, log_file: Optional[str] = None,
+                 k_factor: int = DEFAULT_K_FACTOR,
+                 snapshot_interval: int = DEFAULT_SNAPSHOT_INTERVAL,
+                 fsync: bool = False):
+        self.questions_file = Path(questions_file)
+        self.log_file = Path(log_file) if log_file else self.questions_file.parent / COMPARISON_LOG_FILENAME
+        self.k_factor = k_factor
+        self.snapshot_interval = snapshot_interval
+        self.fsync = fsync
+
+        self.data: Dict = {}
+        self.index: Dict[str, Dict] = {}
+        self.last_seq = 0
+        self.snapshot_seq = 0
+        self._excluded = set()
+        self._log_offset = 0
+        self._torn_tail = False
+        self._log_handle = None
+        self._loaded = False
+
+    def load(self):
+        """Lataa snapshot ja toista sen jälkeiset lokirivit"""
+        if self._loaded:
+            return self
+        if not self.questions_file.exists():
+            raise ElectionSystemError(f"Kysymysten tiedostoa ei löydy: {self.questions_file}")
+        with comparison_log_lock(self.log_file):
+            self._load()
+        return self
+
+    def _load(self):
+        self.data = read_json_file(self.questions_file)
+        self.index = {}
+        for question in self.data.get("questions", []):
+            question_id = get_question_id(question)
+            if question_id:
+                self.index[question_id] = question
+
+        metadata = self.data.get("metadata", {})
+        self.snapshot_seq = metadata.get("elo_log_seq", 0)
+        self.last_seq = self.snapshot_seq
+        # Kiistetyt vertailut (elo_batch --exclude-seq) eivät vaikuta luokituksiin
+        self._excluded = set(metadata.get("elo_excluded_seqs", []))
+
+        self._log_offset = 0
+        self._catch_up()
+        self._loaded = True
+
+    def _catch_up(self):
+        """Toista lokiin edellisen luvun jälkeen lisätyt rivit (lukon alla)"""
+        if not self.log_file.exists():
+            return
+        with open(self.log_file, "rb") as f:
+            f.seek(self._log_offset)
+            chunk = f.read()
+        if not chunk:
+            return
+        self._log_offset += len(chunk)
+
+        lines = chunk.split(b"\n")
+        # Rivinvaihdoton loppu on kaatuneen kirjoittajan kesken jäänyt rivi
+        self._torn_tail = lines[-1].strip() != b""
+        for line in lines:
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                continue
+            seq = entry.get("seq", 0)
+            if seq <= self.snapshot_seq:
+                continue
+            if seq not in self._excluded:
+                self._apply(entry["a"], entry["b"], entry["winner"], entry.get("k", self.k_factor))
+            self.last_seq = max(self.last_seq, seq)
+
+    def get_rating(self, question_id: str) -> int:
+        """Hae kysymyksen nykyinen luokitus"""
+        self.load()
+        question = self.index.get(question_id)
+        if question is None:
+            raise ValueError(f"Kysymystä ei löydy: {question_id}")
+        return get_question_rating(question)
+
+    def questions(self) -> List[Dict]:
+        """Kaikki kysymykset nykyisillä luokituksilla"""
+        self.load()
+        return self.data.get("questions", [])
+
+    def _apply(self, question_a: str, question_b: str, winner: str, k_factor: float) -> Dict:
+        q_a = self.index.get(question_a)
+        q_b = self.index.get(question_b)
+        if not q_a or not q_b:
+            raise ValueError(f"Kysymyksiä ei löydy: {question_a} tai {question_b}")
+
+        rating_a = get_question_rating(q_a)
+        rating_b = get_question_rating(q_b)
+
+        expected_a = calculate_expected(rating_a, rating_b)
+        expected_b = calculate_expected(rating_b, rating_a)
+        actual_a = OUTCOMES.get(winner, 0.5)
+        actual_b = 1.0 - actual_a
+
+        new_rating_a = rating_a + k_factor * (actual_a - expected_a)
+        new_rating_b = rating_b + k_factor * (actual_b - expected_b)
+
+        set_question_rating(q_a, int(new_rating_a), int(new_rating_a - rating_a))
+        set_question_rating(q_b, int(new_rating_b), int(new_rating_b - rating_b))
+
+        return {
+            "question_a": {"old": rating_a, "new": new_rating_a, "delta": new_rating_a - rating_a},
+            "question_b": {"old": rating_b, "new": new_rating_b, "delta": new_rating_b - rating_b}
+        }
+
+    def record_comparison(self, question_a: str, question_b: str, winner: str) -> Dict:
+        """
+        Päivitä luokitukset muistissa ja lisää vertailu lokiin
+
+        Args:
+            question_a: Kysymyksen A tunniste
+            question_b: Kysymyksen B tunniste
+            winner: 'a', 'b' tai 't' (tasapeli)
+
+        Returns:
+            Vanhat ja uudet luokitukset kummallekin kysymykselle
+        """
+        self.load()
+        with comparison_log_lock(self.log_file):
+            self._catch_up()
+            if self.last_seq == 0:
+                self._record_base_ratings()
+            result = self._apply(question_a, question_b, winner, self.k_factor)
+
+            self.last_seq += 1
+            self._append_log({
+                "seq": self.last_seq,
+                "a": question_a,
+                "b": question_b,
+                "winner": winner,
+                "k": self.k_factor,
+                "timestamp": datetime.now().isoformat()
+            })
+
+        if self.snapshot_interval and self.last_seq - self.snapshot_seq >= self.snapshot_interval:
+            self.snapshot()
+
+        return result
+
+    def _record_base_ratings(self):
+        """Tallenna lokin alkua edeltävät luokitukset uudelleenlaskennan lähtötasoksi"""
+        base_file = base_ratings_file(self.log_file)
+        if base_file.exists():
+            return
+        base_file.parent.mkdir(parents=True, exist_ok=True)
+        write_json_file(base_file, {qid: get_question_rating(q) for qid, q in self.index.items()})
+
+    def _append_log(self, entry: Dict):
+        if self._log_handle is None:
+            self.log_file.parent.mkdir(parents=True, exist_ok=True)
+            self._log_handle = open(self.log_file, "ab")
+        line = json.dumps(entry, ensure_ascii=False) + "\n"
+        if self._torn_tail:
+            line = "\n" + line
+            self._torn_tail = False
+        self._log_handle.write(line.encode("utf-8"))
+        self.flush()
+        self._log_offset = self._log_handle.tell()
+
+    def flush(self):
+        """Kirjoita puskuroidut lokirivit levylle"""
+        if self._log_handle is not None:
+            self._log_handle.flush()
+            if self.fsync:
+                os.fsync(self._log_handle.fileno())
+
+    def snapshot(self):
+        """Kirjoita tiivistetty snapshot questions.json-tiedostoon"""
+        if not self._loaded:
+            return
+        # Loki ensin levylle, jotta snapshotin järjestysnumero ei ohita sitä
+        self.flush()
+        with comparison_log_lock(self.log_file):
+            # Toinen istunto tai uudelleenlaskenta on voinut kirjoittaa tiedostoon
+            self._load()
+            if self.last_seq == self.snapshot_seq:
+                return
+
+            metadata = self.data.setdefault("metadata", {})
+            metadata["elo_log_seq"] = self.last_seq
+            metadata["last_updated"] = datetime.now().isoformat()
+            write_json_file(self.questions_file, self.data)
+            self.snapshot_seq = self.last_seq
+
+    def close(self):
+        """Tallenna snapshot ja sulje loki"""
+        self.snapshot()
+        if self._log_handle is not None:
+            self._log_handle.close()
+            self._log_handle = None
+
+    def __enter__(self):
+        return self.load()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
@@ -2,12 +2,32 @@
 """
 Yhteiset tiedostonkäsittelyfunktiot - KORJATTU VERSIO
 """
+import hashlib
 import json
 import os
+import secrets
 from pathlib import Path
 from typing import Dict, Any
 from .error_handling import ElectionSystemError
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Kutsutaan polulla jokaisen write_json_file-kirjoituksen jälkeen (esim. välimuistin mitätöinti)
+_write_listeners = []
+
+def add_write_listener(listener):
+    """
+    Rekisteröi funktio, jota kutsutaan kirjoitetun tiedoston polulla
+    
+    Args:
+        listener: Funktio (polku) -> None
+    """
+    if listener not in _write_listeners:
+        _write_listeners.append(listener)
+
 def read_json_file(file_path: str, default: Any = None) -> Any:
     """
     Turvallinen JSON-tiedoston lukeminen UTF-8 encodingilla
@@ -28,6 +48,14 @@ def read_json_file(file_path: str, default: Any = None) -> Any:
         raise ElectionSystemError(f"Tiedostoa ei löydy: {file_path}")
     
     try:
+        if orjson is not None:
+            with open(path, 'rb') as f:
+                content = f.read()
+            try:
+                return orjson.loads(content)
+            except orjson.JSONDecodeError:
+                # orjson ei hyväksy esim. NaN-arvoja; standardikirjasto ratkaisee
+                return json.loads(content.decode('utf-8'))
         with open(path, 'r', encoding='utf-8') as f:
             return json.load(f)
     except json.JSONDecodeError as e:
@@ -35,14 +63,104 @@ def read_json_file(file_path: str, default: Any = None) -> Any:
     except Exception as e:
         raise ElectionSystemError(f"Tiedoston lukuvirhe {file_path}: {e}")
 
-def write_json_file(file_path: str, data: Any, ensure_ascii: bool = False):
+# orjson käyttää eksponenttimuotoa eri tavalla kuin float.__repr__ (esim. 1e-5 vs 1e-05)
+# näiden rajojen ulkopuolella; rajojen sisällä esitys on sama
+_ORJSON_FLOAT_MIN = 1e-4
+_ORJSON_FLOAT_MAX = 1e16
+_ORJSON_INT_MIN = -2 ** 63
+_ORJSON_INT_MAX = 2 ** 64 - 1
+
+def _orjson_compatible(data: Any) -> bool:
+    """
+    Tuottaako orjson täsmälleen saman tuloksen kuin json.dumps
+    
+    Sallitaan vain JSON-perustyypit (ei aliluokkia), merkkijonoavaimet,
+    64-bittiset kokonaisluvut ja äärelliset liukuluvut, joiden esitys ei
+    ole eksponenttimuodossa. Muut (NaN, datetime, ...) jätetään
+    standardikirjastolle, joka myös nostaa samat virheet kuin ennen.
+    """
+    stack = [data]
+    while stack:
+        value = stack.pop()
+        kind = type(value)
+        if kind is str or kind is bool or value is None:
+            continue
+        if kind is dict:
+            for key in value:
+                if type(key) is not str:
+                    return False
+            stack.extend(value.values())
+        elif kind is list or kind is tuple:
+            stack.extend(value)
+        elif kind is int:
+            if not _ORJSON_INT_MIN <= value <= _ORJSON_INT_MAX:
+                return False
+        elif kind is float:
+            magnitude = abs(value)
+            if magnitude != magnitude or magnitude >= _ORJSON_FLOAT_MAX:
+                return False
+            if 0 < magnitude < _ORJSON_FLOAT_MIN:
+                return False
+        else:
+            return False
+    return True
+
+def dumps_json(data: Any, ensure_ascii: bool = False, compact: bool = False) -> bytes:
+    """
+    Serialisoi data UTF-8-tavuiksi
+    
+    Käyttää orjsonia kun se on asennettu ja data on sellaista, jolle orjsonin
+    tulos on tavu tavulta sama kuin json.dumps(indent=2) (ks. _orjson_compatible);
+    muuten standardikirjastoa.
+    
+    Args:
+        data: Serialisoitava data
+        ensure_ascii: Pakota ASCII-merkistö (aina standardikirjasto)
+        compact: Tiivis muoto ilman sisennyksiä ja välilyöntejä
+    """
+    if orjson is not None and not ensure_ascii and _orjson_compatible(data):
+        try:
+            return orjson.dumps(data, option=0 if compact else orjson.OPT_INDENT_2)
+        except TypeError:
+            # Esim. yksinäiset surrogaattimerkit merkkijonoissa
+            pass
+    
+    if compact:
+        text = json.dumps(data, ensure_ascii=ensure_ascii, separators=(',', ':'))
+    else:
+        text = json.dumps(data, indent=2, ensure_ascii=ensure_ascii)
+    return text.encode('utf-8')
+
+def _content_unchanged(path: Path, payload: bytes) -> bool:
+    """Onko tiedoston sisältö jo täsmälleen sama (koko tarkistetaan ensin)"""
+    try:
+        if path.stat().st_size != len(payload):
+            return False
+        with open(path, 'rb') as f:
+            return f.read() == payload
+    except OSError:
+        return False
+
+def write_json_file(file_path: str, data: Any, ensure_ascii: bool = False,
+                    compact: bool = False, atomic: bool = True,
+                    skip_unchanged: bool = True) -> bool:
     """
     Turvallinen JSON-tiedoston kirjoitus UTF-8 encodingilla
     
+    Oletuksena kirjoitus on atominen: data kirjoitetaan väliaikaistiedostoon
+    samassa hakemistossa, synkronoidaan levylle (fsync) ja nimetään kohteen
+    päälle, joten kaatuminen kesken kirjoituksen ei jätä katkaistua tiedostoa.
+    
     Args:
         file_path: Polku JSON-tiedostoon
         data: Kirjoitettava data
         ensure_ascii: Pakota ASCII-merkistö
+        compact: Tiivis muoto (nopeampi ja pienempi, ei ihmisluettava)
+        atomic: Kirjoita väliaikaistiedoston ja uudelleennimeämisen kautta
+        skip_unchanged: Älä kirjoita jos sisältö on jo sama
+        
+    Returns:
+        True jos tiedosto kirjoitettiin, False jos sisältö oli ennallaan
     """
     path = Path(file_path)
     
@@ -50,10 +168,55 @@ def write_json_file(file_path: str, data: Any, ensure_ascii: bool = False):
     path.parent.mkdir(parents=True, exist_ok=True)
     
     try:
-        with open(path, 'w', encoding='utf-8') as f:
-            json.dump(data, f, indent=2, ensure_ascii=ensure_ascii)
+        payload = dumps_json(data, ensure_ascii=ensure_ascii, compact=compact)
+        if skip_unchanged and _content_unchanged(path, payload):
+            return False
+        
+        if not atomic:
+            with open(path, 'wb') as f:
+                f.write(payload)
+            return True
+        
+        tmp_name = str(path.with_name(f".{path.name}.{os.getpid()}.{secrets.token_hex(4)}.tmp"))
+        # 0o666 + umask kuten tavallisella open()-kutsulla
+        fd = os.open(tmp_name, os.O_WRONLY | os.O_CREAT | os.O_EXCL | getattr(os, 'O_BINARY', 0), 0o666)
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(payload)
+                f.flush()
+                os.fsync(f.fileno())
+            if path.exists():
+                # Säilytä olemassa olevan tiedoston oikeudet
+                os.chmod(tmp_name, path.stat().st_mode & 0o7777)
+            os.replace(tmp_name, path)
+        except BaseException:
+            try:
+                os.unlink(tmp_name)
+            except OSError:
+                pass
+            raise
+        _fsync_directory(path.parent)
+        return True
     except Exception as e:
         raise ElectionSystemError(f"Tiedoston kirjoitusvirhe {file_path}: {e}")
+    finally:
+        for listener in _write_listeners:
+            listener(path)
+
+def _fsync_directory(directory: Path):
+    """Synkronoi hakemistomerkintä, jotta uudelleennimeäminen säilyy kaatumisessa"""
+    if os.name != 'posix':
+        return
+    try:
+        fd = os.open(str(directory), os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
 
 def calculate_file_hash(file_path: str) -> str:
     """
@@ -65,8 +228,6 @@ def calculate_file_hash(file_path: str) -> str:
     Returns:
         SHA-256 tiiviste hex-muodossa
     """
-    import hashlib
-    
     path = Path(file_path)
     if not path.exists():
         raise ElectionSystemError(f"Tiedostoa ei löydy: {file_path}")
@@ -0,0 +1,259 @@
+# src/core/ipfs/archive_codec.py
+"""
+Pakattu rivipohjainen (NDJSON) koodaus synkronointiarkistoille
+
+Dokumentti kirjoitetaan tapahtumariveinä, jotka syötetään suoraan
+pakkausvirtaan (gzip tai zstd). Tietuelistat kirjoitetaan tietue kerrallaan,
+joten kumpikaan puoli ei pidä muistissa sekä Python-oliota että sen koko
+sarjallistettua merkkijonoa.
+
+Rivit:
+    {"format": "ndjson-events", "version": "1.0", "codec": ..., "metadata": ...}
+    ["o", polku]           sanakirja polussa
+    ["s", polku, arvo]     arvo polussa
+    ["a", polku]           lista polussa
+    ["i", polku, alkio]    alkio polun listaan
+
+Purku tunnistaa koodauksen tavujen alusta (gzip, zstd tai tavallinen JSON),
+joten eri koodauksilla julkaistuja lohkoja voi sekoittaa.
+"""
+import gzip
+import io
+import itertools
+import json
+import tempfile
+from typing import Any, BinaryIO, Dict, Iterator, List, Optional, Tuple
+
+try:
+    import zstandard
+    HAS_ZSTD = True
+except ImportError:
+    zstandard = None
+    HAS_ZSTD = False
+
+FORMAT_NAME = "ndjson-events"
+FORMAT_VERSION = "1.0"
+
+CODEC_JSON = "json"
+CODEC_GZIP = "gzip"
+CODEC_ZSTD = "zstd"
+
+# Neuvottelujärjestys: ensimmäinen käytettävissä oleva valitaan
+CODEC_PREFERENCE = (CODEC_ZSTD, CODEC_GZIP, CODEC_JSON)
+
+GZIP_MAGIC = b"\x1f\x8b"
+ZSTD_MAGIC = b"\x28\xb5\x2f\xfd"
+
+# Muistissa pidettävän koodatun datan raja ennen levylle siirtymistä
+SPOOL_MAX_BYTES = 16 * 1024 * 1024
+
+_READ_SIZE = 1024 * 1024
+
+
+def available_codecs() -> List[str]:
+    """Tässä ympäristössä käytettävissä olevat koodaukset suositusjärjestyksessä"""
+    return [codec for codec in CODEC_PREFERENCE if codec != CODEC_ZSTD or HAS_ZSTD]
+
+
+def negotiate_codec(client, preferred: Optional[str] = None) -> str:
+    """
+    Valitse koodaus clientin ja ympäristön mukaan
+
+    Pakatut koodaukset vaativat clientilta add_stream- ja cat_stream-tuen;
+    muuten käytetään tavallista JSONia (add_json/get_json).
+    """
+    if not (hasattr(client, "add_stream") and hasattr(client, "cat_stream")):
+        return CODEC_JSON
+    codecs = available_codecs()
+    if preferred:
+        if preferred not in CODEC_PREFERENCE:
+            raise ValueError(f"Unknown archive codec: {preferred}")
+        return preferred if preferred in codecs else codecs[0]
+    return codecs[0]
+
+
+def ensure_codec_supported(codec: Optional[str]):
+    """Tarkista arkiston metadatan koodaus ennen palojen hakua"""
+    if codec and codec not in available_codecs():
+        raise ValueError(f"Archive codec '{codec}' is not supported here (available: {available_codecs()})")
+
+
+def detect_codec(head: bytes) -> str:
+    """Tunnista koodaus tavujen alusta"""
+    if head.startswith(GZIP_MAGIC):
+        return CODEC_GZIP
+    if head.startswith(ZSTD_MAGIC):
+        return CODEC_ZSTD
+    return CODEC_JSON
+
+
+# ----------------------------------------------------------------------
+# Koodaus
+# ----------------------------------------------------------------------
+
+def _dumps(value: Any) -> bytes:
+    return json.dumps(value, ensure_ascii=False, separators=(",", ":")).encode("utf-8") + b"\n"
+
+
+def iter_events(document: Any, path: Optional[List[str]] = None) -> Iterator[list]:
+    """Dokumentin tapahtumarivit; listojen alkiot tuotetaan yksitellen"""
+    path = path or []
+    if isinstance(document, dict):
+        yield ["o", path]
+        for key, value in document.items():
+            child = path + [key]
+            if isinstance(value, dict):
+                yield from iter_events(value, child)
+            elif isinstance(value, list):
+                yield ["a", child]
+                for item in value:
+                    yield ["i", child, item]
+            else:
+                yield ["s", child, value]
+    else:
+        yield ["s", path, document]
+
+
+def _open_compressor(fileobj: BinaryIO, codec: str):
+    if codec == CODEC_GZIP:
+        # mtime=0: sama sisältö tuottaa samat tavut ja siten saman CID:n
+        return gzip.GzipFile(fileobj=fileobj, mode="wb", mtime=0)
+    if codec == CODEC_ZSTD:
+        if not HAS_ZSTD:
+            raise ValueError("zstd codec requires the zstandard package")
+        return zstandard.ZstdCompressor().stream_writer(fileobj, closefd=False)
+    raise ValueError(f"Codec {codec} is not a streaming codec")
+
+
+def encode_to(document: Any, fileobj: BinaryIO, codec: str = CODEC_GZIP,
+              metadata: Optional[Dict[str, Any]] = None) -> int:
+    """
+    Kirjoita dokumentti pakattuna tapahtumavirtana tiedostoon
+
+    Returns:
+        Pakkaamattomien tavujen määrä
+    """
+    if codec == CODEC_JSON:
+        data = _dumps(document)
+        fileobj.write(data)
+        return len(data)
+
+    header = {"format": FORMAT_NAME, "version": FORMAT_VERSION, "codec": codec, "metadata": metadata or {}}
+    written = 0
+    writer = _open_compressor(fileobj, codec)
+    try:
+        for event in itertools.chain([header], iter_events(document)):
+            data = _dumps(event)
+            writer.write(data)
+            written += len(data)
+    finally:
+        writer.close()
+    return written
+
+
+def encode_spooled(document: Any, codec: str = CODEC_GZIP,
+                   metadata: Optional[Dict[str, Any]] = None) -> Tuple[BinaryIO, int]:
+    """
+    Koodaa dokumentti väliaikaistiedostoon (muistissa SPOOL_MAX_BYTES asti)
+
+    Returns:
+        (tiedosto-olio alkuun kelattuna, pakkaamaton koko)
+    """
+    spool = tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_BYTES)
+    size = encode_to(document, spool, codec, metadata)
+    spool.seek(0)
+    return spool, size
+
+
+def encode_bytes(document: Any, codec: str = CODEC_GZIP,
+                 metadata: Optional[Dict[str, Any]] = None) -> bytes:
+    """Koodaa dokumentti tavuiksi"""
+    buffer = io.BytesIO()
+    encode_to(document, buffer, codec, metadata)
+    return buffer.getvalue()
+
+
+# ----------------------------------------------------------------------
+# Purku
+# ----------------------------------------------------------------------
+
+def _open_decompressor(fileobj: BinaryIO, codec: str) -> BinaryIO:
+    if codec == CODEC_GZIP:
+        return gzip.GzipFile(fileobj=fileobj, mode="rb")
+    if codec == CODEC_ZSTD:
+        if not HAS_ZSTD:
+            raise ValueError("Archive is zstd-compressed but the zstandard package is not installed")
+        return zstandard.ZstdDecompressor().stream_reader(fileobj, read_size=_READ_SIZE)
+    return fileobj
+
+
+def _resolve(root: Any, path: List[str]) -> Any:
+    node = root
+    for key in path:
+        node = node[key]
+    return node
+
+
+def _assign(root: Any, path: List[str], value: Any) -> Any:
+    if not path:
+        return value
+    _resolve(root, path[:-1])[path[-1]] = value
+    return root
+
+
+def decode_events(lines: Iterator[bytes]) -> Tuple[Dict[str, Any], Any]:
+    """Rakenna dokumentti tapahtumariveistä; palauttaa (otsake, dokumentti)"""
+    header = None
+    root = None
+    current_path = None
+    current_list = None
+
+    for raw in lines:
+        if not raw.strip():
+            continue
+        event = json.loads(raw)
+        if header is None:
+            if not isinstance(event, dict) or event.get("format") != FORMAT_NAME:
+                raise ValueError("Not an ndjson-events archive stream")
+            header = event
+            continue
+
+        kind, path = event[0], event[1]
+        if kind == "i":
+            if path != current_path:
+                current_path, current_list = path, _resolve(root, path)
+            current_list.append(event[2])
+        elif kind == "o":
+            root = _assign(root, path, {})
+        elif kind == "a":
+            root = _assign(root, path, [])
+            current_path, current_list = None, None
+        elif kind == "s":
+            root = _assign(root, path, event[2])
+        else:
+            raise ValueError(f"Unknown archive event: {kind}")
+
+    if header is None:
+        raise ValueError("Empty archive stream")
+    return header, root
+
+
+def decode_from(fileobj: BinaryIO) -> Tuple[Dict[str, Any], Any]:
+    """
+    Lue dokumentti tiedostosta tai HTTP-virrasta; koodaus tunnistetaan alusta
+
+    Returns:
+        (otsake, dokumentti) - tavallisella JSONilla otsake on {"codec": "json"}
+    """
+    reader = io.BufferedReader(fileobj) if not hasattr(fileobj, "peek") else fileobj
+    codec = detect_codec(reader.peek(4)[:4])
+    if codec == CODEC_JSON:
+        return {"codec": CODEC_JSON, "metadata": {}}, json.loads(reader.read())
+
+    stream = io.BufferedReader(_open_decompressor(reader, codec), buffer_size=_READ_SIZE)
+    return decode_events(stream)
+
+
+def decode_bytes(data: bytes) -> Tuple[Dict[str, Any], Any]:
+    """Pura tavuiksi koodattu dokumentti"""
+    return decode_from(io.BytesIO(data))
@@ -1,19 +1,55 @@
 # src/core/ipfs/archive_manager.py
 """
 Täyden arkistojen hallinta - käytetään vain ensimmäisellä synkronoinnilla
+
+Täysi arkisto voidaan julkaista yhtenä JSON-dokumenttina (full_archive) tai
+paloiteltuna (chunked_archive), jolloin edellisen version muuttumattomat palat
+käytetään uudelleen ja lukija hakee vain puuttuvat palat.
+
+Kaikki lohkot kirjoitetaan neuvotellulla koodauksella (json, gzip tai zstd,
+ks. archive_codec). Luku tunnistaa koodauksen sisällöstä, ja manifestin
+metadata kertoo, millä koodauksella palat on julkaistu.
 """
-import json
-import hashlib
 from datetime import datetime
-from typing import Dict, Any, Optional
+from typing import Any, Callable, Dict, Optional
 from pathlib import Path
 
+from .archive_codec import (
+    CODEC_JSON, decode_from, encode_spooled, ensure_codec_supported, negotiate_codec
+)
+from .chunked_archive import ChunkSpool, assemble_files, build_manifest, is_chunked_archive
+from .digest_cache import DigestCache, digest_operation
+
 class ArchiveManager:
     """Hallitsee täyden IPFS-arkistojen luomista ja purkamista"""
     
-    def __init__(self, client):
+    def __init__(self, client, codec: Optional[str] = None, digests: Optional[DigestCache] = None):
         self.client = client
+        self.codec = negotiate_codec(client, codec)
+        # Tiedostojen koot ja tiivisteet lasketaan kerran operaatiota kohden
+        self.digests = digests or DigestCache()
     
+    def put_blob(self, document: Any, metadata: Optional[Dict[str, Any]] = None) -> str:
+        """Lisää dokumentti IPFS:ään neuvotellulla koodauksella"""
+        if self.codec == CODEC_JSON:
+            return self.client.add_json(document)
+        
+        stream, _ = encode_spooled(document, self.codec, metadata)
+        with stream:
+            return self.client.add_stream(stream)
+    
+    def get_blob(self, cid: str) -> Any:
+        """Hae dokumentti; koodaus tunnistetaan sisällöstä"""
+        if not hasattr(self.client, "cat_stream"):
+            return self.client.get_json(cid)
+        
+        stream = self.client.cat_stream(cid)
+        try:
+            return decode_from(stream)[1]
+        finally:
+            stream.close()
+    
+    @digest_operation
     def create_full_archive(self, data_files: Dict[str, Dict]) -> str:
         """
         Luo täyden arkiston kaikesta datasta
@@ -24,27 +60,117 @@ class ArchiveManager:
         Returns:
             IPFS CID arkistolle
         """
+        metadata = {
+            "type": "full_archive",
+            "version": "1.0",
+            "timestamp": datetime.now().isoformat(),
+            "file_count": len(data_files),
+            "codec": self.codec
+        }
+        if self.codec == CODEC_JSON:
+            # Pakatuissa koodauksissa koko selviää vasta virtana kirjoitettaessa
+            metadata["total_size"] = self._calculate_total_size(data_files)
+        
         archive = {
-            "metadata": {
-                "type": "full_archive",
-                "version": "1.0",
-                "timestamp": datetime.now().isoformat(),
-                "file_count": len(data_files),
-                "total_size": self._calculate_total_size(data_files)
-            },
+            "metadata": metadata,
             "files": data_files,
             "file_hashes": self._calculate_file_hashes(data_files)
         }
         
-        print(f"📦 Creating full archive: {archive['metadata']['file_count']} files, "
-              f"{archive['metadata']['total_size']} bytes")
+        print(f"📦 Creating full archive: {metadata['file_count']} files ({self.codec})")
         
-        cid = self.client.add_json(archive)
+        cid = self.put_blob(archive, metadata)
         print(f"✅ Full archive created: {cid}")
         
         return cid
     
-    def extract_full_archive(self, cid: str) -> Dict[str, Any]:
+    @digest_operation
+    def create_chunked_archive(self, data_files: Dict[str, Dict],
+                               previous_cid: Optional[str] = None,
+                               journal: Optional[Dict[str, str]] = None,
+                               checkpoint: Optional[Callable[[], None]] = None) -> str:
+        """
+        Luo paloiteltu arkisto: palat erikseen IPFS:ään ja manifesti niiden CID:eistä
+        
+        Args:
+            data_files: Sanakirja tiedostonimi -> data
+            previous_cid: Edellinen paloiteltu arkisto, jonka palat käytetään uudelleen
+            journal: Keskeytyneen julkaisun jo lähetetyt palat (täydennetään lähetettäessä)
+            checkpoint: Kutsutaan jokaisen lähetetyn palan jälkeen (journalin tallennus)
+            
+        Returns:
+            IPFS CID manifestille
+        """
+        previous_manifest = None
+        if previous_cid:
+            try:
+                previous_manifest = self.get_blob(previous_cid)
+            except Exception as e:
+                print(f"   ⚠️  Previous archive not available ({e}), uploading all chunks")
+        
+        manifest, stats = build_manifest(
+            data_files,
+            self.put_blob,
+            previous_manifest,
+            {"file_hashes": self._calculate_file_hashes(data_files), "codec": self.codec},
+            journal=journal,
+            checkpoint=checkpoint
+        )
+        
+        print(f"📦 Creating chunked archive: {manifest['metadata']['file_count']} files, "
+              f"{stats['chunks']} chunks ({stats['uploaded']} uploaded, {stats['reused']} reused, "
+              f"{stats['resumed']} resumed), "
+              f"{stats['uploaded_bytes']}/{stats['total_bytes']} bytes")
+        
+        cid = self.put_blob(manifest, manifest["metadata"])
+        print(f"✅ Chunked archive created: {cid} (root {manifest['metadata']['merkle_root'][:16]}...)")
+        
+        return cid
+    
+    def extract_archive(self, cid: str, local_files: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """
+        Pura täysi tai paloiteltu arkisto
+        
+        Args:
+            cid: IPFS CID arkistolle tai manifestille
+            local_files: Paikallinen data, jonka paloja ei tarvitse hakea
+            
+        Returns:
+            Purettu data sanakirjana
+        """
+        archive_data = self.get_blob(cid)
+        if is_chunked_archive(archive_data):
+            return self.extract_chunked_archive(cid, local_files, archive_data)
+        return self.extract_full_archive(cid, archive_data)
+    
+    def extract_chunked_archive(self, cid: str, local_files: Optional[Dict[str, Any]] = None,
+                                manifest: Optional[Dict[str, Any]] = None,
+                                spool: Optional[ChunkSpool] = None) -> Dict[str, Any]:
+        """
+        Pura paloiteltu arkisto hakemalla vain palat, joita paikallinen data ei sisällä
+        
+        Haetut palat tallennetaan spooliin (jos annettu), joten keskeytynyt
+        lataus jatkuu seuraavalla kerralla hakematta niitä uudelleen.
+        
+        Raises:
+            ValueError: jos manifestin Merkle-juuri tai jokin pala ei täsmää
+        """
+        print(f"📦 Extracting chunked archive: {cid}")
+        
+        if manifest is None:
+            manifest = self.get_blob(cid)
+        if not is_chunked_archive(manifest):
+            raise ValueError(f"CID {cid} is not a chunked archive")
+        ensure_codec_supported(manifest["metadata"].get("codec"))
+        
+        files, stats = assemble_files(manifest, self.get_blob, local_files, spool)
+        print(f"✅ Extracted {len(files)} files: {stats['fetched']} chunks fetched "
+              f"({stats['fetched_bytes']} bytes), {stats['local']} reused locally, "
+              f"{stats['resumed']} resumed")
+        
+        return files
+    
+    def extract_full_archive(self, cid: str, archive_data: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
         """
         Pura täysi arkisto IPFS:stä
         
@@ -56,7 +182,8 @@ class ArchiveManager:
         """
         print(f"📦 Extracting full archive: {cid}")
         
-        archive_data = self.client.get_json(cid)
+        if archive_data is None:
+            archive_data = self.get_blob(cid)
         
         if archive_data.get("metadata", {}).get("type") != "full_archive":
             raise ValueError(f"CID {cid} is not a full archive")
@@ -68,24 +195,17 @@ class ArchiveManager:
     
     def _calculate_total_size(self, data_files: Dict[str, Dict]) -> int:
         """Laske datan kokonaiskoko tavuina"""
-        total_size = 0
-        for filename, data in data_files.items():
-            content = json.dumps(data, ensure_ascii=False)
-            total_size += len(content.encode('utf-8'))
-        return total_size
+        return self.digests.total_size(data_files)
     
     def _calculate_file_hashes(self, data_files: Dict[str, Dict]) -> Dict[str, str]:
         """Laske tiedostojen SHA-256 tiivisteet"""
-        hashes = {}
-        for filename, data in data_files.items():
-            content = json.dumps(data, sort_keys=True, ensure_ascii=False)
-            file_hash = hashlib.sha256(content.encode('utf-8')).hexdigest()
-            hashes[filename] = file_hash
-            
+        hashes = self.digests.file_hashes(data_files)
+        for filename, file_hash in hashes.items():
             print(f"   🔍 {filename}: {file_hash[:16]}...")
         
         return hashes
     
+    @digest_operation
     def verify_archive_integrity(self, cid: str, expected_files: list) -> bool:
         """
         Tarkista arkiston eheys
@@ -98,8 +218,13 @@ class ArchiveManager:
             True jos arkisto on ehjä
         """
         try:
-            archive_data = self.client.get_json(cid)
-            files = archive_data.get("files", {})
+            archive_data = self.get_blob(cid)
+            if is_chunked_archive(archive_data):
+                files = self.extract_chunked_archive(cid, manifest=archive_data)
+                stored_hashes = archive_data["metadata"].get("file_hashes", {})
+            else:
+                files = archive_data.get("files", {})
+                stored_hashes = archive_data.get("file_hashes", {})
             
             # Tarkista että kaikki odotetut tiedostot ovat läsnä
             for expected_file in expected_files:
@@ -109,7 +234,6 @@ class ArchiveManager:
             
             # Tarkista tiivisteet
             current_hashes = self._calculate_file_hashes(files)
-            stored_hashes = archive_data.get("file_hashes", {})
             
             for filename, current_hash in current_hashes.items():
                 if stored_hashes.get(filename) != current_hash:
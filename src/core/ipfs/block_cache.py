@@ -0,0 +1,325 @@
+# src/core/ipfs/block_cache.py
+"""
+Paikallinen sisältöosoitteellinen lohkovälimuisti IPFS-hauille
+
+CID:n sisältö ei koskaan muutu, joten kerran haettu lohko voidaan lukea
+levyltä uudelleen ilman IPFS-daemonia (myös offline-tilassa).
+
+- Lohkot tallennetaan tiedostoina hakemistoon <cache>/blocks/<cid[:2]>/<cid>
+- Indeksi (koko, viimeisin käyttö, SHA-256) on SQLite-tietokannassa
+- Kokoraja: vähiten viimeksi käytetyt lohkot poistetaan rajan ylittyessä
+- Lisäyksessä itsekuvaavat raw-CID:t (CIDv1, sha2-256) tarkistetaan
+  sisältöä vasten; kaikista lohkoista tallennetaan SHA-256, joka
+  tarkistetaan luettaessa (vioittunut lohko poistetaan ja haetaan uudelleen)
+- Suuret lohkot luetaan mmap:lla, jolloin tarkistus ei vaadi erillistä puskuria
+- Lukko suojaa vain indeksiä: lohkon luku ja tarkistus tehdään lukon
+  ulkopuolella, joten rinnakkaiset haut eivät odota toistensa levylukuja
+"""
+import base64
+import hashlib
+import mmap
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from pathlib import Path
+from typing import BinaryIO, Callable, Dict, Optional
+
+DEFAULT_CACHE_DIR = "data/ipfs_cache"
+DEFAULT_MAX_BYTES = 512 * 1024 * 1024
+DEFAULT_MMAP_THRESHOLD = 1024 * 1024
+
+_COPY_SIZE = 1024 * 1024
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS blocks (
+    cid TEXT PRIMARY KEY,
+    size INTEGER NOT NULL,
+    sha256 TEXT NOT NULL,
+    last_access REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_blocks_access ON blocks (last_access);
+"""
+
+# CIDv1: versio 0x01, raw-koodekki 0x55, multihash sha2-256 (0x12, pituus 0x20)
+_RAW_SHA256_PREFIX = b"\x01\x55\x12\x20"
+
+
+class BlockVerificationError(ValueError):
+    """Lohkon sisältö ei vastaa CID:tä"""
+    pass
+
+
+def raw_cid_digest(cid: str) -> Optional[bytes]:
+    """
+    SHA-256-tiiviste itsekuvaavasta raw-CID:stä (bafkrei...), muuten None
+
+    dag-pb-CID:iden (Qm..., bafybei...) tiiviste lasketaan UnixFS-solmusta
+    eikä sisällöstä, joten niitä ei voi tarkistaa pelkästä sisällöstä.
+    """
+    if not cid.startswith("b"):
+        return None
+    encoded = cid[1:].upper()
+    try:
+        decoded = base64.b32decode(encoded + "=" * (-len(encoded) % 8))
+    except (ValueError, TypeError):
+        return None
+    if decoded.startswith(_RAW_SHA256_PREFIX) and len(decoded) == len(_RAW_SHA256_PREFIX) + 32:
+        return decoded[len(_RAW_SHA256_PREFIX):]
+    return None
+
+
+def _safe_name(cid: str) -> str:
+    if not cid or "/" in cid or "\\" in cid or cid.startswith("."):
+        raise ValueError(f"Invalid CID: {cid!r}")
+    return cid
+
+
+class BlockCache:
+    """CID-avaimella toimiva LRU-lohkovälimuisti levyllä"""
+
+    def __init__(self, cache_dir=DEFAULT_CACHE_DIR, max_bytes: int = DEFAULT_MAX_BYTES,
+                 mmap_threshold: int = DEFAULT_MMAP_THRESHOLD):
+        self.cache_dir = Path(cache_dir)
+        self.blocks_dir = self.cache_dir / "blocks"
+        self.max_bytes = max_bytes
+        self.mmap_threshold = mmap_threshold
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.RLock()
+        self.hits = 0
+        self.misses = 0
+
+    # ------------------------------------------------------------------
+    # Indeksi
+    # ------------------------------------------------------------------
+
+    @property
+    def conn(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self.blocks_dir.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(str(self.cache_dir / "index.db"), isolation_level=None,
+                                   check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.executescript(_SCHEMA)
+            self._conn = conn
+        return self._conn
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+    def path(self, cid: str) -> Path:
+        cid = _safe_name(cid)
+        return self.blocks_dir / cid[:2] / cid
+
+    def _entry(self, cid: str):
+        if self._conn is None and not (self.cache_dir / "index.db").exists():
+            # Ei luoda välimuistia pelkän haun takia
+            return None
+        return self.conn.execute("SELECT size, sha256 FROM blocks WHERE cid = ?", (cid,)).fetchone()
+
+    def _touch(self, cid: str):
+        self.conn.execute("UPDATE blocks SET last_access = ? WHERE cid = ?", (time.time(), cid))
+
+    def __contains__(self, cid: str) -> bool:
+        with self._lock:
+            return self._entry(cid) is not None and self.path(cid).exists()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self.conn.execute("SELECT COUNT(*) FROM blocks").fetchone()[0]
+
+    @property
+    def total_bytes(self) -> int:
+        with self._lock:
+            return self.conn.execute("SELECT COALESCE(SUM(size), 0) FROM blocks").fetchone()[0]
+
+    # ------------------------------------------------------------------
+    # Luku
+    # ------------------------------------------------------------------
+
+    def _lookup(self, cid: str):
+        """Indeksirivi (size, sha256) tai None; puuttuva kirjataan hutiksi"""
+        path = self.path(cid)
+        with self._lock:
+            entry = self._entry(cid)
+            if entry is None:
+                self.misses += 1
+        return entry, path
+
+    def _hit(self, cid: str):
+        with self._lock:
+            self._touch(cid)
+            self.hits += 1
+
+    def _invalidate(self, cid: str, entry):
+        """Poista lukukelvoton lohko, ellei sitä ole sillä välin tallennettu uudelleen"""
+        with self._lock:
+            if self._entry(cid) == entry:
+                self._remove(cid)
+            self.misses += 1
+
+    def get(self, cid: str) -> Optional[bytes]:
+        """Lohkon sisältö tai None; vioittunut lohko poistetaan"""
+        entry, path = self._lookup(cid)
+        if entry is None:
+            return None
+        size, expected = entry
+        try:
+            data = self._read_verified(path, size, expected)
+        except (OSError, BlockVerificationError):
+            self._invalidate(cid, entry)
+            return None
+        self._hit(cid)
+        return data
+
+    def _read_verified(self, path: Path, size: int, expected: str) -> bytes:
+        with open(path, "rb") as f:
+            if size >= self.mmap_threshold:
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as view:
+                    if len(view) != size or hashlib.sha256(view).hexdigest() != expected:
+                        raise BlockVerificationError(f"Corrupted cache block: {path.name}")
+                    return view[:]
+            data = f.read()
+        if len(data) != size or hashlib.sha256(data).hexdigest() != expected:
+            raise BlockVerificationError(f"Corrupted cache block: {path.name}")
+        return data
+
+    def open(self, cid: str) -> Optional[BinaryIO]:
+        """Avaa tarkistettu lohko luettavaksi tiedostona (virtalukijoille) tai None"""
+        entry, path = self._lookup(cid)
+        if entry is None:
+            return None
+        try:
+            handle = open(path, "rb")
+        except OSError:
+            self._invalidate(cid, entry)
+            return None
+        digest = hashlib.sha256()
+        for chunk in iter(lambda: handle.read(_COPY_SIZE), b""):
+            digest.update(chunk)
+        if digest.hexdigest() != entry[1]:
+            handle.close()
+            self._invalidate(cid, entry)
+            return None
+        handle.seek(0)
+        self._hit(cid)
+        return handle
+
+    # ------------------------------------------------------------------
+    # Lisäys ja poisto
+    # ------------------------------------------------------------------
+
+    def put(self, cid: str, data: bytes) -> bool:
+        """
+        Tallenna lohko (tarkistetaan raw-CID:tä vasten, jos mahdollista)
+
+        Returns:
+            True jos lohko tallennettiin
+
+        Raises:
+            BlockVerificationError: jos sisältö ei vastaa CID:tä
+        """
+        if len(data) > self.max_bytes:
+            return False
+        digest = hashlib.sha256(data)
+        return self._store(cid, digest, len(data), lambda f: f.write(data))
+
+    def put_stream(self, cid: str, stream: BinaryIO) -> bool:
+        """
+        Tallenna lohko virrasta ilman koko sisällön puskurointia muistiin
+
+        Kokorajan ylittävän virran luku lopetetaan heti rajan ylityttyä,
+        joten virta voi jäädä osittain luetuksi (palauttaa False).
+        """
+        digest = hashlib.sha256()
+        size = 0
+
+        def write(f):
+            nonlocal size
+            while size <= self.max_bytes:
+                chunk = stream.read(_COPY_SIZE)
+                if not chunk:
+                    break
+                digest.update(chunk)
+                size += len(chunk)
+                f.write(chunk)
+
+        return self._store(cid, digest, None, write, lambda: size)
+
+    def _store(self, cid: str, digest, size: Optional[int], writer: Callable,
+               size_after: Optional[Callable[[], int]] = None) -> bool:
+        path = self.path(cid)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_name(f".{cid}.{uuid.uuid4().hex}.tmp")
+        try:
+            with open(tmp_path, "wb") as f:
+                writer(f)
+            if size is None:
+                size = size_after()
+            if size > self.max_bytes:
+                return False
+
+            expected = raw_cid_digest(cid)
+            if expected is not None and digest.digest() != expected:
+                raise BlockVerificationError(f"Content does not match CID {cid}")
+
+            with self._lock:
+                os.replace(tmp_path, path)
+                self.conn.execute(
+                    "INSERT OR REPLACE INTO blocks (cid, size, sha256, last_access) VALUES (?, ?, ?, ?)",
+                    (cid, size, digest.hexdigest(), time.time())
+                )
+                self._evict()
+            return True
+        finally:
+            if tmp_path.exists():
+                tmp_path.unlink()
+
+    def _remove(self, cid: str):
+        self.conn.execute("DELETE FROM blocks WHERE cid = ?", (cid,))
+        try:
+            self.path(cid).unlink()
+        except FileNotFoundError:
+            pass
+
+    def _evict(self):
+        """Poista vähiten viimeksi käytetyt lohkot, kunnes koko on rajan alla"""
+        total = self.conn.execute("SELECT COALESCE(SUM(size), 0) FROM blocks").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        for cid, size in self.conn.execute(
+                "SELECT cid, size FROM blocks ORDER BY last_access").fetchall():
+            self._remove(cid)
+            total -= size
+            if total <= self.max_bytes:
+                break
+
+    def discard(self, cid: str):
+        """Poista lohko välimuistista"""
+        with self._lock:
+            self._remove(cid)
+
+    def clear(self):
+        """Tyhjennä välimuisti"""
+        with self._lock:
+            for (cid,) in self.conn.execute("SELECT cid FROM blocks").fetchall():
+                self._remove(cid)
+
+
+_caches: Dict[str, BlockCache] = {}
+_caches_lock = threading.Lock()
+
+
+def get_block_cache(cache_dir=DEFAULT_CACHE_DIR) -> BlockCache:
+    """Jaettu lohkovälimuisti hakemistolle (oletus data/ipfs_cache)"""
+    key = str(Path(cache_dir).resolve())
+    with _caches_lock:
+        cache = _caches.get(key)
+        if cache is None:
+            cache = _caches[key] = BlockCache(cache_dir)
+        return cache
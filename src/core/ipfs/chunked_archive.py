@@ -0,0 +1,329 @@
+# src/core/ipfs/chunked_archive.py
+"""
+Sisältöosoitteelliset paloitellut arkistot
+
+Arkisto on manifesti, joka listaa jokaisen tiedoston palat (CID + SHA-256)
+ja kaikkien palojen Merkle-juuren. Tietuelistat (questions, candidates,
+answers ...) pilkotaan sisältöpohjaisesti: palan raja määräytyy tietueen
+avaimen tiivisteestä, joten lisäys tai poisto muuttaa vain oman palansa.
+Muuttumattomat palat saavat saman tiivisteen ja CID:n versiosta toiseen:
+julkaisija lähettää vain uudet palat ja vastaanottaja hakee vain ne palat,
+joita sen oma data ei jo sisällä.
+
+Moduuli ei riipu tietystä IPFS-clientistä: julkaisu ja haku saavat
+put(payload) -> cid ja get(cid) -> payload -funktiot.
+"""
+import hashlib
+import json
+import shutil
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from ..file_utils import write_json_file
+from .record_index import canonical_hash, canonical_json, detect_key_fields, record_key
+
+ARCHIVE_TYPE = "chunked_archive"
+ARCHIVE_VERSION = "1.0"
+
+# Keskimääräinen palakoko tietueina (raja kun avaintiiviste % TARGET == 0) ja yläraja
+CHUNK_TARGET_RECORDS = 256
+CHUNK_MAX_RECORDS = 1024
+
+
+def is_chunked_archive(data: Any) -> bool:
+    """Onko data paloitellun arkiston manifesti"""
+    return isinstance(data, dict) and data.get("metadata", {}).get("type") == ARCHIVE_TYPE
+
+
+def merkle_root(leaf_hashes: List[str]) -> str:
+    """Binäärinen Merkle-juuri heksamuotoisista lehtitiivisteistä"""
+    if not leaf_hashes:
+        return hashlib.sha256(b"").hexdigest()
+    level = [bytes.fromhex(h) for h in leaf_hashes]
+    while len(level) > 1:
+        if len(level) % 2:
+            level.append(level[-1])
+        level = [hashlib.sha256(level[i] + level[i + 1]).digest() for i in range(0, len(level), 2)]
+    return level[0].hex()
+
+
+def _is_boundary(key: str, target: int) -> bool:
+    digest = hashlib.sha1(key.encode("utf-8")).digest()
+    return int.from_bytes(digest[:4], "big") % target == 0
+
+
+def split_records(records: List[Dict], fields: List[str], target: int = CHUNK_TARGET_RECORDS,
+                  max_records: int = CHUNK_MAX_RECORDS) -> List[List[Dict]]:
+    """Pilko tietuelista sisältöpohjaisiin paloihin"""
+    chunks = []
+    current = []
+    for record in records:
+        current.append(record)
+        if len(current) >= max_records or _is_boundary(record_key(record, fields), target):
+            chunks.append(current)
+            current = []
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+def chunk_files(files: Dict[str, Any], target: int = CHUNK_TARGET_RECORDS,
+                max_records: int = CHUNK_MAX_RECORDS,
+                hints: Optional[Dict[str, Dict[str, List[str]]]] = None) -> Tuple[Dict[str, Dict], Dict[str, Dict]]:
+    """
+    Pilko tiedostot paloiksi
+
+    Args:
+        hints: tiedosto -> {kokoelma: avainkentät} (edellisen manifestin avaimet)
+
+    Returns:
+        (tiedostojen rakenne palatiivisteinä, {tiiviste: palan sisältö})
+    """
+    layout = {}
+    chunks = {}
+
+    def add(payload: Dict) -> str:
+        chunk_hash = canonical_hash(payload)
+        chunks.setdefault(chunk_hash, payload)
+        return chunk_hash
+
+    for filename, data in files.items():
+        file_hints = (hints or {}).get(filename, {})
+        collections = {}
+        rest = data
+        if isinstance(data, dict):
+            rest = {}
+            for name, value in data.items():
+                fields = detect_key_fields(value, file_hints.get(name))
+                if fields:
+                    collections[name] = {
+                        "key": fields,
+                        "chunks": [add({"records": part})
+                                   for part in split_records(value, fields, target, max_records)]
+                    }
+                else:
+                    rest[name] = value
+
+        entry = {"document": add({"document": rest})}
+        if collections:
+            entry["collections"] = collections
+            entry["order"] = list(data.keys())
+        layout[filename] = entry
+
+    return layout, chunks
+
+
+def _iter_chunk_refs(files: Dict[str, Dict]):
+    """Manifestin palaviittaukset [cid, tiiviste] manifestin järjestyksessä"""
+    for filename in sorted(files):
+        entry = files[filename]
+        yield entry["document"]
+        for name in sorted(entry.get("collections", {})):
+            for ref in entry["collections"][name]["chunks"]:
+                yield ref
+
+
+def manifest_hints(manifest: Optional[Dict]) -> Dict[str, Dict[str, List[str]]]:
+    """Edellisen manifestin avainkentät pilkkomisen vihjeiksi"""
+    if not is_chunked_archive(manifest):
+        return {}
+    return {
+        filename: {name: c["key"] for name, c in entry.get("collections", {}).items()}
+        for filename, entry in manifest.get("files", {}).items()
+    }
+
+
+def known_chunks(manifest: Optional[Dict]) -> Dict[str, str]:
+    """Aiemmin julkaistut palat: tiiviste -> CID"""
+    if not is_chunked_archive(manifest):
+        return {}
+    return {chunk_hash: cid for cid, chunk_hash in _iter_chunk_refs(manifest.get("files", {}))}
+
+
+def build_manifest(files: Dict[str, Any], put: Callable[[Dict], str],
+                   previous_manifest: Optional[Dict] = None,
+                   metadata: Optional[Dict[str, Any]] = None,
+                   target: int = CHUNK_TARGET_RECORDS,
+                   max_records: int = CHUNK_MAX_RECORDS,
+                   journal: Optional[Dict[str, str]] = None,
+                   checkpoint: Optional[Callable[[], None]] = None) -> Tuple[Dict[str, Any], Dict[str, int]]:
+    """
+    Julkaise palat ja muodosta manifesti
+
+    Palat, jotka löytyvät edellisestä manifestista, käytetään uudelleen
+    lähettämättä niitä.
+
+    Keskeytyneen julkaisun jatkamiseksi jokainen lähetetty pala kirjataan
+    journal-sanakirjaan (tiiviste -> CID) ja checkpoint() kutsutaan sen
+    jälkeen. Seuraavalla yrityksellä journalin palat ohitetaan (resumed).
+
+    Returns:
+        (manifesti, tilastot: uploaded / reused / resumed / uploaded_bytes / total_bytes)
+    """
+    layout, chunks = chunk_files(files, target, max_records, manifest_hints(previous_manifest))
+    known = known_chunks(previous_manifest)
+
+    stats = {"chunks": len(chunks), "uploaded": 0, "reused": 0, "resumed": 0,
+             "uploaded_bytes": 0, "total_bytes": 0}
+    cids = {}
+    for chunk_hash, payload in chunks.items():
+        size = len(canonical_json(payload))
+        stats["total_bytes"] += size
+        cid = known.get(chunk_hash)
+        if cid:
+            stats["reused"] += 1
+        elif journal and chunk_hash in journal:
+            cid = journal[chunk_hash]
+            stats["resumed"] += 1
+        else:
+            cid = put(payload)
+            stats["uploaded"] += 1
+            stats["uploaded_bytes"] += size
+            if journal is not None:
+                journal[chunk_hash] = cid
+                if checkpoint:
+                    checkpoint()
+        cids[chunk_hash] = cid
+
+    def ref(chunk_hash: str) -> List[str]:
+        return [cids[chunk_hash], chunk_hash]
+
+    manifest_files = {}
+    for filename, entry in layout.items():
+        manifest_entry = {"document": ref(entry["document"])}
+        if "collections" in entry:
+            manifest_entry["collections"] = {
+                name: {"key": c["key"], "chunks": [ref(h) for h in c["chunks"]]}
+                for name, c in entry["collections"].items()
+            }
+            manifest_entry["order"] = entry["order"]
+        manifest_files[filename] = manifest_entry
+
+    leaf_hashes = [chunk_hash for _, chunk_hash in _iter_chunk_refs(manifest_files)]
+    manifest = {
+        "metadata": dict(metadata or {}, **{
+            "type": ARCHIVE_TYPE,
+            "version": ARCHIVE_VERSION,
+            "timestamp": datetime.now().isoformat(),
+            "file_count": len(files),
+            "chunk_count": len(chunks),
+            "total_size": stats["total_bytes"],
+            "merkle_root": merkle_root(leaf_hashes),
+            "chunking": {"target": target, "max_records": max_records}
+        }),
+        "files": manifest_files
+    }
+    return manifest, stats
+
+
+class ChunkSpool:
+    """
+    Haettujen palojen levytallennus keskeytyneen latauksen jatkamiseen
+
+    Palat tallennetaan tiivisteen mukaan nimettyinä, joten tallennus on
+    arkistosta riippumaton; luettu pala tarkistetaan tiivistettä vasten.
+    """
+
+    def __init__(self, directory: str):
+        self.directory = Path(directory)
+
+    def _path(self, chunk_hash: str) -> Path:
+        return self.directory / f"{chunk_hash}.json"
+
+    def get(self, chunk_hash: str) -> Optional[Dict]:
+        """Tallennettu pala tai None (puuttuu tai ei täsmää tiivisteeseen)"""
+        try:
+            payload = json.loads(self._path(chunk_hash).read_bytes())
+        except (OSError, ValueError):
+            return None
+        return payload if canonical_hash(payload) == chunk_hash else None
+
+    def put(self, chunk_hash: str, payload: Dict):
+        write_json_file(self._path(chunk_hash), payload, compact=True, skip_unchanged=False)
+
+    def clear(self):
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def __len__(self) -> int:
+        return len(list(self.directory.glob("*.json"))) if self.directory.exists() else 0
+
+
+def local_chunks(manifest: Dict, local_files: Optional[Dict[str, Any]]) -> Dict[str, Dict]:
+    """Pilko paikallinen data manifestin parametreilla: tiiviste -> pala"""
+    if not local_files:
+        return {}
+    chunking = manifest.get("metadata", {}).get("chunking", {})
+    _, chunks = chunk_files(local_files,
+                            chunking.get("target", CHUNK_TARGET_RECORDS),
+                            chunking.get("max_records", CHUNK_MAX_RECORDS),
+                            manifest_hints(manifest))
+    return chunks
+
+
+def assemble_files(manifest: Dict, get: Callable[[str], Dict],
+                   local_files: Optional[Dict[str, Any]] = None,
+                   spool: Optional[ChunkSpool] = None) -> Tuple[Dict[str, Any], Dict[str, int]]:
+    """
+    Kokoa tiedostot manifestista
+
+    Palat, jotka löytyvät paikallisesta datasta, otetaan sieltä; vain puuttuvat
+    haetaan get-funktiolla. Jokainen haettu pala ja Merkle-juuri tarkistetaan.
+    Jos spool on annettu, haetut palat tallennetaan siihen ja aiemmin
+    keskeytyneen latauksen palat luetaan sieltä (resumed).
+
+    Returns:
+        (tiedostot, tilastot: fetched / local / resumed / fetched_bytes)
+
+    Raises:
+        ValueError: jos manifesti tai pala ei täsmää tiivisteisiin
+    """
+    if not is_chunked_archive(manifest):
+        raise ValueError("Data is not a chunked archive manifest")
+
+    files = manifest.get("files", {})
+    leaf_hashes = [chunk_hash for _, chunk_hash in _iter_chunk_refs(files)]
+    if merkle_root(leaf_hashes) != manifest["metadata"].get("merkle_root"):
+        raise ValueError("Archive manifest Merkle root mismatch")
+
+    available = local_chunks(manifest, local_files)
+    stats = {"fetched": 0, "local": 0, "resumed": 0, "fetched_bytes": 0}
+
+    def load(ref: List[str]) -> Dict:
+        cid, chunk_hash = ref
+        payload = available.get(chunk_hash)
+        if payload is not None:
+            stats["local"] += 1
+            return payload
+        payload = spool.get(chunk_hash) if spool is not None else None
+        if payload is not None:
+            stats["resumed"] += 1
+            available[chunk_hash] = payload
+            return payload
+        payload = get(cid)
+        if not isinstance(payload, dict) or canonical_hash(payload) != chunk_hash:
+            raise ValueError(f"Chunk {cid} failed integrity check")
+        stats["fetched"] += 1
+        stats["fetched_bytes"] += len(canonical_json(payload))
+        available[chunk_hash] = payload
+        if spool is not None:
+            spool.put(chunk_hash, payload)
+        return payload
+
+    result = {}
+    for filename, entry in files.items():
+        document = load(entry["document"])["document"]
+        collections = entry.get("collections")
+        if not collections:
+            result[filename] = document
+            continue
+
+        parts = dict(document)
+        for name, collection in collections.items():
+            records = []
+            for ref in collection["chunks"]:
+                records.extend(load(ref)["records"])
+            parts[name] = records
+        result[filename] = {key: parts[key] for key in entry.get("order", parts)}
+
+    return result, stats
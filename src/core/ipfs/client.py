@@ -1,18 +1,29 @@
 # src/core/ipfs/client.py
 """
 Yksinkertaistettu IPFS-client - tukee uusia archive/delta moduuleja
+
+Haetut lohkot tallennetaan paikalliseen lohkovälimuistiin (block_cache):
+sama CID haetaan daemonilta vain kerran, ja välimuistissa olevat lohkot
+ovat luettavissa myös ilman IPFS-yhteyttä.
 """
+import hashlib
+import io
 import json
 import requests
-from typing import Dict, Any, Optional
+from typing import BinaryIO, Dict, Any, Optional
+
+from .block_cache import BlockCache, get_block_cache
 
 class IPFSClient:
     """Yksinkertaistettu IPFS-client uusille moduuleille"""
     
-    def __init__(self, api_url: str = "http://127.0.0.1:5001", timeout: int = 30):
+    def __init__(self, api_url: str = "http://127.0.0.1:5001", timeout: int = 30,
+                 block_cache: Optional[BlockCache] = None, use_cache: bool = True):
         self.api_url = api_url.rstrip("/")
         self.timeout = timeout
+        self.block_cache = block_cache or (get_block_cache() if use_cache else None)
         self.connected = self._test_connection()
+        self._mock_blobs: Dict[str, bytes] = {}
         
         if self.connected:
             print("✅ Connected to IPFS")
@@ -33,7 +44,8 @@ class IPFSClient:
             return self._mock_add(data)
         
         try:
-            files = {'file': ('data.json', json.dumps(data), 'application/json')}
+            content = json.dumps(data).encode('utf-8')
+            files = {'file': ('data.json', content, 'application/json')}
             response = requests.post(
                 f"{self.api_url}/api/v0/add",
                 files=files,
@@ -42,13 +54,17 @@ class IPFSClient:
             )
             response.raise_for_status()
             result = response.json()
+            self._cache_put(result['Hash'], content)
             return result['Hash']
         except Exception as e:
             print(f"IPFS add failed: {e}")
             return self._mock_add(data)
     
     def get_json(self, cid: str) -> Dict:
-        """Hae JSON-data IPFS:stä"""
+        """Hae JSON-data IPFS:stä (ensin lohkovälimuistista)"""
+        cached = self._cache_get(cid)
+        if cached is not None:
+            return json.loads(cached)
         if not self.connected:
             return self._mock_get(cid)
         
@@ -59,14 +75,83 @@ class IPFSClient:
                 timeout=self.timeout
             )
             response.raise_for_status()
-            return json.loads(response.text)
+            self._cache_put(cid, response.content)
+            return json.loads(response.content)
         except Exception as e:
             print(f"IPFS get failed: {e}")
             return self._mock_get(cid)
     
+    def add_stream(self, stream: BinaryIO, filename: str = "archive.ndjson") -> str:
+        """Lisää tiedosto-olion sisältö IPFS:ään (esim. pakattu arkisto)"""
+        if not self.connected:
+            return self._mock_add_bytes(stream.read())
+        
+        try:
+            files = {'file': (filename, stream, 'application/octet-stream')}
+            response = requests.post(
+                f"{self.api_url}/api/v0/add",
+                files=files,
+                params={'pin': 'true'},
+                timeout=self.timeout
+            )
+            response.raise_for_status()
+            cid = response.json()['Hash']
+            if self.block_cache is not None:
+                stream.seek(0)
+                self.block_cache.put_stream(cid, stream)
+            return cid
+        except Exception as e:
+            print(f"IPFS add failed: {e}")
+            stream.seek(0)
+            return self._mock_add_bytes(stream.read())
+    
+    def cat_stream(self, cid: str) -> BinaryIO:
+        """Hae sisältö virtana; kutsuja sulkee virran"""
+        if cid in self._mock_blobs:
+            return io.BytesIO(self._mock_blobs[cid])
+        if self.block_cache is not None:
+            cached = self.block_cache.open(cid)
+            if cached is not None:
+                return cached
+        if not self.connected:
+            return io.BytesIO(json.dumps(self._mock_get(cid)).encode('utf-8'))
+        
+        if self.block_cache is not None:
+            # Kirjoitetaan virta välimuistiin ja luetaan sieltä (ei koko sisältöä muistiin)
+            with self._cat_response(cid) as response:
+                stored = self.block_cache.put_stream(cid, response.raw)
+            cached = self.block_cache.open(cid) if stored else None
+            if cached is not None:
+                return cached
+        
+        # Välimuistin kokorajaa suurempi lohko luetaan suoraan verkosta
+        return self._cat_response(cid).raw
+    
+    def _cat_response(self, cid: str) -> requests.Response:
+        response = requests.post(
+            f"{self.api_url}/api/v0/cat",
+            params={'arg': cid},
+            timeout=self.timeout,
+            stream=True
+        )
+        response.raise_for_status()
+        response.raw.decode_content = True
+        return response
+    
+    def _cache_get(self, cid: str) -> Optional[bytes]:
+        return self.block_cache.get(cid) if self.block_cache is not None else None
+    
+    def _cache_put(self, cid: str, content: bytes):
+        if self.block_cache is not None:
+            self.block_cache.put(cid, content)
+    
+    def _mock_add_bytes(self, data: bytes) -> str:
+        cid = f"mock_{hashlib.md5(data).hexdigest()[:16]}"
+        self._mock_blobs[cid] = data
+        return cid
+    
     def _mock_add(self, data: Dict) -> str:
         """Mock-toteutus"""
-        import hashlib
         data_str = json.dumps(data, sort_keys=True)
         return f"mock_{hashlib.md5(data_str.encode()).hexdigest()[:16]}"
     
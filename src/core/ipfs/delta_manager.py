@@ -3,30 +3,94 @@
 Delta-päivitysten hallinta - lähettää vain muutokset täyden arkiston perusteella
 """
 import json
-import hashlib
 from datetime import datetime
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, List, Optional, Tuple
+
+from .digest_cache import DigestCache, digest_operation
+from .record_index import apply_patch, diff_document, index_document, index_files, root_hashes
+
+DELTA_VERSION_FILES = "1.0"
+DELTA_VERSION_RECORDS = "2.0"
+
 
 class DeltaManager:
     """Hallitsee delta-päivityksiä täyden arkiston perusteella"""
     
-    def __init__(self, client):
+    def __init__(self, client, digests: Optional[DigestCache] = None):
         self.client = client
+        # Tiedostojen koot ja tiivisteet lasketaan kerran operaatiota kohden
+        self.digests = digests or DigestCache()
+        # Perusarkistojen tietueindeksit CID:n mukaan (apply_delta_update)
+        self._base_indexes: Dict[str, Dict] = {}
     
-    def create_delta_update(self, current_files: Dict[str, Dict], 
-                          base_cid: str, 
-                          base_hashes: Dict[str, str]) -> str:
+    @digest_operation
+    def build_delta(self, current_files: Dict[str, Dict],
+                    base_cid: str,
+                    base_hashes: Dict[str, str],
+                    base_index: Optional[Dict[str, Dict]] = None) -> Tuple[Dict[str, Any], Dict[str, Dict]]:
         """
-        Luo delta-päivitys perustuen edelliseen täyteen arkistoon
+        Muodosta delta lähettämättä sitä
+        
+        Jos perusarkiston tietueindeksi on annettu, muuttuneista tiedostoista
+        lähetetään vain lisätyt, muuttuneet ja poistetut tietueet (versio 2.0).
+        Muuten verrataan kokonaisia tiedostoja (versio 1.0).
         
-        Args:
-            current_files: Nykyinen data
-            base_cid: Täyden arkiston CID
-            base_hashes: Täyden arkiston tiedostotiivisteet
-            
         Returns:
-            IPFS CID delta-päivitykselle
+            (delta, nykyinen tietueindeksi tai {})
         """
+        if base_index is None:
+            return self._build_file_delta(current_files, base_cid, base_hashes), {}
+        
+        changed_files = {}
+        record_deltas = {}
+        current_index = {}
+        record_changes = 0
+        
+        for filename, data in current_files.items():
+            base_entry = base_index.get(filename)
+            if base_entry is None:
+                current_index[filename] = index_document(data)
+                changed_files[filename] = data
+                print(f"   ➕ {filename} added")
+                continue
+            
+            status, patch, current_index[filename] = diff_document(base_entry, data)
+            if status == "replace":
+                changed_files[filename] = data
+                print(f"   📝 {filename} changed: {base_entry['root'][:8]}... → "
+                      f"{current_index[filename]['root'][:8]}...")
+            elif status == "patch":
+                record_deltas[filename] = patch
+                counts = [(len(c["upserts"]), len(c["removed"])) for c in patch["collections"].values()]
+                upserted = sum(u for u, _ in counts)
+                removed = sum(r for _, r in counts)
+                record_changes += upserted + removed
+                print(f"   📝 {filename}: {upserted} records changed, {removed} removed")
+        
+        deleted_files = [f for f in base_index if f not in current_files]
+        for filename in deleted_files:
+            print(f"   🗑️  {filename} deleted")
+        
+        delta = {
+            "metadata": {
+                "type": "delta_update",
+                "version": DELTA_VERSION_RECORDS,
+                "timestamp": datetime.now().isoformat(),
+                "base_cid": base_cid,
+                "changed_count": len(changed_files) + len(record_deltas),
+                "deleted_count": len(deleted_files),
+                "record_changes": record_changes
+            },
+            "changed_files": changed_files,
+            "record_deltas": record_deltas,
+            "deleted_files": deleted_files,
+            "current_hashes": root_hashes(current_index)
+        }
+        return delta, current_index
+    
+    def _build_file_delta(self, current_files: Dict[str, Dict], base_cid: str,
+                          base_hashes: Dict[str, str]) -> Dict[str, Any]:
+        """Tiedostotason delta (versio 1.0)"""
         # Laske nykyiset tiivisteet
         current_hashes = self._calculate_file_hashes(current_files)
         
@@ -38,7 +102,7 @@ class DeltaManager:
             
             if base_hash != current_hash:
                 changed_files[filename] = data
-                print(f"   📝 {filename} changed: {base_hash[:8]}... → {current_hash[:8]}...")
+                print(f"   📝 {filename} changed: {str(base_hash)[:8]}... → {current_hash[:8]}...")
         
         # Etsi poistetut tiedostot
         deleted_files = []
@@ -48,10 +112,10 @@ class DeltaManager:
                 print(f"   🗑️  {base_filename} deleted")
         
         # Luo delta
-        delta = {
+        return {
             "metadata": {
                 "type": "delta_update",
-                "version": "1.0",
+                "version": DELTA_VERSION_FILES,
                 "timestamp": datetime.now().isoformat(),
                 "base_cid": base_cid,
                 "changed_count": len(changed_files),
@@ -61,23 +125,48 @@ class DeltaManager:
             "deleted_files": deleted_files,
             "current_hashes": current_hashes
         }
+    
+    @digest_operation
+    def create_delta_update(self, current_files: Dict[str, Dict], 
+                          base_cid: str, 
+                          base_hashes: Dict[str, str],
+                          base_index: Optional[Dict[str, Dict]] = None,
+                          delta: Optional[Dict[str, Any]] = None) -> str:
+        """
+        Luo delta-päivitys perustuen edelliseen täyteen arkistoon
+        
+        Args:
+            current_files: Nykyinen data
+            base_cid: Täyden arkiston CID
+            base_hashes: Täyden arkiston tiedostotiivisteet
+            base_index: Täyden arkiston tietueindeksi (tietuetason delta)
+            delta: Valmiiksi muodostettu delta (build_delta)
+            
+        Returns:
+            IPFS CID delta-päivitykselle
+        """
+        if delta is None:
+            delta, _ = self.build_delta(current_files, base_cid, base_hashes, base_index)
         
         delta_size = len(json.dumps(delta, ensure_ascii=False).encode('utf-8'))
-        print(f"📋 Creating delta: {len(changed_files)} changed, {len(deleted_files)} deleted, "
-              f"{delta_size} bytes")
+        print(f"📋 Creating delta: {delta['metadata']['changed_count']} changed, "
+              f"{delta['metadata']['deleted_count']} deleted, {delta_size} bytes")
         
         cid = self.client.add_json(delta)
         print(f"✅ Delta created: {cid}")
         
         return cid
     
-    def apply_delta_update(self, base_files: Dict[str, Dict], delta_cid: str) -> Dict[str, Dict]:
+    @digest_operation
+    def apply_delta_update(self, base_files: Dict[str, Dict], delta_cid: str,
+                           base_index: Optional[Dict[str, Dict]] = None) -> Dict[str, Dict]:
         """
         Sovelta delta-päivitys täyteen arkistoon
         
         Args:
             base_files: Täyden arkiston data
             delta_cid: Delta-päivityksen CID
+            base_index: Täyden arkiston tietueindeksi (lasketaan tarvittaessa)
             
         Returns:
             Päivitetty data
@@ -89,6 +178,12 @@ class DeltaManager:
         if delta_data.get("metadata", {}).get("type") != "delta_update":
             raise ValueError(f"CID {delta_cid} is not a delta update")
         
+        if delta_data["metadata"].get("version") == DELTA_VERSION_RECORDS:
+            base_cid = delta_data["metadata"].get("base_cid")
+            if base_index is None:
+                base_index = self.get_base_index(base_cid, base_files)
+            return self._apply_record_delta(base_files, base_index, delta_data)
+        
         # Alusta tulos täydellä arkistolla
         result_files = base_files.copy()
         
@@ -116,42 +211,75 @@ class DeltaManager:
         print(f"✅ Delta applied: {len(result_files)} files total")
         return result_files
     
+    def get_base_index(self, base_cid: Optional[str], base_files: Dict[str, Dict]) -> Dict[str, Dict]:
+        """Perusarkiston tietueindeksi (lasketaan kerran per CID)"""
+        base_index = self._base_indexes.get(base_cid) if base_cid else None
+        if base_index is None:
+            base_index = index_files(base_files)
+            if base_cid:
+                self._base_indexes[base_cid] = base_index
+        return base_index
+    
+    def _apply_record_delta(self, base_files: Dict[str, Dict], base_index: Dict[str, Dict],
+                            delta_data: Dict[str, Any]) -> Dict[str, Dict]:
+        """Sovella tietuetason delta ja tarkista vain kosketut tietueet ja tiedostot"""
+        expected_hashes = delta_data.get("current_hashes", {})
+        result_files = base_files.copy()
+        
+        for filename, patch in delta_data.get("record_deltas", {}).items():
+            if filename not in base_files or "collections" not in base_index.get(filename, {}):
+                raise ValueError(f"Delta patch for unknown base file {filename}")
+            result_files[filename], file_index = apply_patch(base_files[filename], base_index[filename], patch)
+            if file_index["root"] != expected_hashes.get(filename):
+                raise ValueError(f"Integrity check failed for {filename}")
+            print(f"   🔄 Patched: {filename}")
+        
+        for filename, new_data in delta_data.get("changed_files", {}).items():
+            if index_document(new_data)["root"] != expected_hashes.get(filename):
+                raise ValueError(f"Integrity check failed for {filename}")
+            result_files[filename] = new_data
+            print(f"   🔄 Updated: {filename}")
+        
+        for filename in delta_data.get("deleted_files", []):
+            if filename in result_files:
+                del result_files[filename]
+                print(f"   🗑️  Deleted: {filename}")
+        
+        # Muuttumattomat tiedostot: juuri perusindeksistä, ei uudelleensarjallistusta
+        for filename, expected_hash in expected_hashes.items():
+            if filename not in result_files:
+                raise ValueError(f"Integrity check failed for {filename}")
+            touched = filename in delta_data.get("record_deltas", {}) or filename in delta_data.get("changed_files", {})
+            if not touched and base_index.get(filename, {}).get("root") != expected_hash:
+                raise ValueError(f"Integrity check failed for {filename}")
+        
+        print(f"✅ Delta applied: {len(result_files)} files total")
+        return result_files
+    
     def _calculate_file_hashes(self, data_files: Dict[str, Dict]) -> Dict[str, str]:
         """Laske tiedostojen SHA-256 tiivisteet"""
-        hashes = {}
-        for filename, data in data_files.items():
-            content = json.dumps(data, sort_keys=True, ensure_ascii=False)
-            file_hash = hashlib.sha256(content.encode('utf-8')).hexdigest()
-            hashes[filename] = file_hash
-        return hashes
+        return self.digests.file_hashes(data_files)
     
+    @digest_operation
     def calculate_delta_size_saving(self, current_files: Dict[str, Dict], 
-                                  base_hashes: Dict[str, str]) -> Dict[str, Any]:
+                                  base_hashes: Dict[str, str],
+                                  base_index: Optional[Dict[str, Dict]] = None,
+                                  delta: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
         """
         Laske kuinka paljon delta säästää tilaa
         
         Returns:
             Säästötilastot
         """
-        current_hashes = self._calculate_file_hashes(current_files)
+        if delta is None:
+            delta, _ = self.build_delta(current_files, None, base_hashes, base_index)
         
         # Laske täyden arkiston koko
-        full_size = len(json.dumps(current_files, ensure_ascii=False).encode('utf-8'))
+        full_size = self.digests.container_size(current_files)
         
-        # Laske deltan koko
-        changed_files = {}
-        for filename, data in current_files.items():
-            current_hash = current_hashes[filename]
-            if base_hashes.get(filename) != current_hash:
-                changed_files[filename] = data
-        
-        deleted_files = [f for f in base_hashes if f not in current_files]
-        
-        delta = {
-            "changed_files": changed_files,
-            "deleted_files": deleted_files
-        }
-        delta_size = len(json.dumps(delta, ensure_ascii=False).encode('utf-8'))
+        # Laske deltan koko (ilman aikaleimoja ja tiivisteitä, kuten ennenkin)
+        payload = {key: delta[key] for key in ("changed_files", "record_deltas", "deleted_files") if key in delta}
+        delta_size = len(json.dumps(payload, ensure_ascii=False).encode('utf-8'))
         
         saving_percent = ((full_size - delta_size) / full_size) * 100 if full_size > 0 else 0
         
@@ -160,6 +288,6 @@ class DeltaManager:
             "delta_size_bytes": delta_size,
             "saving_bytes": full_size - delta_size,
             "saving_percent": saving_percent,
-            "changed_files": len(changed_files),
-            "deleted_files": len(deleted_files)
+            "changed_files": len(delta.get("changed_files", {})) + len(delta.get("record_deltas", {})),
+            "deleted_files": len(delta.get("deleted_files", []))
         }
@@ -0,0 +1,101 @@
+# src/core/ipfs/digest_cache.py
+"""
+Dokumenttien kanonisen sarjallistuksen koko- ja tiivistevälimuisti
+
+Arkisto- ja deltamanagerit tarvitsevat saman dokumentin tiivisteen ja koon
+useaan kertaan saman synkronoinnin aikana (luonti, eheystarkistus, säästö-
+laskelma, deltan sovitus). DigestCache sarjallistaa jokaisen dokumentin
+kerran ja palauttaa saman tuloksen, kunnes uloin operaatio päättyy.
+
+Välimuisti on sidottu olion identiteettiin, joten se on voimassa vain
+operation()-lohkon sisällä: kutsuja voi muokata dokumentteja vapaasti
+operaatioiden välissä ilman vanhentuneita tiivisteitä.
+
+Tiivisteformaatti on sama kuin aiemmin julkaistuissa arkistoissa
+(json.dumps(sort_keys=True, ensure_ascii=False)), joten vanhat
+file_hashes- ja base_hashes-arvot pysyvät vertailukelpoisina.
+"""
+import functools
+import hashlib
+import json
+from contextlib import contextmanager
+from typing import Any, Dict, NamedTuple, Tuple
+
+
+class DocumentDigest(NamedTuple):
+    """Dokumentin sarjallistuksen koko tavuina ja SHA-256"""
+    size: int
+    sha256: str
+
+
+def document_digest(value: Any) -> DocumentDigest:
+    """Sarjallista dokumentti kerran ja laske siitä koko ja tiiviste"""
+    content = json.dumps(value, sort_keys=True, ensure_ascii=False).encode("utf-8")
+    return DocumentDigest(len(content), hashlib.sha256(content).hexdigest())
+
+
+def _key_size(key: str) -> int:
+    return len(json.dumps(key, ensure_ascii=False).encode("utf-8"))
+
+
+class DigestCache:
+    """Operaatiokohtainen dokumenttitiivisteiden välimuisti"""
+
+    def __init__(self):
+        self._entries: Dict[int, Tuple[Any, DocumentDigest]] = {}
+        self._depth = 0
+        self.hits = 0
+        self.misses = 0
+
+    @contextmanager
+    def operation(self):
+        """Välimuisti on voimassa uloimman operaation loppuun (sisäkkäiset jakavat sen)"""
+        self._depth += 1
+        try:
+            yield self
+        finally:
+            self._depth -= 1
+            if self._depth == 0:
+                self._entries.clear()
+
+    def digest(self, value: Any) -> DocumentDigest:
+        """Dokumentin koko ja tiiviste; operaation sisällä lasketaan kerran"""
+        if self._depth == 0:
+            self.misses += 1
+            return document_digest(value)
+
+        entry = self._entries.get(id(value))
+        if entry is not None and entry[0] is value:
+            self.hits += 1
+            return entry[1]
+
+        self.misses += 1
+        digest = document_digest(value)
+        # Viite olioon pitää id:n yksilöllisenä operaation ajan
+        self._entries[id(value)] = (value, digest)
+        return digest
+
+    def file_hashes(self, files: Dict[str, Any]) -> Dict[str, str]:
+        """Tiedostojen SHA-256 tiivisteet"""
+        return {filename: self.digest(data).sha256 for filename, data in files.items()}
+
+    def total_size(self, files: Dict[str, Any]) -> int:
+        """Tiedostojen sarjallistusten yhteiskoko (avainten järjestys ei vaikuta kokoon)"""
+        return sum(self.digest(data).size for data in files.values())
+
+    def container_size(self, files: Dict[str, Any]) -> int:
+        """json.dumps(files, ensure_ascii=False) -tuloksen koko ilman uutta sarjallistusta"""
+        if not files:
+            return 2
+        # {"nimi": <dokumentti>, ...}: sulut, avaimet, ": " ja ", " -erottimet
+        return (2 + 2 * (len(files) - 1)
+                + sum(_key_size(filename) + 2 + self.digest(data).size for filename, data in files.items()))
+
+
+def digest_operation(method):
+    """Metodidekoraattori: suorita metodi self.digests.operation()-lohkossa"""
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        with self.digests.operation():
+            return method(self, *args, **kwargs)
+    return wrapper
@@ -0,0 +1,234 @@
+# src/core/ipfs/http_client.py
+"""
+Poolattu IPFS HTTP -client (Kubo API) rinnakkaisilla erä-API:lla
+
+- Yksi requests.Session, jonka yhteyspooli pitää keep-alive-yhteydet auki
+- Rinnakkaisuus rajataan säiepoolin koolla (max_workers)
+- Ohimenevät virheet (yhteysvirhe, aikakatkaisu, 429, 5xx) yritetään
+  uudelleen eksponentiaalisella viiveellä ja satunnaisella jitterillä
+- Yhteyttä ei testata konstruktorissa; is_available() tarkistaa sen
+  ensimmäisellä kutsulla ja muistaa tuloksen
+- Haetut ja lisätyt lohkot tallennetaan paikalliseen lohkovälimuistiin
+  (block_cache), joten samaa CID:tä ei haeta daemonilta uudelleen
+"""
+import json
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple, Union
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from ..error_handling import ElectionSystemError
+from .block_cache import BlockCache, get_block_cache
+
+DEFAULT_API_URL = "http://127.0.0.1:5001"
+DEFAULT_TIMEOUT = 30
+DEFAULT_MAX_WORKERS = 8
+DEFAULT_MAX_RETRIES = 3
+DEFAULT_BACKOFF_BASE = 0.25
+DEFAULT_BACKOFF_MAX = 8.0
+
+RETRY_STATUS_CODES = frozenset({429, 500, 502, 503, 504})
+
+# add_many-alkio: tavut, merkkijono, JSON-olio tai (tiedostonimi, sisältö[, content-type])
+AddItem = Union[bytes, str, Dict[str, Any], Tuple]
+
+
+class IPFSRequestError(ElectionSystemError):
+    """IPFS API -kutsu epäonnistui kaikkien uudelleenyritysten jälkeen"""
+    pass
+
+
+class PooledIPFSClient:
+    """Säiepoolilla rinnakkaistettu IPFS HTTP -client"""
+
+    def __init__(self, api_url: str = DEFAULT_API_URL, timeout: float = DEFAULT_TIMEOUT,
+                 max_workers: int = DEFAULT_MAX_WORKERS, max_retries: int = DEFAULT_MAX_RETRIES,
+                 backoff_base: float = DEFAULT_BACKOFF_BASE, backoff_max: float = DEFAULT_BACKOFF_MAX,
+                 pin: bool = True, block_cache: Optional[BlockCache] = None, use_cache: bool = True):
+        self.api_url = api_url.rstrip("/")
+        self.timeout = timeout
+        self.max_workers = max(1, int(max_workers))
+        self.max_retries = max(0, int(max_retries))
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.pin = pin
+        self.block_cache = block_cache or (get_block_cache() if use_cache else None)
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.max_workers)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._executor_lock = threading.Lock()
+        self._available: Optional[bool] = None
+
+    # ------------------------------------------------------------------
+    # Elinkaari
+    # ------------------------------------------------------------------
+
+    @property
+    def executor(self) -> ThreadPoolExecutor:
+        with self._executor_lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.max_workers,
+                                                    thread_name_prefix="ipfs-http")
+            return self._executor
+
+    def close(self):
+        """Sulje säiepooli ja yhteydet"""
+        with self._executor_lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=True)
+                self._executor = None
+        self.session.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    # ------------------------------------------------------------------
+    # HTTP ja uudelleenyritykset
+    # ------------------------------------------------------------------
+
+    def backoff_delay(self, attempt: int) -> float:
+        """Viive ennen uudelleenyritystä (full jitter): satunnainen 0..min(max, base * 2^attempt)"""
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+
+    def _post(self, endpoint: str, params: Optional[Dict[str, Any]] = None,
+              files_factory: Optional[Callable[[], Dict]] = None,
+              timeout: Optional[float] = None, retries: Optional[int] = None) -> requests.Response:
+        url = f"{self.api_url}/api/v0/{endpoint}"
+        retries = self.max_retries if retries is None else retries
+        last_error = None
+        for attempt in range(retries + 1):
+            if attempt:
+                time.sleep(self.backoff_delay(attempt - 1))
+            try:
+                response = self.session.post(
+                    url,
+                    params=params,
+                    files=files_factory() if files_factory else None,
+                    timeout=timeout or self.timeout
+                )
+            except (requests.ConnectionError, requests.Timeout) as e:
+                last_error = e
+                continue
+            if response.status_code in RETRY_STATUS_CODES:
+                last_error = requests.HTTPError(f"{response.status_code} {response.reason}", response=response)
+                response.close()
+                continue
+            try:
+                response.raise_for_status()
+            except requests.HTTPError as e:
+                raise IPFSRequestError(f"IPFS {endpoint} failed: {e}") from e
+            return response
+        raise IPFSRequestError(f"IPFS {endpoint} failed after {retries + 1} attempts: {last_error}")
+
+    # ------------------------------------------------------------------
+    # Yksittäiset kutsut
+    # ------------------------------------------------------------------
+
+    def version(self) -> Dict[str, Any]:
+        """Kubo-solmun versiotiedot (ei uudelleenyrityksiä: käytetään saatavuuden tarkistukseen)"""
+        return self._post("version", timeout=min(5, self.timeout), retries=0).json()
+
+    def is_available(self, refresh: bool = False) -> bool:
+        """Onko IPFS-solmu saatavilla (tarkistetaan kerran ja muistetaan)"""
+        if self._available is None or refresh:
+            try:
+                self.version()
+                self._available = True
+            except IPFSRequestError:
+                self._available = False
+        return self._available
+
+    def add_bytes(self, data: bytes, filename: str = "data",
+                  content_type: str = "application/octet-stream") -> str:
+        """Lisää raakadata; palauttaa CID:n"""
+        response = self._post(
+            "add",
+            params={"pin": "true" if self.pin else "false"},
+            files_factory=lambda: {"file": (filename, data, content_type)}
+        )
+        cid = response.json()["Hash"]
+        if self.block_cache is not None:
+            self.block_cache.put(cid, data)
+        return cid
+
+    def add_json(self, data: Any, filename: str = "data.json") -> str:
+        """Lisää JSON-olio tiiviissä muodossa; palauttaa CID:n"""
+        content = json.dumps(data, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+        return self.add_bytes(content, filename, "application/json")
+
+    def cat(self, cid: str) -> bytes:
+        """Hae sisältö CID:llä (ensin lohkovälimuistista)"""
+        if self.block_cache is not None:
+            cached = self.block_cache.get(cid)
+            if cached is not None:
+                return cached
+        content = self._post("cat", params={"arg": cid}).content
+        if self.block_cache is not None:
+            self.block_cache.put(cid, content)
+        return content
+
+    def get_json(self, cid: str) -> Any:
+        """Hae ja jäsennä JSON-sisältö"""
+        return json.loads(self.cat(cid))
+
+    # ------------------------------------------------------------------
+    # Erä-API:t
+    # ------------------------------------------------------------------
+
+    def _normalize(self, item: AddItem, index: int) -> Tuple[bytes, str, str]:
+        """add_bytes-argumentit (sisältö, tiedostonimi, content-type)"""
+        if isinstance(item, tuple):
+            filename, content = item[0], item[1]
+            content_type = item[2] if len(item) > 2 else "application/octet-stream"
+        else:
+            filename, content, content_type = f"item_{index}", item, "application/octet-stream"
+        if isinstance(content, str):
+            content = content.encode("utf-8")
+        elif not isinstance(content, (bytes, bytearray)):
+            content = json.dumps(content, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+            content_type = "application/json"
+        return bytes(content), filename, content_type
+
+    def _gather(self, func: Callable, args: List[Tuple], return_exceptions: bool) -> List[Any]:
+        futures = [self.executor.submit(func, *a) for a in args]
+        results = []
+        first_error = None
+        for future in futures:
+            try:
+                results.append(future.result())
+            except Exception as e:
+                if not return_exceptions and first_error is None:
+                    first_error = e
+                results.append(e)
+        if first_error is not None:
+            raise first_error
+        return results
+
+    def add_many(self, items: Iterable[AddItem], return_exceptions: bool = False) -> List[Union[str, Exception]]:
+        """
+        Lisää monta sisältöä rinnakkain
+
+        Args:
+            items: tavut, merkkijonot, JSON-oliot tai (tiedostonimi, sisältö[, content-type])
+            return_exceptions: palauta virheet listassa sen sijaan että nostetaan ensimmäinen
+
+        Returns:
+            CID:t syötteen järjestyksessä
+        """
+        args = [self._normalize(item, i) for i, item in enumerate(items)]
+        return self._gather(self.add_bytes, args, return_exceptions)
+
+    def cat_many(self, cids: Iterable[str], return_exceptions: bool = False) -> List[Union[bytes, Exception]]:
+        """Hae monta CID:tä rinnakkain; tulokset syötteen järjestyksessä"""
+        return self._gather(self.cat, [(cid,) for cid in cids], return_exceptions)
@@ -0,0 +1,253 @@
+# src/core/ipfs/record_index.py
+"""
+Tietuetason tiivistepuu synkronoitaville JSON-tiedostoille
+
+Tiedoston tietuelistat (questions, candidates, parties, answers ...) tunnistetaan
+pysyvän avaimen perusteella, ja jokaiselle tietueelle lasketaan oma tiiviste.
+Tiedoston juuritiiviste lasketaan tietuetiivisteistä, joten muutoksen jälkeen
+uudelleen sarjallistetaan vain muuttuneet tietueet.
+
+Indeksin muoto (JSON-yhteensopiva, tallennetaan synkronointitilaan):
+    {"root": ..., "rest": ..., "collections": {nimi: {"key": [kentät], "records": {avain: tiiviste}}}}
+Tiedostot, joissa ei ole tunnistettavia tietuelistoja, indeksoidaan pelkällä juurella.
+"""
+import hashlib
+import json
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+# Avainehdokkaat tärkeysjärjestyksessä; ensimmäinen kaikille tietueille yksilöllinen valitaan
+KEY_CANDIDATES = (
+    ("id",),
+    ("local_id",),
+    ("candidate_id",),
+    ("party_id",),
+    ("candidate_id", "question_id"),
+)
+
+
+def canonical_json(value: Any) -> bytes:
+    """Kanoninen sarjallistus tiivisteitä varten (järjestetyt avaimet, ei välilyöntejä)"""
+    return json.dumps(value, sort_keys=True, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def canonical_hash(value: Any) -> str:
+    """SHA-256 kanonisesta sarjallistuksesta"""
+    return hashlib.sha256(canonical_json(value)).hexdigest()
+
+
+def record_key(record: Dict, fields: List[str]) -> str:
+    """Tietueen avain merkkijonona (yhdistelmäavain JSON-listana)"""
+    if len(fields) == 1:
+        return str(record[fields[0]])
+    return json.dumps([record[field] for field in fields], ensure_ascii=False)
+
+
+def _valid_key(records: List[Dict], fields: Iterable[str]) -> bool:
+    fields = list(fields)
+    seen = set()
+    for record in records:
+        if not all(isinstance(record.get(field), (str, int)) and record.get(field) != "" for field in fields):
+            return False
+        key = record_key(record, fields)
+        if key in seen:
+            return False
+        seen.add(key)
+    return True
+
+
+def detect_key_fields(records: Any, hint: Optional[List[str]] = None) -> Optional[List[str]]:
+    """
+    Valitse tietuelistalle pysyvä avain
+
+    Args:
+        hint: aiemmin käytetty avain, jota suositaan jos se on yhä kelvollinen
+
+    Returns:
+        Avainkentät tai None jos lista ei ole tietuelista
+    """
+    if not isinstance(records, list) or not records or not all(isinstance(r, dict) for r in records):
+        return None
+    candidates = ([tuple(hint)] if hint else []) + list(KEY_CANDIDATES)
+    for fields in candidates:
+        if _valid_key(records, fields):
+            return list(fields)
+    return None
+
+
+def collection_root(name: str, fields: List[str], record_hashes: Dict[str, str]) -> str:
+    """Kokoelman tiiviste avain-tiiviste-pareista (järjestys merkitsee)"""
+    digest = hashlib.sha256()
+    digest.update(canonical_json([name, fields]))
+    for key, record_hash in record_hashes.items():
+        digest.update(key.encode("utf-8"))
+        digest.update(b"\x00")
+        digest.update(record_hash.encode("ascii"))
+    return digest.hexdigest()
+
+
+def document_root(rest_hash: str, collections: Dict[str, Dict]) -> str:
+    """Tiedoston juuritiiviste muiden kenttien ja kokoelmien tiivisteistä"""
+    digest = hashlib.sha256(b"records:" + rest_hash.encode("ascii"))
+    for name in sorted(collections):
+        collection = collections[name]
+        digest.update(collection_root(name, collection["key"], collection["records"]).encode("ascii"))
+    return digest.hexdigest()
+
+
+def _split(document: Dict, hints: Dict[str, List[str]]) -> Tuple[Dict[str, List[str]], Dict]:
+    """Erottele tietuelistat (nimi -> avain) ja muut kentät"""
+    keys = {}
+    rest = {}
+    for name, value in document.items():
+        fields = detect_key_fields(value, hints.get(name))
+        if fields:
+            keys[name] = fields
+        else:
+            rest[name] = value
+    return keys, rest
+
+
+def index_document(document: Any, hints: Optional[Dict[str, List[str]]] = None) -> Dict:
+    """Laske tiedoston tietuetason indeksi"""
+    if not isinstance(document, dict):
+        return {"root": canonical_hash(document)}
+
+    keys, rest = _split(document, hints or {})
+    if not keys:
+        return {"root": canonical_hash(document)}
+
+    collections = {}
+    for name, fields in keys.items():
+        collections[name] = {
+            "key": fields,
+            "records": {record_key(r, fields): canonical_hash(r) for r in document[name]}
+        }
+    rest_hash = canonical_hash(rest)
+    return {
+        "root": document_root(rest_hash, collections),
+        "rest": rest_hash,
+        "collections": collections
+    }
+
+
+def index_files(files: Dict[str, Any]) -> Dict[str, Dict]:
+    """Indeksoi kaikki tiedostot"""
+    return {filename: index_document(data) for filename, data in files.items()}
+
+
+def root_hashes(index: Dict[str, Dict]) -> Dict[str, str]:
+    """Tiedostojen juuritiivisteet indeksistä"""
+    return {filename: entry["root"] for filename, entry in index.items()}
+
+
+def diff_document(base_index: Dict, document: Any) -> Tuple[str, Optional[Dict], Dict]:
+    """
+    Vertaa tiedostoa perusindeksiin
+
+    Returns:
+        (tila, patch, uusi indeksi) missä tila on 'unchanged', 'patch' tai 'replace'.
+        'replace' tarkoittaa, että tiedosto lähetetään kokonaan (rakenne muuttui).
+    """
+    hints = {name: c["key"] for name, c in base_index.get("collections", {}).items()}
+    new_index = index_document(document, hints)
+    if new_index["root"] == base_index.get("root"):
+        return "unchanged", None, new_index
+
+    base_collections = base_index.get("collections")
+    new_collections = new_index.get("collections")
+    if not base_collections or not new_collections or set(base_collections) != set(new_collections):
+        return "replace", None, new_index
+
+    patch = {"collections": {}, "record_hashes": {}}
+    if new_index["rest"] != base_index["rest"]:
+        patch["rest"] = {k: v for k, v in document.items() if k not in new_collections}
+
+    for name, collection in new_collections.items():
+        base = base_collections[name]
+        if collection["key"] != base["key"]:
+            return "replace", None, new_index
+
+        base_hashes = base["records"]
+        new_hashes = collection["records"]
+        upserts = {}
+        for record in document[name]:
+            key = record_key(record, collection["key"])
+            if base_hashes.get(key) != new_hashes[key]:
+                upserts[key] = record
+        removed = [key for key in base_hashes if key not in new_hashes]
+
+        # Järjestys, joka syntyy kun poistot ja lisäykset tehdään paikallaan
+        removed_set = set(removed)
+        expected_order = [k for k in base_hashes if k not in removed_set]
+        expected_order += [k for k in upserts if k not in base_hashes]
+        order = list(new_hashes) if expected_order != list(new_hashes) else None
+
+        if upserts or removed or order:
+            entry = {"key": collection["key"], "upserts": upserts, "removed": removed}
+            if order:
+                entry["order"] = order
+            patch["collections"][name] = entry
+            patch["record_hashes"][name] = {key: new_hashes[key] for key in upserts}
+
+    return "patch", patch, new_index
+
+
+def apply_patch(document: Dict, base_index: Dict, patch: Dict) -> Tuple[Dict, Dict]:
+    """
+    Sovella tietuetason patch ja tarkista vain muuttuneet tietueet
+
+    Muuttumattomien tietueiden tiivisteet otetaan perusindeksistä, joten niitä
+    ei sarjallisteta uudelleen.
+
+    Returns:
+        (uusi dokumentti, uusi indeksi)
+
+    Raises:
+        ValueError: jos muuttuneen tietueen tiiviste ei täsmää
+    """
+    result = dict(document)
+    collections = {name: {"key": c["key"], "records": dict(c["records"])}
+                   for name, c in base_index["collections"].items()}
+
+    rest_hash = base_index["rest"]
+    if "rest" in patch:
+        for name in list(result):
+            if name not in collections:
+                del result[name]
+        result.update(patch["rest"])
+        rest_hash = canonical_hash(patch["rest"])
+
+    for name, change in patch.get("collections", {}).items():
+        collection = collections[name]
+        fields = collection["key"]
+        hashes = collection["records"]
+        expected = patch.get("record_hashes", {}).get(name, {})
+
+        records = {record_key(r, fields): r for r in document.get(name, [])}
+        for key in change.get("removed", []):
+            records.pop(key, None)
+            hashes.pop(key, None)
+        for key, record in change.get("upserts", {}).items():
+            record_hash = canonical_hash(record)
+            if record_key(record, fields) != key or expected.get(key) != record_hash:
+                raise ValueError(f"Integrity check failed for record {name}/{key}")
+            records[key] = record
+            hashes[key] = record_hash
+
+        order = change.get("order")
+        if order:
+            if set(order) != set(records):
+                raise ValueError(f"Integrity check failed for record order in {name}")
+            hashes = {key: hashes[key] for key in order}
+            collection["records"] = hashes
+            result[name] = [records[key] for key in order]
+        else:
+            result[name] = list(records.values())
+            collection["records"] = {key: hashes[key] for key in records}
+
+    new_index = {
+        "root": document_root(rest_hash, collections),
+        "rest": rest_hash,
+        "collections": collections
+    }
+    return result, new_index
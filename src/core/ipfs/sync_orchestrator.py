@@ -1,35 +1,74 @@
 # src/core/ipfs/sync_orchestrator.py
 """
 Synkronointi orkestraattori - hallitsee täydet arkistot ja delta-päivitykset
+
+Täyden arkiston julkaisu on jatkettavissa: jokainen lähetetty pala kirjataan
+synkronointitilan journaliin (pending_upload), joten keskeytynyt julkaisu
+jatkuu seuraavalla kerralla viimeisestä vahvistetusta palasta.
+
+Lataus (load_data) on jatkettavissa samoin: haetut palat tallennetaan
+levylle (<id>_chunks) ja keskeneräinen lataus kirjataan tilaan
+(pending_load). Jos haku tai delta-päivityksen soveltaminen epäonnistuu,
+seuraava yritys hakee vain puuttuvat palat.
+
+Deltat lasketaan aina viimeisintä perusarkistoa vasten, joten jokainen
+delta sisältää kaikki muutokset perusarkiston jälkeen. Kun uusin delta
+ylittää promote_ratio-osuuden perusarkiston koosta, data julkaistaan
+uutena perusarkistona.
 """
 import json
+import time
 from datetime import datetime
 from typing import Dict, Any, Optional, Tuple
 from pathlib import Path
 
+from ..file_utils import read_json_file, write_json_file
 from .archive_manager import ArchiveManager
+from .chunked_archive import ChunkSpool
 from .delta_manager import DeltaManager
+from .digest_cache import DigestCache, digest_operation
+from .record_index import index_files
+
+DEFAULT_PROMOTE_RATIO = 0.5
+# Journal tallennetaan levylle enintään näin usein (sekuntia); virhe tallentaa aina
+CHECKPOINT_INTERVAL = 1.0
 
 class SyncOrchestrator:
     """
     Orkestroi koko synkronointiprosessin
     - Ensimmäinen synkronointi: Täysi arkisto
     - Seuraavat synkronointit: Delta-päivitykset
+    - Pitkä deltaketju: uusi täysi perusarkisto
     """
     
-    def __init__(self, election_id: str, client):
+    def __init__(self, election_id: str, client, codec: Optional[str] = None,
+                 promote_ratio: Optional[float] = DEFAULT_PROMOTE_RATIO):
         self.election_id = election_id
         self.client = client
+        # Deltan koko suhteessa perusarkistoon, jonka jälkeen tehdään täysi synkronointi
+        # (None = ei koskaan)
+        self.promote_ratio = promote_ratio
+        self._last_checkpoint = 0.0
         
-        # Alusta managerit
-        self.archive_manager = ArchiveManager(client)
-        self.delta_manager = DeltaManager(client)
+        # Alusta managerit; arkistojen koodaus neuvotellaan clientin ja ympäristön mukaan.
+        # Managerit jakavat tiivistevälimuistin, joten synkronoinnin aikana
+        # jokainen tiedosto sarjallistetaan tiivistettä varten vain kerran.
+        self.digests = DigestCache()
+        self.archive_manager = ArchiveManager(client, codec, self.digests)
+        self.delta_manager = DeltaManager(client, self.digests)
         
         # Synkronointitila
         self.sync_state_file = Path(f"data/sync_state/{election_id}_orchestrator.json")
         self.sync_state_file.parent.mkdir(parents=True, exist_ok=True)
         self.sync_state = self._load_sync_state()
+        
+        # Perusarkiston tietuetason tiivisteet (voi olla suuri, siksi oma tiedosto)
+        self.base_index_file = self.sync_state_file.with_name(f"{election_id}_base_index.json")
+        
+        # Keskeytyneen latauksen jo haetut palat
+        self.chunk_spool = ChunkSpool(self.sync_state_file.with_name(f"{election_id}_chunks"))
     
+    @digest_operation
     def sync_data(self, data_files: Dict[str, Dict], force_full_sync: bool = False) -> str:
         """
         Päätä synkronointistrategia ja suorita synkronointi
@@ -43,6 +82,7 @@ class SyncOrchestrator:
         """
         print(f"🔄 Starting sync for {self.election_id}")
         print(f"   Files: {list(data_files.keys())}")
+        print(f"   Codec: {self.archive_manager.codec}")
         
         if force_full_sync or not self.sync_state.get("last_base_cid"):
             # TÄYSI SYNKRONOINTI - ensimmäinen kerta tai pakotettu
@@ -51,47 +91,95 @@ class SyncOrchestrator:
             # DELTA SYNKRONOINTI - normaali päivitys
             return self._perform_delta_sync(data_files)
     
-    def _perform_full_sync(self, data_files: Dict[str, Dict]) -> str:
-        """Suorita täysi synkronointi"""
-        print("🎯 Strategy: FULL SYNC")
+    def _perform_full_sync(self, data_files: Dict[str, Dict], promoted: bool = False) -> str:
+        """Suorita täysi synkronointi (jatkaa keskeytynyttä julkaisua journalista)"""
+        print("🎯 Strategy: FULL SYNC" + (" (delta chain promoted)" if promoted else ""))
         
-        # Luo täysi arkisto
-        base_cid = self.archive_manager.create_full_archive(data_files)
+        pending = self.sync_state.setdefault("pending_upload", {
+            "started": datetime.now().isoformat(),
+            "chunks": {}
+        })
+        if pending["chunks"]:
+            print(f"   ⏯️  Resuming upload: {len(pending['chunks'])} chunks already confirmed")
+        
+        # Luo paloiteltu täysi arkisto; edellisen perusarkiston muuttumattomat palat käytetään uudelleen
+        try:
+            base_cid = self.archive_manager.create_chunked_archive(
+                data_files, self.sync_state.get("last_base_cid"),
+                journal=pending["chunks"], checkpoint=self._checkpoint)
+        except Exception:
+            # Vahvistetut palat talteen seuraavaa yritystä varten
+            self._save_sync_state()
+            raise
+        
+        # Tallenna tietueindeksi seuraavia deltoja varten
+        self._save_base_index(base_cid, index_files(data_files))
         
         # Päivitä synkronointitila
+        del self.sync_state["pending_upload"]
         self.sync_state.update({
             "last_base_cid": base_cid,
             "base_hashes": self.archive_manager._calculate_file_hashes(data_files),
+            "base_size_bytes": self.digests.total_size(data_files),
+            "deltas_since_base": 0,
+            "last_delta_size_bytes": 0,
             "last_full_sync": datetime.now().isoformat(),
             "file_count": len(data_files),
+            "codec": self.archive_manager.codec,
             "sync_count": self.sync_state.get("sync_count", 0) + 1
         })
+        if promoted:
+            self.sync_state["promotion_count"] = self.sync_state.get("promotion_count", 0) + 1
         
         self._save_sync_state()
         
         print(f"✅ Full sync completed: {base_cid}")
         return base_cid
     
+    def _checkpoint(self):
+        """Tallenna julkaisun edistyminen (harvennettuna)"""
+        now = time.monotonic()
+        if now - self._last_checkpoint >= CHECKPOINT_INTERVAL:
+            self._save_sync_state()
+            self._last_checkpoint = now
+    
+    def _should_promote(self, delta_size: int) -> bool:
+        """Ylittääkö delta perusarkiston kynnyksen? (delta on jo kumulatiivinen)"""
+        base_size = self.sync_state.get("base_size_bytes")
+        if self.promote_ratio is None or not base_size:
+            return False
+        return delta_size > self.promote_ratio * base_size
+    
     def _perform_delta_sync(self, data_files: Dict[str, Dict]) -> str:
         """Suorita delta-synkronointi"""
         print("🎯 Strategy: DELTA SYNC")
         
         base_cid = self.sync_state["last_base_cid"]
         base_hashes = self.sync_state["base_hashes"]
+        base_index = self._load_base_index(base_cid)
+        
+        # Muodosta delta kerran: tietuetasolla jos perusindeksi on tallessa
+        delta, _ = self.delta_manager.build_delta(data_files, base_cid, base_hashes, base_index)
         
         # Laske säästöt
-        savings = self.delta_manager.calculate_delta_size_saving(data_files, base_hashes)
+        savings = self.delta_manager.calculate_delta_size_saving(data_files, base_hashes, delta=delta)
         print(f"   💰 Size saving: {savings['saving_percent']:.1f}% "
               f"({savings['saving_bytes']} bytes)")
         
+        if self._should_promote(savings["delta_size_bytes"]):
+            print(f"   ⏫ Delta chain exceeds {self.promote_ratio:.0%} of base size, publishing new base")
+            return self._perform_full_sync(data_files, promoted=True)
+        
         # Luo delta-päivitys
-        delta_cid = self.delta_manager.create_delta_update(data_files, base_cid, base_hashes)
+        delta_cid = self.delta_manager.create_delta_update(data_files, base_cid, base_hashes, delta=delta)
         
         # Päivitä synkronointitila
         self.sync_state.update({
             "last_delta_cid": delta_cid,
             "last_sync": datetime.now().isoformat(),
             "delta_count": self.sync_state.get("delta_count", 0) + 1,
+            "deltas_since_base": self.sync_state.get("deltas_since_base", 0) + 1,
+            "last_delta_size_bytes": savings["delta_size_bytes"],
             "total_savings_bytes": self.sync_state.get("total_savings_bytes", 0) + savings["saving_bytes"],
             "last_savings": savings
         })
@@ -101,25 +189,50 @@ class SyncOrchestrator:
         print(f"✅ Delta sync completed: {delta_cid}")
         return delta_cid
     
-    def load_data(self, cid: str) -> Dict[str, Dict]:
+    @digest_operation
+    def load_data(self, cid: str, local_files: Optional[Dict[str, Dict]] = None) -> Dict[str, Dict]:
         """
         Lataa data IPFS:stä, käsitellen sekä täydet arkistot että deltat
         
+        Keskeytynyt lataus jatkuu: jo haetut palat luetaan levyltä, ja ne
+        poistetaan vasta onnistuneen latauksen jälkeen.
+        
         Args:
-            cid: IPFS CID (täysi arkisto tai delta)
+            cid: IPFS CID (täysi arkisto, paloiteltu arkisto tai delta)
+            local_files: Paikallinen data; paloitellusta arkistosta haetaan vain puuttuvat palat
             
         Returns:
             Purettu data
         """
+        pending = self.sync_state.get("pending_load")
+        if pending:
+            print(f"   ⏯️  Resuming load of {pending['cid']}: {len(self.chunk_spool)} chunks already fetched")
+        self.sync_state["pending_load"] = {
+            "cid": cid,
+            "started": pending["started"] if pending and pending.get("cid") == cid else datetime.now().isoformat()
+        }
+        self._save_sync_state()
+        
+        files = self._load(cid, local_files)
+        
+        self.chunk_spool.clear()
+        del self.sync_state["pending_load"]
+        self._save_sync_state()
+        return files
+    
+    def _load(self, cid: str, local_files: Optional[Dict[str, Dict]] = None) -> Dict[str, Dict]:
         print(f"📥 Loading data: {cid}")
         
-        data = self.client.get_json(cid)
+        data = self.archive_manager.get_blob(cid)
         metadata = data.get("metadata", {})
         
         if metadata.get("type") == "full_archive":
             # Täysi arkisto - palauta suoraan
             return data.get("files", {})
         
+        elif metadata.get("type") == "chunked_archive":
+            return self.archive_manager.extract_chunked_archive(cid, local_files, data, self.chunk_spool)
+        
         elif metadata.get("type") == "delta_update":
             # Delta - lataa ensin perusarkisto ja sovi delta
             base_cid = metadata.get("base_cid")
@@ -127,8 +240,9 @@ class SyncOrchestrator:
                 raise ValueError("Delta missing base_cid")
             
             print(f"   🔗 Loading base archive: {base_cid}")
-            base_files = self.load_data(base_cid)  # Rekursiivisesti
-            updated_files = self.delta_manager.apply_delta_update(base_files, cid)
+            base_files = self._load(base_cid, local_files)  # Rekursiivisesti
+            base_index = self._load_base_index(base_cid)
+            updated_files = self.delta_manager.apply_delta_update(base_files, cid, base_index)
             return updated_files
         
         else:
@@ -152,9 +266,9 @@ class SyncOrchestrator:
     
     def _load_sync_state(self) -> Dict[str, Any]:
         """Lataa synkronointitila"""
-        if self.sync_state_file.exists():
-            with open(self.sync_state_file, 'r') as f:
-                return json.load(f)
+        state = read_json_file(str(self.sync_state_file), {})
+        if state:
+            return state
         
         # Oletustila
         return {
@@ -165,10 +279,27 @@ class SyncOrchestrator:
             "total_savings_bytes": 0
         }
     
+    def _load_base_index(self, base_cid: str) -> Optional[Dict[str, Dict]]:
+        """Lataa perusarkiston tietueindeksi, jos se vastaa annettua CID:tä"""
+        if not self.base_index_file.exists():
+            return None
+        try:
+            with open(self.base_index_file, 'r', encoding='utf-8') as f:
+                stored = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if stored.get("base_cid") != base_cid:
+            return None
+        return stored.get("files")
+    
+    def _save_base_index(self, base_cid: str, index: Dict[str, Dict]):
+        """Tallenna perusarkiston tietueindeksi (atomisesti kuten synkronointitila)"""
+        write_json_file(str(self.base_index_file), {"base_cid": base_cid, "files": index}, compact=True)
+    
     def _save_sync_state(self):
         """Tallenna synkronointitila"""
-        with open(self.sync_state_file, 'w') as f:
-            json.dump(self.sync_state, f, indent=2)
+        # Atominen kirjoitus: keskeytys ei riko journalia
+        write_json_file(str(self.sync_state_file), self.sync_state)
     
     def reset_sync_state(self):
         """Nollaa synkronointitila (käytä testauksessa)"""
@@ -4,18 +4,30 @@ IPFS-client, joka käyttää suoraan IPFS HTTP API:ta requests-kirjaston kautta
 Tukee kaikkia IPFS Kubo versioita (0.10.0+)
 """
 import requests
+import hashlib
 import json
+import threading
 import time
-from typing import Dict, Any, Optional, List
+from typing import Dict, Any, Optional, List, Tuple
 from pathlib import Path
 
+from .ipfs.block_cache import get_block_cache
+from .ipfs.http_client import PooledIPFSClient
+
 class MockIPFSClient:
     """Mock IPFS-client testausta varten"""
     
-    def __init__(self):
+    def __init__(self, block_cache=None):
         self.mock_data = {}
+        # Aiemmin haetut lohkot ovat käytettävissä myös ilman daemonia
+        self.block_cache = block_cache
         print("🔶 Käytetään stabiilia mock IPFS-clientia")
     
+    def _cached(self, cid: str) -> Optional[bytes]:
+        if cid in self.mock_data or self.block_cache is None:
+            return None
+        return self.block_cache.get(cid)
+    
     def add_json(self, data: Dict) -> Dict[str, str]:
         import hashlib
         content = json.dumps(data, sort_keys=True, ensure_ascii=False)
@@ -24,6 +36,9 @@ class MockIPFSClient:
         return {'Hash': cid}
     
     def get_json(self, cid: str) -> Dict:
+        cached = self._cached(cid)
+        if cached is not None:
+            return json.loads(cached)
         return self.mock_data.get(cid, {"error": "Data not found"})
     
     def add_bytes(self, data: bytes, content_type: str = 'application/octet-stream') -> Dict[str, str]:
@@ -33,112 +48,120 @@ class MockIPFSClient:
         return {'Hash': cid}
     
     def cat(self, cid: str) -> bytes:
+        cached = self._cached(cid)
+        if cached is not None:
+            return cached
         data = self.mock_data.get(cid)
         if isinstance(data, bytes):
             return data
         return json.dumps(data or {}).encode()
+    
+    def add_many(self, items: List[Any], return_exceptions: bool = False) -> List[str]:
+        results = []
+        for item in items:
+            content = item[1] if isinstance(item, tuple) else item
+            if isinstance(content, str):
+                content = content.encode('utf-8')
+            if isinstance(content, (bytes, bytearray)):
+                results.append(self.add_bytes(bytes(content))['Hash'])
+            else:
+                results.append(self.add_json(content)['Hash'])
+        return results
+    
+    def cat_many(self, cids: List[str], return_exceptions: bool = False) -> List[bytes]:
+        return [self.cat(cid) for cid in cids]
 
 class RealIPFSClient:
-    """Oikea IPFS-client, joka käyttää HTTP API:ta"""
+    """Oikea IPFS-client, joka käyttää HTTP API:ta (poolatut yhteydet, uudelleenyritykset)"""
     
-    def __init__(self, api_url: str = "http://127.0.0.1:5001", timeout: int = 30):
+    def __init__(self, api_url: str = "http://127.0.0.1:5001", timeout: int = 30,
+                 max_workers: int = 8, max_retries: int = 3):
         self.api_url = api_url.rstrip("/")
         self.timeout = timeout
-        self.session = requests.Session()
+        self.pool = PooledIPFSClient(self.api_url, timeout=timeout,
+                                     max_workers=max_workers, max_retries=max_retries)
+        self.session = self.pool.session
         
         # Testaa yhteys
         try:
-            response = self.session.post(f"{self.api_url}/api/v0/version", timeout=5)
-            if response.status_code == 200:
-                version_info = response.json()
-                print(f"✅ IPFS yhdistetty: {version_info.get('Version', 'Unknown')}")
-            else:
-                raise Exception(f"IPFS API returned status {response.status_code}")
+            version_info = self.pool.version()
+            print(f"✅ IPFS yhdistetty: {version_info.get('Version', 'Unknown')}")
         except Exception as e:
             raise Exception(f"IPFS ei saatavilla: {e}")
     
     def add_json(self, data: Dict) -> Dict[str, str]:
         """Lisää JSON-data IPFS:ään"""
         try:
-            # Muunna JSONiksi
-            json_str = json.dumps(data, indent=2, ensure_ascii=False)
-            files = {
-                'file': ('data.json', json_str, 'application/json')
-            }
-            
-            response = self.session.post(
-                f"{self.api_url}/api/v0/add",
-                files=files,
-                params={'pin': 'true'},
-                timeout=self.timeout
-            )
-            response.raise_for_status()
-            result = response.json()
-            return result
-            
+            return {'Hash': self.pool.add_json(data)}
         except Exception as e:
             raise Exception(f"IPFS lisäys epäonnistui: {e}")
     
     def get_json(self, cid: str) -> Dict:
         """Hae JSON-data IPFS:stä"""
         try:
-            response = self.session.post(
-                f"{self.api_url}/api/v0/cat",
-                params={'arg': cid},
-                timeout=self.timeout
-            )
-            response.raise_for_status()
-            return json.loads(response.text)
+            return self.pool.get_json(cid)
         except Exception as e:
             raise Exception(f"IPFS haku epäonnistui: {e}")
     
     def add_bytes(self, data: bytes, content_type: str = 'application/octet-stream') -> Dict[str, str]:
         """Lisää raakadata IPFS:ään"""
         try:
-            files = {
-                'file': ('content.html', data, content_type)
-            }
-            
-            response = self.session.post(
-                f"{self.api_url}/api/v0/add",
-                files=files,
-                params={'pin': 'true'},
-                timeout=self.timeout
-            )
-            response.raise_for_status()
-            return response.json()
+            return {'Hash': self.pool.add_bytes(data, 'content.html', content_type)}
         except Exception as e:
             raise Exception(f"IPFS bytes lisäys epäonnistui: {e}")
     
     def cat(self, cid: str) -> bytes:
         """Hae raakadata IPFS:stä"""
         try:
-            response = self.session.post(
-                f"{self.api_url}/api/v0/cat",
-                params={'arg': cid},
-                timeout=self.timeout
-            )
-            response.raise_for_status()
-            return response.content
+            return self.pool.cat(cid)
         except Exception as e:
             raise Exception(f"IPFS cat epäonnistui: {e}")
+    
+    def add_many(self, items: List[Any], return_exceptions: bool = False) -> List[str]:
+        """Lisää monta sisältöä rinnakkain; palauttaa CID:t syötteen järjestyksessä"""
+        return self.pool.add_many(items, return_exceptions)
+    
+    def cat_many(self, cids: List[str], return_exceptions: bool = False) -> List[bytes]:
+        """Hae monta CID:tä rinnakkain"""
+        return self.pool.cat_many(cids, return_exceptions)
 
 class IPFSClient:
     """Pää-IPFS-client, joka valitsee automaattisesti oikean toteutuksen"""
     
     _instances = {}
     
-    def __init__(self, election_id: str = "default"):
+    def __init__(self, election_id: str = "default", api_url: str = "http://127.0.0.1:5001"):
         self.election_id = election_id
-        
+        self.api_url = api_url
+        self._resolved_client = None
+        self._resolve_lock = threading.Lock()
+        self.fallback_reason: Optional[str] = None
+    
+    @property
+    def _client(self):
+        """Toteutus valitaan vasta ensimmäisellä käytöllä (ei verkkokutsua konstruktorissa)"""
+        if self._resolved_client is None:
+            with self._resolve_lock:
+                if self._resolved_client is None:
+                    self._resolved_client = self._select_client()
+        return self._resolved_client
+    
+    def _select_client(self):
         # Yritä ensin oikeaa IPFS:ää
         try:
-            self._client = RealIPFSClient()
-            print(f"✅ Oikea IPFS-client käytössä vaalille: {election_id}")
+            client = RealIPFSClient(self.api_url)
+            print(f"✅ Oikea IPFS-client käytössä vaalille: {self.election_id}")
+            return client
         except Exception as e:
-            # Fallback mock-clientiin
-            self._client = MockIPFSClient()
-            print(f"🔶 Mock IPFS-client käytössä vaalille: {election_id}")
+            # Fallback mock-clientiin; syy talteen ja näkyviin
+            self.fallback_reason = str(e)
+            print(f"🔶 Mock IPFS-client käytössä vaalille: {self.election_id} ({e})")
+            return MockIPFSClient(get_block_cache())
+    
+    @property
+    def is_mock(self) -> bool:
+        """Käytetäänkö mock-toteutusta"""
+        return isinstance(self._client, MockIPFSClient)
     
     @classmethod
     def get_client(cls, election_id: str = "default") -> 'IPFSClient':
@@ -146,19 +169,23 @@ class IPFSClient:
             cls._instances[election_id] = IPFSClient(election_id)
         return cls._instances[election_id]
     
+    def _document(self, data_type: str, data: Dict) -> Dict:
+        """Julkaistava dokumentti: metadata ja data"""
+        return {
+            "metadata": {
+                "type": data_type,
+                "election_id": self.election_id,
+                "timestamp": time.time(),
+                "version": "1.0"
+            },
+            "data": data
+        }
+    
     def publish_election_data(self, data_type: str, data: Dict) -> str:
         """Julkaise vaalidata IPFS:ään ja palauta CID"""
         try:
             # Lisää metadata
-            full_data = {
-                "metadata": {
-                    "type": data_type,
-                    "election_id": self.election_id,
-                    "timestamp": time.time(),
-                    "version": "1.0"
-                },
-                "data": data
-            }
+            full_data = self._document(data_type, data)
             
             result = self._client.add_json(full_data)
             cid = result['Hash']
@@ -170,6 +197,20 @@ class IPFSClient:
             # Fallback mock-CID:lle
             return f"mock_fallback_{data_type}_{int(time.time())}"
 
+    def publish_document(self, data_type: str, data: Dict) -> Tuple[str, str]:
+        """
+        Julkaise vaalidata ja palauta (CID, sha256)
+        
+        Dokumentti sarjallistetaan kerran tavuiksi, joten tiiviste vastaa
+        täsmälleen retrieve_raw():n palauttamaa sisältöä. Virheet nostetaan
+        kutsujalle (fallback-CID:lle ei ole tiivistettä).
+        """
+        content = json.dumps(self._document(data_type, data), ensure_ascii=False,
+                             separators=(",", ":")).encode("utf-8")
+        cid = self._client.add_bytes(content, 'application/json')['Hash']
+        print(f"✅ {data_type} julkaistu IPFS:ään: {cid}")
+        return cid, hashlib.sha256(content).hexdigest()
+
     def publish_html_content(self, content: str, filename: str = "profile.html") -> str:
         """Julkaise suoraan HTML-sisältö IPFS:ään"""
         try:
@@ -186,6 +227,32 @@ class IPFSClient:
             print(f"❌ HTML-julkaisu epäonnistui: {e}")
             return f"mock_html_{int(time.time())}"
     
+    def publish_html_many(self, pages: Dict[str, str]) -> Dict[str, str]:
+        """
+        Julkaise monta HTML-sivua rinnakkain
+        
+        Args:
+            pages: tiedostonimi -> HTML-sisältö
+            
+        Returns:
+            tiedostonimi -> CID (epäonnistuneille mock-CID kuten publish_html_content)
+        """
+        filenames = list(pages)
+        items = [(name, pages[name].encode('utf-8'), 'text/html; charset=utf-8') for name in filenames]
+        results = self._client.add_many(items, return_exceptions=True)
+        
+        cids = {}
+        failed = 0
+        for filename, result in zip(filenames, results):
+            if isinstance(result, Exception):
+                failed += 1
+                print(f"❌ HTML-julkaisu epäonnistui ({filename}): {result}")
+                cids[filename] = f"mock_html_{int(time.time())}"
+            else:
+                cids[filename] = result
+        print(f"✅ {len(filenames) - failed}/{len(filenames)} HTML-sivua julkaistu IPFS:ään")
+        return cids
+    
     def retrieve_election_data(self, cid: str) -> Dict:
         """Hae vaalidata IPFS:stä"""
         try:
@@ -195,6 +262,10 @@ class IPFSClient:
             print(f"❌ IPFS-haku epäonnistui: {e}")
             return {"error": str(e)}
 
+    def retrieve_raw(self, cid: str) -> bytes:
+        """Hae sisältö tavuina (virheet nostetaan kutsujalle)"""
+        return self._client.cat(cid)
+
     def retrieve_html_content(self, cid: str) -> str:
         """Hae HTML-sisältö IPFS:stä"""
         try:
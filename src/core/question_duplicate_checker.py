@@ -2,19 +2,48 @@
 """
 Kysymysten duplikaattien tarkistus - estää samanlaisten kysymysten lisäämisen
 """
+import itertools
 import json
 import re
 from pathlib import Path
 from typing import Dict, List, Optional, Tuple
 from difflib import SequenceMatcher
 
+try:
+    from .question_similarity_index import (
+        QuestionSimilarityIndex, INDEX_FILENAME, candidate_pairs, minhash_signatures,
+        normalize_text as _normalize_text
+    )
+except ImportError:
+    from core.question_similarity_index import (
+        QuestionSimilarityIndex, INDEX_FILENAME, candidate_pairs, minhash_signatures,
+        normalize_text as _normalize_text
+    )
+
+# Vaalien data projektin juuresta (ei työhakemistosta riippuen)
+PROJECT_ROOT = Path(__file__).resolve().parent.parent.parent
+ELECTIONS_PATH = PROJECT_ROOT / "data" / "elections"
+
+# Enintään näin monta kysymystä verrataan aina kaikkiin (kuten ennen indeksiä)
+EXACT_CHECK_LIMIT = 200
+
 
 class QuestionDuplicateChecker:
     """Tarkistaa ja estää duplikaattikysymykset"""
     
-    def __init__(self, election_id: str = None):
+    def __init__(self, election_id: str = None, verbose: bool = True, data_path: Optional[str] = None,
+                 exact_check_limit: int = EXACT_CHECK_LIMIT):
         self.election_id = election_id
+        self.verbose = verbose
+        self.data_path = Path(data_path) if data_path else ELECTIONS_PATH
+        self.exact_check_limit = exact_check_limit
         self.questions_data = None
+        self.similarity_index = None
+    
+    def _debug(self, message: str):
+        """Tulosta latauksen ja haun vianetsintätiedot vain verbose-tilassa"""
+        if self.verbose:
+            print(message)
         
     def load_questions(self) -> Dict:
         """Lataa nykyiset kysymykset suoraan tiedostosta"""
@@ -24,7 +53,7 @@ class QuestionDuplicateChecker:
         questions_data = {}
         
         # Lataa suoraan tiedostosta
-        data_path = Path("data/elections")
+        data_path = self.data_path
         if self.election_id and data_path.exists():
             election_path = data_path / self.election_id / "questions.json"
             if election_path.exists():
@@ -32,48 +61,48 @@ class QuestionDuplicateChecker:
                     with open(election_path, 'r', encoding='utf-8') as f:
                         file_content = f.read().strip()
                         if not file_content:
-                            print("⚠️  Kysymystiedosto on tyhjä")
+                            self._debug("⚠️  Kysymystiedosto on tyhjä")
                             return {}
                         
                         data = json.loads(file_content)
                         
                         # DEBUG: Tulosta data rakenne
-                        print(f"🔍 LADATUN DATAN RAKENNE: {type(data)}")
+                        self._debug(f"🔍 LADATUN DATAN RAKENNE: {type(data)}")
                         
                         # Käsittele eri data-formaatteja
                         if isinstance(data, list):
-                            print(f"📋 Data on lista, pituus: {len(data)}")
+                            self._debug(f"📋 Data on lista, pituus: {len(data)}")
                             
                             # Tapaus 1: Lista suoria kysymyksiä
                             if data and isinstance(data[0], dict) and 'question_fi' in data[0]:
-                                print("✅ Lista suoria kysymyksiä")
+                                self._debug("✅ Lista suoria kysymyksiä")
                                 for i, item in enumerate(data):
                                     if isinstance(item, dict) and 'id' in item:
                                         questions_data[item['id']] = item
-                                print(f"✅ Muunnettiin {len(questions_data)} kysymystä listasta")
+                                self._debug(f"✅ Muunnettiin {len(questions_data)} kysymystä listasta")
                             
                             # Tapaus 2: Lista, jossa on yksi alkio joka sisältää 'questions' kentän
                             elif data and isinstance(data[0], dict) and 'questions' in data[0]:
-                                print("✅ Lista, jossa 'questions' kenttä")
+                                self._debug("✅ Lista, jossa 'questions' kenttä")
                                 questions_list = data[0]['questions']
                                 if isinstance(questions_list, list):
                                     for item in questions_list:
                                         if isinstance(item, dict) and 'id' in item:
                                             questions_data[item['id']] = item
-                                    print(f"✅ Ladattiin {len(questions_data)} kysymystä 'questions' kentästä")
+                                    self._debug(f"✅ Ladattiin {len(questions_data)} kysymystä 'questions' kentästä")
                             
                             else:
-                                print(f"❌ Tuntematon lista-formaatti")
+                                self._debug(f"❌ Tuntematon lista-formaatti")
                                 for i, item in enumerate(data[:2]):
-                                    print(f"   Alkio {i}: {type(item)} - {item}")
+                                    self._debug(f"   Alkio {i}: {type(item)} - {item}")
                         
                         elif isinstance(data, dict):
-                            print(f"📋 Data on dictionary, avaimia: {len(data)}")
+                            self._debug(f"📋 Data on dictionary, avaimia: {len(data)}")
                             
                             # Tapaus 3: Dictionary suorilla kysymyksillä
                             if 'question_fi' in list(data.values())[0] if data else False:
                                 questions_data = data
-                                print(f"✅ Ladattiin {len(questions_data)} kysymystä dictionarysta")
+                                self._debug(f"✅ Ladattiin {len(questions_data)} kysymystä dictionarysta")
                             
                             # Tapaus 4: Dictionary, jossa on 'questions' kenttä
                             elif 'questions' in data:
@@ -82,44 +111,32 @@ class QuestionDuplicateChecker:
                                     for item in questions_list:
                                         if isinstance(item, dict) and 'id' in item:
                                             questions_data[item['id']] = item
-                                    print(f"✅ Ladattiin {len(questions_data)} kysymystä 'questions' kentästä")
+                                    self._debug(f"✅ Ladattiin {len(questions_data)} kysymystä 'questions' kentästä")
                             
                             else:
-                                print(f"❌ Tuntematon dictionary-formaatti")
+                                self._debug(f"❌ Tuntematon dictionary-formaatti")
                                 for key, value in list(data.items())[:2]:
-                                    print(f"   Avain {key}: {type(value)}")
+                                    self._debug(f"   Avain {key}: {type(value)}")
                         
                         else:
-                            print(f"❌ Tuntematon data-tyyppi: {type(data)}")
+                            self._debug(f"❌ Tuntematon data-tyyppi: {type(data)}")
                             
                     self.questions_data = questions_data
                     return questions_data
                     
                 except json.JSONDecodeError as e:
-                    print(f"❌ JSON virhe kysymysten latauksessa: {e}")
-                    print(f"📄 Tiedoston sisältö: {file_content[:200]}...")
+                    self._debug(f"❌ JSON virhe kysymysten latauksessa: {e}")
+                    self._debug(f"📄 Tiedoston sisältö: {file_content[:200]}...")
                 except Exception as e:
-                    print(f"⚠️  Kysymysten lataus tiedostosta epäonnistui: {e}")
+                    self._debug(f"⚠️  Kysymysten lataus tiedostosta epäonnistui: {e}")
         
-        print(f"⚠️  Ei kysymyksiä ladattu - tiedostoa ei löydy tai tyhjä")
+        self._debug(f"⚠️  Ei kysymyksiä ladattu - tiedostoa ei löydy tai tyhjä")
         return {}
     
     def normalize_text(self, text: str) -> str:
         """Normalisoi teksti vertailua varten"""
-        if not text:
-            return ""
-        
-        # Muunna pieniksi kirjaimiksi
-        text = text.lower()
-        
-        # Poista ylimääräiset välilyönnit
-        text = re.sub(r'\s+', ' ', text).strip()
-        
-        # Poista yleiset välimerkit (säilytä sisältö)
-        text = re.sub(r'[.,!?;:()\-"]', ' ', text)
-        text = re.sub(r'\s+', ' ', text).strip()
-        
-        return text
+        # Esikäännetyt regexit ja välimuisti: sama teksti normalisoidaan vain kerran
+        return _normalize_text(text)
     
     def calculate_similarity(self, text1: str, text2: str) -> float:
         """Laskee kahden tekstin samankaltaisuuden 0-1 asteikolla"""
@@ -132,28 +149,64 @@ class QuestionDuplicateChecker:
         similarity = SequenceMatcher(None, normalized1, normalized2).ratio()
         return similarity
     
-    def find_similar_questions(self, new_question: str, threshold: float = 0.7) -> List[Dict]:
+    def _index_file(self) -> Optional[Path]:
+        if not self.election_id:
+            return None
+        return self.data_path / self.election_id / INDEX_FILENAME
+    
+    def get_similarity_index(self) -> QuestionSimilarityIndex:
+        """Lataa tallennettu MinHash-indeksi ja päivitä se vastaamaan kysymyksiä"""
+        if self.similarity_index is not None:
+            return self.similarity_index
+        
+        index_file = self._index_file()
+        if index_file is not None:
+            index = QuestionSimilarityIndex.load(index_file)
+        else:
+            index = QuestionSimilarityIndex()
+        
+        questions = self.load_questions()
+        index.sync({'id': q_id, **q_data} for q_id, q_data in questions.items() if isinstance(q_data, dict))
+        
+        if index.dirty and index_file is not None and index_file.parent.exists():
+            try:
+                index.save()
+            except OSError as e:
+                print(f"⚠️  Samankaltaisuusindeksin tallennus epäonnistui: {e}")
+        
+        self.similarity_index = index
+        return index
+    
+    def find_similar_questions(self, new_question: str, threshold: float = 0.7,
+                               lang: str = "fi") -> List[Dict]:
         """Etsii samankaltaisia kysymyksiä"""
         questions = self.load_questions()
         similar_questions = []
         
-        print(f"   🔍 Etsitään samankaltaisia kysymyksiä ({len(questions)} kysymystä)...")
+        # LSH-indeksi rajaa ehdokkaat, tarkka vertailu vain lyhyelle listalle
+        # (pienessä kysymysjoukossa verrataan suoraan kaikkiin)
+        if len(questions) <= self.exact_check_limit:
+            candidates = [(q_id, None) for q_id in questions]
+        else:
+            candidates = self.get_similarity_index().candidates(new_question, lang)
+        self._debug(f"   🔍 Etsitään samankaltaisia kysymyksiä ({len(candidates)}/{len(questions)} ehdokasta)...")
         
-        for q_id, q_data in questions.items():
+        for q_id, _estimate in candidates:
+            q_data = questions.get(q_id)
             if not isinstance(q_data, dict):
                 continue
                 
-            # Tarkista suomenkielinen teksti
-            fi_text = q_data.get('question_fi', '')
-            if not fi_text:
+            # Tarkista valitun kielen teksti
+            text = q_data.get(f'question_{lang}', '')
+            if not text:
                 continue
                 
-            similarity = self.calculate_similarity(new_question, fi_text)
+            similarity = self.calculate_similarity(new_question, text)
             
             if similarity >= threshold:
                 similar_questions.append({
                     'id': q_id,
-                    'question_fi': fi_text,
+                    'question_fi': q_data.get('question_fi', ''),
                     'question_en': q_data.get('question_en', ''),
                     'category': q_data.get('category', ''),
                     'similarity': round(similarity, 3),
@@ -173,7 +226,7 @@ class QuestionDuplicateChecker:
             'suggestion': None
         }
         
-        print(f"   🔍 Tarkistetaan: '{question_fi}'")
+        self._debug(f"   🔍 Tarkistetaan: '{question_fi}'")
         
         # Etsi samankaltaisia kysymyksiä
         similar_fi = self.find_similar_questions(question_fi)
@@ -190,6 +243,152 @@ class QuestionDuplicateChecker:
         
         return results
     
+    def load_new_questions(self) -> List[Dict]:
+        """Lataa new_questions.json -tarkistusjono"""
+        if not self.election_id:
+            return []
+        new_questions_file = self.data_path / self.election_id / "new_questions.json"
+        if not new_questions_file.exists():
+            return []
+        try:
+            with open(new_questions_file, 'r', encoding='utf-8') as f:
+                content = f.read().strip()
+            data = json.loads(content) if content else []
+        except (OSError, json.JSONDecodeError) as e:
+            print(f"❌ Virhe ladattaessa new_questions.json: {e}")
+            return []
+        return [q for q in data if isinstance(q, dict)] if isinstance(data, list) else []
+    
+    def cluster_new_questions(self, threshold: float = 0.7, lang: str = "fi",
+                              new_questions: Optional[List[Dict]] = None) -> Dict:
+        """
+        Ryhmittele koko tarkistusjonon lähes-duplikaatit yhdellä ajolla
+        
+        Uusien kysymysten keskinäiset ehdokasparit haetaan LSH-kaistoista ja
+        verrataan hyväksyttyihin kysymyksiin indeksin kautta; tarkka
+        SequenceMatcher-vertailu tehdään vain ehdokaspareille. Enintään
+        exact_check_limit kysymyksen joukoissa verrataan kaikki parit.
+        
+        Returns:
+            Yhteenveto ja klusterit edustajakysymyksineen
+        """
+        if new_questions is None:
+            new_questions = self.load_new_questions()
+        queue_positions = [i for i, q in enumerate(new_questions) if q.get('status') not in ('approved', 'rejected')]
+        pending = [new_questions[i] for i in queue_positions]
+        texts = [q.get(f'question_{lang}', '') or '' for q in pending]
+        signatures = minhash_signatures(texts)
+        
+        # Union-find uusien kysymysten välisille duplikaattipareille
+        parent = list(range(len(pending)))
+        
+        def find(i):
+            while parent[i] != i:
+                parent[i] = parent[parent[i]]
+                i = parent[i]
+            return i
+        
+        if len(pending) <= self.exact_check_limit:
+            pairs = itertools.combinations(range(len(pending)), 2)
+        else:
+            pairs = candidate_pairs(signatures).tolist()
+        
+        pair_similarity = {}
+        for i, j in pairs:
+            similarity = self.calculate_similarity(texts[i], texts[j])
+            if similarity >= threshold:
+                pair_similarity[(i, j)] = similarity
+                parent[find(j)] = find(i)
+        
+        # Vertailu hyväksyttyihin kysymyksiin
+        accepted = self.load_questions()
+        exhaustive = len(accepted) <= self.exact_check_limit
+        index = None if exhaustive else self.get_similarity_index()
+        accepted_matches = {}
+        for i, signature in enumerate(signatures):
+            if exhaustive:
+                candidate_ids = list(accepted)
+            else:
+                candidate_ids = [q_id for q_id, _estimate in index.candidates_for_signature(signature, lang)]
+            for q_id in candidate_ids:
+                q_data = accepted.get(q_id)
+                if not isinstance(q_data, dict):
+                    continue
+                similarity = self.calculate_similarity(texts[i], q_data.get(f'question_{lang}', ''))
+                if similarity >= threshold:
+                    accepted_matches.setdefault(i, []).append((q_id, similarity))
+        
+        groups = {}
+        for i in range(len(pending)):
+            groups.setdefault(find(i), []).append(i)
+        
+        # Edustajan valintaa varten: yhteenlaskettu samankaltaisuus muihin jäseniin
+        centrality = [0.0] * len(pending)
+        cluster_max = {}
+        for (i, j), similarity in pair_similarity.items():
+            centrality[i] += similarity
+            centrality[j] += similarity
+            root = find(i)
+            cluster_max[root] = max(similarity, cluster_max.get(root, 0.0))
+        
+        clusters = []
+        for root, members in groups.items():
+            matches = {}
+            for i in members:
+                for q_id, similarity in accepted_matches.get(i, []):
+                    matches[q_id] = max(similarity, matches.get(q_id, 0.0))
+            if len(members) < 2 and not matches:
+                continue
+            
+            if matches:
+                best_id = max(matches, key=lambda q_id: (matches[q_id], q_id))
+                q_data = accepted[best_id]
+                representative = {
+                    'source': 'accepted',
+                    'id': best_id,
+                    'question_fi': q_data.get('question_fi', ''),
+                    'question_en': q_data.get('question_en', ''),
+                    'category': q_data.get('category', '')
+                }
+            else:
+                best = max(members, key=lambda i: (centrality[i], -i))
+                representative = {
+                    'source': 'new',
+                    'queue_index': queue_positions[best],
+                    'question_fi': pending[best].get('question_fi', ''),
+                    'question_en': pending[best].get('question_en', ''),
+                    'category': pending[best].get('category', '')
+                }
+            
+            clusters.append({
+                'representative': representative,
+                'members': [
+                    {
+                        'queue_index': queue_positions[i],
+                        'question_fi': pending[i].get('question_fi', ''),
+                        'question_en': pending[i].get('question_en', ''),
+                        'category': pending[i].get('category', '')
+                    }
+                    for i in members
+                ],
+                'accepted_matches': [
+                    {'id': q_id, 'question_fi': accepted[q_id].get('question_fi', ''),
+                     'similarity': round(similarity, 3)}
+                    for q_id, similarity in sorted(matches.items(), key=lambda item: item[1], reverse=True)
+                ],
+                'max_similarity': round(max([cluster_max.get(root, 0.0)] + list(matches.values())), 3)
+            })
+        
+        clusters.sort(key=lambda c: (len(c['members']), c['max_similarity']), reverse=True)
+        clustered = sum(len(c['members']) for c in clusters)
+        
+        return {
+            'total_pending': len(pending),
+            'clusters': clusters,
+            'duplicates_of_accepted': sum(len(c['members']) for c in clusters if c['accepted_matches']),
+            'unique_questions': len(pending) - clustered
+        }
+    
     def format_comparison(self, new_question: str, similar_questions: List[Dict]) -> str:
         """Muotoilee vertailun tulostusta varten"""
         if not similar_questions:
@@ -214,7 +413,7 @@ class QuestionDuplicateChecker:
     def save_to_new_questions(self, question_data: Dict, force: bool = False) -> bool:
         """Tallentaa kysymyksen new_questions.json tiedostoon"""
         try:
-            data_path = Path("data/elections")
+            data_path = self.data_path
             if self.election_id and data_path.exists():
                 election_path = data_path / self.election_id
                 new_questions_file = election_path / "new_questions.json"
@@ -9,6 +9,7 @@ try:
     from .commands.publish_command import publish, publish_command
     from .commands.sync_command import sync, sync_command
     from .commands.status_command import status, status_command
+    from .commands.schedule_command import schedule, schedule_command
     COMMANDS_AVAILABLE = True
 except ImportError as e:
     print(f"⚠️  Sync commands not available: {e}")
@@ -24,6 +25,7 @@ if COMMANDS_AVAILABLE:
     sync_cli.add_command(publish, name='publish')
     sync_cli.add_command(sync, name='sync')
     sync_cli.add_command(status, name='status')
+    sync_cli.add_command(schedule, name='schedule')
 else:
     sync_cli = None
 
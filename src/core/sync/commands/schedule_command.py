@@ -0,0 +1,28 @@
+# src/core/sync/commands/schedule_command.py
+"""
+Schedule command - synkronoi kaikki rekisterin vaalit rinnakkain.
+"""
+import click
+
+from ..orchestrators import SyncScheduler
+from ..orchestrators.scheduler import DEFAULT_POLL_SECONDS, DEFAULT_REGISTRY
+
+
+def schedule_command(registry: str = DEFAULT_REGISTRY, workers: int = None, once: bool = False,
+                     force: bool = False, poll_seconds: float = DEFAULT_POLL_SECONDS):
+    """Suorita schedule-komento."""
+    scheduler = SyncScheduler(registry, max_workers=workers, poll_seconds=poll_seconds)
+    if once:
+        return scheduler.run_once(force)
+    scheduler.run_forever()
+
+
+@click.command()
+@click.option('--registry', default=DEFAULT_REGISTRY, help='Vaalirekisterin polku')
+@click.option('--workers', type=int, default=None, help='Työprosessien määrä (oletus: CPU-ytimet)')
+@click.option('--once', is_flag=True, help='Aja ajankohtaiset vaalit kerran ja lopeta')
+@click.option('--force', is_flag=True, help='Julkaise kaikki vaalit aikataulusta ja muutoksista riippumatta')
+@click.option('--poll-seconds', type=float, default=DEFAULT_POLL_SECONDS, help='Tarkistusväli daemon-tilassa')
+def schedule(registry, workers, once, force, poll_seconds):
+    """Synkronoi kaikki rekisterin vaalit ajastetusti."""
+    schedule_command(registry, workers, once, force, poll_seconds)
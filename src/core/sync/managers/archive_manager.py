@@ -1,41 +1,54 @@
 # src/core/sync/managers/archive_manager.py
 """
 Arkiston hallinta - luo, lataa ja hallinnoi arkistoja.
+
+Julkaistujen tiedostojen tila (koko, mtime_ns, SHA-256) tallennetaan
+muutosmanifestiin, jonka avulla has_data_changed() selvittää muutokset
+ensin pelkällä stat-kutsulla ja laskee tiivisteen vain epäilyttäville
+tiedostoille. Muuttumaton data ei siis aiheuta uutta julkaisua.
 """
 import json
+import time
 from pathlib import Path
 from datetime import datetime
 from typing import Dict, Any, Optional, List
 import click
 
-from core.file_utils import read_json_file, write_json_file, ensure_directory
+from core.file_utils import read_json_file, write_json_file, ensure_directory, calculate_file_hash
+from core.error_handling import ElectionSystemError
+from core.ipfs.chunked_archive import assemble_files, build_manifest
+
+DATA_FILES = [
+    "meta.json",
+    "questions.json", 
+    "candidates.json",
+    "parties.json",
+    "candidate_answers.json",
+    "system_chain.json"
+]
+
+# Tiedosto, jonka mtime on näin lähellä tilannekuvan ottohetkeä, on voinut
+# muuttua samalla aikaleiman tarkkuudella - sen tiiviste tarkistetaan aina
+RACY_WINDOW_NS = 2_000_000_000
 
 
 class ArchiveManager:
     """Arkiston hallinta."""
     
-    def __init__(self, election_id: str = "Jumaltenvaalit2026"):
+    def __init__(self, election_id: str = "Jumaltenvaalit2026", data_dir: Optional[str] = None):
         self.election_id = election_id
-        self.data_dir = Path("data/runtime")
+        self.data_dir = Path(data_dir or "data/runtime")
+        self.manifest_file = Path("data/runtime") / f"{election_id}_archive_manifest.json"
     
     def load_current_data(self) -> Dict[str, Any]:
         """Lataa nykyinen data arkistointia varten."""
-        data_files = [
-            "meta.json",
-            "questions.json", 
-            "candidates.json",
-            "parties.json",
-            "candidate_answers.json",
-            "system_chain.json"
-        ]
-        
         archive_data = {
             "election_id": self.election_id,
             "timestamp": datetime.now().isoformat(),
             "files": {}
         }
         
-        for filename in data_files:
+        for filename in DATA_FILES:
             file_path = self.data_dir / filename
             if file_path.exists():
                 file_data = read_json_file(str(file_path), {})
@@ -46,6 +59,50 @@ class ArchiveManager:
         
         return archive_data
     
+    def publish_chunked_archive(self, ipfs_manager, previous_cid: Optional[str] = None):
+        """
+        Julkaise nykyinen data paloiteltuna arkistona
+        
+        Edellisen arkiston (jos se on paloiteltu) muuttumattomia paloja ei lähetetä uudelleen.
+        
+        Returns:
+            (manifestin CID tai None, manifesti, tilastot)
+        """
+        archive_data = self.load_current_data()
+        previous_manifest = ipfs_manager.get_data(previous_cid) if previous_cid else None
+        
+        manifest, stats = build_manifest(
+            archive_data["files"],
+            lambda chunk: ipfs_manager.add_data(chunk, f"{self.election_id}_chunk.json"),
+            previous_manifest,
+            {"election_id": self.election_id}
+        )
+        click.echo(f"   🧩 Paloja: {stats['chunks']} ({stats['uploaded']} uutta, {stats['reused']} uudelleenkäytetty)")
+        
+        manifest_cid = ipfs_manager.add_data(manifest, f"{self.election_id}_archive.json")
+        return manifest_cid, manifest, stats
+    
+    def assemble_chunked_archive(self, manifest: Dict[str, Any], ipfs_manager) -> Dict[str, Any]:
+        """
+        Kokoa paloiteltu arkisto purettavaan muotoon
+        
+        Paikallisesta datasta löytyviä paloja ei haeta verkosta.
+        """
+        local_files = {}
+        for filename in manifest.get("files", {}):
+            file_path = self.data_dir / filename
+            if file_path.exists():
+                local_files[filename] = read_json_file(str(file_path), {})
+        
+        files, stats = assemble_files(manifest, ipfs_manager.get_data, local_files)
+        click.echo(f"   🧩 Haettu {stats['fetched']} palaa, {stats['local']} paikallisesti")
+        
+        return {
+            "election_id": manifest.get("metadata", {}).get("election_id", self.election_id),
+            "timestamp": manifest.get("metadata", {}).get("timestamp"),
+            "files": files
+        }
+    
     def unpack_archive(self, archive_data: Dict[str, Any]) -> bool:
         """Pura arkisto tiedostoiksi."""
         try:
@@ -68,11 +125,79 @@ class ArchiveManager:
         """Laske data-tiedostojen määrä."""
         return len(list(self.data_dir.glob("*.json")))
     
+    def snapshot_files(self) -> Dict[str, Any]:
+        """
+        Ota tilannekuva data-tiedostoista muutosmanifestia varten
+        
+        Otetaan ennen datan lataamista: jos tiedosto muuttuu latauksen
+        aikana, seuraava tarkistus näkee eri mtime:n ja julkaisee uudelleen.
+        """
+        files = {}
+        for filename in DATA_FILES:
+            file_path = self.data_dir / filename
+            try:
+                stat = file_path.stat()
+                files[filename] = {
+                    "size": stat.st_size,
+                    "mtime_ns": stat.st_mtime_ns,
+                    "sha256": calculate_file_hash(str(file_path))
+                }
+            except FileNotFoundError:
+                continue
+        return {"snapshot_ns": time.time_ns(), "files": files}
+    
+    def save_change_manifest(self, snapshot: Dict[str, Any], archive_cid: Optional[str] = None):
+        """Tallenna julkaistun datan tilannekuva"""
+        manifest = dict(snapshot, election_id=self.election_id, archive_cid=archive_cid)
+        write_json_file(str(self.manifest_file), manifest, compact=True)
+    
     def has_data_changed(self, last_archive_timestamp: Optional[str] = None) -> bool:
-        """Tarkista onko data muuttunut viime julkaisusta."""
-        # Yksinkertaistettu - aina palautetaan True testauksen helpottamiseksi
-        # Todellisessa käytössä voitaisiin vertailla timestampeja tai hash-eja
-        return True
+        """
+        Tarkista onko data muuttunut viime julkaisusta.
+        
+        Koko ja mtime_ns verrataan ensin; tiiviste lasketaan vain, jos mtime
+        on muuttunut tai osuu tilannekuvan ottohetken epävarmaan ikkunaan.
+        Tarkistuksen tulos (esim. pelkästään kosketetun tiedoston uusi mtime)
+        päivitetään manifestiin, jotta tiivistettä ei lasketa uudelleen.
+        """
+        try:
+            manifest = read_json_file(str(self.manifest_file), {})
+        except ElectionSystemError:
+            # Vioittunut manifesti: julkaistaan varmuuden vuoksi uudelleen
+            return True
+        if "files" not in manifest:
+            return True
+        
+        checked_ns = time.time_ns()
+        recorded = manifest["files"]
+        racy_after = manifest.get("snapshot_ns", 0) - RACY_WINDOW_NS
+        refreshed = False
+        
+        for filename in DATA_FILES:
+            file_path = self.data_dir / filename
+            entry = recorded.get(filename)
+            try:
+                stat = file_path.stat()
+            except FileNotFoundError:
+                if entry is not None:
+                    return True
+                continue
+            
+            if entry is None or stat.st_size != entry["size"]:
+                return True
+            if stat.st_mtime_ns == entry["mtime_ns"] and stat.st_mtime_ns < racy_after:
+                continue
+            
+            if calculate_file_hash(str(file_path)) != entry["sha256"]:
+                return True
+            entry["mtime_ns"] = stat.st_mtime_ns
+            refreshed = True
+        
+        if refreshed:
+            # Kaikki epävarmat tiedostot on nyt tarkistettu tiivisteellä
+            manifest["snapshot_ns"] = checked_ns
+            write_json_file(str(self.manifest_file), manifest, compact=True)
+        return False
     
     def get_data_files_info(self) -> Dict[str, Any]:
         """Hae data-tiedostojen tiedot."""
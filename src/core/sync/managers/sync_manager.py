@@ -34,7 +34,7 @@ class SyncManager:
     def save_sync_list(self, sync_list: Dict[str, Any], ipfs_manager=None) -> Optional[str]:
         """Tallenna synkronointilista."""
         # Tallenna paikallisesti
-        write_json_file(str(self.sync_file), sync_list)
+        write_json_file(str(self.sync_file), sync_list, compact=True)
         click.echo(f"   💾 Tallennettu paikallisesti: {self.sync_file}")
         
         # Lisää IPFS:ään jos manager on annettu
@@ -89,9 +89,37 @@ class SyncManager:
             "timestamp": datetime.now().isoformat(),
             **metadata
         })
+        self.schedule_next_sync(sync_list)
         
         return sync_list
     
+    def schedule_next_sync(self, sync_list: Dict[str, Any], now: Optional[datetime] = None) -> Dict[str, Any]:
+        """Aseta seuraava synkronointi interval_hours-välin päähän."""
+        schedule = sync_list.setdefault("sync_schedule", {})
+        interval = float(schedule.get("interval_hours", 1))
+        schedule["interval_hours"] = schedule.get("interval_hours", 1)
+        schedule["next_sync"] = ((now or datetime.now()) + timedelta(hours=interval)).isoformat()
+        return sync_list
+    
+    def is_sync_due(self, now: Optional[datetime] = None) -> bool:
+        """Onko synkronointi ajankohtainen (sync_schedule.next_sync ohitettu)?"""
+        if not self.sync_file.exists():
+            return True
+        sync_list = read_json_file(str(self.sync_file), {})
+        next_sync = sync_list.get("sync_schedule", {}).get("next_sync")
+        if not next_sync:
+            return True
+        try:
+            return (now or datetime.now()) >= datetime.fromisoformat(next_sync)
+        except ValueError:
+            return True
+    
+    def advance_schedule(self, now: Optional[datetime] = None):
+        """Siirrä seuraavaa synkronointia ilman uutta julkaisua (vain paikallisesti)."""
+        sync_list = read_json_file(str(self.sync_file), {}) or self.create_default_sync_list()
+        self.schedule_next_sync(sync_list, now)
+        write_json_file(str(self.sync_file), sync_list, compact=True)
+    
     def get_sync_status(self, ipfs_manager=None) -> Dict[str, Any]:
         """Hae synkronointitila."""
         sync_list = self.load_sync_list(ipfs_manager)
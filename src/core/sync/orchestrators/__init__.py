@@ -1,4 +1,4 @@
-# src/core/sync/orchestrators/__init__.py
 from .coordinator import SyncCoordinator
+from .scheduler import SyncScheduler
 
-__all__ = ['SyncCoordinator']
+__all__ = ['SyncCoordinator', 'SyncScheduler']
@@ -6,17 +6,20 @@ import click
 from datetime import datetime
 from typing import Optional
 
+from core.ipfs.chunked_archive import is_chunked_archive
+
 from ..managers import IPFSManager, ArchiveManager, SyncManager
 
 
 class SyncCoordinator:
     """Synkronointikoordinaattori."""
     
-    def __init__(self, election_id: str = "Jumaltenvaalit2026", debug: bool = False):
+    def __init__(self, election_id: str = "Jumaltenvaalit2026", debug: bool = False,
+                 data_dir: Optional[str] = None):
         self.election_id = election_id
         self.debug = debug
         self.ipfs = IPFSManager()
-        self.archive = ArchiveManager(election_id)
+        self.archive = ArchiveManager(election_id, data_dir)
         self.sync = SyncManager(election_id)
         
         if debug:
@@ -38,26 +41,29 @@ class SyncCoordinator:
             click.echo("ℹ️  Data ei ole muuttunut viime julkaisusta -- käytä --force pakottamiseen")
             return False
         
-        # 1. Luo arkisto
-        archive_data = self.archive.load_current_data()
-        archive_cid = self.ipfs.add_data(archive_data, f"{self.election_id}_archive.json")
+        # 1. Luo paloiteltu arkisto (edellisen arkiston muuttumattomat palat käytetään uudelleen)
+        snapshot = self.archive.snapshot_files()
+        previous_cid = self.sync.load_sync_list(self.ipfs).get("latest_archive_cid")
+        archive_cid, manifest, stats = self.archive.publish_chunked_archive(self.ipfs, previous_cid)
         
         if not archive_cid:
             click.echo("❌ Arkiston luonti epäonnistui")
             return False
         
-        click.echo(f"   📊 Pakattu {len(archive_data['files'])} tiedostoa")
-        click.echo(f"   💾 Koko: {len(str(archive_data)) / 1024:.1f} KB")
+        click.echo(f"   📊 Pakattu {len(manifest['files'])} tiedostoa")
+        click.echo(f"   💾 Koko: {stats['total_bytes'] / 1024:.1f} KB (lähetetty {stats['uploaded_bytes'] / 1024:.1f} KB)")
         
         # 2. Päivitä synkronointilista
         metadata = {
-            "archive_size_bytes": len(str(archive_data).encode('utf-8')),
+            "archive_size_bytes": stats["total_bytes"],
+            "merkle_root": manifest["metadata"]["merkle_root"],
             "file_count": self.archive.count_data_files(),
             "ipfs_mode": self.ipfs.get_mode()
         }
         
         updated_sync_list = self.sync.update_sync_list(archive_cid, metadata, self.ipfs)
         sync_list_cid = self.sync.save_sync_list(updated_sync_list, self.ipfs)
+        self.archive.save_change_manifest(snapshot, archive_cid)
         
         click.echo("✅ UUSI ARKISTO JULKAISTU!")
         click.echo(f"📦 Arkisto CID: {archive_cid}")
@@ -88,6 +94,13 @@ class SyncCoordinator:
             click.echo(f"❌ Arkistoa ei löydy: {latest_cid}")
             return False
         
+        if is_chunked_archive(archive_data):
+            try:
+                archive_data = self.archive.assemble_chunked_archive(archive_data, self.ipfs)
+            except ValueError as e:
+                click.echo(f"❌ Arkiston eheystarkistus epäonnistui: {e}")
+                return False
+        
         success = self.archive.unpack_archive(archive_data)
         
         if success:
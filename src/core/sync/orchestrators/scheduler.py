@@ -0,0 +1,169 @@
+# src/core/sync/orchestrators/scheduler.py
+"""
+Monivaaliajastin - julkaisee kaikkien rekisterin vaalien arkistot rinnakkain.
+
+- Vaalit luetaan config/election_registry.json -rekisteristä; vaali, jolle
+  ei löydy omaa data-hakemistoa, ohitetaan (status "skipped")
+- Vaali käsitellään, kun sen synkronointilistan sync_schedule.next_sync on
+  ohitettu (interval_hours); muuttumaton data ei aiheuta julkaisua
+- Muutostunnistus, arkiston rakennus ja IPFS-julkaisu ajetaan prosessipoolissa
+- Vaalikohtainen lukko (ElectionIsolationManager) estää saman vaalin
+  päällekkäiset ajot: hidas vaali ei estä muita, eikä sitä aloiteta
+  uudelleen ennen kuin edellinen ajo on valmis
+"""
+import os
+import time
+from concurrent.futures import Future, ProcessPoolExecutor, wait
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+import click
+
+from core.election_isolation_manager import ElectionIsolationManager
+from core.file_utils import read_json_file
+
+from ..managers import ArchiveManager, SyncManager
+
+DEFAULT_REGISTRY = "config/election_registry.json"
+DEFAULT_POLL_SECONDS = 60
+RUNTIME_DIR = "data/runtime"
+
+
+def election_data_dir(election_id: str, entry: Optional[Dict[str, Any]] = None) -> Optional[str]:
+    """
+    Vaalin data-hakemisto: rekisterin data_dir, data/elections/<id> tai data/runtime
+
+    Jaettu data/runtime kelpaa vain vaalille, jonka tunniste on sen meta.json:ssa;
+    muuten palautetaan None (muuten kaikki vaalit julkaisisivat saman datan).
+    """
+    if entry and entry.get("data_dir"):
+        return entry["data_dir"]
+    election_dir = Path("data/elections") / election_id
+    if election_dir.is_dir():
+        return str(election_dir)
+    meta = read_json_file(str(Path(RUNTIME_DIR) / "meta.json"), {})
+    runtime_election = meta.get("metadata", {}).get("election_id") or meta.get("election_id")
+    return RUNTIME_DIR if runtime_election == election_id else None
+
+
+def sync_election(election_id: str, data_dir: Optional[str] = None, force: bool = False) -> Dict[str, Any]:
+    """
+    Synkronoi yksi vaali (ajetaan työprosessissa)
+
+    Muutostunnistus tehdään ennen koordinaattorin (ja IPFS-yhteyden) luontia,
+    joten muuttumattoman vaalin käsittely maksaa vain stat-kutsut.
+    """
+    started = time.perf_counter()
+    result = {"election_id": election_id, "status": "unchanged", "error": None}
+    try:
+        if not force and not ArchiveManager(election_id, data_dir).has_data_changed():
+            SyncManager(election_id).advance_schedule()
+        else:
+            from .coordinator import SyncCoordinator
+
+            coordinator = SyncCoordinator(election_id, data_dir=data_dir)
+            result["status"] = "published" if coordinator.publish_new_archive(force=True) else "failed"
+    except Exception as e:
+        result.update(status="failed", error=str(e))
+    result["duration_seconds"] = round(time.perf_counter() - started, 3)
+    return result
+
+
+class SyncScheduler:
+    """Rinnakkainen julkaisuajastin usealle vaalille."""
+
+    def __init__(self, registry_path: str = DEFAULT_REGISTRY, max_workers: Optional[int] = None,
+                 poll_seconds: float = DEFAULT_POLL_SECONDS,
+                 isolation: Optional[ElectionIsolationManager] = None,
+                 worker: Callable[..., Dict[str, Any]] = sync_election):
+        self.registry_path = Path(registry_path)
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.poll_seconds = poll_seconds
+        self.isolation = isolation or ElectionIsolationManager()
+        self.worker = worker
+        self._running: Dict[str, Future] = {}
+        self._skipped: List[Dict[str, Any]] = []
+
+    def load_elections(self) -> Dict[str, Dict[str, Any]]:
+        """Aktiiviset vaalit rekisteristä"""
+        registry = read_json_file(str(self.registry_path), {})
+        return {
+            election_id: entry
+            for election_id, entry in registry.get("elections", {}).items()
+            if entry.get("status", "active") == "active"
+        }
+
+    def due_elections(self, now: Optional[datetime] = None) -> List[str]:
+        """Vaalit, joiden synkronointi on ajankohtainen"""
+        return [election_id for election_id in self.load_elections()
+                if SyncManager(election_id).is_sync_due(now)]
+
+    def submit_due(self, executor: ProcessPoolExecutor, now: Optional[datetime] = None,
+                   force: bool = False) -> List[str]:
+        """Käynnistä ajankohtaiset vaalit, joita ei jo ajeta; palauttaa käynnistetyt"""
+        elections = self.load_elections()
+        due = list(elections) if force else self.due_elections(now)
+        submitted = []
+        for election_id in due:
+            data_dir = election_data_dir(election_id, elections[election_id])
+            if data_dir is None:
+                self._skipped.append({"election_id": election_id, "status": "skipped",
+                                      "error": "no data dir"})
+                continue
+            if not self.isolation.acquire_election_lock(election_id, "scheduled_sync"):
+                continue
+            try:
+                future = executor.submit(self.worker, election_id, data_dir, force)
+            except Exception:
+                self.isolation.release_election_lock(election_id)
+                raise
+            self._running[election_id] = future
+            submitted.append(election_id)
+        return submitted
+
+    def collect(self, block: bool = False) -> List[Dict[str, Any]]:
+        """Kerää valmistuneet ja ohitetut ajot ja vapauta niiden lukot"""
+        if block and self._running:
+            wait(list(self._running.values()))
+        results, self._skipped = self._skipped, []
+        for election_id, future in list(self._running.items()):
+            if not future.done():
+                continue
+            del self._running[election_id]
+            self.isolation.release_election_lock(election_id)
+            try:
+                results.append(future.result())
+            except Exception as e:
+                results.append({"election_id": election_id, "status": "failed", "error": str(e)})
+        return results
+
+    def run_once(self, force: bool = False, now: Optional[datetime] = None) -> List[Dict[str, Any]]:
+        """Aja kaikki ajankohtaiset vaalit kerran ja odota niiden valmistumista"""
+        with ProcessPoolExecutor(max_workers=self.max_workers) as executor:
+            self.submit_due(executor, now, force)
+            results = self.collect(block=True)
+        self._report(results)
+        return results
+
+    def run_forever(self, max_cycles: Optional[int] = None):
+        """Daemon-tila: tarkista ajankohtaiset vaalit poll_seconds välein"""
+        click.echo(f"🕒 Ajastin käynnissä: {len(self.load_elections())} vaalia, {self.max_workers} työprosessia")
+        cycles = 0
+        with ProcessPoolExecutor(max_workers=self.max_workers) as executor:
+            try:
+                while max_cycles is None or cycles < max_cycles:
+                    self._report(self.collect())
+                    self.submit_due(executor)
+                    cycles += 1
+                    time.sleep(self.poll_seconds)
+            finally:
+                self._report(self.collect(block=True))
+
+    def _report(self, results: List[Dict[str, Any]]):
+        icons = {"published": "✅", "unchanged": "ℹ️ ", "skipped": "⏭️ ", "failed": "❌"}
+        for result in results:
+            line = f"{icons.get(result['status'], '•')} {result['election_id']}: {result['status']}"
+            if result.get("error"):
+                line += f" ({result['error']})"
+            click.echo(line)
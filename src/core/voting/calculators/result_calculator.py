@@ -1,8 +1,396 @@
 """
 result_calculator.py - Voting result calculations
+
+Ehdokkaiden vastaukset pakataan tiheään NumPy-matriisiin (ehdokkaat × kysymykset),
+jolloin äänestäjän vastausvektori pisteytetään kaikkia ehdokkaita vastaan
+yhdellä vektoroidulla laskulla.
 """
+import threading
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+
+# Importoi tarvittavat moduulit
+try:
+    from src.core import get_data_path
+    from src.core.file_utils import read_json_file
+except ImportError:
+    from core import get_data_path
+    from core.file_utils import read_json_file
+
+# Vastausasteikko -5 ... +5, luottamustaso 1 ... 5
+ANSWER_MIN = -5
+ANSWER_MAX = 5
+MAX_ANSWER_DISTANCE = float(ANSWER_MAX - ANSWER_MIN)
+MAX_CONFIDENCE = 5.0
+DEFAULT_CONFIDENCE = 3.0
+
+# Eräpisteytyksen oletuskoko: 1024 äänestäjää × 2000 ehdokasta ≈ 8 MB per välimatriisi
+DEFAULT_BATCH_SIZE = 1024
+
+
+class CandidateMatrix:
+    """Candidate answers packed as a dense candidates × questions matrix"""
+
+    def __init__(self, candidate_ids, question_ids, values, mask, weights, candidate_info=None):
+        self.candidate_ids = list(candidate_ids)
+        self.question_ids = list(question_ids)
+        self.question_index = {qid: i for i, qid in enumerate(self.question_ids)}
+        self.candidate_info = candidate_info or {}
+
+        # values: vastausarvot, mask: onko vastaus olemassa, weights: luottamuspaino
+        self.values = np.asarray(values, dtype=np.float32)
+        self.mask = np.asarray(mask, dtype=bool)
+        self.weights = np.where(self.mask, np.asarray(weights, dtype=np.float32), 0.0).astype(np.float32)
+
+        # Esilasketut termit neliöetäisyyden hajotelmaa varten:
+        #   sum w (v - a)^2 = (W) @ v^2 - 2 (W*A) @ v + (W*A^2) @ 1
+        self._w = self.weights
+        self._wa = self.weights * self.values
+        self._wa2 = self._wa * self.values
+
+    @property
+    def shape(self):
+        return self.values.shape
+
+    @classmethod
+    def from_answers(cls, answers, question_ids=None, candidate_ids=None, candidate_info=None):
+        """
+        Build matrix from answer dicts ({candidate_id, question_id, value, confidence})
+
+        Virheelliset tai asteikon ulkopuoliset vastaukset ohitetaan.
+        """
+        answers = list(answers)
+
+        if question_ids is None:
+            question_ids = sorted({a.get("question_id") for a in answers if a.get("question_id")})
+        if candidate_ids is None:
+            candidate_ids = sorted({a.get("candidate_id") for a in answers if a.get("candidate_id")})
+
+        q_index = {qid: i for i, qid in enumerate(question_ids)}
+        c_index = {cid: i for i, cid in enumerate(candidate_ids)}
+
+        values = np.zeros((len(candidate_ids), len(question_ids)), dtype=np.float32)
+        mask = np.zeros(values.shape, dtype=bool)
+        weights = np.zeros(values.shape, dtype=np.float32)
+
+        for answer in answers:
+            row = c_index.get(answer.get("candidate_id"))
+            col = q_index.get(answer.get("question_id"))
+            if row is None or col is None:
+                continue
+
+            try:
+                value = float(answer.get("value", answer.get("answer_value")))
+            except (TypeError, ValueError):
+                continue
+            if not ANSWER_MIN <= value <= ANSWER_MAX:
+                continue
+
+            confidence = answer.get("confidence")
+            try:
+                confidence = float(confidence) if confidence is not None else DEFAULT_CONFIDENCE
+            except (TypeError, ValueError):
+                confidence = DEFAULT_CONFIDENCE
+            confidence = min(max(confidence, 1.0), MAX_CONFIDENCE)
+
+            values[row, col] = value
+            mask[row, col] = True
+            weights[row, col] = confidence / MAX_CONFIDENCE
+
+        return cls(candidate_ids, question_ids, values, mask, weights, candidate_info)
+
+    @classmethod
+    def from_election(cls, election_id):
+        """Load candidate answers of an election into a matrix"""
+        data_path = Path(get_data_path(election_id))
+
+        answers_data = read_json_file(data_path / "candidate_answers.json", {"answers": []})
+        questions_data = read_json_file(data_path / "questions.json", {"questions": []})
+        candidates_data = read_json_file(data_path / "candidates.json", {"candidates": []})
+
+        answers = list(answers_data.get("answers", []))
+
+        candidate_info = {}
+        for candidate in candidates_data.get("candidates", []):
+            candidate_id = candidate.get("id") or candidate.get("candidate_id")
+            if not candidate_id:
+                continue
+            basic_info = candidate.get("basic_info", {})
+            candidate_info[candidate_id] = {
+                "name": basic_info.get("name", {}).get("fi", candidate_id),
+                "party": basic_info.get("party"),
+            }
+            # Vanha formaatti: vastaukset ehdokkaan sisällä {question_id: {value, confidence}}
+            embedded = candidate.get("answers") or {}
+            if isinstance(embedded, dict):
+                for question_id, answer in embedded.items():
+                    if isinstance(answer, dict):
+                        answers.append({"candidate_id": candidate_id, "question_id": question_id, **answer})
+
+        question_ids = [q.get("id") for q in questions_data.get("questions", []) if q.get("id")]
+        known_questions = set(question_ids)
+        question_ids += sorted({a.get("question_id") for a in answers
+                                if a.get("question_id") and a.get("question_id") not in known_questions})
+
+        candidate_ids = list(candidate_info.keys())
+        known_candidates = set(candidate_ids)
+        candidate_ids += sorted({a.get("candidate_id") for a in answers
+                                 if a.get("candidate_id") and a.get("candidate_id") not in known_candidates})
+
+        return cls.from_answers(answers, question_ids, candidate_ids, candidate_info)
+
+    def encode_voter(self, user_answers):
+        """
+        Convert voter answers to (values, mask, weights) vectors
+
+        user_answers: {question_id: value} tai {question_id: {"value": v, "weight": w}}
+        Tuntemattomat kysymykset ja virheelliset arvot ohitetaan.
+        """
+        q = len(self.question_ids)
+        values = np.zeros(q, dtype=np.float32)
+        weights = np.zeros(q, dtype=np.float32)
+
+        for question_id, answer in (user_answers or {}).items():
+            col = self.question_index.get(question_id)
+            if col is None:
+                continue
+
+            weight = 1.0
+            if isinstance(answer, dict):
+                weight = answer.get("weight", 1.0)
+                answer = answer.get("value")
+            try:
+                value = float(answer)
+                weight = float(weight)
+            except (TypeError, ValueError):
+                continue
+            if not ANSWER_MIN <= value <= ANSWER_MAX or weight <= 0:
+                continue
+
+            values[col] = value
+            weights[col] = weight
+
+        return values, weights > 0, weights
+
+    def score_matrix(self, voter_values, voter_weights):
+        """
+        Score N voter vectors against every candidate
+
+        Args:
+            voter_values: N × Q vastausarvot
+            voter_weights: N × Q painot (0 = ei vastattu)
+
+        Returns:
+            (scores N × C prosentteina, common N × C yhteisten kysymysten määrä)
+        """
+        v = np.asarray(voter_values, dtype=np.float32)
+        m = np.asarray(voter_weights, dtype=np.float32)
+        mv = m * v
+        mv2 = mv * v
+
+        # Painotettu neliöetäisyys kolmella matriisitulolla
+        sq_dist = mv2 @ self._w.T - 2.0 * (mv @ self._wa.T) + m @ self._wa2.T
+        norm = m @ self._w.T
+        common = (m > 0).astype(np.float32) @ self.mask.T.astype(np.float32)
+
+        with np.errstate(divide="ignore", invalid="ignore"):
+            rms = np.sqrt(np.clip(sq_dist / norm, 0.0, None)) / MAX_ANSWER_DISTANCE
+        scores = np.where(norm > 0, (1.0 - np.clip(rms, 0.0, 1.0)) * 100.0, 0.0)
+
+        return scores.astype(np.float32), common.astype(np.int32)
+
+    def score(self, user_answers):
+        """Score one voter against every candidate"""
+        values, mask, weights = self.encode_voter(user_answers)
+        scores, common = self.score_matrix(values[None, :], weights[None, :])
+        return scores[0], common[0]
+
+
+# Pistemäärät kvantisoidaan järjestystä varten, jotta yksittäis- ja eräpisteytys
+# järjestävät tasapisteet identtisesti (ehdokasjärjestyksessä)
+RANK_SCORE_SCALE = 1000
+
+
+def _rank_keys(scores):
+    """Unique integer sort keys: higher score first, ties by candidate index"""
+    scores = np.asarray(scores)
+    n = scores.shape[-1]
+    quantized = np.rint(scores.astype(np.float64) * RANK_SCORE_SCALE).astype(np.int64)
+    return quantized * n + (n - 1 - np.arange(n, dtype=np.int64))
+
+
+def top_k_indices(scores, k=None):
+    """
+    Stable top-k ranking: highest score first, ties in candidate order
+
+    Toimii sekä yhdelle pistevektorille (C) että eräpisteille (N × C).
+    """
+    keys = -_rank_keys(scores)
+    n = keys.shape[-1]
+    if k is None or k >= n:
+        return np.argsort(keys, axis=-1)
+    if k <= 0:
+        return np.zeros(keys.shape[:-1] + (0,), dtype=np.int64)
+
+    # Avaimet ovat uniikkeja, joten argpartition + lajittelu on deterministinen
+    part = np.argpartition(keys, k - 1, axis=-1)[..., :k]
+    order = np.argsort(np.take_along_axis(keys, part, axis=-1), axis=-1)
+    return np.take_along_axis(part, order, axis=-1)
+
+
+class MatchingEngine:
+    """Matching engine caching one candidate matrix per election"""
+
+    _source_files = ("candidate_answers.json", "questions.json", "candidates.json")
+
+    def __init__(self):
+        self._matrices = {}
+        self._lock = threading.Lock()
+
+    def _signature(self, election_id):
+        data_path = Path(get_data_path(election_id))
+        signature = []
+        for filename in self._source_files:
+            path = data_path / filename
+            try:
+                stat = path.stat()
+                signature.append((filename, stat.st_mtime_ns, stat.st_size))
+            except OSError:
+                signature.append((filename, None, None))
+        return tuple(signature)
+
+    def get_matrix(self, election_id):
+        """Return cached matrix, rebuilding it when source files change"""
+        signature = self._signature(election_id)
+        with self._lock:
+            cached = self._matrices.get(election_id)
+            if cached and cached[0] == signature:
+                return cached[1]
+
+        matrix = CandidateMatrix.from_election(election_id)
+        with self._lock:
+            self._matrices[election_id] = (signature, matrix)
+        return matrix
+
+    def invalidate(self, election_id=None):
+        """Drop cached matrices"""
+        with self._lock:
+            if election_id is None:
+                self._matrices.clear()
+            else:
+                self._matrices.pop(election_id, None)
+
+    @staticmethod
+    def _match_entry(matrix, rank, idx, score, common):
+        candidate_id = matrix.candidate_ids[idx]
+        info = matrix.candidate_info.get(candidate_id, {})
+        return {
+            "rank": rank,
+            "candidate_id": candidate_id,
+            "name": info.get("name", candidate_id),
+            "party": info.get("party"),
+            "match_percentage": round(float(score), 1),
+            "common_questions": int(common),
+        }
+
+    def rank(self, matrix, scores, common, top_k=None):
+        """Build ranked match list from score vectors"""
+        return [
+            self._match_entry(matrix, rank, idx, scores[idx], common[idx])
+            for rank, idx in enumerate(top_k_indices(scores, top_k), start=1)
+        ]
+
+    def iter_score_batches(self, election_id, answer_sets, top_k=10, chunk_size=DEFAULT_BATCH_SIZE,
+                           matrix=None):
+        """
+        Score many voters in bounded-memory chunks
+
+        Args:
+            answer_sets: iteroitava (session_id, user_answers) -pareja
+            top_k: palautettavien ehdokkaiden määrä per äänestäjä
+            chunk_size: kerralla pisteytettävien äänestäjien määrä
+            matrix: valmiiksi ladattu ehdokasmatriisi (oletus: välimuistista)
+
+        Yields:
+            (session_ids, top_indices N × k, top_scores N × k, common N × k, answered N)
+        """
+        matrix = matrix or self.get_matrix(election_id)
+        q = len(matrix.question_ids)
+        chunk_size = max(1, int(chunk_size))
+
+        values = np.zeros((chunk_size, q), dtype=np.float32)
+        weights = np.zeros((chunk_size, q), dtype=np.float32)
+        session_ids = []
+
+        def flush():
+            n = len(session_ids)
+            scores, common = matrix.score_matrix(values[:n], weights[:n])
+            top = top_k_indices(scores, top_k)
+            return (list(session_ids), top,
+                    np.take_along_axis(scores, top, axis=1),
+                    np.take_along_axis(common, top, axis=1),
+                    (weights[:n] > 0).sum(axis=1))
+
+        for session_id, user_answers in answer_sets:
+            row = len(session_ids)
+            values[row], _, weights[row] = matrix.encode_voter(user_answers)
+            session_ids.append(session_id)
+            if len(session_ids) == chunk_size:
+                yield flush()
+                session_ids.clear()
+
+        if session_ids:
+            yield flush()
+
+    def score_batch(self, election_id, answer_sets, top_k=10, chunk_size=DEFAULT_BATCH_SIZE):
+        """Score many voters, yielding one result dict per voter"""
+        matrix = self.get_matrix(election_id)
+        calculated_at = datetime.now().isoformat()
+
+        for session_ids, top, top_scores, top_common, answered in self.iter_score_batches(
+                election_id, answer_sets, top_k, chunk_size, matrix):
+            for row, session_id in enumerate(session_ids):
+                matches = [
+                    self._match_entry(matrix, rank, idx, score, common)
+                    for rank, (idx, score, common) in enumerate(
+                        zip(top[row], top_scores[row], top_common[row]), start=1)
+                ]
+                yield {
+                    "session_id": session_id,
+                    "election_id": election_id,
+                    "calculated_at": calculated_at,
+                    "answered_questions": int(answered[row]),
+                    "total_candidates": len(matrix.candidate_ids),
+                    "matches": matches,
+                }
+
+    def calculate(self, election_id, user_answers, session_id=None, top_k=None):
+        """Calculate match results for one voter"""
+        matrix = self.get_matrix(election_id)
+        values, mask, weights = matrix.encode_voter(user_answers)
+        scores, common = matrix.score_matrix(values[None, :], weights[None, :])
+
+        return {
+            "session_id": session_id,
+            "election_id": election_id,
+            "calculated_at": datetime.now().isoformat(),
+            "answered_questions": int(mask.sum()),
+            "total_candidates": len(matrix.candidate_ids),
+            "matches": self.rank(matrix, scores[0], common[0], top_k),
+        }
+
+
+# Yhteinen moottori, jotta matriisi rakennetaan vain kerran per vaali
+_default_engine = MatchingEngine()
+
+
+def get_matching_engine():
+    """Return the shared matching engine"""
+    return _default_engine
+
 
-def calculate_results(election_id, user_answers, session_id):
-    """Calculate voting results - TO BE IMPLEMENTED"""
-    # Toteutus siirretään voting_engine.py:stä
-    pass
+def calculate_results(election_id, user_answers, session_id, top_k=None):
+    """Calculate voting results for a voter against all candidates"""
+    return _default_engine.calculate(election_id, user_answers, session_id, top_k)
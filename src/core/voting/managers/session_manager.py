@@ -24,6 +24,11 @@ except ImportError:
     def write_json_file(file_path, data):
         pass
 
+try:
+    from src.core.voting.calculators.result_calculator import get_matching_engine, DEFAULT_BATCH_SIZE
+except ImportError:
+    from core.voting.calculators.result_calculator import get_matching_engine, DEFAULT_BATCH_SIZE
+
 # Multinode availability check
 try:
     from nodes.core.node_identity import NodeIdentity
@@ -123,6 +128,105 @@ class VotingSessionManager:
             return True
         return False
     
+    def calculate_session_results(self, session_id, top_k=None):
+        """Calculate and save match results for a session's answers"""
+        session = self.sessions.get(session_id)
+        if not session:
+            return None
+
+        user_answers = self._session_answers(session)
+        results = get_matching_engine().calculate(self.election_id, user_answers, session_id, top_k)
+        self.save_session(session_id, results)
+        return results
+    
+    @staticmethod
+    def _session_answers(session):
+        session_data = session.get('data') or {}
+        return session_data.get('answers', session_data)
+    
+    def _iter_session_answers(self, sessions):
+        """Yield (session_id, answers) pairs from session ids or session dicts"""
+        for session in sessions:
+            if isinstance(session, str):
+                session_id, session = session, self.sessions.get(session)
+                if session is None:
+                    continue
+            else:
+                session_id = session.get('id') or session.get('session_id')
+            yield session_id, self._session_answers(session)
+    
+    def score_sessions_batch(self, sessions, top_k=10, chunk_size=DEFAULT_BATCH_SIZE, save=True):
+        """
+        Score many voting sessions at once
+        
+        Äänestäjien vastausvektorit pinotaan matriisiksi ja pisteytetään
+        chunk_size kerrallaan, joten muistinkäyttö pysyy rajattuna.
+        
+        Args:
+            sessions: session ID:t tai session-dictit ({'id', 'data': {'answers'}})
+            top_k: palautettavien ehdokkaiden määrä per sessio
+            chunk_size: kerralla pisteytettävien sessioiden määrä
+            save: tallenna tulokset tunnettuihin sessioihin
+            
+        Returns:
+            {session_id: results}
+        """
+        engine = get_matching_engine()
+        batch_results = {}
+        
+        for results in engine.score_batch(self.election_id, self._iter_session_answers(sessions),
+                                          top_k, chunk_size):
+            session_id = results['session_id']
+            batch_results[session_id] = results
+            if save and session_id in self.sessions:
+                self.save_session(session_id, results)
+        
+        return batch_results
+    
+    def replay_session_log(self, log_file, output_file=None, top_k=10, chunk_size=DEFAULT_BATCH_SIZE):
+        """
+        Replay an exported session log (JSON lines) against the election
+        
+        Loki luetaan ja tulokset kirjoitetaan rivi kerrallaan, joten
+        miljoonankaan session loki ei lataudu kokonaan muistiin.
+        
+        Returns:
+            Tilastot: käsitellyt sessiot, ohitetut rivit ja kesto
+        """
+        engine = get_matching_engine()
+        stats = {'scored': 0, 'skipped': 0}
+        started = datetime.now()
+        
+        def read_log(f):
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    session = json.loads(line)
+                except json.JSONDecodeError:
+                    stats['skipped'] += 1
+                    continue
+                if not isinstance(session, dict):
+                    stats['skipped'] += 1
+                    continue
+                session_id = session.get('id') or session.get('session_id') or str(uuid.uuid4())
+                yield session_id, self._session_answers(session)
+        
+        out = open(output_file, 'w', encoding='utf-8') if output_file else None
+        try:
+            with open(log_file, 'r', encoding='utf-8') as f:
+                for results in engine.score_batch(self.election_id, read_log(f), top_k, chunk_size):
+                    stats['scored'] += 1
+                    if out:
+                        out.write(json.dumps(results, ensure_ascii=False) + '\n')
+        finally:
+            if out:
+                out.close()
+        
+        stats['duration_seconds'] = (datetime.now() - started).total_seconds()
+        return stats
+    
     def list_sessions(self):
         """List all voting sessions"""
         return list(self.sessions.keys())
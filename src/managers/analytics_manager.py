@@ -8,6 +8,11 @@ from datetime import datetime
 from typing import Dict, List, Any
 from pathlib import Path
 
+try:
+    from src.core.data import get_document_cache
+except ImportError:
+    from core.data import get_document_cache
+
 class AnalyticsManager:
     def __init__(self, election_id: str):
         self.election_id = election_id
@@ -31,8 +36,7 @@ class AnalyticsManager:
             file_path = self.data_dir / file
             if file_path.exists():
                 try:
-                    with open(file_path, 'r', encoding='utf-8') as f:
-                        data = json.load(f)
+                    data = get_document_cache().load(file_path)
                     
                     stats["file_stats"][file] = {
                         "exists": True,
@@ -71,8 +75,7 @@ class AnalyticsManager:
             return {}
         
         try:
-            with open(questions_file, 'r', encoding='utf-8') as f:
-                data = json.load(f)
+            data = get_document_cache().load(questions_file)
             
             questions = data.get("questions", [])
             if not questions:
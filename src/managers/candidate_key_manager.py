@@ -5,13 +5,14 @@ Ehdokkaiden PKI-valtuutusten hallinta
 import hashlib
 import json
 from datetime import datetime, timedelta
-from typing import Dict
+from typing import Dict, Optional
 from .crypto_manager import CryptoManager
 
 class CandidateKeyManager:
-    def __init__(self, election_id: str):
+    def __init__(self, election_id: str, scheme: Optional[str] = None):
         self.election_id = election_id
-        self.crypto = CryptoManager()
+        # scheme: ehdokasavainten tyyppi (ks. CryptoManager)
+        self.crypto = CryptoManager(scheme)
     
     def issue_candidate_credentials(self, party_id: str, candidate_id: str, 
                                   party_private_key: str, validity_days: int = 180) -> Dict:
@@ -35,6 +36,7 @@ class CandidateKeyManager:
             "valid_until": (datetime.now() + timedelta(days=validity_days)).isoformat(),
             "candidate_public_key": candidate_keys["public_key"],
             "candidate_key_fingerprint": candidate_keys["key_fingerprint"],
+            "candidate_key_type": candidate_keys["key_type"],
             "document_version": "1.0"
         }
         
@@ -71,15 +73,10 @@ class CandidateKeyManager:
                 print("❌ Puolueen allekirjoitus epävalidi")
                 return False
             
-            # 2. Tarkista voimassaolo
-            valid_until = datetime.fromisoformat(delegation_document["valid_until"])
-            if datetime.now() > valid_until:
-                print("❌ Valitus vanhentunut")
-                return False
-            
-            # 3. Tarkista ehdokas-id
-            if delegation_document["candidate_id"] != candidate_id:
-                print("❌ Ehdokas-id ei täsmää")
+            # 2.-3. Tarkista voimassaolo ja ehdokas-id
+            error = self.delegation_terms_error(candidate_id, delegation_document)
+            if error:
+                print(f"❌ {error}")
                 return False
             
             print("✅ Valituus validi")
@@ -88,3 +85,21 @@ class CandidateKeyManager:
         except Exception as e:
             print(f"❌ Valituuden tarkistusvirhe: {e}")
             return False
+    
+    def delegation_terms_error(self, candidate_id: str, delegation_document: Dict) -> Optional[str]:
+        """Valtuutuksen ehdot ilman allekirjoitusta: virheilmoitus tai None"""
+        # 2. Tarkista voimassaolo
+        valid_until = datetime.fromisoformat(delegation_document["valid_until"])
+        if datetime.now() > valid_until:
+            return "Valitus vanhentunut"
+        
+        # 3. Tarkista ehdokas-id
+        if delegation_document["candidate_id"] != candidate_id:
+            return "Ehdokas-id ei täsmää"
+        
+        # 4. Tarkista avaintyyppi (vanhoissa valtuutuksissa ei merkintää)
+        declared_type = delegation_document.get("candidate_key_type")
+        if declared_type and declared_type != self.crypto.key_type_of(delegation_document["candidate_public_key"]):
+            return "Avaintyyppi ei täsmää"
+        
+        return None
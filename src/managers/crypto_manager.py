@@ -1,23 +1,172 @@
 # src/managers/crypto_manager.py
+"""
+Allekirjoitukset: RSA-2048 PSS (oletus) tai Ed25519
+
+Uusien avainten tyyppi valitaan allekirjoitusskeemalla (CryptoManager(scheme)
+tai ympäristömuuttuja SIGNATURE_SCHEME). Allekirjoitus ja varmistus
+tunnistavat tyypin avaimesta itsestään, joten molempien tyyppien
+allekirjoitukset varmistuvat skeemasta riippumatta. Ed25519-avainten
+sormenjäljet on merkitty tyypillä ("ed25519:<tiiviste>"); RSA-sormenjäljet
+pysyvät aiemmassa muodossa.
+
+PEM-avainten jäsentäminen on allekirjoituksen tarkistusta kalliimpaa, joten
+jäsennetyt avainoliot pidetään prosessikohtaisessa välimuistissa avaimen
+sormenjäljen (PEM-tekstin SHA-256) mukaan. Allekirjoitettava data
+sarjallistetaan kanonisesti (canonical_bytes); valmiit tavut voi antaa
+suoraan, jolloin samaa dataa ei sarjallisteta uudelleen.
+
+verify_many() tarkistaa suuren joukon allekirjoituksia prosessipoolissa
+(esim. vaalin kaikkien vastausten auditointi).
+"""
 import hashlib
 import json
 import base64
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
 from cryptography.hazmat.primitives import serialization
-from cryptography.hazmat.primitives.asymmetric import rsa
+from cryptography.hazmat.primitives.asymmetric import ed25519, rsa
 from cryptography.hazmat.primitives import hashes
 from cryptography.hazmat.primitives.asymmetric import padding
-from typing import Dict
+from typing import Any, Dict, Iterable, List, Optional, Tuple, Union
+
+KEY_TYPE_RSA = "rsa"
+KEY_TYPE_ED25519 = "ed25519"
+SIGNATURE_SCHEMES = (KEY_TYPE_RSA, KEY_TYPE_ED25519)
+DEFAULT_SIGNATURE_SCHEME = KEY_TYPE_RSA
+
+KEY_CACHE_SIZE = 1024
+# Tätä pienemmät erät tarkistetaan ilman prosessipoolia
+PARALLEL_VERIFY_THRESHOLD = 256
+
+Payload = Union[Dict, bytes]
+
+
+def canonical_bytes(data: Payload) -> bytes:
+    """Allekirjoitettavan datan kanoninen sarjallistus (tavut sellaisenaan)"""
+    if isinstance(data, bytes):
+        return data
+    return json.dumps(data, sort_keys=True, ensure_ascii=False).encode('utf-8')
+
+
+def key_fingerprint(key_pem: str) -> str:
+    """Avaimen välimuistitunniste: koko PEM-tekstin SHA-256"""
+    return hashlib.sha256(key_pem.encode()).hexdigest()
+
+
+class KeyCache:
+    """Jäsennettyjen avainolioiden LRU-välimuisti sormenjäljen mukaan"""
+    
+    def __init__(self, max_size: int = KEY_CACHE_SIZE):
+        self.max_size = max_size
+        self._keys: "OrderedDict[str, Any]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+    
+    def public_key(self, public_key_pem: str):
+        return self._get(public_key_pem,
+                         lambda pem: serialization.load_pem_public_key(pem.encode()))
+    
+    def private_key(self, private_key_pem: str):
+        return self._get(private_key_pem,
+                         lambda pem: serialization.load_pem_private_key(pem.encode(), password=None))
+    
+    def _get(self, key_pem: str, load):
+        fingerprint = key_fingerprint(key_pem)
+        with self._lock:
+            key = self._keys.get(fingerprint)
+            if key is not None:
+                self._keys.move_to_end(fingerprint)
+                self.hits += 1
+                return key
+        
+        key = load(key_pem)
+        with self._lock:
+            self.misses += 1
+            self._keys[fingerprint] = key
+            if len(self._keys) > self.max_size:
+                self._keys.popitem(last=False)
+        return key
+    
+    def clear(self):
+        with self._lock:
+            self._keys.clear()
+
+
+# Prosessikohtainen: jokainen CryptoManager ja poolin työprosessi käyttää omaa prosessinsa välimuistia
+_key_cache = KeyCache()
+
+_PSS_PADDING = padding.PSS(
+    mgf=padding.MGF1(hashes.SHA256()),
+    salt_length=padding.PSS.MAX_LENGTH
+)
+
+
+def resolve_scheme(scheme: Optional[str] = None) -> str:
+    """Allekirjoitusskeema: annettu, SIGNATURE_SCHEME tai oletus"""
+    scheme = scheme or os.environ.get("SIGNATURE_SCHEME") or DEFAULT_SIGNATURE_SCHEME
+    if scheme not in SIGNATURE_SCHEMES:
+        raise ValueError(f"Tuntematon allekirjoitusskeema: {scheme} (tuetut: {', '.join(SIGNATURE_SCHEMES)})")
+    return scheme
+
+
+def key_type(key) -> str:
+    """Avainolion tyyppi"""
+    if isinstance(key, (ed25519.Ed25519PrivateKey, ed25519.Ed25519PublicKey)):
+        return KEY_TYPE_ED25519
+    return KEY_TYPE_RSA
+
+
+def _sign(private_key, payload: bytes) -> bytes:
+    if isinstance(private_key, ed25519.Ed25519PrivateKey):
+        return private_key.sign(payload)
+    return private_key.sign(payload, _PSS_PADDING, hashes.SHA256())
+
+
+def _check(public_key, payload: bytes, signature: bytes):
+    """Nostaa InvalidSignature-poikkeuksen, jos allekirjoitus ei täsmää"""
+    if isinstance(public_key, ed25519.Ed25519PublicKey):
+        public_key.verify(signature, payload)
+    else:
+        public_key.verify(signature, payload, _PSS_PADDING, hashes.SHA256())
+
+
+def _verify(public_key, payload: bytes, signature: str) -> bool:
+    try:
+        _check(public_key, payload, base64.b64decode(signature))
+        return True
+    except Exception:
+        return False
+
+
+def _verify_batch(keys: Dict[str, str], items: List[Tuple[str, bytes, str]]) -> List[bool]:
+    """Tarkista erä (ajetaan työprosessissa): keys sormenjälki -> PEM, items (sormenjälki, data, allekirjoitus)"""
+    parsed = {}
+    for fingerprint, pem in keys.items():
+        try:
+            parsed[fingerprint] = _key_cache.public_key(pem)
+        except Exception:
+            parsed[fingerprint] = None
+    return [parsed[fingerprint] is not None and _verify(parsed[fingerprint], payload, signature)
+            for fingerprint, payload, signature in items]
+
 
 class CryptoManager:
-    def __init__(self):
+    def __init__(self, scheme: Optional[str] = None):
         self.key_size = 2048
+        self.scheme = resolve_scheme(scheme)
     
     def generate_key_pair(self) -> Dict:
-        """Luo RSA-avainparin"""
-        private_key = rsa.generate_private_key(
-            public_exponent=65537,
-            key_size=self.key_size
-        )
+        """Luo avainparin skeeman mukaan (RSA tai Ed25519)"""
+        if self.scheme == KEY_TYPE_ED25519:
+            private_key = ed25519.Ed25519PrivateKey.generate()
+        else:
+            private_key = rsa.generate_private_key(
+                public_exponent=65537,
+                key_size=self.key_size
+            )
         
         public_key = private_key.public_key()
         
@@ -36,48 +185,85 @@ class CryptoManager:
         return {
             "private_key": private_pem,
             "public_key": public_pem,
-            "key_fingerprint": self.calculate_fingerprint(public_pem)
+            "key_type": self.scheme,
+            "key_fingerprint": self.calculate_fingerprint(public_pem, self.scheme)
         }
     
-    def calculate_fingerprint(self, public_key_pem: str) -> str:
-        """Laske julkisen avaimen tunniste"""
-        return hashlib.sha256(public_key_pem.encode()).hexdigest()[:16]
+    def key_type_of(self, public_key_pem: str) -> str:
+        """Julkisen avaimen tyyppi PEM-tekstistä"""
+        return key_type(_key_cache.public_key(public_key_pem))
     
-    def sign_data(self, private_key_pem: str, data: Dict) -> str:
-        """Allekirjoita data yksityisellä avaimella"""
-        private_key = serialization.load_pem_private_key(
-            private_key_pem.encode(),
-            password=None
-        )
-        
-        signature = private_key.sign(
-            json.dumps(data, sort_keys=True, ensure_ascii=False).encode('utf-8'),
-            padding.PSS(
-                mgf=padding.MGF1(hashes.SHA256()),
-                salt_length=padding.PSS.MAX_LENGTH
-            ),
-            hashes.SHA256()
-        )
-        
+    def calculate_fingerprint(self, public_key_pem: str, key_type: Optional[str] = None) -> str:
+        """Laske julkisen avaimen tunniste (Ed25519: "ed25519:"-etuliite)"""
+        digest = hashlib.sha256(public_key_pem.encode()).hexdigest()[:16]
+        if key_type is None:
+            try:
+                key_type = self.key_type_of(public_key_pem)
+            except Exception:
+                key_type = KEY_TYPE_RSA
+        return digest if key_type == KEY_TYPE_RSA else f"{key_type}:{digest}"
+    
+    def sign_data(self, private_key_pem: str, data: Payload) -> str:
+        """Allekirjoita data yksityisellä avaimella (avaimen tyypin mukaan)"""
+        private_key = _key_cache.private_key(private_key_pem)
+        signature = _sign(private_key, canonical_bytes(data))
         return base64.b64encode(signature).decode('utf-8')
     
-    def verify_signature(self, public_key_pem: str, data: Dict, signature: str) -> bool:
+    def verify_signature(self, public_key_pem: str, data: Payload, signature: str) -> bool:
         """Varmista allekirjoitus"""
         try:
-            public_key = serialization.load_pem_public_key(
-                public_key_pem.encode()
-            )
-            
-            public_key.verify(
-                base64.b64decode(signature),
-                json.dumps(data, sort_keys=True, ensure_ascii=False).encode('utf-8'),
-                padding.PSS(
-                    mgf=padding.MGF1(hashes.SHA256()),
-                    salt_length=padding.PSS.MAX_LENGTH
-                ),
-                hashes.SHA256()
-            )
+            public_key = _key_cache.public_key(public_key_pem)
+            _check(public_key, canonical_bytes(data), base64.b64decode(signature))
             return True
         except Exception as e:
             print(f"Allekirjoituksen varmistusvirhe: {e}")
             return False
+    
+    def verify_many(self, items: Iterable[Tuple[str, Payload, str]],
+                    max_workers: Optional[int] = None) -> List[bool]:
+        """
+        Varmista joukko allekirjoituksia rinnakkain
+        
+        Args:
+            items: (julkinen avain PEM, data tai kanoniset tavut, allekirjoitus)
+            max_workers: Työprosessien määrä (oletus: kaikki ytimet)
+            
+        Returns:
+            Tulokset samassa järjestyksessä kuin items; virheellinen syöte
+            (esim. avain ei merkkijono, data ei sarjallistu) on False kuten
+            verify_signaturessa
+        """
+        keys: Dict[str, str] = {}
+        batch = []
+        positions = []
+        results: List[bool] = []
+        for public_key_pem, data, signature in items:
+            results.append(False)
+            try:
+                fingerprint = key_fingerprint(public_key_pem)
+                payload = canonical_bytes(data)
+            except Exception:
+                continue
+            keys.setdefault(fingerprint, public_key_pem)
+            batch.append((fingerprint, payload, signature))
+            positions.append(len(results) - 1)
+        
+        for position, valid in zip(positions, self._verify_parallel(keys, batch, max_workers)):
+            results[position] = valid
+        return results
+    
+    def _verify_parallel(self, keys: Dict[str, str], batch: List[Tuple[str, bytes, str]],
+                         max_workers: Optional[int]) -> List[bool]:
+        workers = max_workers or os.cpu_count() or 1
+        if workers == 1 or len(batch) < PARALLEL_VERIFY_THRESHOLD:
+            return _verify_batch(keys, batch)
+        
+        # Muutama erä per työprosessi tasaa kuorman; jokainen erä saa vain tarvitsemansa avaimet
+        chunk_size = -(-len(batch) // (workers * 4))
+        chunks = [batch[i:i + chunk_size] for i in range(0, len(batch), chunk_size)]
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = [
+                executor.submit(_verify_batch, {fp: keys[fp] for fp in {item[0] for item in chunk}}, chunk)
+                for chunk in chunks
+            ]
+            return [result for future in futures for result in future.result()]
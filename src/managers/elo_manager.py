@@ -2,63 +2,56 @@
 import json
 from datetime import datetime
 
+try:
+    from src.core.elo_store import ELORatingStore, calculate_expected
+    from src.core.elo_batch import recompute_ratings, METHOD_ELO
+except ImportError:
+    from core.elo_store import ELORatingStore, calculate_expected
+    from core.elo_batch import recompute_ratings, METHOD_ELO
+
 class ELOManager:
-    def __init__(self, election_id: str):
+    def __init__(self, election_id: str, questions_file: str = "data/runtime/questions.json"):
         self.election_id = election_id
         self.k_factor = 32
-    
+        self.questions_file = questions_file
+        self._store = None
+
+    @property
+    def store(self) -> ELORatingStore:
+        """Muistissa pidettävä luokitusindeksi (ladataan ensimmäisellä käytöllä)"""
+        if self._store is None:
+            self._store = ELORatingStore(self.questions_file, k_factor=self.k_factor)
+        return self._store
+
     def calculate_expected(self, rating_a: int, rating_b: int) -> float:
         """Laske odotettu tulos kahden kysymyksen välillä"""
-        return 1 / (1 + 10 ** ((rating_b - rating_a) / 400))
-    
+        return calculate_expected(rating_a, rating_b)
+
     def update_ratings(self, question_a: str, question_b: str, winner: str):
         """Päivitä ELO-luokitukset vertailun perusteella"""
         try:
-            # Lataa kysymykset
-            with open("data/runtime/questions.json", "r", encoding='utf-8') as f:
-                data = json.load(f)
-            
-            # Etsi kysymykset
-            q_a = next((q for q in data["questions"] if q["local_id"] == question_a), None)
-            q_b = next((q for q in data["questions"] if q["local_id"] == question_b), None)
-            
-            if not q_a or not q_b:
-                raise ValueError("Kysymyksiä ei löydy")
-            
-            rating_a = q_a["elo_rating"]["current_rating"]
-            rating_b = q_b["elo_rating"]["current_rating"]
-            
-            # Laske odotetut tulokset
-            expected_a = self.calculate_expected(rating_a, rating_b)
-            expected_b = self.calculate_expected(rating_b, rating_a)
-            
-            # Päivitä ratingit voittajan mukaan
-            if winner == "a":
-                actual_a, actual_b = 1.0, 0.0
-            elif winner == "b":
-                actual_a, actual_b = 0.0, 1.0
-            else:  # tasapeli
-                actual_a, actual_b = 0.5, 0.5
-            
-            # Laske uudet ratingit
-            new_rating_a = rating_a + self.k_factor * (actual_a - expected_a)
-            new_rating_b = rating_b + self.k_factor * (actual_b - expected_b)
-            
-            # Päivitä data
-            q_a["elo_rating"]["current_rating"] = int(new_rating_a)
-            q_a["elo_rating"]["comparison_delta"] = int(new_rating_a - rating_a)
-            q_b["elo_rating"]["current_rating"] = int(new_rating_b)
-            q_b["elo_rating"]["comparison_delta"] = int(new_rating_b - rating_b)
-            
-            # Tallenna
-            with open("data/runtime/questions.json", "w", encoding='utf-8') as f:
-                json.dump(data, f, indent=2, ensure_ascii=False)
-            
-            return {
-                "question_a": {"old": rating_a, "new": new_rating_a, "delta": new_rating_a - rating_a},
-                "question_b": {"old": rating_b, "new": new_rating_b, "delta": new_rating_b - rating_b}
-            }
-            
+            self.store.k_factor = self.k_factor
+            return self.store.record_comparison(question_a, question_b, winner)
         except Exception as e:
             print(f"ELO-päivitysvirhe: {e}")
             raise
+
+    def recompute_ratings(self, method: str = METHOD_ELO, k_factor: float = None,
+                          exclude_seqs=(), apply: bool = False):
+        """Laske kaikki luokitukset uudelleen koko vertailuhistoriasta"""
+        # Snapshot ensin, jotta questions.json ja loki ovat samassa tilassa
+        self.close()
+        self._store = None
+        return recompute_ratings(self.questions_file, method=method, k_factor=k_factor,
+                                 exclude_seqs=exclude_seqs, apply=apply)
+
+    def close(self):
+        """Tallenna luokitukset questions.json-tiedostoon"""
+        if self._store is not None:
+            self._store.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
@@ -6,15 +6,15 @@ Turvallinen vastausjärjestelmä PKI-allekirjoituksilla
 import json
 import hashlib
 from datetime import datetime
-from typing import Dict, List
+from typing import Dict, List, Optional, Tuple
 from .candidate_key_manager import CandidateKeyManager
-from .crypto_manager import CryptoManager
+from .crypto_manager import CryptoManager, canonical_bytes
 
 class SecureAnswerManager:
-    def __init__(self, election_id: str):
+    def __init__(self, election_id: str, scheme: Optional[str] = None):
         self.election_id = election_id
-        self.crypto = CryptoManager()
-        self.key_manager = CandidateKeyManager(election_id)
+        self.crypto = CryptoManager(scheme)
+        self.key_manager = CandidateKeyManager(election_id, scheme)
     
     def submit_signed_answer(self, candidate_id: str, question_id: str,
                            answer_data: Dict, candidate_private_key: str,
@@ -112,6 +112,68 @@ class SecureAnswerManager:
             print(f"❌ Vastauksen eheystarkistusvirhe: {e}")
             return False
     
+    def verify_answers(self, secure_answers: List[Dict], max_workers: Optional[int] = None) -> List[bool]:
+        """
+        Tarkista suuren vastausjoukon eheys (vaalin auditointi)
+        
+        Sama tarkistus kuin verify_answer_integrity, mutta allekirjoitukset
+        varmistetaan yhdellä CryptoManager.verify_many-kutsulla kaikilla
+        ytimillä. Saman ehdokkaan vastaukset jakavat valtuutuksen, joten
+        kukin valtuutusallekirjoitus tarkistetaan vain kerran.
+        
+        Returns:
+            Tulokset samassa järjestyksessä kuin secure_answers
+        """
+        items = []
+        answer_items: List[Optional[Tuple[int, int]]] = []
+        delegation_index: Dict[Tuple[str, bytes, str], int] = {}
+        
+        for secure_answer in secure_answers:
+            try:
+                delegation = secure_answer["delegation_chain"]
+                delegation_document = delegation["delegation_document"]
+                items.append((delegation_document["candidate_public_key"],
+                              secure_answer["answer_document"], secure_answer["answer_signature"]))
+                answer_position = len(items) - 1
+                
+                delegation_bytes = canonical_bytes(delegation_document)
+                key = (delegation["party_public_key"], delegation_bytes, delegation["delegation_signature"])
+                if key not in delegation_index:
+                    items.append(key)
+                    delegation_index[key] = len(items) - 1
+                answer_items.append((answer_position, delegation_index[key]))
+            except (KeyError, TypeError, ValueError):
+                answer_items.append(None)
+        
+        signatures_valid = self.crypto.verify_many(items, max_workers)
+        
+        results = []
+        for secure_answer, positions in zip(secure_answers, answer_items):
+            results.append(
+                positions is not None
+                and signatures_valid[positions[0]]
+                and signatures_valid[positions[1]]
+                and self._answer_terms_valid(secure_answer)
+            )
+        
+        print(f"🔍 Auditoitu {len(results)} vastausta: {sum(results)} validia, "
+              f"{len(results) - sum(results)} epävalidia "
+              f"({len(items)} allekirjoitusta, {len(delegation_index)} valtuutusta)")
+        return results
+    
+    def _answer_terms_valid(self, secure_answer: Dict) -> bool:
+        """Vastauksen tarkistukset allekirjoitusten lisäksi (valtuutuksen ehdot, hash-ketju)"""
+        try:
+            answer_doc = secure_answer["answer_document"]
+            if self.key_manager.delegation_terms_error(
+                answer_doc["candidate_id"], secure_answer["delegation_chain"]["delegation_document"]
+            ):
+                return False
+            expected_hash = self._calculate_hash_chain(answer_doc, secure_answer["answer_signature"])
+            return secure_answer["metadata"]["hash_chain"] == expected_hash
+        except Exception:
+            return False
+    
     def _validate_answer_data(self, answer_data: Dict) -> bool:
         """Validoi vastausdata"""
         if "answer_value" not in answer_data:
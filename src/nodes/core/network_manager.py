@@ -1,15 +1,53 @@
 """
 Network management for multinode architecture
 Extends existing NetworkSyncManager functionality
+
+Verkkoliikenne kulkee asyncio-transportin (transport.AsyncTransport) kautta:
+start() avaa TCP-palvelimen ja connect_peer() yhteyden vertaiseen. Jokaisella
+vertaisella on oma lähetysjono, joten broadcast jonottaa viestin kaikille
+rinnakkain eikä odota vertaisia yksi kerrallaan. Vastaanotetut viestit
+ohjataan message_handlers-käsittelijöille.
+
+Synkroniset metodit (broadcast_message, send_message) toimivat myös
+käsittelijöiden sisältä: ne ajastavat lähetyksen noden tapahtumasilmukkaan.
+Ilman käynnistettyä transportia vertaiset ovat paikallisia identiteettejä
+ja lähetys vain kirjataan (aiempi toiminta).
 """
 
+import asyncio
 import time
 import json
 import hashlib  # LISÄTTY: Turvallisempaa hash-laskentaa varten
+import uuid
 from datetime import datetime
-from typing import Dict, List, Any, Optional, Callable
+from typing import Dict, List, Any, Optional, Callable, Tuple
 from pathlib import Path
 
+try:
+    from .transport import AsyncTransport
+except ImportError:
+    # Suora ajo (python network_manager.py)
+    from transport import AsyncTransport
+
+
+class RemotePeer:
+    """Verkon yli tunnistettu vertainen (hello-viestin tiedot)"""
+    
+    def __init__(self, node_id: str, election_id: str = None, node_type: str = None,
+                 address: Optional[List] = None):
+        self.node_id = node_id
+        self.election_id = election_id
+        self.node_type = node_type
+        self.address = tuple(address) if address else None
+    
+    @classmethod
+    def from_hello(cls, info: Dict[str, Any]) -> "RemotePeer":
+        return cls(info["node_id"], info.get("election_id"), info.get("node_type"), info.get("address"))
+    
+    def __repr__(self):
+        return f"RemotePeer({self.node_id}, {self.address})"
+
+
 class NetworkManager:
     """Complete network management implementation"""
     
@@ -17,9 +55,17 @@ class NetworkManager:
         self.identity = identity
         self.peers = {}  # node_id -> peer_info
         self.message_handlers = {}
-        self.message_queue = []
         self.connection_status = "disconnected"
         
+        # Asyncio transport (start() käynnistää)
+        self.transport: Optional[AsyncTransport] = None
+        self.address: Optional[Tuple[str, int]] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._tasks = set()
+        
+        # Gossip-levitys (enable_gossip); None = broadcast kaikille vertaisille
+        self.gossip = None
+        
         # Statistics
         self.messages_sent = 0
         self.messages_received = 0
@@ -45,14 +91,11 @@ class NetworkManager:
         
         self.connection_attempts += 1
         
-        # Mock connection process
+        # Paikalliset identiteetit; verkon yli yhdistetään connect_peer():llä
         if bootstrap_peers:
             for peer in bootstrap_peers:
                 self.add_peer(peer)
         
-        # Simulate connection delay
-        time.sleep(0.5)
-        
         self.connection_status = "connected"
         print(f"✅ {self.identity.node_id} connected to network with {len(self.peers)} peers")
         return True
@@ -60,14 +103,104 @@ class NetworkManager:
     def disconnect_from_network(self):
         """Disconnect from network"""
         print(f"🌐 Disconnecting {self.identity.node_id} from network...")
+        if self.transport:
+            self._spawn(self.transport.close())
+            self.transport = None
         self.connection_status = "disconnected"
         self.peers.clear()
         print("✅ Disconnected from network")
     
-    def add_peer(self, peer_identity):
+    # Asyncio transport
+    async def start(self, host: str = "127.0.0.1", port: int = 0) -> Tuple[str, int]:
+        """Käynnistä TCP-palvelin nykyiseen tapahtumasilmukkaan; palauttaa osoitteen"""
+        self._loop = asyncio.get_running_loop()
+        self.transport = AsyncTransport(
+            {
+                "node_id": self.identity.node_id,
+                "election_id": getattr(self.identity, "election_id", None),
+                "node_type": getattr(self.identity, "node_type", None)
+            },
+            on_message=self.process_incoming_message,
+            on_peer=lambda info: self.add_peer(RemotePeer.from_hello(info), info.get("address")),
+            on_peer_lost=self.remove_peer
+        )
+        self.address = await self.transport.start(host, port)
+        self.connection_status = "connected"
+        print(f"✅ {self.identity.node_id} listening on {self.address[0]}:{self.address[1]}")
+        return self.address
+    
+    async def connect_peer(self, host: str, port: int) -> str:
+        """Yhdistä vertaiseen osoitteella; palauttaa vertaisen node_id:n"""
+        self.connection_attempts += 1
+        info = await self.transport.connect(host, port)
+        return info["node_id"]
+    
+    async def connect_peers(self, addresses: List[Tuple[str, int]]) -> List[str]:
+        """Yhdistä useaan vertaiseen rinnakkain; epäonnistuneet ohitetaan"""
+        results = await asyncio.gather(*(self.connect_peer(host, port) for host, port in addresses),
+                                       return_exceptions=True)
+        for (host, port), result in zip(addresses, results):
+            if isinstance(result, Exception):
+                print(f"❌ Connection to {host}:{port} failed: {result}")
+        return [result for result in results if not isinstance(result, Exception)]
+    
+    async def broadcast(self, message_type: str, payload: Dict,
+                        exclude_nodes: List[str] = None) -> Dict:
+        """Lähetä viesti kaikille vertaisille rinnakkain (odottaa jonotuksen)"""
+        message = self._build_message(message_type, payload)
+        sent_count = await self._broadcast_to_peers(message, exclude_nodes)
+        print(f"📤 Broadcast '{message_type}' to {sent_count} peers")
+        return message
+    
+    async def send(self, target_node_id: str, message_type: str, payload: Dict) -> bool:
+        """Lähetä viesti yhdelle vertaiselle (odottaa jonotuksen)"""
+        if target_node_id not in self.peers:
+            print(f"❌ Target peer not found: {target_node_id}")
+            return False
+        message = self._build_message(message_type, payload, target_node_id)
+        self._mark_sent(target_node_id)
+        self.messages_sent += 1
+        return await self.transport.send(target_node_id, message)
+    
+    async def flush(self):
+        """Odota, että jonotetut ja ajastetut lähetykset on kirjoitettu"""
+        while self._tasks:
+            await asyncio.gather(*list(self._tasks), return_exceptions=True)
+        if self.transport:
+            await self.transport.flush()
+    
+    async def stop(self):
+        """Sulje palvelin ja yhteydet"""
+        if self.transport:
+            await self.transport.close()
+            self.transport = None
+        self.connection_status = "disconnected"
+        self.peers.clear()
+    
+    def _spawn(self, coroutine):
+        """Ajasta korutiini noden tapahtumasilmukkaan (myös toisesta säikeestä)"""
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        
+        if running is self._loop:
+            task = self._loop.create_task(coroutine)
+            self._tasks.add(task)
+            task.add_done_callback(self._task_done)
+        else:
+            asyncio.run_coroutine_threadsafe(coroutine, self._loop)
+    
+    def _task_done(self, task: asyncio.Task):
+        self._tasks.discard(task)
+        if not task.cancelled() and task.exception():
+            print(f"❌ Send failed: {task.exception()}")
+    
+    def add_peer(self, peer_identity, address: Optional[List] = None):
         """Add peer to network"""
         peer_info = {
             "identity": peer_identity,
+            "address": tuple(address) if address else None,
             "last_seen": datetime.now().isoformat(),
             "connection_status": "connected",
             "message_count": 0
@@ -88,38 +221,33 @@ class NetworkManager:
         """Get number of connected peers - FIXED METHOD"""
         return len(self.peers)
     
+    def enable_gossip(self, fanout: int = None, ttl: int = None):
+        """Levitä broadcast_message-viestit gossipilla (rajattu fanout ja ttl)"""
+        from ..protocols.gossip import GossipLayer, DEFAULT_FANOUT, DEFAULT_TTL
+        
+        self.gossip = GossipLayer(self, fanout or DEFAULT_FANOUT, ttl or DEFAULT_TTL)
+        print(f"✅ Gossip enabled: fanout {self.gossip.fanout}, ttl {self.gossip.ttl}")
+        return self.gossip
+    
     def broadcast_message(self, message_type: str, payload: Dict, exclude_nodes: List[str] = None):
         """Broadcast message to all peers"""
         if self.connection_status != "connected":
             print("❌ Cannot broadcast - not connected to network")
             return
         
-        exclude_nodes = exclude_nodes or []
-        
-        # KORJATTU: Turvallisempi message_id generointi
-        try:
-            # Yritä JSON-serialisointia ensin
-            payload_json = json.dumps(payload, sort_keys=True, default=str)
-            payload_hash = hashlib.md5(payload_json.encode()).hexdigest()[:8]
-        except (TypeError, ValueError):
-            # Fallback: käytä string-repr ja timestamp
-            payload_hash = hashlib.md5(str(payload).encode()).hexdigest()[:8]
+        if self.gossip:
+            # exclude_nodes rajaa vain ensimmäisen hypyn vastaanottajia
+            return self.gossip.publish(message_type, payload, exclude_nodes)
         
-        message = {
-            "type": message_type,
-            "payload": payload,
-            "sender": self.identity.node_id,
-            "timestamp": datetime.now().isoformat(),
-            "election_id": self.identity.election_id,
-            "message_id": f"msg_{int(time.time())}_{payload_hash}"  # KORJATTU
-        }
+        message = self._build_message(message_type, payload)
         
-        # Sign message if we have crypto capabilities
-        if hasattr(self.identity, 'crypto_manager'):
-            message["signature"] = self.identity.crypto_manager.sign_data(
-                self.identity.keys["private_key"], payload
-            )
+        if self.transport:
+            # Rinnakkainen lähetys tapahtumasilmukassa
+            self._spawn(self._broadcast_to_peers(message, exclude_nodes))
+            print(f"📤 Broadcast '{message_type}' to {self.get_peer_count()} peers")
+            return message
         
+        exclude_nodes = exclude_nodes or []
         sent_count = 0
         for peer_id, peer_info in self.peers.items():
             if peer_id not in exclude_nodes:
@@ -128,6 +256,7 @@ class NetworkManager:
         
         self.messages_sent += sent_count
         print(f"📤 Broadcast '{message_type}' to {sent_count} peers")
+        return message
     
     def send_message(self, target_node_id: str, message_type: str, payload: Dict) -> bool:
         """Send message to specific peer"""
@@ -135,48 +264,78 @@ class NetworkManager:
             print(f"❌ Target peer not found: {target_node_id}")
             return False
         
-        # KORJATTU: Sama message_id korjaus myös send_message:lle
+        if self.transport:
+            self._spawn(self.send(target_node_id, message_type, payload))
+            return True
+        
+        message = self._build_message(message_type, payload, target_node_id)
+        peer_info = self.peers[target_node_id]
+        self._send_to_peer(peer_info, message)
+        self.messages_sent += 1
+        
+        return True
+    
+    def _build_message(self, message_type: str, payload: Dict, target_node_id: str = None) -> Dict:
+        """Muodosta allekirjoitettu viesti"""
+        # KORJATTU: Turvallisempi message_id generointi
         try:
+            # Yritä JSON-serialisointia ensin
             payload_json = json.dumps(payload, sort_keys=True, default=str)
             payload_hash = hashlib.md5(payload_json.encode()).hexdigest()[:8]
         except (TypeError, ValueError):
+            # Fallback: käytä string-repr ja timestamp
             payload_hash = hashlib.md5(str(payload).encode()).hexdigest()[:8]
         
         message = {
             "type": message_type,
             "payload": payload,
             "sender": self.identity.node_id,
-            "target": target_node_id,
             "timestamp": datetime.now().isoformat(),
             "election_id": self.identity.election_id,
-            "message_id": f"msg_{int(time.time())}_{payload_hash}"  # KORJATTU
+            # Satunnainen loppuosa: saman sekunnin viestit eivät törmää
+            "message_id": f"msg_{int(time.time())}_{payload_hash}_{uuid.uuid4().hex[:12]}"
         }
+        if target_node_id:
+            message["target"] = target_node_id
         
-        peer_info = self.peers[target_node_id]
-        self._send_to_peer(peer_info, message)
-        self.messages_sent += 1
+        # Sign message if we have crypto capabilities
+        if hasattr(self.identity, 'crypto_manager'):
+            message["signature"] = self.identity.crypto_manager.sign_data(
+                self.identity.keys["private_key"], payload
+            )
         
-        return True
+        return message
+    
+    async def _broadcast_to_peers(self, message: Dict, exclude_nodes: List[str] = None) -> int:
+        exclude_nodes = set(exclude_nodes or [])
+        targets = [peer_id for peer_id in self.peers if peer_id not in exclude_nodes]
+        for peer_id in targets:
+            self._mark_sent(peer_id)
+        sent_count = await self.transport.broadcast(targets, message)
+        self.messages_sent += sent_count
+        return sent_count
+    
+    def _mark_sent(self, peer_id: str):
+        peer_info = self.peers[peer_id]
+        peer_info["last_seen"] = datetime.now().isoformat()
+        peer_info["message_count"] += 1
     
     def _send_to_peer(self, peer_info: Dict, message: Dict):
-        """Send message to specific peer (mock implementation)"""
-        # Mock implementation - in real system this would use WebSocket/REST
+        """Send message to specific peer (local peer without transport)"""
         peer_identity = peer_info["identity"]
         peer_info["last_seen"] = datetime.now().isoformat()
         peer_info["message_count"] += 1
         
         print(f"📤 [{self.identity.node_id}] → [{peer_identity.node_id}]: {message['type']}")
-        
-        # Simulate network delay
-        time.sleep(0.1)
-        
-        # In real system, this would actually send the message
-        # For now, we'll just log it
     
     def process_incoming_message(self, message: Dict):
         """Process incoming message from network"""
         self.messages_received += 1
         
+        sender = self.peers.get(message.get("sender"))
+        if sender:
+            sender["last_seen"] = datetime.now().isoformat()
+        
         message_type = message.get("type")
         handler = self.message_handlers.get(message_type)
         
@@ -14,6 +14,12 @@ from typing import Dict, Any, Optional
 
 class MockCryptoManager:
     """Mock crypto manager for testing when real one is not available"""
+    def __init__(self, scheme: str = None):
+        self.scheme = scheme
+    
+    def calculate_fingerprint(self, public_key_pem: str) -> str:
+        return hashlib.sha256(public_key_pem.encode()).hexdigest()[:16]
+    
     def generate_key_pair(self):
         return {
             "private_key": "mock_private_key_" + hashlib.md5(str(time.time()).encode()).hexdigest()[:8],
@@ -32,11 +38,16 @@ except ImportError:
     CryptoManager = MockCryptoManager
     print("🔶 Using MockCryptoManager (real one not available)")
 
+# Nodet allekirjoittavat jokaisen viestin: Ed25519 on avainten luonnissa ja
+# allekirjoituksessa moninkertaisesti RSA-2048:aa nopeampi
+NODE_SIGNATURE_SCHEME = "ed25519"
+
 class NodeIdentity:
     """Complete node identity management implementation"""
     
     def __init__(self, election_id: str = "default", node_type: str = "worker", 
-                 node_name: str = None, domain: str = "general"):
+                 node_name: str = None, domain: str = "general",
+                 signature_scheme: str = NODE_SIGNATURE_SCHEME):
         self.election_id = election_id
         self.node_type = node_type
         self.node_name = node_name or f"{node_type}_node"
@@ -45,9 +56,10 @@ class NodeIdentity:
         self.created = datetime.now().isoformat()
         self.last_seen = self.created
         
-        # Cryptographic identity
-        self.crypto_manager = CryptoManager()
-        self.keys = self.crypto_manager.generate_key_pair()
+        # Cryptographic identity (avaimet luodaan vasta tarvittaessa:
+        # esim. load_identity() ennen käyttöä ei tuota turhaa avainparia)
+        self.crypto_manager = CryptoManager(signature_scheme)
+        self._keys = None
         
         # Network capabilities
         self.capabilities = self._get_default_capabilities()
@@ -56,6 +68,16 @@ class NodeIdentity:
         # Storage
         self.identity_file = Path(f"data/nodes/{election_id}/{self.node_id}_identity.json")
     
+    @property
+    def keys(self) -> Dict[str, str]:
+        if self._keys is None:
+            self._keys = self.crypto_manager.generate_key_pair()
+        return self._keys
+    
+    @keys.setter
+    def keys(self, value: Dict[str, str]):
+        self._keys = value
+    
     def _generate_node_id(self) -> str:
         """Generate unique node ID compatible with existing system"""
         timestamp = int(time.time() * 1000)
@@ -136,6 +158,7 @@ class NodeIdentity:
             "domain": self.domain,
             "public_key": self.keys["public_key"],
             "key_fingerprint": self.keys["key_fingerprint"],
+            "key_type": self.keys.get("key_type"),
             "capabilities": self.capabilities,
             "trust_score": self.trust_score,
             "created": self.created,
@@ -154,7 +177,7 @@ class NodeIdentity:
                 public_key = self.keys["public_key"]
             
             expected_fingerprint = self.keys["key_fingerprint"]
-            actual_fingerprint = hashlib.sha256(public_key.encode()).hexdigest()[:16]
+            actual_fingerprint = self.crypto_manager.calculate_fingerprint(public_key)
             
             result = expected_fingerprint == actual_fingerprint
             print(f"🔐 Identity verification: {result} (expected: {expected_fingerprint}, got: {actual_fingerprint})")
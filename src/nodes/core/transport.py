@@ -0,0 +1,203 @@
+# src/nodes/core/transport.py
+"""
+Asyncio TCP transport for NetworkManager
+
+- Viestit kulkevat rivinvaihdolla erotettuna JSONina (yksi viesti per rivi)
+- Yhteyden molemmat päät lähettävät ensin hello-viestin, jolla vertainen
+  tunnistetaan; yhteys on kaksisuuntainen, joten kahden noden välillä
+  riittää yksi yhteys
+- Jokaisella vertaisella on oma rajattu lähetysjono ja kirjoitustehtävä:
+  hidas vertainen täyttää vain oman jononsa, ja täysi jono hidastaa
+  lähettäjää (backpressure) sen sijaan että muistinkäyttö kasvaisi rajatta
+- Broadcast sarjallistaa viestin kerran ja jonottaa sen kaikille
+  vertaisille rinnakkain
+"""
+
+import asyncio
+import json
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+SEND_QUEUE_SIZE = 1000
+MAX_MESSAGE_BYTES = 16 * 1024 * 1024
+HANDSHAKE_TIMEOUT = 10.0
+
+
+def encode_message(message: Dict[str, Any]) -> bytes:
+    """Sarjallista viesti yhdeksi riviksi"""
+    return json.dumps(message, ensure_ascii=False, default=str).encode("utf-8") + b"\n"
+
+
+class PeerConnection:
+    """Yksi vertaisyhteys: lähetysjono, kirjoittaja ja vastaanottosilmukka"""
+
+    def __init__(self, info: Dict[str, Any], reader: asyncio.StreamReader,
+                 writer: asyncio.StreamWriter, queue_size: int = SEND_QUEUE_SIZE):
+        self.info = info
+        self.node_id = info["node_id"]
+        self.reader = reader
+        self.writer = writer
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        self.closed = False
+        self._tasks: List[asyncio.Task] = []
+
+    def start(self, on_message: Callable[["PeerConnection", Dict], None],
+              on_close: Callable[["PeerConnection"], None]):
+        self._tasks = [
+            asyncio.ensure_future(self._write_loop()),
+            asyncio.ensure_future(self._read_loop(on_message, on_close))
+        ]
+
+    async def send_raw(self, line: bytes):
+        """Jonota valmiiksi sarjallistettu viesti (odottaa, jos jono on täynnä)"""
+        if self.closed:
+            raise ConnectionError(f"Connection to {self.node_id} is closed")
+        await self.queue.put(line)
+
+    async def _write_loop(self):
+        try:
+            while True:
+                lines = [await self.queue.get()]
+                # Kirjoita kaikki jonossa odottavat ennen drainia
+                while not self.queue.empty():
+                    lines.append(self.queue.get_nowait())
+                try:
+                    self.writer.writelines(lines)
+                    await self.writer.drain()
+                finally:
+                    for _ in lines:
+                        self.queue.task_done()
+        except (ConnectionError, OSError):
+            self.close()
+
+    async def _read_loop(self, on_message, on_close):
+        try:
+            while True:
+                line = await self.reader.readline()
+                if not line:
+                    break
+                try:
+                    message = json.loads(line)
+                except ValueError:
+                    print(f"⚠️  Invalid message from {self.node_id}")
+                    continue
+                on_message(self, message)
+        except (ConnectionError, OSError, ValueError):
+            # ValueError: viesti ylitti MAX_MESSAGE_BYTES-rajan
+            pass
+        finally:
+            self.close()
+            on_close(self)
+
+    def close(self):
+        """Sulje yhteys; jonoon jääneet viestit hylätään"""
+        if self.closed:
+            return
+        self.closed = True
+        while not self.queue.empty():
+            self.queue.get_nowait()
+            self.queue.task_done()
+        current = asyncio.current_task()
+        for task in self._tasks:
+            if task is not current:
+                task.cancel()
+        self.writer.close()
+
+
+class AsyncTransport:
+    """TCP-palvelin ja vertaisyhteydet yhdelle nodelle"""
+
+    def __init__(self, hello: Dict[str, Any],
+                 on_message: Callable[[Dict], None],
+                 on_peer: Optional[Callable[[Dict[str, Any]], None]] = None,
+                 on_peer_lost: Optional[Callable[[str], None]] = None,
+                 queue_size: int = SEND_QUEUE_SIZE):
+        self.hello = dict(hello, type="hello")
+        self.on_message = on_message
+        self.on_peer = on_peer
+        self.on_peer_lost = on_peer_lost
+        self.queue_size = queue_size
+        self.connections: Dict[str, PeerConnection] = {}
+        self.server: Optional[asyncio.AbstractServer] = None
+        self.address: Optional[Tuple[str, int]] = None
+
+    async def start(self, host: str = "127.0.0.1", port: int = 0) -> Tuple[str, int]:
+        """Käynnistä palvelin; port=0 valitsee vapaan portin"""
+        self.server = await asyncio.start_server(self._accept, host, port, limit=MAX_MESSAGE_BYTES)
+        self.address = self.server.sockets[0].getsockname()[:2]
+        self.hello["address"] = list(self.address)
+        return self.address
+
+    async def connect(self, host: str, port: int) -> Dict[str, Any]:
+        """Avaa yhteys vertaiseen; palauttaa sen hello-tiedot"""
+        reader, writer = await asyncio.open_connection(host, port, limit=MAX_MESSAGE_BYTES)
+        try:
+            writer.write(encode_message(self.hello))
+            info = await self._read_hello(reader)
+        except Exception:
+            writer.close()
+            raise
+        self._register(info, reader, writer)
+        return info
+
+    async def _accept(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            info = await self._read_hello(reader)
+            writer.write(encode_message(self.hello))
+        except Exception:
+            writer.close()
+            return
+        self._register(info, reader, writer)
+
+    async def _read_hello(self, reader: asyncio.StreamReader) -> Dict[str, Any]:
+        line = await asyncio.wait_for(reader.readline(), HANDSHAKE_TIMEOUT)
+        info = json.loads(line) if line else {}
+        if info.get("type") != "hello" or not info.get("node_id"):
+            raise ConnectionError("Invalid handshake")
+        return info
+
+    def _register(self, info: Dict[str, Any], reader, writer):
+        previous = self.connections.get(info["node_id"])
+        if previous:
+            previous.close()
+        connection = PeerConnection(info, reader, writer, self.queue_size)
+        self.connections[connection.node_id] = connection
+        connection.start(lambda conn, message: self.on_message(message), self._lost)
+        if self.on_peer:
+            self.on_peer(info)
+
+    def _lost(self, connection: PeerConnection):
+        if self.connections.get(connection.node_id) is connection:
+            del self.connections[connection.node_id]
+            if self.on_peer_lost:
+                self.on_peer_lost(connection.node_id)
+
+    async def send(self, node_id: str, message: Dict[str, Any]) -> bool:
+        """Jonota viesti yhdelle vertaiselle"""
+        connection = self.connections.get(node_id)
+        if not connection or connection.closed:
+            return False
+        await connection.send_raw(encode_message(message))
+        return True
+
+    async def broadcast(self, node_ids: Iterable[str], message: Dict[str, Any]) -> int:
+        """Jonota viesti usealle vertaiselle rinnakkain; palauttaa jonotettujen määrän"""
+        line = encode_message(message)
+        targets = [self.connections[node_id] for node_id in node_ids
+                   if node_id in self.connections and not self.connections[node_id].closed]
+        results = await asyncio.gather(*(conn.send_raw(line) for conn in targets), return_exceptions=True)
+        return sum(1 for result in results if not isinstance(result, Exception))
+
+    async def flush(self):
+        """Odota, että kaikki jonotetut viestit on kirjoitettu"""
+        await asyncio.gather(*(conn.queue.join() for conn in list(self.connections.values())
+                               if not conn.closed))
+
+    async def close(self):
+        """Sulje palvelin ja kaikki yhteydet"""
+        for connection in list(self.connections.values()):
+            connection.close()
+        self.connections.clear()
+        if self.server:
+            self.server.close()
+            await self.server.wait_closed()
+            self.server = None
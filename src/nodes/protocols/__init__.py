@@ -5,5 +5,6 @@ Network protocols and consensus mechanisms
 
 from .consensus import ConsensusManager
 from .message_protocol import MessageProtocol
+from .gossip import GossipLayer, SeenFilter
 
-__all__ = ['ConsensusManager', 'MessageProtocol']
+__all__ = ['ConsensusManager', 'MessageProtocol', 'GossipLayer', 'SeenFilter']
@@ -1,18 +1,51 @@
 """
 Consensus protocols for multinode architecture
 Extends existing QuorumVoting functionality
+
+Konsensus on tapahtumapohjainen tilakone: ehdotus on tilassa "pending",
+kunnes consensus_vote-viestit ratkaisevat sen ("approved" / "rejected")
+tai sen määräaika umpeutuu ("timeout"). Määräajat ovat ajastinpyörässä
+(TimerWheel), jota kuljetetaan jokaisen viestin käsittelyn yhteydessä ja
+tapahtumasilmukassa run_timers()-tehtävällä, joten kutsuja ei koskaan
+odota eikä yksittäinen ehdotus estä muita.
+
+Äänestäjien määrä (electorate) kiinnitetään ehdotusta luotaessa
+(vertaiset + ehdottaja). Ehdotus hyväksytään, kun puoltavia on vähintään
+consensus_threshold-osuus äänestäjistä, ja hylätään, kun hyväksyntä on
+vastustavien vuoksi mahdoton.
+
+Ehdottaja julkaisee lopputuloksen (consensus_result); muut hyväksyvät
+tuloksen vain ehdottajalta. Ennen ehdotusta saapuneet äänet puskuroidaan
+ehdotuskohtaisesti ja käsitellään, kun ehdotus saapuu.
 """
 
+import asyncio
+import itertools
+import math
 import time
 import hashlib
 import json
 from datetime import datetime, timedelta
 from typing import Dict, List, Any, Optional, Callable
 
+try:
+    from .timer_wheel import TimerWheel, DEFAULT_TICK_SECONDS
+except ImportError:
+    # Suora ajo (python consensus.py)
+    from timer_wheel import TimerWheel, DEFAULT_TICK_SECONDS
+
+VOTE_COUNTERS = {"for": "votes_for", "against": "votes_against", "abstain": "votes_abstain"}
+RESULTS = ("approved", "rejected")
+
+# Puskuroitujen (ennen ehdotusta saapuneiden) ehdotusten enimmäismäärä
+MAX_EARLY_PROPOSALS = 10_000
+
+
 class ConsensusManager:
     """Complete consensus management implementation"""
     
-    def __init__(self, network_manager):
+    def __init__(self, network_manager, clock: Callable[[], float] = time.monotonic,
+                 tick_seconds: float = DEFAULT_TICK_SECONDS):
         self.network = network_manager
         self.proposals = {}  # proposal_id -> proposal_data
         self.votes = {}      # proposal_id -> {node_id -> vote}
@@ -23,14 +56,32 @@ class ConsensusManager:
         self.finalized_proposals = set()
         self.failed_proposals = set()
         
+        # Määräajat ja vastaanotettujen ehdotusten automaattinen äänestys
+        # (vote_policy(proposal) -> "for" / "against" / "abstain" / None)
+        self.timers = TimerWheel(tick_seconds, clock=clock)
+        self._deadlines = {}  # proposal_id -> timer handle
+        self._early_messages = {}  # proposal_id -> [vote/result message]
+        self._sequence = itertools.count()
+        self.vote_policy: Optional[Callable[[Dict], Optional[str]]] = None
+        
         # Statistics
         self.proposals_created = 0
         self.consensus_reached = 0
         self.consensus_failed = 0
+        
+        if hasattr(self.network, "register_message_handler"):
+            self.network.register_message_handler("consensus_proposal", self._handle_proposal)
+            self.network.register_message_handler("consensus_vote", self._handle_vote)
+            self.network.register_message_handler("consensus_result", self._handle_result)
+    
+    @property
+    def node_id(self) -> str:
+        return self.network.identity.node_id
     
     def create_proposal(self, proposal_type: str, proposal_data: Dict, 
                        timeout_seconds: int = 30) -> str:
-        """Create new consensus proposal"""
+        """Create new consensus proposal (ei odota; tulos ratkeaa äänistä tai määräajasta)"""
+        self.timers.advance()
         proposal_id = self._generate_proposal_id(proposal_type, proposal_data)
         
         # KORJATTU: Käytä listaa setin sijaan JSON-serialisoitavuuden vuoksi
@@ -38,9 +89,11 @@ class ConsensusManager:
             "id": proposal_id,
             "type": proposal_type,
             "data": proposal_data,
-            "proposer": self.network.identity.node_id,
+            "proposer": self.node_id,
             "created": datetime.now().isoformat(),
             "timeout": (datetime.now() + timedelta(seconds=timeout_seconds)).isoformat(),
+            "timeout_seconds": timeout_seconds,
+            "electorate": len(getattr(self.network, "peers", {})) + 1,
             "status": "pending",
             "votes_for": 0,
             "votes_against": 0,
@@ -48,10 +101,12 @@ class ConsensusManager:
             "participating_nodes": []  # KORJATTU: [] instead of set()
         }
         
-        self.proposals[proposal_id] = proposal
-        self.active_proposals.add(proposal_id)
+        self._open_proposal(proposal)
         self.proposals_created += 1
         
+        # Ehdottajan oma ääni: muut kirjaavat sen ehdotuksen mukana
+        self._record_vote(proposal_id, self.node_id, "for", "Proposer auto-approval")
+        
         # Broadcast proposal to network
         self.network.broadcast_message("consensus_proposal", {
             "proposal_id": proposal_id,
@@ -62,122 +117,234 @@ class ConsensusManager:
         print(f"   Type: {proposal_type}")
         print(f"   Timeout: {timeout_seconds}s")
         
-        # Start consensus process
-        self._start_consensus_process(proposal_id, timeout_seconds)
-        
         return proposal_id
     
     def vote_on_proposal(self, proposal_id: str, vote: str, justification: str = "") -> bool:
         """Vote on consensus proposal"""
+        self.timers.advance()
         if proposal_id not in self.proposals:
             print(f"❌ Proposal not found: {proposal_id}")
             return False
         
-        proposal = self.proposals[proposal_id]
-        
         # Check if voting is still open
-        if proposal["status"] != "pending":
+        if self.proposals[proposal_id]["status"] != "pending":
             print(f"❌ Voting closed for proposal: {proposal_id}")
             return False
         
-        # Check timeout
-        timeout = datetime.fromisoformat(proposal["timeout"])
-        if datetime.now() > timeout:
-            proposal["status"] = "timeout"
-            self.failed_proposals.add(proposal_id)
-            self.active_proposals.remove(proposal_id)
-            print(f"❌ Proposal timed out: {proposal_id}")
+        if vote not in VOTE_COUNTERS:
+            print(f"❌ Invalid vote: {vote}")
             return False
         
-        # Record vote
-        vote_record = {
-            "node_id": self.network.identity.node_id,
+        # Ääni muille nodeille ennen omaa kirjausta: ratkaiseva ääni
+        # lähettää tuloksen vasta äänen perässä
+        self.network.broadcast_message("consensus_vote", {
+            "proposal_id": proposal_id,
             "vote": vote,
-            "justification": justification,
-            "timestamp": datetime.now().isoformat()
-        }
+            "justification": justification
+        })
         
-        # Initialize votes dict if needed
-        if proposal_id not in self.votes:
-            self.votes[proposal_id] = {}
+        print(f"✅ Vote cast: {self.node_id} → {vote} on {proposal_id}")
+        return self._record_vote(proposal_id, self.node_id, vote, justification)
+    
+    def tick(self, now: Optional[float] = None) -> int:
+        """Käsittele erääntyneet määräajat; palauttaa aikakatkaistujen määrän"""
+        return self.timers.advance(now)
+    
+    async def run_timers(self):
+        """Kuljeta ajastinpyörää tapahtumasilmukassa (peru tehtävä lopettaaksesi)"""
+        while True:
+            await asyncio.sleep(self.timers.tick_seconds)
+            self.tick()
+    
+    def _open_proposal(self, proposal: Dict):
+        proposal_id = proposal["id"]
+        self.proposals[proposal_id] = proposal
+        self.votes.setdefault(proposal_id, {})
+        self.active_proposals.add(proposal_id)
+        self._deadlines[proposal_id] = self.timers.schedule(
+            proposal["timeout_seconds"], lambda: self._expire(proposal_id))
+    
+    def _record_vote(self, proposal_id: str, node_id: str, vote: str, justification: str = "") -> bool:
+        """Kirjaa noden ääni (uusi ääni korvaa saman noden aiemman) ja päivitä tila"""
+        if vote not in VOTE_COUNTERS:
+            print(f"❌ Invalid vote: {vote}")
+            return False
         
-        self.votes[proposal_id][self.network.identity.node_id] = vote_record
+        proposal = self.proposals[proposal_id]
+        votes = self.votes[proposal_id]
+        previous = votes.get(node_id)
+        if previous:
+            proposal[VOTE_COUNTERS[previous["vote"]]] -= 1
         
-        # Update vote counts
-        if vote == "for":
-            proposal["votes_for"] += 1
-        elif vote == "against":
-            proposal["votes_against"] += 1
-        elif vote == "abstain":
-            proposal["votes_abstain"] += 1
+        votes[node_id] = {
+            "node_id": node_id,
+            "vote": vote,
+            "justification": justification,
+            "timestamp": datetime.now().isoformat()
+        }
+        proposal[VOTE_COUNTERS[vote]] += 1
         
         # KORJATTU: Käytä listaa setin sijaan
-        if self.network.identity.node_id not in proposal["participating_nodes"]:
-            proposal["participating_nodes"].append(self.network.identity.node_id)
-        
-        print(f"✅ Vote cast: {self.network.identity.node_id} → {vote} on {proposal_id}")
+        if not previous:
+            proposal["participating_nodes"].append(node_id)
         
         # Check if consensus reached
         self._check_consensus(proposal_id)
-        
         return True
     
-    def _start_consensus_process(self, proposal_id: str, timeout_seconds: int):
-        """Start the consensus gathering process"""
-        print(f"🔄 Starting consensus process for: {proposal_id}")
-        
-        # In real implementation, this would start background thread
-        # For now, we'll simulate with immediate check
-        time.sleep(1)  # Simulate network delay
-        
-        # Auto-vote for our own proposal
-        self.vote_on_proposal(proposal_id, "for", "Proposer auto-approval")
-    
     def _check_consensus(self, proposal_id: str):
         """Check if consensus has been reached for proposal"""
         if proposal_id not in self.proposals:
             return
         
         proposal = self.proposals[proposal_id]
-        total_votes = proposal["votes_for"] + proposal["votes_against"] + proposal["votes_abstain"]
+        if proposal["status"] != "pending":
+            return
         
+        total_votes = proposal["votes_for"] + proposal["votes_against"] + proposal["votes_abstain"]
         if total_votes == 0:
             return
         
-        # Calculate consensus
+        electorate = max(proposal.get("electorate", 1), total_votes)
+        required = math.ceil(self.consensus_threshold * electorate)
         approval_ratio = proposal["votes_for"] / total_votes
         
-        if approval_ratio >= self.consensus_threshold:
+        if proposal["votes_for"] >= required:
             # Consensus reached!
-            proposal["status"] = "approved"
-            proposal["decided_at"] = datetime.now().isoformat()
             proposal["approval_ratio"] = approval_ratio
-            
-            self.active_proposals.remove(proposal_id)
-            self.finalized_proposals.add(proposal_id)
-            self.consensus_reached += 1
+            self._finish(proposal_id, "approved")
             
             print(f"🎉 CONSENSUS REACHED for {proposal_id}!")
             print(f"   Approval: {proposal['votes_for']}/{total_votes} ({approval_ratio:.1%})")
             
-            # Broadcast consensus result
-            self.network.broadcast_message("consensus_result", {
-                "proposal_id": proposal_id,
-                "result": "approved",
-                "approval_ratio": approval_ratio,
-                "total_votes": total_votes
-            })
+            self._broadcast_result(proposal_id, "approved", approval_ratio, total_votes)
         
-        # Check for rejection (majority against)
-        elif proposal["votes_against"] > proposal["votes_for"] and total_votes >= 3:
-            proposal["status"] = "rejected"
-            proposal["decided_at"] = datetime.now().isoformat()
+        # Hyväksyntä mahdoton: jäljellä olevatkaan äänet eivät riitä
+        elif not self._approval_possible(proposal):
+            self._finish(proposal_id, "rejected")
             
-            self.active_proposals.remove(proposal_id)
+            print(f"❌ CONSENSUS REJECTED for {proposal_id}")
+            self._broadcast_result(proposal_id, "rejected", approval_ratio, total_votes)
+    
+    def _approval_possible(self, proposal: Dict) -> bool:
+        """Voivatko vielä antamattomat äänet riittää hyväksyntään"""
+        total_votes = proposal["votes_for"] + proposal["votes_against"] + proposal["votes_abstain"]
+        electorate = max(proposal.get("electorate", 1), total_votes)
+        required = math.ceil(self.consensus_threshold * electorate)
+        return electorate - proposal["votes_against"] - proposal["votes_abstain"] >= required
+    
+    def _broadcast_result(self, proposal_id: str, result: str, approval_ratio: float, total_votes: int):
+        """Broadcast consensus result (vain ehdottaja; muut laskevat saman tuloksen äänistä)"""
+        if self.proposals[proposal_id]["proposer"] != self.node_id:
+            return
+        self.network.broadcast_message("consensus_result", {
+            "proposal_id": proposal_id,
+            "result": result,
+            "approval_ratio": approval_ratio,
+            "total_votes": total_votes
+        })
+    
+    def _expire(self, proposal_id: str):
+        """Ajastinpyörän kutsuma: määräaika umpeutui"""
+        self._deadlines.pop(proposal_id, None)
+        if self.proposals[proposal_id]["status"] == "pending":
+            self._finish(proposal_id, "timeout")
+            print(f"❌ Proposal timed out: {proposal_id}")
+    
+    def _finish(self, proposal_id: str, status: str):
+        """Siirrä ehdotus lopputilaan"""
+        proposal = self.proposals[proposal_id]
+        proposal["status"] = status
+        proposal["decided_at"] = datetime.now().isoformat()
+        self.timers.cancel(self._deadlines.pop(proposal_id, None))
+        
+        self.active_proposals.discard(proposal_id)
+        if status == "approved":
+            self.finalized_proposals.add(proposal_id)
+            self.consensus_reached += 1
+        else:
             self.failed_proposals.add(proposal_id)
             self.consensus_failed += 1
-            
-            print(f"❌ CONSENSUS REJECTED for {proposal_id}")
+    
+    # Message handlers
+    def _handle_proposal(self, message: Dict):
+        """Vastaanotettu ehdotus: avaa se ja äänestä vote_policyn mukaan"""
+        self.timers.advance()
+        proposal = dict(message.get("payload", {}).get("proposal", {}))
+        proposal_id = proposal.get("id")
+        if not proposal_id or proposal_id in self.proposals:
+            return
+        
+        proposal.update(status="pending", votes_for=0, votes_against=0, votes_abstain=0,
+                        participating_nodes=[])
+        proposal.setdefault("timeout_seconds", 30)
+        self._open_proposal(proposal)
+        self._record_vote(proposal_id, proposal["proposer"], "for", "Proposer auto-approval")
+        
+        # Ehdotusta ennen saapuneet äänet ja tulos
+        for early in self._early_messages.pop(proposal_id, []):
+            if early.get("type") == "consensus_result":
+                self._handle_result(early)
+            else:
+                self._handle_vote(early)
+        
+        if self.vote_policy and proposal["status"] == "pending":
+            vote = self.vote_policy(proposal)
+            if vote:
+                self.vote_on_proposal(proposal_id, vote, "Automatic policy vote")
+    
+    def _handle_vote(self, message: Dict):
+        """Vastaanotettu ääni: päivitä tilakone"""
+        self.timers.advance()
+        payload = message.get("payload", {})
+        proposal_id = payload.get("proposal_id")
+        sender = message.get("sender")
+        if not proposal_id or not sender:
+            return
+        if proposal_id not in self.proposals:
+            self._buffer_early(proposal_id, dict(message, type="consensus_vote"))
+            return
+        if self.proposals[proposal_id]["status"] == "pending":
+            self._record_vote(proposal_id, sender, payload.get("vote"), payload.get("justification", ""))
+    
+    def _handle_result(self, message: Dict):
+        """
+        Ehdottajan julkaisema tulos: hyväksy se, jos ehdotus on vielä auki täällä
+
+        Tulos hyväksytään vain ehdotuksen ehdottajalta, ja hyväksyntä vain,
+        jos ilmoitetut puoltavat äänet riittävät paikalliseen äänestäjämäärään.
+        (Paikallisten vastaäänien tekemä hylkäys on jo ratkaissut ehdotuksen.)
+        """
+        self.timers.advance()
+        payload = message.get("payload", {})
+        proposal_id = payload.get("proposal_id")
+        result = payload.get("result")
+        if not proposal_id or result not in RESULTS:
+            return
+        proposal = self.proposals.get(proposal_id)
+        if proposal is None:
+            self._buffer_early(proposal_id, dict(message, type="consensus_result"))
+            return
+        if proposal["status"] != "pending" or message.get("sender") != proposal["proposer"]:
+            return
+        if result == "approved":
+            try:
+                votes_for = round(float(payload.get("approval_ratio")) * int(payload.get("total_votes")))
+            except (TypeError, ValueError):
+                return
+            electorate = max(proposal.get("electorate", 1), votes_for)
+            if votes_for < max(proposal["votes_for"], math.ceil(self.consensus_threshold * electorate)):
+                print(f"⚠️  Ignoring approval without enough votes: {proposal_id}")
+                return
+        proposal["approval_ratio"] = payload.get("approval_ratio")
+        self._finish(proposal_id, result)
+    
+    def _buffer_early(self, proposal_id: str, message: Dict):
+        """Säilytä ääni tai tulos, jonka ehdotus ei ole vielä saapunut"""
+        if proposal_id not in self._early_messages and len(self._early_messages) >= MAX_EARLY_PROPOSALS:
+            # Vanhin puskuroitu ehdotus pois (dict säilyttää lisäysjärjestyksen)
+            self._early_messages.pop(next(iter(self._early_messages)))
+        self._early_messages.setdefault(proposal_id, []).append(message)
     
     def _generate_proposal_id(self, proposal_type: str, proposal_data: Dict) -> str:
         """Generate unique proposal ID"""
@@ -185,8 +352,11 @@ class ConsensusManager:
             f"{proposal_type}{json.dumps(proposal_data, sort_keys=True)}".encode()
         ).hexdigest()[:8]
         
+        # Sama data voidaan ehdottaa uudelleen: noden ja järjestysnumeron mukaan yksilöllinen
+        unique = hashlib.md5(f"{self.node_id}:{next(self._sequence)}".encode()).hexdigest()[:6]
+        
         timestamp = int(time.time())
-        return f"consensus_{proposal_type}_{timestamp}_{content_hash}"
+        return f"consensus_{proposal_type}_{timestamp}_{content_hash}{unique}"
     
     def get_proposal_status(self, proposal_id: str) -> Optional[Dict]:
         """Get current status of proposal"""
@@ -222,7 +392,7 @@ def test_consensus_manager_direct():
                 'election_id': 'TestElection'
             })()
         
-        def broadcast_message(self, message_type, payload):
+        def broadcast_message(self, message_type, payload, exclude_nodes=None):
             print(f"📤 Mock broadcast: {message_type} - {payload.get('proposal_id', 'unknown')}")
     
     # Test basic functionality
@@ -235,13 +405,9 @@ def test_consensus_manager_direct():
     
     assert proposal_id in consensus.proposals
     
-    # KORJATTU: Älä testaa statusia heti, koska konsensus voi tapahtua nopeasti
-    # Odota hetki konsensusprosessin loppumiseen
-    time.sleep(2)
-    
-    # Tarkista että proposal on käsitelty
+    # Ilman vertaisia ehdottajan oma ääni ratkaisee heti
     proposal = consensus.proposals[proposal_id]
-    assert proposal["status"] in ["approved", "pending", "rejected"]  # Jokin näistä tiloista
+    assert proposal["status"] == "approved"
     
     # Testaa että äänestys toimii (tämä voi epäonnistua jos konsensus on jo saavutettu)
     try:
@@ -0,0 +1,166 @@
+# src/nodes/protocols/gossip.py
+"""
+Epideeminen gossip-levitys suurille node-verkoille
+
+Täysi broadcast lähettää jokaisen viestin kaikille tunnetuille vertaisille,
+joten yhden noden kaista kasvaa verkon koon mukana. Gossip-kerroksessa
+jokainen node välittää uuden viestin vain fanout satunnaiselle vertaiselle,
+ja ttl rajaa hyppyjen määrän. Nodekohtainen kaista on siten enintään
+fanout lähetystä viestiä kohden verkon koosta riippumatta, ja viesti
+tavoittaa verkon noin log_fanout(N) hypyssä.
+
+- Viestit muodostetaan ja validoidaan MessageProtocolilla; kuori
+  ("gossip") kuljettaa viestin, jäljellä olevan ttl:n ja hyppymäärän.
+  Viestityyppejä ei rajata (kuten suorassa broadcastissa), ja viesti
+  allekirjoitetaan noden avaimella samoin kuin NetworkManagerissa
+- Jokaisella viestillä on yksilöllinen message_id; SeenFilter pudottaa
+  jo nähdyt viestit (aikaikkunoihin jaettu, rajattu muistinkäyttö)
+- Uusi viesti toimitetaan paikallisesti network.process_incoming_message()
+  -kautta, joten tavalliset message_handlers-käsittelijät toimivat sellaisenaan
+"""
+
+import random
+import time
+from collections import deque
+from typing import Any, Callable, Dict, List, Optional
+
+try:
+    from .message_protocol import MessageProtocol
+except ImportError:
+    # Suora ajo (python gossip.py)
+    from message_protocol import MessageProtocol
+
+DEFAULT_FANOUT = 8
+DEFAULT_TTL = 8
+SEEN_BUCKET_SECONDS = 60.0
+SEEN_BUCKETS = 5
+SEEN_MAX_PER_BUCKET = 100_000
+
+
+class SeenFilter:
+    """
+    Nähtyjen viestien suodatin aikaikkunoittain
+
+    Tunnisteet kirjataan nykyiseen ikkunaan; vanhin ikkuna pudotetaan,
+    kun uusi alkaa. Täysi ikkuna aloittaa uuden etuajassa, joten muisti
+    on enintään buckets * max_per_bucket tunnistetta.
+    """
+
+    def __init__(self, bucket_seconds: float = SEEN_BUCKET_SECONDS, buckets: int = SEEN_BUCKETS,
+                 max_per_bucket: int = SEEN_MAX_PER_BUCKET, clock: Callable[[], float] = time.monotonic):
+        self.bucket_seconds = bucket_seconds
+        self.max_per_bucket = max_per_bucket
+        self.clock = clock
+        self._buckets = deque([set()], maxlen=buckets)
+        self._bucket_started = clock()
+
+    def add(self, message_id: str) -> bool:
+        """Kirjaa tunniste; palauttaa False, jos se on jo nähty"""
+        if message_id in self:
+            return False
+        now = self.clock()
+        elapsed = int((now - self._bucket_started) // self.bucket_seconds)
+        if elapsed:
+            # Jokainen ohitettu ikkuna työntää vanhimman ulos (myös tyhjät)
+            for _ in range(min(elapsed, self._buckets.maxlen)):
+                self._buckets.append(set())
+            self._bucket_started += elapsed * self.bucket_seconds
+        elif len(self._buckets[-1]) >= self.max_per_bucket:
+            self._buckets.append(set())
+            self._bucket_started = now
+        self._buckets[-1].add(message_id)
+        return True
+
+    def __contains__(self, message_id: str) -> bool:
+        return any(message_id in bucket for bucket in self._buckets)
+
+    def __len__(self) -> int:
+        return sum(len(bucket) for bucket in self._buckets)
+
+
+class GossipLayer:
+    """Gossip-levitys NetworkManagerin päällä"""
+
+    def __init__(self, network, fanout: int = DEFAULT_FANOUT, ttl: int = DEFAULT_TTL,
+                 protocol: Optional[MessageProtocol] = None, seen: Optional[SeenFilter] = None,
+                 rng: Optional[random.Random] = None):
+        self.network = network
+        self.fanout = fanout
+        self.ttl = ttl
+        self.protocol = protocol or MessageProtocol(allow_unknown_types=True)
+        self.seen = seen or SeenFilter()
+        self.rng = rng or random.Random()
+
+        # Statistics
+        self.published = 0
+        self.delivered = 0
+        self.duplicates = 0
+        self.forwarded = 0
+        self.invalid = 0
+
+        self.network.register_message_handler("gossip", self._handle_gossip)
+
+    @property
+    def node_id(self) -> str:
+        return self.network.identity.node_id
+
+    def publish(self, message_type: str, payload: Dict, exclude_nodes: List[str] = None) -> Dict[str, Any]:
+        """Levitä uusi viesti verkkoon; palauttaa MessageProtocol-viestin"""
+        message = self.protocol.create_message(message_type, payload, self.node_id,
+                                               getattr(self.network.identity, "election_id", None))
+        self._sign(message)
+        self.seen.add(message["message_id"])
+        self.published += 1
+        self._forward(message, self.ttl, 0, exclude=set(exclude_nodes or []))
+        return message
+
+    def _sign(self, message: Dict):
+        """Allekirjoita payload kuten NetworkManager._build_message"""
+        identity = self.network.identity
+        if hasattr(identity, "crypto_manager"):
+            message["signature"] = identity.crypto_manager.sign_data(identity.keys["private_key"],
+                                                                     message["payload"])
+
+    def _handle_gossip(self, envelope: Dict):
+        """Vastaanotettu kuori: pudota kaksoiskappaleet, toimita ja välitä eteenpäin"""
+        gossip = envelope.get("payload", {})
+        message = gossip.get("message", {})
+        valid, error = self.protocol.validate_message(message)
+        if not valid or "message_id" not in message:
+            self.invalid += 1
+            return
+
+        if not self.seen.add(message["message_id"]):
+            self.duplicates += 1
+            return
+
+        self.delivered += 1
+        self.network.process_incoming_message(message)
+
+        ttl = gossip.get("ttl", 0) - 1
+        if ttl > 0:
+            self._forward(message, ttl, gossip.get("hops", 0) + 1,
+                          exclude={envelope.get("sender"), message["sender"]})
+
+    def _forward(self, message: Dict, ttl: int, hops: int, exclude: set):
+        candidates = [peer_id for peer_id in self.network.peers if peer_id not in exclude]
+        targets = self.rng.sample(candidates, min(self.fanout, len(candidates)))
+        for peer_id in targets:
+            self.network.send_message(peer_id, "gossip", {"message": message, "ttl": ttl, "hops": hops})
+        self.forwarded += len(targets)
+
+    def get_gossip_stats(self) -> Dict[str, Any]:
+        """Get gossip statistics"""
+        return {
+            "fanout": self.fanout,
+            "ttl": self.ttl,
+            "published": self.published,
+            "delivered": self.delivered,
+            "duplicates": self.duplicates,
+            "forwarded": self.forwarded,
+            "invalid": self.invalid,
+            "seen_ids": len(self.seen)
+        }
+
+    def __repr__(self):
+        return f"GossipLayer({self.node_id}, fanout: {self.fanout}, ttl: {self.ttl})"
@@ -0,0 +1,137 @@
+# src/nodes/protocols/gossip_simulator.py
+"""
+Gossip-levityksen simulaattori
+
+Ajaa oikeaa GossipLayeria prosessin sisäisessä verkossa, jossa jokainen
+node tuntee view_size satunnaista vertaista (osittainen näkymä, kuten
+suurissa verkoissa). Viestit toimitetaan FIFO-jonosta hyppy kerrallaan,
+ja jokaisen noden lähettämät viestit ja tavut lasketaan.
+
+Vertailukohtana mode="mesh" lähettää jokaisen viestin suoraan kaikille
+noden vertaisille (aiempi broadcast_message).
+
+    python src/nodes/protocols/gossip_simulator.py
+"""
+
+import json
+import random
+from collections import deque
+from typing import Any, Dict, List
+
+try:
+    from .gossip import GossipLayer, DEFAULT_FANOUT, DEFAULT_TTL
+except ImportError:
+    # Suora ajo (python gossip_simulator.py)
+    from gossip import GossipLayer, DEFAULT_FANOUT, DEFAULT_TTL
+
+DEFAULT_VIEW_SIZE = 32
+
+
+class SimIdentity:
+    def __init__(self, node_id: str):
+        self.node_id = node_id
+        self.election_id = "Simulaatio"
+
+
+class SimNode:
+    """NetworkManagerin rajapinta simulaattorin jonon päällä"""
+
+    def __init__(self, simulator: "GossipSimulator", node_id: str):
+        self.simulator = simulator
+        self.identity = SimIdentity(node_id)
+        self.peers: Dict[str, Dict] = {}
+        self.message_handlers = {}
+        self.sent_messages = 0
+        self.sent_bytes = 0
+        self.received = set()
+
+    def register_message_handler(self, message_type: str, handler):
+        self.message_handlers[message_type] = handler
+
+    def send_message(self, target_node_id: str, message_type: str, payload: Dict) -> bool:
+        message = {"type": message_type, "payload": payload, "sender": self.identity.node_id}
+        self.sent_messages += 1
+        self.sent_bytes += len(json.dumps(message, default=str))
+        self.simulator.queue.append((target_node_id, message))
+        return True
+
+    def broadcast_message(self, message_type: str, payload: Dict, exclude_nodes: List[str] = None):
+        for peer_id in self.peers:
+            self.send_message(peer_id, message_type, payload)
+
+    def process_incoming_message(self, message: Dict):
+        self.received.add(message["payload"].get("sequence"))
+
+
+class GossipSimulator:
+    """Prosessin sisäinen N noden verkko"""
+
+    def __init__(self, node_count: int, fanout: int = DEFAULT_FANOUT, ttl: int = DEFAULT_TTL,
+                 view_size: int = DEFAULT_VIEW_SIZE, seed: int = 0):
+        self.rng = random.Random(seed)
+        self.queue = deque()
+        self.nodes = [SimNode(self, f"node_{i:05d}") for i in range(node_count)]
+        self.by_id = {node.identity.node_id: node for node in self.nodes}
+
+        ids = list(self.by_id)
+        for node in self.nodes:
+            others = [peer_id for peer_id in self.rng.sample(ids, min(view_size + 1, len(ids)))
+                      if peer_id != node.identity.node_id][:view_size]
+            node.peers = {peer_id: {} for peer_id in others}
+
+        self.layers = [GossipLayer(node, fanout, ttl, rng=random.Random(self.rng.random()))
+                       for node in self.nodes]
+
+    def run(self):
+        """Toimita jonossa olevat viestit, kunnes verkko on hiljainen"""
+        while self.queue:
+            target, message = self.queue.popleft()
+            handler = self.by_id[target].message_handlers.get(message["type"])
+            if handler:
+                handler(message)
+            else:
+                self.by_id[target].process_incoming_message(message)
+
+    def simulate(self, messages: int = 10, mode: str = "gossip") -> Dict[str, Any]:
+        """Levitä viestejä satunnaisista nodeista ja mittaa kattavuus ja kaista"""
+        for sequence in range(messages):
+            origin = self.rng.randrange(len(self.nodes))
+            payload = {"data_type": "simulation", "sequence": sequence}
+            if mode == "gossip":
+                self.layers[origin].publish("data_sync", payload)
+            else:
+                self.nodes[origin].broadcast_message("data_sync", payload)
+            self.nodes[origin].received.add(sequence)
+            self.run()
+
+        count = len(self.nodes)
+        sent = [node.sent_messages / messages for node in self.nodes]
+        return {
+            "mode": mode,
+            "nodes": count,
+            "messages": messages,
+            "coverage": sum(len(node.received) for node in self.nodes) / (count * messages),
+            "avg_sent_per_node": sum(sent) / count,
+            "max_sent_per_node": max(sent),
+            "avg_bytes_per_node": sum(node.sent_bytes for node in self.nodes) / (count * messages),
+            "duplicates_per_node": sum(layer.duplicates for layer in self.layers) / (count * messages)
+        }
+
+
+def simulate_gossip(node_count: int, messages: int = 10, fanout: int = DEFAULT_FANOUT,
+                    ttl: int = DEFAULT_TTL, view_size: int = DEFAULT_VIEW_SIZE,
+                    mode: str = "gossip", seed: int = 0) -> Dict[str, Any]:
+    """Aja yksi simulaatio (ks. GossipSimulator.simulate)"""
+    return GossipSimulator(node_count, fanout, ttl, view_size, seed).simulate(messages, mode)
+
+
+if __name__ == "__main__":
+    print("🧪 Gossip simulation (per message, per node)")
+    print(f"{'mode':>6} {'nodes':>6} {'coverage':>9} {'avg sent':>9} {'max sent':>9} {'avg bytes':>10} {'dups':>6}")
+    for mode in ("mesh", "gossip"):
+        for node_count in (10, 100, 1000):
+            result = simulate_gossip(node_count, view_size=node_count if mode == "mesh" else DEFAULT_VIEW_SIZE,
+                                     mode=mode)
+            print(f"{mode:>6} {node_count:>6} {result['coverage']:>9.2%} {result['avg_sent_per_node']:>9.2f} "
+                  f"{result['max_sent_per_node']:>9.2f} {result['avg_bytes_per_node']:>10.0f} "
+                  f"{result['duplicates_per_node']:>6.2f}")
@@ -6,24 +6,27 @@ Standardized message formats and validation
 
 import json
 import hashlib
+import uuid
 from datetime import datetime
 from typing import Dict, Any, Optional
 
 class MessageProtocol:
     """Standardized message protocol implementation"""
     
-    def __init__(self, version: str = "1.0"):
+    def __init__(self, version: str = "1.0", allow_unknown_types: bool = False):
         self.version = version
+        # True: vain rakenne tarkistetaan (esim. gossip kuljettaa mitä tahansa broadcast-tyyppiä)
+        self.allow_unknown_types = allow_unknown_types
         self.supported_types = [
             "ping", "pong", "node_announce", "peer_list", 
             "consensus_proposal", "consensus_vote", "consensus_result",
-            "data_sync", "error"
+            "data_sync", "error", "gossip"
         ]
     
     def create_message(self, message_type: str, payload: Dict, 
                       sender_id: str, election_id: str) -> Dict[str, Any]:
         """Create standardized message"""
-        if message_type not in self.supported_types:
+        if message_type not in self.supported_types and not self.allow_unknown_types:
             raise ValueError(f"Unsupported message type: {message_type}")
         
         message = {
@@ -46,15 +49,17 @@ class MessageProtocol:
             if field not in message:
                 return False, f"Missing required field: {field}"
         
-        if message["type"] not in self.supported_types:
+        if message["type"] not in self.supported_types and not self.allow_unknown_types:
             return False, f"Unsupported message type: {message['type']}"
         
         return True, None
     
     def _generate_message_id(self, payload: Dict) -> str:
         """Generate unique message ID"""
-        content = json.dumps(payload, sort_keys=True) + str(datetime.now().timestamp())
-        return hashlib.md5(content.encode()).hexdigest()[:12]
+        # Satunnainen osa: sama payload samalla aikaleimalla ei saa törmätä
+        # (gossip-kerros pudottaa jo nähdyt tunnisteet)
+        content = json.dumps(payload, sort_keys=True, default=str) + uuid.uuid4().hex
+        return hashlib.sha256(content.encode()).hexdigest()[:32]
     
     def __repr__(self):
         return f"MessageProtocol(v{self.version}, types: {len(self.supported_types)})"
@@ -0,0 +1,83 @@
+# src/nodes/protocols/timer_wheel.py
+"""
+Ajastinpyörä (hashed timing wheel) protokollien määräajoille
+
+Ajastus ja peruutus ovat O(1): ajastin sijoitetaan lokeroon
+määräajan tikin mukaan, ja advance() käy läpi vain edellisen kutsun
+jälkeen ohitetut lokerot. Pyörä ei nuku eikä käynnistä säikeitä;
+sitä kuljetetaan kutsumalla advance() (esim. viestien käsittelyn
+yhteydessä tai tapahtumasilmukan ajastimesta).
+"""
+
+import itertools
+import math
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+DEFAULT_TICK_SECONDS = 0.1
+DEFAULT_SLOTS = 512
+
+
+class TimerWheel:
+    """Määräaikojen ajastinpyörä"""
+
+    def __init__(self, tick_seconds: float = DEFAULT_TICK_SECONDS, slots: int = DEFAULT_SLOTS,
+                 clock: Callable[[], float] = time.monotonic):
+        self.tick_seconds = tick_seconds
+        self.clock = clock
+        self._slots: List[Dict[int, Tuple[int, Callable[[], None]]]] = [{} for _ in range(slots)]
+        self._slot_of: Dict[int, int] = {}
+        self._handles = itertools.count(1)
+        self._current_tick = self._tick(clock())
+
+    def _tick(self, at: float) -> int:
+        # Pieni toleranssi: 1000.3 / 0.1 = 10002.999...
+        return math.floor(at / self.tick_seconds + 1e-9)
+
+    def schedule(self, delay_seconds: float, callback: Callable[[], None]) -> int:
+        """Ajasta callback delay_seconds päähän; palauttaa peruutuskahvan"""
+        deadline = max(math.ceil((self.clock() + delay_seconds) / self.tick_seconds),
+                       self._current_tick + 1)
+        handle = next(self._handles)
+        slot = deadline % len(self._slots)
+        self._slots[slot][handle] = (deadline, callback)
+        self._slot_of[handle] = slot
+        return handle
+
+    def cancel(self, handle: Optional[int]) -> bool:
+        """Peru ajastin (ei virhettä, jos se on jo lauennut)"""
+        slot = self._slot_of.pop(handle, None)
+        if slot is None:
+            return False
+        del self._slots[slot][handle]
+        return True
+
+    def advance(self, now: Optional[float] = None) -> int:
+        """Laukaise erääntyneet ajastimet; palauttaa laukaistujen määrän"""
+        target = self._tick(self.clock() if now is None else now)
+        if target <= self._current_tick:
+            return 0
+
+        if target - self._current_tick >= len(self._slots):
+            # Koko kierros ohitettu: käy jokainen lokero kerran
+            ticks = range(len(self._slots))
+        else:
+            ticks = range(self._current_tick + 1, target + 1)
+        self._current_tick = target
+
+        fired = 0
+        for tick in ticks:
+            bucket = self._slots[tick % len(self._slots)]
+            due = [handle for handle, (deadline, _) in bucket.items() if deadline <= target]
+            for handle in due:
+                _, callback = bucket.pop(handle)
+                del self._slot_of[handle]
+                fired += 1
+                try:
+                    callback()
+                except Exception as e:
+                    print(f"❌ Timer callback failed: {e}")
+        return fired
+
+    def __len__(self) -> int:
+        return len(self._slot_of)
@@ -1,12 +1,27 @@
 #!/usr/bin/env python3
 """
 Worker node election installer - lataa ja asentaa vaalit IPFS:stä
+
+Asennus on putkitettu: vaalilistan jälkeen kaikkien valittujen vaalien
+asetukset ja datatiedostot haetaan rinnakkain rajatulla säiepoolilla.
+Vaalin datahaut käynnistyvät heti, kun sen asetukset ovat saapuneet, eikä
+muiden vaalien valmistumista odoteta. Jokainen haettu lohko tarkistetaan
+ennen jäsennystä julkaisijan kirjoittamaa tiivistettä vasten (vaalilista:
+--registry-sha256, asetukset: config_sha256, data: data_sources[*].sha256;
+ks. src/cli/publish_election_configs.py), ja vaali kirjoitetaan levylle
+vasta, kun kaikki sen tiedostot ovat onnistuneesti perillä.
 """
+import hashlib
 import json
 import os
-import requests
-from pathlib import Path
-from typing import Dict, List, Optional
+import shutil
+import threading
+import time
+import uuid
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from datetime import datetime
+from pathlib import Path, PurePosixPath
+from typing import Any, Dict, Iterable, List, Optional, Tuple
 import sys
 
 # Lisää projektin juuri Python-polkuun
@@ -20,13 +35,26 @@ except ImportError as e:
     print("💡 Varmista että olet projektin juurihakemistossa")
     sys.exit(1)
 
+DEFAULT_MAX_WORKERS = 8
+STAGES = ("registry", "config", "data", "write")
+
+
 class ElectionInstaller:
     """Lataa ja asentaa vaalit IPFS:stä"""
     
-    def __init__(self, worker_config_path: str = "config/worker_config.json"):
+    def __init__(self, worker_config_path: str = "config/worker_config.json",
+                 max_workers: Optional[int] = None, ipfs_client=None):
         self.worker_config_path = Path(worker_config_path)
         self.config = self._load_config()
-        self.ipfs_client = IPFSClient.get_client("worker_node")
+        self.ipfs_client = ipfs_client or IPFSClient.get_client("worker_node")
+        
+        settings = self.config.get("worker_settings", {})
+        self.elections_path = Path(settings.get("elections_base_path", "data/elections"))
+        self.max_workers = max(1, int(max_workers or settings.get("max_concurrent_downloads")
+                                      or DEFAULT_MAX_WORKERS))
+        
+        self._timings_lock = threading.Lock()
+        self.stage_seconds: Dict[str, float] = dict.fromkeys(STAGES, 0.0)
         
     def _load_config(self) -> Dict:
         """Lataa workerin konfiguraatio"""
@@ -35,12 +63,35 @@ class ElectionInstaller:
                 return json.load(f)
         return {}
     
-    def download_election_registry(self, registry_cid: str) -> Dict:
+    def _add_timing(self, stage: str, started: float):
+        with self._timings_lock:
+            self.stage_seconds[stage] += time.perf_counter() - started
+    
+    def _fetch_document(self, cid: str, expected_sha256: Optional[str] = None,
+                        stage: str = "data") -> Any:
+        """
+        Hae julkaistu dokumentti, tarkista tiiviste ja palauta sen data-osa
+        
+        Raises:
+            ValueError: jos tiiviste ei täsmää tai dokumentti ei sisällä dataa
+        """
+        started = time.perf_counter()
+        try:
+            content = self.ipfs_client.retrieve_raw(cid)
+            if expected_sha256 and hashlib.sha256(content).hexdigest() != expected_sha256:
+                raise ValueError(f"Tiiviste ei täsmää CID:lle {cid}")
+            document = json.loads(content)
+            if not isinstance(document, dict) or 'data' not in document:
+                raise ValueError(f"Dataa ei löytynyt CID:llä {cid}")
+            return document['data']
+        finally:
+            self._add_timing(stage, started)
+    
+    def download_election_registry(self, registry_cid: str, registry_sha256: Optional[str] = None) -> Dict:
         """Lataa vaalilista IPFS:stä"""
         try:
             print(f"📋 Ladataan vaalilistaa: {registry_cid}")
-            registry_data = self.ipfs_client.retrieve_election_data(registry_cid)
-            return registry_data.get('data', {})
+            return self._fetch_document(registry_cid, registry_sha256, stage="registry")
         except Exception as e:
             print(f"❌ Vaalilistan lataus epäonnistui: {e}")
             return {}
@@ -49,102 +100,196 @@ class ElectionInstaller:
         """Lataa vaalin asennustiedosto IPFS:stä"""
         try:
             print(f"📥 Ladataan vaalin {election_id} asetuksia: {config_cid}")
-            config_data = self.ipfs_client.retrieve_election_data(config_cid)
-            return config_data.get('data', {})
+            return self._fetch_document(config_cid, stage="config")
         except Exception as e:
             print(f"❌ Vaalin {election_id} asetusten lataus epäonnistui: {e}")
             return {}
     
     def download_election_data(self, data_source: Dict, target_path: Path) -> bool:
-        """Lataa vaalidata IPFS:stä"""
+        """Lataa yksi vaalidatatiedosto IPFS:stä"""
         try:
-            cid = data_source.get('cid')
-            filename = data_source.get('filename')
-            
-            if not cid or not filename:
-                print(f"❌ Virheellinen data-lähde: {data_source}")
-                return False
-            
+            cid, filename = self._validate_source(data_source)
             print(f"📄 Ladataan {filename}: {cid}")
-            
-            # Hae data IPFS:stä
-            data = self.ipfs_client.retrieve_election_data(cid)
-            
-            if 'data' in data:
-                # Tallenna tiedostoon
-                full_path = target_path / filename
-                full_path.parent.mkdir(parents=True, exist_ok=True)
-                
-                with open(full_path, 'w', encoding='utf-8') as f:
-                    json.dump(data['data'], f, indent=2, ensure_ascii=False)
-                
-                print(f"✅ {filename} tallennettu: {full_path}")
-                return True
-            else:
-                print(f"❌ Dataa ei löytynyt CID:llä {cid}")
-                return False
-                
+            data = self._fetch_document(cid, data_source.get('sha256'))
+            self._write_json(Path(target_path) / filename, data)
+            print(f"✅ {filename} tallennettu: {Path(target_path) / filename}")
+            return True
         except Exception as e:
             print(f"❌ Datan lataus epäonnistui: {e}")
             return False
     
+    @staticmethod
+    def _validate_source(data_source: Dict) -> Tuple[str, str]:
+        """Data-lähteen CID ja turvallinen suhteellinen tiedostonimi"""
+        cid = data_source.get('cid')
+        filename = data_source.get('filename')
+        if not cid or not filename:
+            raise ValueError(f"Virheellinen data-lähde: {data_source}")
+        path = PurePosixPath(filename)
+        if path.is_absolute() or '..' in path.parts:
+            raise ValueError(f"Virheellinen tiedostonimi: {filename}")
+        return cid, filename
+    
+    @staticmethod
+    def _write_json(path: Path, data: Any):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, indent=2, ensure_ascii=False)
+    
+    # ------------------------------------------------------------------
+    # Putkitettu asennus
+    # ------------------------------------------------------------------
+    
+    def install_elections(self, registry_cid: str,
+                          election_ids: Optional[Iterable[str]] = None,
+                          registry_sha256: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Asenna vaalilistan vaalit rinnakkain
+        
+        Args:
+            registry_cid: Vaalilistan CID
+            election_ids: Asennettavat vaalit (oletus: kaikki listan vaalit)
+            registry_sha256: Vaalilistan julkaisijan ilmoittama tiiviste
+            
+        Returns:
+            Raportti: vaalikohtaiset tulokset ja vaiheiden ajat
+        """
+        started = time.perf_counter()
+        self.stage_seconds = dict.fromkeys(STAGES, 0.0)
+        
+        registry = self.download_election_registry(registry_cid, registry_sha256).get('elections', {})
+        selected = list(election_ids) if election_ids is not None else list(registry)
+        
+        targets = {}
+        results = {}
+        for election_id in selected:
+            entry = registry.get(election_id)
+            if not entry or not entry.get('config_cid'):
+                results[election_id] = {"status": "failed", "error": "Vaalia ei löydy vaalilistasta"}
+                continue
+            targets[election_id] = (entry['config_cid'], entry.get('config_sha256'))
+        
+        results.update(self._install_many(targets))
+        return self._report(registry_cid, results, started)
+    
     def install_election(self, election_id: str, config_cid: str) -> bool:
         """Asenna vaali paikallisesti"""
-        try:
-            print(f"🚀 Asennetaan vaalia: {election_id}")
-            
-            # 1. Lataa vaalin asetukset
-            election_config = self.download_election_config(election_id, config_cid)
-            if not election_config:
-                return False
-            
-            # 2. Luo vaalin hakemistorakenne
-            election_path = Path(f"data/elections/{election_id}")
-            election_path.mkdir(parents=True, exist_ok=True)
-            
-            # 3. Tallenna vaalin asetukset
-            config_file = election_path / "election_config.json"
-            with open(config_file, 'w', encoding='utf-8') as f:
-                json.dump(election_config, f, indent=2, ensure_ascii=False)
+        print(f"🚀 Asennetaan vaalia: {election_id}")
+        result = self._install_many({election_id: (config_cid, None)})[election_id]
+        if result["status"] == "installed":
+            print(f"🎉 Vaali {election_id} asennettu onnistuneesti!")
+            return True
+        print(f"❌ Vaalin {election_id} asennus epäonnistui: {result['error']}")
+        return False
+    
+    def _install_many(self, targets: Dict[str, Tuple[str, Optional[str]]]) -> Dict[str, Dict[str, Any]]:
+        """Hae asetukset ja data rinnakkain; kirjoita jokainen vaali heti kun se on valmis"""
+        states = {}
+        results = {}
+        outstanding = {}
+        
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="installer") as pool:
+            for election_id, (config_cid, config_sha256) in targets.items():
+                states[election_id] = {"config": None, "files": {}, "pending": set(),
+                                       "started": time.perf_counter()}
+                future = pool.submit(self._fetch_document, config_cid, config_sha256, "config")
+                outstanding[future] = (election_id, None)
             
-            print(f"✅ Vaalin asetukset tallennettu: {config_file}")
+            while outstanding:
+                done, _ = wait(outstanding, return_when=FIRST_COMPLETED)
+                for future in done:
+                    election_id, filename = outstanding.pop(future)
+                    if election_id in results:
+                        continue  # Vaali on jo epäonnistunut
+                    state = states[election_id]
+                    try:
+                        value = future.result()
+                        if filename is None:
+                            state["config"] = value
+                            for data_source in value.get('data_sources', {}).values():
+                                cid, source_name = self._validate_source(data_source)
+                                state["pending"].add(source_name)
+                                data_future = pool.submit(self._fetch_document, cid, data_source.get('sha256'))
+                                outstanding[data_future] = (election_id, source_name)
+                        else:
+                            state["files"][filename] = value
+                            state["pending"].discard(filename)
+                        if not state["pending"]:
+                            self._commit_election(election_id, state["config"], state["files"])
+                            results[election_id] = {"status": "installed", "files": len(state["files"]),
+                                                    "error": None}
+                    except Exception as e:
+                        results[election_id] = {"status": "failed", "files": 0, "error": str(e)}
+                        for other, (other_id, _) in outstanding.items():
+                            if other_id == election_id:
+                                other.cancel()
+                    if election_id in results:
+                        results[election_id]["seconds"] = round(time.perf_counter() - state["started"], 3)
+                        states.pop(election_id)
+        
+        return results
+    
+    def _commit_election(self, election_id: str, election_config: Dict, files: Dict[str, Any]):
+        """
+        Kirjoita vaali ensin väliaikaishakemistoon ja siirrä se paikalleen
+        
+        Uusi vaali siirretään yhdellä hakemiston uudelleennimeämisellä.
+        Olemassa olevaan hakemistoon (jossa voi olla paikallista dataa)
+        tiedostot korvataan yksitellen os.replace:lla, ja meta.json
+        kirjoitetaan viimeisenä merkiksi valmiista asennuksesta.
+        """
+        started = time.perf_counter()
+        target = self.elections_path / election_id
+        staging = self.elections_path / f".{election_id}.installing-{uuid.uuid4().hex[:8]}"
+        try:
+            for filename, data in files.items():
+                self._write_json(staging / filename, data)
+            self._write_json(staging / "election_config.json", election_config)
             
-            # 4. Lataa kaikki vaalidata
-            data_sources = election_config.get('data_sources', {})
-            success_count = 0
-            total_sources = len(data_sources)
+            election_info = election_config.get('election_info', {})
+            self._write_json(staging / "meta.json", {
+                "election_id": election_id,
+                "name": election_info.get('name'),
+                "description": election_info.get('description'),
+                "installed_at": datetime.now().isoformat(),
+                "data_sources": list(election_config.get('data_sources', {}).keys()),
+                "status": "installed"
+            })
             
-            for data_type, data_source in data_sources.items():
-                if self.download_election_data(data_source, election_path):
-                    success_count += 1
+            if not target.exists():
+                os.replace(staging, target)
+                return
             
-            # 5. Tarkista onnistuminen
-            if success_count == total_sources:
-                print(f"🎉 Vaali {election_id} asennettu onnistuneesti!")
-                
-                # Luo meta.json
-                from datetime import datetime
-                meta_data = {
-                    "election_id": election_id,
-                    "name": election_config['election_info']['name'],
-                    "description": election_config['election_info']['description'],
-                    "installed_at": datetime.now().isoformat(),
-                    "data_sources": list(data_sources.keys()),
-                    "status": "installed"
-                }
-                
-                meta_file = election_path / "meta.json"
-                with open(meta_file, 'w', encoding='utf-8') as f:
-                    json.dump(meta_data, f, indent=2, ensure_ascii=False)
-                
-                return True
-            else:
-                print(f"⚠️ Vaali {election_id} asennettu osittain ({success_count}/{total_sources} dataa)")
-                return False
-                
-        except Exception as e:
-            print(f"❌ Vaalin {election_id} asennus epäonnistui: {e}")
-            return False
+            staged = sorted((p for p in staging.rglob('*') if p.is_file()),
+                            key=lambda p: p.name == "meta.json")
+            for path in staged:
+                destination = target / path.relative_to(staging)
+                destination.parent.mkdir(parents=True, exist_ok=True)
+                os.replace(path, destination)
+        finally:
+            shutil.rmtree(staging, ignore_errors=True)
+            self._add_timing("write", started)
+    
+    def _report(self, registry_cid: str, results: Dict[str, Dict[str, Any]], started: float) -> Dict[str, Any]:
+        installed = sum(1 for r in results.values() if r["status"] == "installed")
+        report = {
+            "registry_cid": registry_cid,
+            "installed": installed,
+            "failed": len(results) - installed,
+            "elections": results,
+            "stage_seconds": {stage: round(seconds, 3) for stage, seconds in self.stage_seconds.items()},
+            "wall_seconds": round(time.perf_counter() - started, 3),
+            "max_workers": self.max_workers
+        }
+        
+        print(f"📊 Asennettu {installed}/{len(results)} vaalia ajassa {report['wall_seconds']:.1f}s "
+              f"({self.max_workers} rinnakkaista hakua)")
+        for stage, seconds in report["stage_seconds"].items():
+            print(f"   ⏱️  {stage}: {seconds:.2f}s")
+        for election_id, result in results.items():
+            if result["status"] != "installed":
+                print(f"   ❌ {election_id}: {result['error']}")
+        return report
     
     def list_available_elections(self, registry_cid: str) -> List[Dict]:
         """Listaa saatavilla olevat vaalit"""
@@ -170,11 +315,14 @@ if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="Worker Node - Vaalien asennus IPFS:stä")
     parser.add_argument("--list", help="Listaa saatavilla olevat vaalit", action="store_true")
     parser.add_argument("--install", help="Asenna tietty vaali", type=str)
+    parser.add_argument("--install-all", help="Asenna kaikki vaalilistan vaalit rinnakkain", action="store_true")
     parser.add_argument("--registry", help="Vaalilistan CID", default="QmTestRegistryCID123456789")
+    parser.add_argument("--registry-sha256", help="Vaalilistan tiiviste (publish_election_configs)", default=None)
+    parser.add_argument("--workers", help="Rinnakkaisten hakujen määrä", type=int, default=None)
     
     args = parser.parse_args()
     
-    installer = ElectionInstaller()
+    installer = ElectionInstaller(max_workers=args.workers)
     
     if args.list:
         print("📋 saatavilla olevat vaalit:")
@@ -185,6 +333,10 @@ if __name__ == "__main__":
             print(f"     🔧 Asenna: python src/nodes/worker/election_installer.py --install {election['election_id']}")
             print()
     
+    elif args.install_all:
+        report = installer.install_elections(args.registry, registry_sha256=args.registry_sha256)
+        sys.exit(0 if report["failed"] == 0 else 1)
+    
     elif args.install:
         # Käytä testi CID:itä demoamiseen
         test_configs = {
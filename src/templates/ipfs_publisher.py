@@ -47,6 +47,30 @@ class IPFSPublisher:
             print(f"❌ IPFS-julkaisu epäonnistui: {e}")
             return f"mock_fallback_{filename}_{int(datetime.now().timestamp())}"
     
+    def publish_many_html_to_ipfs(self, pages: Dict[str, str]) -> Dict[str, str]:
+        """
+        Julkaise monta HTML-sivua kerralla (rinnakkain oikealla IPFS:llä)
+        
+        Args:
+            pages: tiedostonimi -> HTML-sisältö
+            
+        Returns:
+            tiedostonimi -> CID
+        """
+        if not self.ipfs_available:
+            timestamp = int(datetime.now().timestamp())
+            print(f"🔶 Mock IPFS: {len(pages)} sivua")
+            return {filename: f"mock_{filename}_{timestamp}" for filename in pages}
+        
+        try:
+            cids = self.ipfs_client.publish_html_many(pages)
+            print(f"🌐 {len(cids)} profiilia julkaistu IPFS:ään")
+            return cids
+        except Exception as e:
+            print(f"❌ IPFS-julkaisu epäonnistui: {e}")
+            timestamp = int(datetime.now().timestamp())
+            return {filename: f"mock_fallback_{filename}_{timestamp}" for filename in pages}
+    
     def save_local_file(self, html_content: str, filename: str) -> str:
         """Tallenna HTML-sisältö paikallisesti"""
         self.output_dir.mkdir(parents=True, exist_ok=True)
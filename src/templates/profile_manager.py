@@ -7,6 +7,11 @@ from datetime import datetime
 from pathlib import Path
 from typing import Dict, List, Optional
 
+try:
+    from src.core.data import get_repository
+except ImportError:
+    from core.data import get_repository
+
 class ProfileManager:
     """Profiilien hallintaluokka"""
     
@@ -19,22 +24,12 @@ class ProfileManager:
     
     def _get_party_candidates(self, party_id: str) -> List[Dict]:
         """Hae puolueen ehdokkaat"""
-        candidates_file = Path("data/runtime/candidates.json")
-        if candidates_file.exists():
-            with open(candidates_file, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-                return [c for c in data.get("candidates", []) 
-                       if c["basic_info"].get("party") == party_id]
-        return []
+        return [c for c in get_repository().candidates()
+                if c["basic_info"].get("party") == party_id]
     
     def _load_questions(self) -> List[Dict]:
         """Lataa kysymykset"""
-        questions_file = Path("data/runtime/questions.json")
-        if questions_file.exists():
-            with open(questions_file, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-                return data.get("questions", [])
-        return []
+        return get_repository().questions()
     
     def generate_candidate_cards(self, candidates: List[Dict]) -> str:
         """Generoi ehdokaskortit"""
@@ -63,8 +58,7 @@ class ProfileManager:
             return '<p class="text-center">Ei vastauksia</p>'
         
         # Lataa kysymykset nimeä varten
-        questions = self._load_questions()
-        question_map = {q["local_id"]: q["content"]["question"]["fi"] for q in questions}
+        question_map = get_repository().question_texts("fi")
         
         answer_cards = []
         for answer in answers:
@@ -37,15 +37,15 @@ def test_elo_comparison():
             print(f"   ELO: {q['elo_rating']['current_rating']}")
         
         # Testaa ELO-päivitys
-        elo_manager = ELOManager("Jumaltenvaalit2026")
-        
         q1_id = questions_data["questions"][0]["local_id"]
         q2_id = questions_data["questions"][1]["local_id"]
         
         print(f"\n🔄 Vertaillaan: {q1_id} vs {q2_id}")
         print("💡 Valinta: 'a' (ensimmäinen kysymys voittaa)")
         
-        result = elo_manager.update_ratings(q1_id, q2_id, "a")
+        # Suljettaessa luokitukset tallennetaan questions.json-tiedostoon
+        with ELOManager("Jumaltenvaalit2026") as elo_manager:
+            result = elo_manager.update_ratings(q1_id, q2_id, "a")
         
         print("✅ ELO-päivitys onnistui!")
         print(f"📊 {q1_id}: {result['question_a']['old']} → {result['question_a']['new']} ({result['question_a']['delta']:+.0f})")
@@ -0,0 +1,191 @@
+#!/usr/bin/env python3
+"""
+Testit indeksoidulle vastausvarastolle
+"""
+import json
+import os
+
+from src.cli.answers.managers import AnswerImporter, AnswerManager, AnswerStore
+
+
+def _answer(candidate_id: str, question_id: str, value: int = 3):
+    return {"id": f"ans_{candidate_id}_{question_id}", "candidate_id": candidate_id,
+            "question_id": question_id, "value": value, "confidence": 4}
+
+
+def _read(path):
+    return json.loads(path.read_text(encoding="utf-8"))
+
+
+class TestAnswerStore:
+    """Testit AnswerStore-luokalle"""
+
+    def test_imports_existing_json(self, tmp_path):
+        """Testaa että olemassa oleva JSON tuodaan ja indeksit toimivat"""
+        answers_file = tmp_path / "candidate_answers.json"
+        answers_file.write_text(json.dumps({
+            "answers": [_answer("c1", "q1"), _answer("c1", "q2"), _answer("c2", "q1")],
+            "metadata": {"election_id": "Test"}
+        }), encoding="utf-8")
+
+        store = AnswerStore(answers_file)
+
+        assert store.count() == 3
+        assert [a["question_id"] for a in store.by_candidate("c1")] == ["q1", "q2"]
+        assert [a["candidate_id"] for a in store.by_question("q1")] == ["c1", "c2"]
+        assert store.existing_keys([("c1", "q2"), ("c3", "q1")]) == {("c1", "q2")}
+        assert store.to_dict()["metadata"] == {"election_id": "Test"}
+
+    def test_batch_writes_export_once(self, tmp_path):
+        """Testaa että eräkirjoitus vie JSON:n vasta lopussa"""
+        answers_file = tmp_path / "candidate_answers.json"
+        store = AnswerStore(answers_file)
+
+        with store.transaction():
+            assert store.insert_many(_answer(f"c{i}", "q1") for i in range(100)) == 100
+            assert store.insert(_answer("c0", "q1")) is False
+            store.update("c0", "q1", {"value": -5})
+            store.delete("c99", "q1")
+            assert not answers_file.exists()
+
+        assert store.export_json() is True
+        assert store.export_json() is False
+
+        saved = _read(answers_file)["answers"]
+        assert len(saved) == 99
+        assert saved[0] == dict(_answer("c0", "q1"), value=-5)
+
+    def test_rollback_on_error(self, tmp_path):
+        """Testaa että virhe perui koko erän"""
+        store = AnswerStore(tmp_path / "candidate_answers.json")
+        try:
+            with store.transaction():
+                store.insert(_answer("c1", "q1"))
+                raise RuntimeError("keskeytys")
+        except RuntimeError:
+            pass
+
+        assert store.count() == 0
+        assert not store.dirty
+
+    def test_external_json_change_rebuilds(self, tmp_path):
+        """Testaa että ohi tietokannan muutettu JSON tuodaan uudelleen"""
+        answers_file = tmp_path / "candidate_answers.json"
+        with AnswerStore(answers_file) as store:
+            store.insert(_answer("c1", "q1"))
+
+        answers_file.write_text(json.dumps({"answers": [_answer("c2", "q2"), _answer("c3", "q3")]}),
+                                encoding="utf-8")
+        os.utime(answers_file, ns=(1, 1))
+
+        reopened = AnswerStore(answers_file)
+        assert reopened.get("c1", "q1") is None
+        assert reopened.count() == 2
+
+
+class TestAnswerManagerStore:
+    """Testit AnswerManagerin varastokäytölle"""
+
+    def _manager(self, tmp_path):
+        manager = AnswerManager("TestElection")
+        manager.data_path = tmp_path
+        manager.answers_file = tmp_path / "candidate_answers.json"
+        return manager
+
+    def test_crud_keeps_json_in_sync(self, tmp_path):
+        """Testaa lisäys, päivitys ja poisto JSON-viennin kanssa"""
+        manager = self._manager(tmp_path)
+
+        success, answer = manager.add_answer("c1", "q1", 3, confidence=4)
+        assert success
+        assert manager.add_answer("c1", "q1", 1)[0] is False
+        assert manager.update_answer("c1", "q1", value=-2)[0]
+        assert _read(manager.answers_file)["answers"][0]["value"] == -2
+
+        assert manager.remove_answer("c1", "q1")[0]
+        assert manager.remove_answer("c1", "q1")[0] is False
+        assert _read(manager.answers_file)["answers"] == []
+
+    def test_batch_add(self, tmp_path):
+        """Testaa monen vastauksen lisäys yhdessä erässä"""
+        manager = self._manager(tmp_path)
+
+        with manager.batch():
+            for i in range(50):
+                manager.add_answer(f"c{i % 5}", f"q{i}", i % 11 - 5)
+
+        stats = manager.get_answer_stats()
+        assert stats["total_answers"] == 50
+        assert stats["candidates_with_answers"] == 5
+        assert len(_read(manager.answers_file)["answers"]) == 50
+        assert len(manager.list_answers(candidate_id="c0")) == 10
+
+
+class TestAnswerImporter:
+    """Testit vastausten massatuonnille"""
+
+    def _importer(self, tmp_path, **kwargs):
+        (tmp_path / "candidates.json").write_text(json.dumps({
+            "candidates": [{"id": "c1"}, {"id": "c2"}]
+        }), encoding="utf-8")
+        (tmp_path / "questions.json").write_text(json.dumps({
+            "questions": [{"id": f"q{i}"} for i in range(5)]
+        }), encoding="utf-8")
+        importer = AnswerImporter("TestElection", **kwargs)
+        importer.data_path = tmp_path
+        importer.answers_file = tmp_path / "candidate_answers.json"
+        return importer
+
+    def _write_jsonl(self, path, lines):
+        path.write_text("\n".join(line if isinstance(line, str) else json.dumps(line) for line in lines),
+                        encoding="utf-8")
+
+    def test_import_validates_and_dedupes(self, tmp_path):
+        """Testaa validointi, duplikaatit ja hylkäysten raportointi"""
+        importer = self._importer(tmp_path, chunk_size=2)
+        with importer.batch():
+            importer.store.insert(_answer("c1", "q0"))
+
+        source = tmp_path / "import.jsonl"
+        self._write_jsonl(source, [
+            {"candidate_id": "c1", "question_id": "q0", "value": 1},
+            {"candidate_id": "c1", "question_id": "q1", "value": 5, "confidence": 2},
+            {"candidate_id": "c2", "question_id": "q1", "value": -5, "explanation_fi": "Perustelu"},
+            {"candidate_id": "c2", "question_id": "q1", "value": 0},
+            {"candidate_id": "c2", "question_id": "q2", "value": 6},
+            {"candidate_id": "c2", "question_id": "q3", "value": 1, "confidence": 9},
+            {"candidate_id": "c9", "question_id": "q3", "value": 1},
+            "{rikki",
+        ])
+        rejects_file = tmp_path / "rejects.jsonl"
+
+        report = importer.import_file(source, rejects_file=rejects_file)
+
+        assert report["total"] == 8
+        assert report["imported"] == 2
+        assert report["duplicates"] == 1
+        assert report["rejected"] == 5
+        assert [r["line"] for r in report["rejects"]] == [4, 5, 6, 7, 8]
+        assert len(rejects_file.read_text(encoding="utf-8").splitlines()) == 5
+
+        saved = _read(importer.answers_file)["answers"]
+        assert [(a["candidate_id"], a["question_id"]) for a in saved] == [("c1", "q0"), ("c1", "q1"), ("c2", "q1")]
+        assert saved[0]["value"] == 3
+        assert saved[2]["explanation_fi"] == "Perustelu"
+
+    def test_import_replace_and_dry_run(self, tmp_path):
+        """Testaa korvaava tuonti ja kuivaharjoitus"""
+        importer = self._importer(tmp_path, replace=True)
+        with importer.batch():
+            importer.store.insert(_answer("c1", "q0"))
+        source = tmp_path / "import.jsonl"
+        self._write_jsonl(source, [{"candidate_id": "c1", "question_id": "q0", "value": -1},
+                                   {"candidate_id": "c2", "question_id": "q0", "value": 2}])
+
+        dry = importer.import_file(source, dry_run=True)
+        assert (dry["imported"], dry["replaced"]) == (1, 1)
+        assert importer.store.count() == 1
+
+        report = importer.import_file(source)
+        assert (report["imported"], report["replaced"]) == (1, 1)
+        assert [a["value"] for a in _read(importer.answers_file)["answers"]] == [-1, 2]
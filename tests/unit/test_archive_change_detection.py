@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+Testit arkistonhallinnan muutostunnistukselle
+"""
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../../src'))
+
+import pytest
+
+from core.sync.managers import archive_manager as archive_module
+from core.sync.managers.archive_manager import ArchiveManager
+
+
+@pytest.fixture
+def archive(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    runtime = tmp_path / "data" / "runtime"
+    runtime.mkdir(parents=True)
+    (runtime / "meta.json").write_text(json.dumps({"election": "Testi"}))
+    (runtime / "questions.json").write_text(json.dumps({"questions": [{"id": "q1"}]}))
+    return ArchiveManager("Testivaali")
+
+
+def _age_files(manager, seconds=10):
+    """Siirrä tiedostojen mtime menneisyyteen (epävarman ikkunan ulkopuolelle)"""
+    for path in manager.data_dir.glob("*.json"):
+        stat = path.stat()
+        os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns - seconds * 1_000_000_000))
+
+
+def _count_hashes(monkeypatch):
+    calls = []
+    original = archive_module.calculate_file_hash
+
+    def counting(path):
+        calls.append(path)
+        return original(path)
+
+    monkeypatch.setattr(archive_module, "calculate_file_hash", counting)
+    return calls
+
+
+class TestHasDataChanged:
+    """Testit has_data_changed-metodille"""
+
+    def test_changed_without_manifest(self, archive):
+        """Testaa että ilman manifestia data tulkitaan muuttuneeksi"""
+        assert archive.has_data_changed()
+
+    def test_unchanged_data_uses_stat_only(self, archive, monkeypatch):
+        """Testaa että muuttumaton data tunnistetaan ilman tiivisteitä"""
+        _age_files(archive)
+        archive.save_change_manifest(archive.snapshot_files(), "QmArkisto")
+
+        calls = _count_hashes(monkeypatch)
+        assert not archive.has_data_changed()
+        assert calls == []
+
+    def test_content_change_is_detected(self, archive):
+        """Testaa sisällön, uuden ja poistetun tiedoston tunnistusta"""
+        _age_files(archive)
+        archive.save_change_manifest(archive.snapshot_files())
+
+        (archive.data_dir / "meta.json").write_text(json.dumps({"election": "Muu!!"}))
+        assert archive.has_data_changed()
+
+        archive.save_change_manifest(archive.snapshot_files())
+        (archive.data_dir / "parties.json").write_text("{}")
+        assert archive.has_data_changed()
+
+        archive.save_change_manifest(archive.snapshot_files())
+        (archive.data_dir / "questions.json").unlink()
+        assert archive.has_data_changed()
+
+    def test_touched_file_is_hashed_once(self, archive, monkeypatch):
+        """Testaa että pelkästään kosketettu tiedosto tiivistetään vain kerran"""
+        _age_files(archive, seconds=20)
+        archive.save_change_manifest(archive.snapshot_files())
+        _age_files(archive, seconds=-10)
+
+        calls = _count_hashes(monkeypatch)
+        assert not archive.has_data_changed()
+        assert len(calls) == 2
+        assert not archive.has_data_changed()
+        assert len(calls) == 2
+
+    def test_racily_clean_file_is_hashed(self, archive):
+        """Testaa saman kokoista muutosta samalla aikaleimalla heti tilannekuvan jälkeen"""
+        path = archive.data_dir / "meta.json"
+        archive.save_change_manifest(archive.snapshot_files())
+        mtime_ns = path.stat().st_mtime_ns
+
+        path.write_text(json.dumps({"election": "Tesla"}))
+        os.utime(path, ns=(mtime_ns, mtime_ns))
+        assert archive.has_data_changed()
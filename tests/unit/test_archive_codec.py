@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+"""
+Testit pakatulle rivipohjaiselle arkistokoodaukselle
+"""
+import copy
+import gzip
+import hashlib
+import io
+import json
+
+import pytest
+
+from src.core.ipfs import archive_codec
+from src.core.ipfs.archive_codec import (
+    CODEC_GZIP, CODEC_JSON, CODEC_ZSTD, decode_bytes, decode_from, encode_bytes, negotiate_codec
+)
+from src.core.ipfs.sync_orchestrator import SyncOrchestrator
+
+
+class StreamClient:
+    """Muistinvarainen IPFS-client virtarajapinnalla"""
+
+    def __init__(self):
+        self.blobs = {}
+
+    def _store(self, data: bytes) -> str:
+        cid = "mem_" + hashlib.sha256(data).hexdigest()[:16]
+        self.blobs[cid] = data
+        return cid
+
+    def add_json(self, data):
+        return self._store(json.dumps(data, sort_keys=True).encode())
+
+    def get_json(self, cid):
+        return json.loads(self.blobs[cid])
+
+    def add_stream(self, stream):
+        return self._store(stream.read())
+
+    def cat_stream(self, cid):
+        return io.BytesIO(self.blobs[cid])
+
+
+def _document(count=2000):
+    return {
+        "metadata": {"type": "full_archive", "version": "1.0"},
+        "files": {
+            "questions.json": {
+                "questions": [{"id": f"q{i}", "question_fi": f"Kysymys {i}?", "tags": ["a", "b"]}
+                              for i in range(count)],
+                "metadata": {"version": 1, "empty": []}
+            },
+            "meta.json": {"election": "Testi", "nested": {"deep": {"value": None}}}
+        },
+        "file_hashes": {}
+    }
+
+
+class TestArchiveCodec:
+    """Testit koodaukselle ja purulle"""
+
+    def test_gzip_round_trip_preserves_order_and_header(self):
+        """Testaa gzip-koodauksen palautusta ja otsakkeen metadataa"""
+        document = _document()
+        data = encode_bytes(document, CODEC_GZIP, {"type": "full_archive"})
+
+        assert data[:2] == b"\x1f\x8b"
+        header, decoded = decode_bytes(data)
+        assert decoded == document
+        assert list(decoded["files"]["questions.json"]) == ["questions", "metadata"]
+        assert header["codec"] == CODEC_GZIP
+        assert header["metadata"] == {"type": "full_archive"}
+        assert len(data) < len(json.dumps(document)) / 5
+
+    def test_records_are_written_line_by_line(self):
+        """Testaa että jokainen tietue on oma rivinsä"""
+        lines = gzip.decompress(encode_bytes(_document(50), CODEC_GZIP)).splitlines()
+        record_lines = [json.loads(line) for line in lines[1:] if json.loads(line)[0] == "i"]
+        assert sum(1 for e in record_lines if e[1] == ["files", "questions.json", "questions"]) == 50
+
+    def test_encoding_is_deterministic(self):
+        """Testaa että sama sisältö tuottaa samat tavut (sama CID)"""
+        assert encode_bytes(_document(), CODEC_GZIP) == encode_bytes(_document(), CODEC_GZIP)
+
+    def test_plain_json_is_detected(self):
+        """Testaa että pakkaamaton JSON luetaan sellaisenaan"""
+        header, decoded = decode_from(io.BytesIO(json.dumps({"a": [1, 2]}).encode()))
+        assert header["codec"] == CODEC_JSON
+        assert decoded == {"a": [1, 2]}
+
+    def test_negotiation(self, monkeypatch):
+        """Testaa koodauksen neuvottelua clientin ja ympäristön mukaan"""
+        monkeypatch.setattr(archive_codec, "HAS_ZSTD", False)
+
+        class JsonOnly:
+            def add_json(self, data): ...
+            def get_json(self, cid): ...
+
+        assert negotiate_codec(JsonOnly()) == CODEC_JSON
+        assert negotiate_codec(StreamClient()) == CODEC_GZIP
+        assert negotiate_codec(StreamClient(), CODEC_ZSTD) == CODEC_GZIP
+        with pytest.raises(ValueError):
+            negotiate_codec(StreamClient(), "brotli")
+
+    @pytest.mark.skipif(not archive_codec.HAS_ZSTD, reason="zstandard ei ole asennettu")
+    def test_zstd_round_trip(self):
+        """Testaa zstd-koodauksen palautusta"""
+        data = encode_bytes(_document(), CODEC_ZSTD)
+        assert data[:4] == b"\x28\xb5\x2f\xfd"
+        assert decode_bytes(data)[1] == _document()
+
+
+class TestOrchestratorCodec:
+    """Testit koodauksen käytölle synkronoinnissa"""
+
+    def test_full_and_delta_sync_with_compressed_chunks(self, tmp_path, monkeypatch):
+        """Testaa pakattua täyttä synkronointia ja deltaa samalla clientilla"""
+        monkeypatch.chdir(tmp_path)
+        client = StreamClient()
+        files = copy.deepcopy(_document()["files"])
+
+        orchestrator = SyncOrchestrator("Testivaali", client, codec=CODEC_GZIP)
+        base_cid = orchestrator.sync_data(files)
+        assert client.blobs[base_cid][:2] == b"\x1f\x8b"
+        assert orchestrator.load_data(base_cid) == files
+
+        manifest = orchestrator.archive_manager.get_blob(base_cid)
+        assert manifest["metadata"]["codec"] == CODEC_GZIP
+
+        current = copy.deepcopy(files)
+        current["questions.json"]["questions"][10]["question_fi"] = "Muutettu?"
+        delta_cid = orchestrator.sync_data(current)
+        assert orchestrator.load_data(delta_cid) == current
+
+    def test_unsupported_codec_in_manifest_is_rejected(self, tmp_path, monkeypatch):
+        """Testaa että tuntematon koodaus havaitaan manifestista ennen palojen hakua"""
+        monkeypatch.chdir(tmp_path)
+        client = StreamClient()
+        orchestrator = SyncOrchestrator("Testivaali", client, codec=CODEC_GZIP)
+        cid = orchestrator.archive_manager.create_chunked_archive({"meta.json": {"a": 1}})
+
+        manifest = orchestrator.archive_manager.get_blob(cid)
+        manifest["metadata"]["codec"] = "brotli"
+        with pytest.raises(ValueError):
+            orchestrator.archive_manager.extract_chunked_archive(cid, manifest=manifest)
@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+"""
+Testit paikalliselle IPFS-lohkovälimuistille
+"""
+import base64
+import hashlib
+import io
+import threading
+
+import pytest
+
+from src.core.ipfs.archive_manager import ArchiveManager
+from src.core.ipfs.block_cache import BlockCache, BlockVerificationError, raw_cid_digest
+from src.core.ipfs.client import IPFSClient
+from src.core.ipfs.http_client import PooledIPFSClient
+from tests.unit.test_ipfs_http_client import FakeKubo
+
+
+def _raw_cid(data: bytes) -> str:
+    """CIDv1 raw-koodekilla ja sha2-256:lla (bafkrei...)"""
+    encoded = base64.b32encode(b"\x01\x55\x12\x20" + hashlib.sha256(data).digest())
+    return "b" + encoded.decode().lower().rstrip("=")
+
+
+@pytest.fixture
+def kubo(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    server = FakeKubo()
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+class TestBlockCache:
+    """Testit BlockCachelle"""
+
+    def test_put_get_and_stream(self, tmp_path):
+        """Testaa tallennusta, hakua ja virtalukua"""
+        cache = BlockCache(tmp_path / "cache")
+        assert cache.get("QmPuuttuu") is None
+        assert not (tmp_path / "cache").exists()
+
+        assert cache.put("QmA", b"sisalto")
+        assert cache.get("QmA") == b"sisalto"
+        assert cache.put_stream("QmB", io.BytesIO(b"virta" * 1000))
+        with cache.open("QmB") as f:
+            assert f.read() == b"virta" * 1000
+        assert "QmA" in cache and len(cache) == 2
+        assert cache.hits == 2 and cache.misses == 1
+
+    def test_large_blocks_use_mmap(self, tmp_path):
+        """Testaa suurten lohkojen lukua mmap:lla"""
+        cache = BlockCache(tmp_path, mmap_threshold=16)
+        cache.put("QmIso", b"x" * 4096)
+        assert cache.get("QmIso") == b"x" * 4096
+
+    def test_lru_eviction(self, tmp_path):
+        """Testaa että vähiten viimeksi käytetty lohko poistetaan kokorajan ylittyessä"""
+        cache = BlockCache(tmp_path, max_bytes=250)
+        cache.put("Qm1", b"1" * 100)
+        cache.put("Qm2", b"2" * 100)
+        cache.get("Qm1")
+        cache.put("Qm3", b"3" * 100)
+
+        assert "Qm1" in cache and "Qm3" in cache
+        assert "Qm2" not in cache
+        assert cache.total_bytes <= 250
+        assert not cache.put("QmLiianIso", b"x" * 1000)
+
+    def test_raw_cid_is_verified_on_insert(self, tmp_path):
+        """Testaa raw-CID:n tarkistusta lisäyksessä"""
+        cache = BlockCache(tmp_path)
+        cid = _raw_cid(b"oikea")
+        assert raw_cid_digest(cid) == hashlib.sha256(b"oikea").digest()
+        assert raw_cid_digest("QmNotRaw") is None
+
+        assert cache.put(cid, b"oikea")
+        with pytest.raises(BlockVerificationError):
+            cache.put(_raw_cid(b"toinen"), b"vaara")
+
+    def test_corrupted_block_is_dropped(self, tmp_path):
+        """Testaa että levyllä vioittunut lohko hylätään"""
+        cache = BlockCache(tmp_path)
+        cache.put("QmC", b"alkuperainen")
+        cache.path("QmC").write_bytes(b"muutettu!!!!")
+
+        assert cache.get("QmC") is None
+        assert "QmC" not in cache
+
+    def test_oversized_stream_is_not_read_to_the_end(self, tmp_path):
+        """Testaa että kokorajan ylittävän virran luku lopetetaan rajan ylityttyä"""
+        cache = BlockCache(tmp_path, max_bytes=100)
+        stream = io.BytesIO(b"x" * (10 * 1024 * 1024))
+
+        assert not cache.put_stream("QmVirta", stream)
+        assert stream.tell() <= 1024 * 1024
+        assert "QmVirta" not in cache
+        assert not list(tmp_path.rglob("*.tmp"))
+
+    def test_block_reads_do_not_hold_the_lock(self, tmp_path):
+        """Testaa että hidas lohkon luku ei estä muiden lohkojen hakua"""
+        cache = BlockCache(tmp_path)
+        cache.put("QmHidas", b"hidas")
+        cache.put("QmNopea", b"nopea")
+        reading, release = threading.Event(), threading.Event()
+        read_verified = cache._read_verified
+
+        def slow_read(path, size, expected):
+            if path.name == "QmHidas":
+                reading.set()
+                release.wait(5)
+            return read_verified(path, size, expected)
+
+        cache._read_verified = slow_read
+        slow = threading.Thread(target=cache.get, args=("QmHidas",))
+        slow.start()
+        assert reading.wait(5)
+
+        results = []
+        fast = threading.Thread(target=lambda: results.append(cache.get("QmNopea")))
+        fast.start()
+        fast.join(1)
+        finished_while_blocked = not fast.is_alive()
+        release.set()
+        slow.join()
+        fast.join()
+
+        assert finished_while_blocked
+        assert results == [b"nopea"]
+        assert cache.hits == 2
+
+    def test_invalid_cid_is_rejected(self, tmp_path):
+        """Testaa polkuja sisältävien CID:iden hylkäämistä"""
+        with pytest.raises(ValueError):
+            BlockCache(tmp_path).put("../pako", b"x")
+
+
+class TestCachedClients:
+    """Testit välimuistin käytölle IPFS-clienteissa"""
+
+    def test_pooled_client_fetches_once_and_works_offline(self, kubo, tmp_path):
+        """Testaa että sama CID haetaan vain kerran ja luetaan myöhemmin ilman daemonia"""
+        cache = BlockCache(tmp_path / "cache")
+        kubo.blobs["QmValmis"] = b'{"vaali": 1}'
+
+        with PooledIPFSClient(kubo.url, block_cache=cache) as client:
+            assert client.get_json("QmValmis") == {"vaali": 1}
+            assert client.get_json("QmValmis") == {"vaali": 1}
+        assert kubo.requests == 1
+
+        with PooledIPFSClient("http://127.0.0.1:9", block_cache=cache, max_retries=0) as offline:
+            assert offline.cat("QmValmis") == b'{"vaali": 1}'
+
+    def test_verify_then_extract_costs_one_fetch(self, kubo, tmp_path):
+        """Testaa että eheystarkistus ja purku samalle CID:lle hakevat sen kerran"""
+        files = {"meta.json": {"election": "Testi"}, "questions.json": {"questions": [{"id": "q1"}]}}
+        publisher = ArchiveManager(IPFSClient(kubo.url, use_cache=False))
+        cid = publisher.create_full_archive(files)
+
+        reader = ArchiveManager(IPFSClient(kubo.url, block_cache=BlockCache(tmp_path / "cache")))
+        requests_before = kubo.requests
+        assert reader.verify_archive_integrity(cid, list(files))
+        assert reader.extract_full_archive(cid) == files
+        assert kubo.requests - requests_before == 1
@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+"""
+Testit paloitelluille sisältöosoitteellisille arkistoille
+"""
+import copy
+import hashlib
+import json
+
+import pytest
+
+from src.core.ipfs.archive_manager import ArchiveManager
+from src.core.ipfs.chunked_archive import (
+    assemble_files, build_manifest, is_chunked_archive, merkle_root, split_records
+)
+from src.core.ipfs.sync_orchestrator import SyncOrchestrator
+
+
+class MemoryClient:
+    """Muistinvarainen IPFS-client, joka laskee lisäykset ja haut"""
+
+    def __init__(self):
+        self.blobs = {}
+        self.added = 0
+        self.fetched = 0
+
+    def add_json(self, data):
+        content = json.dumps(data, sort_keys=True)
+        cid = "mem_" + hashlib.sha256(content.encode()).hexdigest()[:16]
+        self.blobs[cid] = json.loads(content)
+        self.added += 1
+        return cid
+
+    def get_json(self, cid):
+        self.fetched += 1
+        return copy.deepcopy(self.blobs[cid])
+
+
+def _files(count=3000):
+    return {
+        "questions.json": {
+            "questions": [{"id": f"q{i}", "question_fi": f"Kysymys {i}?", "elo_rating": 1000} for i in range(count)],
+            "metadata": {"version": 1}
+        },
+        "candidate_answers.json": {
+            "answers": [{"candidate_id": f"c{i % 50}", "question_id": f"q{i // 50}", "value": 1}
+                        for i in range(count)]
+        },
+        "meta.json": {"election": "Testi"}
+    }
+
+
+class TestChunking:
+    """Testit pilkkomiselle ja Merkle-juurelle"""
+
+    def test_insert_changes_only_local_chunks(self):
+        """Testaa että lisäys muuttaa vain oman palansa (sisältöpohjaiset rajat)"""
+        records = [{"id": f"r{i}"} for i in range(5000)]
+        before = split_records(records, ["id"], target=64)
+        after = split_records(records[:2500] + [{"id": "uusi"}] + records[2500:], ["id"], target=64)
+
+        before_set = {json.dumps(c) for c in before}
+        changed = [c for c in after if json.dumps(c) not in before_set]
+        assert len(before) > 20
+        assert len(changed) <= 2
+
+    def test_max_records_caps_chunk_size(self):
+        """Testaa palakoon ylärajaa"""
+        chunks = split_records([{"id": f"r{i}"} for i in range(1000)], ["id"], target=10 ** 9, max_records=100)
+        assert [len(c) for c in chunks] == [100] * 10
+
+    def test_merkle_root(self):
+        """Testaa Merkle-juuren riippuvuutta lehdistä ja järjestyksestä"""
+        leaves = [hashlib.sha256(str(i).encode()).hexdigest() for i in range(5)]
+        assert merkle_root(leaves) == merkle_root(list(leaves))
+        assert merkle_root(leaves) != merkle_root(leaves[::-1])
+        assert merkle_root(leaves[:1]) == leaves[0]
+
+
+class TestChunkedArchive:
+    """Testit julkaisulle ja kokoamiselle"""
+
+    def test_round_trip_preserves_documents(self):
+        """Testaa että koottu data vastaa alkuperäistä avainjärjestystä myöten"""
+        client = MemoryClient()
+        files = _files()
+        manifest, stats = build_manifest(files, client.add_json)
+
+        assert is_chunked_archive(manifest)
+        assert stats["uploaded"] == stats["chunks"] > 3
+        restored, fetch_stats = assemble_files(manifest, client.get_json)
+        assert restored == files
+        assert list(restored["questions.json"]) == ["questions", "metadata"]
+        assert fetch_stats["fetched"] == stats["chunks"]
+
+    def test_republish_uploads_and_fetches_only_changes(self):
+        """Testaa palojen uudelleenkäyttöä julkaisussa ja haussa"""
+        client = MemoryClient()
+        base = _files()
+        previous, _ = build_manifest(base, client.add_json)
+
+        current = copy.deepcopy(base)
+        current["questions.json"]["questions"][1500]["elo_rating"] = 1016
+        manifest, stats = build_manifest(current, client.add_json, previous)
+
+        assert stats["uploaded"] == 1
+        assert stats["reused"] == stats["chunks"] - 1
+        assert manifest["metadata"]["merkle_root"] != previous["metadata"]["merkle_root"]
+
+        restored, fetch_stats = assemble_files(manifest, client.get_json, local_files=base)
+        assert restored == current
+        assert fetch_stats["fetched"] == 1
+
+    def test_tampered_chunk_and_manifest_are_rejected(self):
+        """Testaa eheystarkistukset"""
+        client = MemoryClient()
+        manifest, _ = build_manifest(_files(), client.add_json)
+
+        cid, _ = manifest["files"]["meta.json"]["document"]
+        client.blobs[cid] = {"document": {"election": "Väärennetty"}}
+        with pytest.raises(ValueError):
+            assemble_files(manifest, client.get_json)
+
+        tampered = copy.deepcopy(manifest)
+        tampered["files"]["meta.json"]["document"][1] = "0" * 64
+        with pytest.raises(ValueError):
+            assemble_files(tampered, client.get_json)
+
+    def test_archive_manager_and_orchestrator(self, tmp_path, monkeypatch):
+        """Testaa ArchiveManagerin ja SyncOrchestratorin paloiteltua täyttä synkronointia"""
+        monkeypatch.chdir(tmp_path)
+        client = MemoryClient()
+        files = _files()
+
+        manager = ArchiveManager(client)
+        cid = manager.create_chunked_archive(files)
+        assert manager.extract_archive(cid) == files
+        assert manager.verify_archive_integrity(cid, list(files))
+
+        orchestrator = SyncOrchestrator("Testivaali", client)
+        base_cid = orchestrator.sync_data(files, force_full_sync=True)
+        assert orchestrator.load_data(base_cid) == files
+
+        current = copy.deepcopy(files)
+        current["meta.json"]["status"] = "open"
+        added = client.added
+        new_cid = orchestrator.sync_data(current, force_full_sync=True)
+        assert client.added - added == 2  # muuttunut pala + manifesti
+
+        fetched = client.fetched
+        assert orchestrator.load_data(new_cid, local_files=files) == current
+        assert client.fetched - fetched == 2  # manifesti + muuttunut pala
@@ -0,0 +1,219 @@
+#!/usr/bin/env python3
+"""
+Testit tapahtumapohjaiselle konsensukselle ja ajastinpyörälle
+"""
+import asyncio
+import time
+from collections import deque
+
+from src.nodes.protocols.consensus import ConsensusManager
+from src.nodes.protocols.timer_wheel import TimerWheel
+from tests.unit.test_network_transport import LocalIdentity, start_nodes, stop_nodes, wait_until
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+class LoopbackNetwork:
+    """Prosessin sisäinen verkko: viestit toimitetaan jonosta muille nodeille"""
+
+    def __init__(self):
+        self.nodes = {}
+        self.pending = deque()
+        self.delivering = False
+
+    def join(self, node_id):
+        node = LoopbackNode(self, node_id)
+        self.nodes[node_id] = node
+        for other in self.nodes.values():
+            other.peers = {peer_id: {} for peer_id in self.nodes if peer_id != other.identity.node_id}
+        return node
+
+    def deliver(self, sender, message_type, payload):
+        for node_id, node in self.nodes.items():
+            if node_id != sender:
+                self.pending.append((node, {"type": message_type, "payload": payload, "sender": sender}))
+        if self.delivering:
+            return
+        self.delivering = True
+        try:
+            while self.pending:
+                node, message = self.pending.popleft()
+                handler = node.handlers.get(message["type"])
+                if handler:
+                    handler(message)
+        finally:
+            self.delivering = False
+
+
+class LoopbackNode:
+    def __init__(self, network, node_id):
+        self.network = network
+        self.identity = LocalIdentity(node_id)
+        self.peers = {}
+        self.handlers = {}
+
+    def register_message_handler(self, message_type, handler):
+        self.handlers[message_type] = handler
+
+    def broadcast_message(self, message_type, payload, exclude_nodes=None):
+        self.network.deliver(self.identity.node_id, message_type, payload)
+
+
+def _cluster(size, clock=None, policy=lambda proposal: "for"):
+    network = LoopbackNetwork()
+    nodes = [network.join(f"node_{i}") for i in range(size)]
+    managers = [ConsensusManager(node, clock=clock or time.monotonic) for node in nodes]
+    for manager in managers[1:]:
+        manager.vote_policy = policy
+    return managers
+
+
+class TestTimerWheel:
+    """Testit ajastinpyörälle"""
+
+    def test_fires_due_timers_in_order_of_deadline(self):
+        """Testaa laukaisua, peruutusta ja yli kierroksen pitkiä määräaikoja"""
+        clock = FakeClock()
+        wheel = TimerWheel(tick_seconds=0.1, slots=8, clock=clock)
+        fired = []
+        wheel.schedule(0.25, lambda: fired.append("lyhyt"))
+        cancelled = wheel.schedule(0.3, lambda: fired.append("peruttu"))
+        wheel.schedule(5.0, lambda: fired.append("pitkä"))
+        assert wheel.cancel(cancelled)
+        assert len(wheel) == 2
+
+        assert wheel.advance(clock.now + 0.2) == 0
+        assert wheel.advance(clock.now + 0.3) == 1
+        assert fired == ["lyhyt"]
+        assert wheel.advance(clock.now + 4.0) == 0
+        assert wheel.advance(clock.now + 60) == 1
+        assert fired == ["lyhyt", "pitkä"] and len(wheel) == 0
+
+
+class TestConsensusManager:
+    """Testit ConsensusManagerin tilakoneelle"""
+
+    def test_create_proposal_does_not_block(self):
+        """Testaa että tuhannet ehdotukset ratkeavat ilman odotusta"""
+        managers = _cluster(3)
+        started = time.perf_counter()
+        ids = [managers[0].create_proposal("party_update", {"party": i}) for i in range(2000)]
+        elapsed = time.perf_counter() - started
+
+        assert len(set(ids)) == 2000
+        assert elapsed < 2
+        for manager in managers:
+            assert all(manager.proposals[pid]["status"] == "approved" for pid in ids)
+            assert not manager.active_proposals
+        assert managers[0].proposals[ids[0]]["votes_for"] >= 2
+        assert len(managers[0].timers) == 0
+
+    def test_pending_proposals_time_out_from_timer_wheel(self):
+        """Testaa että määräajat laukeavat ilman uusia ääniä"""
+        clock = FakeClock()
+        managers = _cluster(3, clock, policy=lambda proposal: None)
+        ids = [managers[0].create_proposal("config_change", {"n": i}, timeout_seconds=30) for i in range(1000)]
+        assert managers[0].get_consensus_stats()["active_proposals"] == 1000
+
+        clock.now += 29
+        assert managers[0].tick() == 0
+        clock.now += 2
+        assert managers[0].tick() == 1000
+        assert all(managers[0].proposals[pid]["status"] == "timeout" for pid in ids)
+        assert managers[0].consensus_failed == 1000
+        assert not managers[0].vote_on_proposal(ids[0], "for")
+
+    def test_rejection_when_approval_impossible(self):
+        """Testaa hylkäystä ja äänen vaihtamista"""
+        managers = _cluster(5, policy=lambda proposal: "against")
+        pid = managers[0].create_proposal("config_change", {"x": 1})
+        proposal = managers[0].proposals[pid]
+        assert proposal["status"] == "rejected"
+        assert proposal["votes_for"] + proposal["votes_against"] < 5
+
+        managers = _cluster(3, policy=lambda proposal: None)
+        pid = managers[0].create_proposal("config_change", {"x": 2})
+        managers[1].vote_on_proposal(pid, "against")
+        managers[1].vote_on_proposal(pid, "for")
+        assert managers[0].proposals[pid]["votes_against"] == 0
+        assert managers[0].proposals[pid]["status"] == "approved"
+        assert managers[2].proposals[pid]["status"] == "approved"
+
+    def test_result_is_accepted_only_from_proposer(self):
+        """Testaa että vieraan lähettäjän tulos ei hyväksy ehdotusta"""
+        managers = _cluster(5, policy=lambda proposal: None)
+        pid = managers[0].create_proposal("config_change", {"x": 3})
+        forged = {"type": "consensus_result", "sender": "EVIL",
+                  "payload": {"proposal_id": pid, "result": "approved", "approval_ratio": 1.0}}
+
+        managers[1]._handle_result(forged)
+        assert managers[1].proposals[pid]["status"] == "pending"
+
+        # Ehdottajankin hyväksynnässä puoltavien on riitettävä äänestäjämäärään
+        managers[1]._handle_result(dict(forged, sender="node_0", payload=dict(forged["payload"], total_votes=2)))
+        assert managers[1].proposals[pid]["status"] == "pending"
+        managers[1]._handle_result(dict(forged, sender="node_0", payload=dict(forged["payload"], total_votes=3)))
+        assert managers[1].proposals[pid]["status"] == "approved"
+
+    def test_votes_before_proposal_are_buffered(self):
+        """Testaa että ennen ehdotusta saapuneet äänet käsitellään ehdotuksen tullessa"""
+        managers = _cluster(3, policy=lambda proposal: None)
+        pid = managers[0].create_proposal("config_change", {"x": 4})
+        proposal = dict(managers[0].proposals[pid])
+
+        late = ConsensusManager(LoopbackNode(LoopbackNetwork(), "node_9"))
+        for voter in ("node_1", "node_2"):
+            late._handle_vote({"sender": voter, "payload": {"proposal_id": pid, "vote": "against"}})
+        assert pid not in late.proposals
+
+        late._handle_proposal({"sender": "node_0", "payload": {"proposal_id": pid, "proposal": proposal}})
+        assert late.proposals[pid]["status"] == "rejected"
+        assert late.proposals[pid]["votes_against"] == 2
+        assert not late._early_messages
+
+    def test_rejection_is_broadcast_by_proposer(self):
+        """Testaa että ehdottaja julkaisee myös hylkäyksen"""
+        managers = _cluster(3, policy=lambda proposal: None)
+        pid = managers[0].create_proposal("config_change", {"x": 5})
+        managers[0]._handle_vote({"sender": "node_1", "payload": {"proposal_id": pid, "vote": "against"}})
+        managers[0]._handle_vote({"sender": "node_2", "payload": {"proposal_id": pid, "vote": "abstain"}})
+
+        assert all(manager.proposals[pid]["status"] == "rejected" for manager in managers)
+
+    def test_invalid_vote_is_not_broadcast(self):
+        """Testaa että virheellinen ääni hylätään ennen lähetystä"""
+        managers = _cluster(3, policy=lambda proposal: None)
+        pid = managers[0].create_proposal("config_change", {"x": 6})
+        sent = []
+        managers[1].network.broadcast_message = lambda *args, **kwargs: sent.append(args)
+
+        assert not managers[1].vote_on_proposal(pid, "maybe")
+        assert sent == []
+
+    def test_consensus_over_asyncio_transport(self):
+        """Testaa konsensusta oikean verkkotransportin yli"""
+        async def scenario():
+            nodes = await start_nodes(3)
+            await nodes[0].connect_peers([node.address for node in nodes[1:]])
+            await nodes[1].connect_peer(*nodes[2].address)
+            managers = [ConsensusManager(node) for node in nodes]
+            for manager in managers[1:]:
+                manager.vote_policy = lambda proposal: "for"
+            timers = asyncio.ensure_future(managers[0].run_timers())
+
+            ids = [managers[0].create_proposal("party_update", {"party": i}) for i in range(200)]
+            await wait_until(lambda: managers[0].consensus_reached == 200)
+            await wait_until(lambda: all(m.consensus_reached == 200 for m in managers))
+
+            timers.cancel()
+            assert not managers[0].active_proposals
+            assert set(ids) == managers[2].finalized_proposals
+            await stop_nodes(nodes)
+
+        asyncio.run(scenario())
@@ -8,9 +8,14 @@ sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 import os
 import json
 
+import pytest
+
 sys.path.append(os.path.join(os.path.dirname(__file__), '../..'))
 
-from src.managers.crypto_manager import CryptoManager
+from src.managers import crypto_manager as crypto_module
+from src.managers.crypto_manager import CryptoManager, canonical_bytes
+from src.managers.secure_answer_manager import SecureAnswerManager
+from src.nodes.core.node_identity import NodeIdentity
 
 def test_key_generation():
     """Testaa avainparin generointia"""
@@ -47,7 +52,140 @@ def test_signature_verification():
     
     print("✅ Allekirjoituksen varmistus onnistui!")
 
+def test_key_cache_reuses_parsed_keys():
+    """Testaa että avaimet jäsennetään kerran ja kanoniset tavut kelpaavat datana"""
+    crypto = CryptoManager()
+    key_pair = crypto.generate_key_pair()
+    cache = crypto_module._key_cache
+    cache.clear()
+    misses = cache.misses
+    
+    test_data = {"ääni": "kyllä", "id": 1}
+    signature = crypto.sign_data(key_pair["private_key"], test_data)
+    for _ in range(10):
+        assert crypto.verify_signature(key_pair["public_key"], test_data, signature)
+    assert crypto.verify_signature(key_pair["public_key"], canonical_bytes(test_data), signature)
+    
+    # Yksityinen ja julkinen avain jäsennetty kerran kumpikin
+    assert cache.misses - misses == 2
+
+def test_verify_many_in_process_pool():
+    """Testaa rinnakkaista eräverifiointia"""
+    crypto = CryptoManager()
+    keys = [crypto.generate_key_pair() for _ in range(3)]
+    items = []
+    for i in range(600):
+        key_pair = keys[i % 3]
+        data = {"answer": i}
+        items.append((key_pair["public_key"], data, crypto.sign_data(key_pair["private_key"], data)))
+    
+    # Väärä data, väärä avain, rikkinäinen allekirjoitus ja avain
+    items[5] = (items[5][0], {"answer": -1}, items[5][2])
+    items[6] = (keys[0]["public_key"], {"answer": 7}, items[7][2])
+    items[8] = (items[8][0], items[8][1], "ei-base64!")
+    items[9] = ("ei avain", items[9][1], items[9][2])
+    
+    items[10] = (None, items[10][1], items[10][2])
+    items[11] = (items[11][0], {"answer": {11}}, items[11][2])
+    
+    expected = [i not in (5, 6, 8, 9, 10, 11) for i in range(600)]
+    assert crypto.verify_many(items, max_workers=2) == expected
+    assert crypto.verify_many(items[:20], max_workers=1) == expected[:20]
+    assert crypto.verify_many([]) == []
+
+def test_secure_answer_batch_audit(tmp_path, monkeypatch):
+    """Testaa vastausten auditointia eränä yksittäistarkistusta vastaavasti"""
+    monkeypatch.chdir(tmp_path)
+    crypto = CryptoManager()
+    party_keys = crypto.generate_key_pair()
+    manager = SecureAnswerManager("Testivaali")
+    credentials = manager.key_manager.issue_candidate_credentials(
+        "puolue1", "ehdokas1", party_keys["private_key"])
+    
+    answers = [
+        manager.submit_signed_answer(
+            "ehdokas1", f"q{i}", {"answer_value": i % 5}, credentials["candidate_keys"]["private_key"],
+            credentials["delegation_document"], credentials["delegation_signature"], party_keys["public_key"])
+        for i in range(300)
+    ]
+    answers[3]["answer_document"]["answer_value"] = -5
+    answers[4]["metadata"]["hash_chain"] = "0" * 64
+    del answers[10]["answer_signature"]
+    
+    # Virheelliset tietueet: avain puuttuu tai ei ole merkkijono, vastaus ei sarjallistu
+    answers[20]["delegation_chain"] = dict(answers[20]["delegation_chain"])
+    answers[20]["delegation_chain"]["delegation_document"] = dict(
+        answers[20]["delegation_chain"]["delegation_document"], candidate_public_key=None)
+    answers[21]["delegation_chain"] = dict(answers[21]["delegation_chain"])
+    answers[21]["delegation_chain"]["delegation_document"] = dict(
+        answers[21]["delegation_chain"]["delegation_document"], candidate_public_key=12345)
+    answers[22]["answer_document"]["answer_value"] = {1, 2}
+    
+    results = manager.verify_answers(answers, max_workers=2)
+    assert results == [manager.verify_answer_integrity(answer) for answer in answers]
+    assert results.count(False) == 6
+
+def test_ed25519_scheme_and_mixed_verification(monkeypatch):
+    """Testaa Ed25519-skeemaa, tyyppimerkittyä sormenjälkeä ja molempien tyyppien varmistusta"""
+    rsa_crypto = CryptoManager()
+    ed_crypto = CryptoManager("ed25519")
+    rsa_keys = rsa_crypto.generate_key_pair()
+    ed_keys = ed_crypto.generate_key_pair()
+    
+    assert rsa_keys["key_type"] == "rsa" and len(rsa_keys["key_fingerprint"]) == 16
+    assert ed_keys["key_type"] == "ed25519"
+    assert ed_keys["key_fingerprint"].startswith("ed25519:")
+    assert rsa_crypto.calculate_fingerprint(ed_keys["public_key"]) == ed_keys["key_fingerprint"]
+    
+    test_data = {"test": "data"}
+    ed_signature = ed_crypto.sign_data(ed_keys["private_key"], test_data)
+    rsa_signature = ed_crypto.sign_data(rsa_keys["private_key"], test_data)
+    assert rsa_crypto.verify_signature(ed_keys["public_key"], test_data, ed_signature)
+    assert ed_crypto.verify_signature(rsa_keys["public_key"], test_data, rsa_signature)
+    assert not rsa_crypto.verify_signature(rsa_keys["public_key"], test_data, ed_signature)
+    assert rsa_crypto.verify_many([
+        (ed_keys["public_key"], test_data, ed_signature),
+        (rsa_keys["public_key"], test_data, rsa_signature),
+        (ed_keys["public_key"], {"test": "muu"}, ed_signature)
+    ]) == [True, True, False]
+    
+    monkeypatch.setenv("SIGNATURE_SCHEME", "ed25519")
+    assert CryptoManager().generate_key_pair()["key_type"] == "ed25519"
+    with pytest.raises(ValueError):
+        CryptoManager("dsa")
+
+def test_ed25519_delegation_and_answers(tmp_path, monkeypatch):
+    """Testaa avaintyypin merkintää valtuutukseen ja Ed25519-vastausten varmistusta"""
+    monkeypatch.chdir(tmp_path)
+    party_keys = CryptoManager("ed25519").generate_key_pair()
+    manager = SecureAnswerManager("Testivaali", scheme="ed25519")
+    credentials = manager.key_manager.issue_candidate_credentials(
+        "puolue1", "ehdokas1", party_keys["private_key"])
+    delegation = credentials["delegation_document"]
+    assert delegation["candidate_key_type"] == "ed25519"
+    
+    answer = manager.submit_signed_answer(
+        "ehdokas1", "q1", {"answer_value": 3}, credentials["candidate_keys"]["private_key"],
+        delegation, credentials["delegation_signature"], party_keys["public_key"])
+    assert manager.verify_answer_integrity(answer)
+    
+    # Väärä avaintyyppimerkintä (allekirjoitettu uudelleen) hylätään
+    relabeled = dict(delegation, candidate_key_type="rsa")
+    signature = manager.crypto.sign_data(party_keys["private_key"], relabeled)
+    assert not manager.key_manager.verify_candidate_authorization(
+        "ehdokas1", relabeled, signature, party_keys["public_key"])
+
+def test_node_identity_keys_are_lazy_ed25519():
+    """Testaa että noden avaimet luodaan vasta tarvittaessa Ed25519-avaimina"""
+    identity = NodeIdentity("Testivaali", "worker")
+    assert identity._keys is None
+    assert identity.keys["key_type"] == "ed25519"
+    assert identity.verify_identity()
+    assert identity.to_dict()["key_type"] == "ed25519"
+
 if __name__ == "__main__":
     test_key_generation()
     test_signature_verification()
+    test_key_cache_reuses_parsed_keys()
+    test_verify_many_in_process_pool()
     print("🎉 Kaikki CryptoManager-testit läpäisty!")
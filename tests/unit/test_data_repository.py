@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+Testit jaetulle välimuistitetulle datakerrokselle
+"""
+import json
+
+import pytest
+
+from src.core.data import DataRepository, JSONDocumentCache, read_json_cached
+from src.core.error_handling import ElectionSystemError
+from src.core.file_utils import write_json_file
+
+
+def _write(path, data):
+    path.write_text(json.dumps(data), encoding="utf-8")
+
+
+class TestJSONDocumentCache:
+    """Testit JSONDocumentCache-luokalle"""
+
+    def test_parses_once_until_file_changes(self, tmp_path):
+        """Testaa että tiedosto jäsennetään vain muuttuessaan"""
+        path = tmp_path / "questions.json"
+        _write(path, {"questions": [{"id": "q1"}]})
+        cache = JSONDocumentCache()
+
+        first = cache.load(path)
+        assert cache.load(path) is first
+        assert (cache.hits, cache.misses) == (1, 1)
+
+        _write(path, {"questions": [{"id": "q1"}, {"id": "q2"}]})
+        assert len(cache.load(path)["questions"]) == 2
+        assert cache.misses == 2
+
+    def test_write_json_file_invalidates(self, tmp_path):
+        """Testaa että write_json_file mitätöi jaetun välimuistin"""
+        path = tmp_path / "parties.json"
+        write_json_file(path, {"parties": []})
+        assert read_json_cached(path) == {"parties": []}
+
+        write_json_file(path, {"parties": [1]})
+        assert read_json_cached(path) == {"parties": [1]}
+
+    def test_lru_eviction_and_missing(self, tmp_path):
+        """Testaa LRU-poisto ja puuttuvat tiedostot"""
+        cache = JSONDocumentCache(max_entries=2)
+        paths = [tmp_path / f"f{i}.json" for i in range(3)]
+        for i, path in enumerate(paths):
+            _write(path, {"i": i})
+            cache.load(path)
+
+        assert len(cache) == 2
+        assert paths[0] not in cache
+        assert cache.load(tmp_path / "missing.json", {"x": 1}) == {"x": 1}
+        with pytest.raises(ElectionSystemError):
+            cache.load(tmp_path / "missing.json")
+
+    def test_load_copy_is_independent(self, tmp_path):
+        """Testaa että muokattava kopio ei muuta välimuistia"""
+        path = tmp_path / "candidates.json"
+        _write(path, {"candidates": []})
+        cache = JSONDocumentCache()
+
+        cache.load_copy(path)["candidates"].append({"id": "c1"})
+        assert cache.load(path) == {"candidates": []}
+
+
+class TestDataRepository:
+    """Testit DataRepository-luokalle"""
+
+    def test_accessors_and_question_texts(self, tmp_path):
+        """Testaa accessorit molemmilla kysymysformaateilla"""
+        _write(tmp_path / "questions.json", {"questions": [
+            {"id": "q1", "question_fi": "Uusi muoto?"},
+            {"local_id": "q2", "content": {"question": {"fi": "Vanha muoto?"}}},
+        ]})
+        _write(tmp_path / "candidates.json", {"candidates": [{"candidate_id": "c1"}]})
+        repository = DataRepository(tmp_path, JSONDocumentCache())
+
+        texts = repository.question_texts()
+        assert texts == {"q1": "Uusi muoto?", "q2": "Vanha muoto?"}
+        assert repository.question_texts() is texts
+        assert list(repository.candidates_by_id()) == ["c1"]
+        assert repository.parties() == []
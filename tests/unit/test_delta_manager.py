@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+Testit tietuetason delta-päivityksille
+"""
+import copy
+import hashlib
+import json
+
+import pytest
+
+from src.core.ipfs.delta_manager import DeltaManager
+from src.core.ipfs.record_index import index_files
+from src.core.ipfs.sync_orchestrator import SyncOrchestrator
+
+
+class MemoryClient:
+    """Muistinvarainen IPFS-client testejä varten"""
+
+    def __init__(self):
+        self.blobs = {}
+
+    def add_json(self, data):
+        content = json.dumps(data, sort_keys=True)
+        cid = "mem_" + hashlib.sha256(content.encode()).hexdigest()[:16]
+        self.blobs[cid] = json.loads(content)
+        return cid
+
+    def get_json(self, cid):
+        return copy.deepcopy(self.blobs[cid])
+
+
+def _files(count=200):
+    return {
+        "questions.json": {
+            "questions": [{"id": f"q{i}", "question_fi": f"Kysymys {i}?", "elo_rating": 1000} for i in range(count)],
+            "metadata": {"version": 1}
+        },
+        "candidate_answers.json": {
+            "answers": [{"id": "ans_sama", "candidate_id": f"c{i % 10}", "question_id": f"q{i // 10}", "value": 1}
+                        for i in range(count)]
+        },
+        "meta.json": {"election": "Testi"}
+    }
+
+
+class TestRecordDeltas:
+    """Testit DeltaManagerin tietuetason deltoille"""
+
+    def test_small_edit_carries_only_changed_records(self):
+        """Testaa että delta sisältää vain muuttuneet tietueet ja palautuu oikein"""
+        client = MemoryClient()
+        manager = DeltaManager(client)
+        base = _files()
+        base_index = index_files(base)
+
+        current = copy.deepcopy(base)
+        current["questions.json"]["questions"][5]["elo_rating"] = 1016
+        del current["questions.json"]["questions"][7]
+        current["questions.json"]["questions"].append({"id": "q_new", "question_fi": "Uusi?", "elo_rating": 1000})
+        current["candidate_answers.json"]["answers"][3]["value"] = -4
+        current["meta.json"] = {"election": "Testi", "status": "open"}
+
+        delta, _ = manager.build_delta(current, "base", {}, base_index)
+        patch = delta["record_deltas"]["questions.json"]["collections"]["questions"]
+        answers_patch = delta["record_deltas"]["candidate_answers.json"]["collections"]["answers"]
+
+        assert list(patch["upserts"]) == ["q5", "q_new"]
+        assert patch["removed"] == ["q7"]
+        assert "order" not in patch
+        assert answers_patch["key"] == ["candidate_id", "question_id"]
+        assert list(delta["changed_files"]) == ["meta.json"]
+
+        cid = manager.create_delta_update(current, "base", {}, delta=delta)
+        assert manager.apply_delta_update(base, cid, base_index) == current
+
+        savings = manager.calculate_delta_size_saving(current, {}, delta=delta)
+        assert savings["delta_size_bytes"] * 10 < savings["full_size_bytes"]
+
+    def test_reorder_and_tampering(self):
+        """Testaa järjestysmuutos ja muokatun tietueen havaitseminen"""
+        client = MemoryClient()
+        manager = DeltaManager(client)
+        base = _files(20)
+        base_index = index_files(base)
+
+        current = copy.deepcopy(base)
+        current["questions.json"]["questions"].reverse()
+        current["questions.json"]["metadata"]["version"] = 2
+        cid = manager.create_delta_update(current, "base", {}, base_index)
+        assert manager.apply_delta_update(base, cid) == current
+
+        current["questions.json"]["questions"][0]["elo_rating"] = 999
+        cid = manager.create_delta_update(current, "base", {}, base_index)
+        client.blobs[cid]["record_deltas"]["questions.json"]["collections"]["questions"]["upserts"]["q19"]["elo_rating"] = 2000
+        with pytest.raises(ValueError):
+            manager.apply_delta_update(base, cid, base_index)
+
+    def test_orchestrator_round_trip(self, tmp_path, monkeypatch):
+        """Testaa täysi synkronointi, tietuedelta ja lataus"""
+        monkeypatch.chdir(tmp_path)
+        orchestrator = SyncOrchestrator("TestElection", MemoryClient())
+        base = _files()
+        orchestrator.sync_data(base)
+
+        current = copy.deepcopy(base)
+        current["questions.json"]["questions"][0]["question_fi"] = "Muutettu?"
+        delta_cid = orchestrator.sync_data(current)
+
+        delta = orchestrator.client.get_json(delta_cid)
+        assert delta["metadata"]["version"] == "2.0"
+        assert delta["metadata"]["record_changes"] == 1
+        assert orchestrator.load_data(delta_cid) == current
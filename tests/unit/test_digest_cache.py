@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+Testit dokumenttitiivisteiden välimuistille
+"""
+import copy
+import hashlib
+import json
+
+import pytest
+
+from src.core.ipfs import digest_cache
+from src.core.ipfs.digest_cache import DigestCache, document_digest
+from src.core.ipfs.sync_orchestrator import SyncOrchestrator
+from tests.unit.test_chunked_archive import MemoryClient
+
+
+def _files():
+    return {
+        "questions.json": {"questions": [{"id": f"q{i}", "text": f"Kysymys {i} – ä"} for i in range(50)]},
+        "meta.json": {"election": "Testi", "b": 1, "a": 2}
+    }
+
+
+@pytest.fixture
+def digest_calls(monkeypatch):
+    calls = []
+    original = digest_cache.document_digest
+
+    def counting(value):
+        calls.append(value)
+        return original(value)
+
+    monkeypatch.setattr(digest_cache, "document_digest", counting)
+    return calls
+
+
+class TestDigestCache:
+    """Testit DigestCachelle"""
+
+    def test_digest_matches_published_hash_format(self):
+        """Testaa että tiiviste ja koko vastaavat aiempaa laskentatapaa"""
+        data = _files()["meta.json"]
+        legacy = json.dumps(data, sort_keys=True, ensure_ascii=False).encode("utf-8")
+        assert document_digest(data) == (len(legacy), hashlib.sha256(legacy).hexdigest())
+
+        files = _files()
+        assert DigestCache().container_size(files) == len(json.dumps(files, ensure_ascii=False).encode("utf-8"))
+        assert DigestCache().container_size({}) == 2
+
+    def test_cached_within_operation_only(self, digest_calls):
+        """Testaa että sama dokumentti sarjallistetaan operaatiossa kerran ja muutos näkyy seuraavassa"""
+        cache = DigestCache()
+        files = _files()
+
+        with cache.operation():
+            first = cache.file_hashes(files)
+            with cache.operation():
+                assert cache.total_size(files) > 0
+            assert cache.file_hashes(files) == first
+        assert len(digest_calls) == 2
+        assert cache.hits == 4
+
+        files["meta.json"]["election"] = "Muutettu"
+        with cache.operation():
+            assert cache.file_hashes(files)["meta.json"] != first["meta.json"]
+
+
+class TestSyncUsesDigestCache:
+    """Testit välimuistin käytölle synkronoinnissa"""
+
+    def test_full_sync_hashes_each_file_once(self, tmp_path, monkeypatch, digest_calls):
+        """Testaa että täysi synkronointi sarjallistaa jokaisen tiedoston tiivisteelle kerran"""
+        monkeypatch.chdir(tmp_path)
+        orchestrator = SyncOrchestrator("Testivaali", MemoryClient())
+        files = _files()
+
+        orchestrator.sync_data(files)
+        assert len(digest_calls) == len(files)
+        assert orchestrator.sync_state["base_hashes"] == {
+            name: document_digest(data).sha256 for name, data in files.items()
+        }
+
+    def test_file_delta_round_trip(self, tmp_path, monkeypatch, digest_calls):
+        """Testaa tiedostotason deltaa ja säästölaskelmaa välimuistin kanssa"""
+        monkeypatch.chdir(tmp_path)
+        orchestrator = SyncOrchestrator("Testivaali", MemoryClient())
+        files = _files()
+        orchestrator.sync_data(files)
+        orchestrator.base_index_file.unlink()
+
+        current = copy.deepcopy(files)
+        current["meta.json"]["election"] = "Muutettu"
+        digest_calls.clear()
+        delta_cid = orchestrator.sync_data(current)
+
+        assert len(digest_calls) == len(current)
+        savings = orchestrator.sync_state["last_savings"]
+        assert savings["full_size_bytes"] == len(json.dumps(current, ensure_ascii=False).encode("utf-8"))
+        assert orchestrator.load_data(delta_cid) == current
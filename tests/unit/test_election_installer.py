@@ -0,0 +1,200 @@
+#!/usr/bin/env python3
+"""
+Testit worker-noden putkitetulle vaalien asennukselle
+"""
+import hashlib
+import json
+import threading
+import time
+
+import pytest
+
+from src.cli.publish_election_configs import publish_registry
+from src.nodes.worker.election_installer import ElectionInstaller
+
+
+class FakeIPFS:
+    """Muistinvarainen IPFS, joka mittaa rinnakkaisia hakuja"""
+
+    def __init__(self, delay=0.0):
+        self.blobs = {}
+        self.delay = delay
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.lock = threading.Lock()
+
+    def publish(self, data):
+        content = json.dumps({"metadata": {}, "data": data}).encode()
+        cid = "Qm" + hashlib.sha256(content).hexdigest()[:44]
+        self.blobs[cid] = content
+        return cid, hashlib.sha256(content).hexdigest()
+
+    def publish_document(self, data_type, data):
+        return self.publish(data)
+
+    def retrieve_raw(self, cid):
+        with self.lock:
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            time.sleep(self.delay)
+            if cid not in self.blobs:
+                raise KeyError(cid)
+            return self.blobs[cid]
+        finally:
+            with self.lock:
+                self.in_flight -= 1
+
+
+def _publish_elections(ipfs, count, files=("questions.json", "candidates.json", "parties.json")):
+    elections = {}
+    for i in range(count):
+        election_id = f"kunta{i:03d}"
+        sources = {}
+        for filename in files:
+            cid, digest = ipfs.publish({"election_id": election_id, "file": filename})
+            sources[filename.split(".")[0]] = {"cid": cid, "filename": filename, "sha256": digest}
+        config_cid, config_sha256 = ipfs.publish({
+            "election_info": {"name": {"fi": f"Kunta {i}"}, "description": {"fi": "Kuntavaalit"}},
+            "data_sources": sources
+        })
+        elections[election_id] = {"name": {"fi": f"Kunta {i}"}, "description": {"fi": ""},
+                                  "config_cid": config_cid, "config_sha256": config_sha256}
+    registry_cid, _ = ipfs.publish({"elections": elections})
+    return registry_cid
+
+
+@pytest.fixture
+def installer_factory(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+
+    def factory(ipfs, workers=16):
+        return ElectionInstaller(str(tmp_path / "worker_config.json"), max_workers=workers, ipfs_client=ipfs)
+
+    return factory
+
+
+class TestElectionInstaller:
+    """Testit ElectionInstallerille"""
+
+    def test_installs_many_elections_concurrently(self, installer_factory, tmp_path):
+        """Testaa satojen vaalien rinnakkaista asennusta ja vaiheaikoja"""
+        ipfs = FakeIPFS(delay=0.01)
+        registry_cid = _publish_elections(ipfs, 100)
+        installer = installer_factory(ipfs, workers=16)
+
+        report = installer.install_elections(registry_cid)
+
+        assert report["installed"] == 100 and report["failed"] == 0
+        assert 1 < ipfs.max_in_flight <= 16
+        # Sarjassa 100 * 4 hakua * 10 ms = 4 s
+        assert report["wall_seconds"] < 2
+        assert set(report["stage_seconds"]) == {"registry", "config", "data", "write"}
+        assert report["stage_seconds"]["data"] > report["stage_seconds"]["registry"]
+
+        election_dir = tmp_path / "data" / "elections" / "kunta042"
+        assert json.loads((election_dir / "parties.json").read_text())["election_id"] == "kunta042"
+        assert json.loads((election_dir / "meta.json").read_text())["status"] == "installed"
+        assert not list((tmp_path / "data" / "elections").glob(".*"))
+
+    def test_hash_mismatch_leaves_election_untouched(self, installer_factory, tmp_path):
+        """Testaa että tiivisteen virhe estää koko vaalin kirjoituksen"""
+        ipfs = FakeIPFS()
+        registry_cid = _publish_elections(ipfs, 2)
+        installer = installer_factory(ipfs)
+        registry = json.loads(ipfs.blobs[registry_cid])["data"]
+        config_cid = registry["elections"]["kunta001"]["config_cid"]
+        config = json.loads(ipfs.blobs[config_cid])["data"]
+        questions_cid = config["data_sources"]["questions"]["cid"]
+        ipfs.blobs[questions_cid] = ipfs.blobs[questions_cid].replace(b"kunta001", b"kunta666")
+
+        report = installer.install_elections(registry_cid)
+
+        assert report["elections"]["kunta000"]["status"] == "installed"
+        assert report["elections"]["kunta001"]["status"] == "failed"
+        assert "Tiiviste" in report["elections"]["kunta001"]["error"]
+        assert not (tmp_path / "data" / "elections" / "kunta001").exists()
+
+    def test_reinstall_keeps_local_files(self, installer_factory, tmp_path):
+        """Testaa että uudelleenasennus korvaa asennetut tiedostot mutta säilyttää paikalliset"""
+        ipfs = FakeIPFS()
+        registry_cid = _publish_elections(ipfs, 1)
+        installer = installer_factory(ipfs)
+        election_dir = tmp_path / "data" / "elections" / "kunta000"
+        election_dir.mkdir(parents=True)
+        (election_dir / "candidate_answers.json").write_text("{}")
+        (election_dir / "questions.json").write_text('{"vanha": true}')
+
+        report = installer.install_elections(registry_cid, ["kunta000", "tuntematon"])
+
+        assert report["elections"]["kunta000"]["status"] == "installed"
+        assert report["elections"]["tuntematon"]["status"] == "failed"
+        assert (election_dir / "candidate_answers.json").read_text() == "{}"
+        assert json.loads((election_dir / "questions.json").read_text())["file"] == "questions.json"
+
+    def test_install_single_election(self, installer_factory, tmp_path):
+        """Testaa yksittäisen vaalin asennusta asetusten CID:llä"""
+        ipfs = FakeIPFS()
+        _publish_elections(ipfs, 1)
+        config_cid = next(cid for cid, blob in ipfs.blobs.items() if b"data_sources" in blob)
+        installer = installer_factory(ipfs)
+
+        assert installer.install_election("kunta000", config_cid)
+        assert not installer.install_election("kunta001", "QmPuuttuu")
+        assert (tmp_path / "data" / "elections" / "kunta000" / "election_config.json").exists()
+
+
+class TestPublishedHashes:
+    """Testit julkaisijan tiivisteiden ja asennuksen tarkistuksen yhteispelille"""
+
+    @staticmethod
+    def _publish(ipfs, tmp_path):
+        config_dir = tmp_path / "config"
+        election_dir = tmp_path / "data" / "elections" / "kunta000"
+        config_dir.mkdir()
+        election_dir.mkdir(parents=True)
+        (election_dir / "questions.json").write_text(json.dumps({"questions": [{"id": "q1"}]}))
+        (config_dir / "election_kunta000.json").write_text(json.dumps({
+            "election_info": {"name": {"fi": "Kunta 0"}},
+            "data_sources": {"questions": {"cid": "QmPlaceholder", "filename": "questions.json"}}
+        }))
+        registry = {"elections": {"kunta000": {"name": {"fi": "Kunta 0"}, "config_cid": "QmPlaceholder"}}}
+        return registry, publish_registry(ipfs, registry, config_dir, tmp_path / "data" / "elections")
+
+    def test_publisher_emits_hashes_checked_by_installer(self, installer_factory, tmp_path):
+        """Testaa että julkaisija kirjoittaa tiivisteet ja asennus hyväksyy ne"""
+        ipfs = FakeIPFS()
+        registry, published = self._publish(ipfs, tmp_path)
+        registry_cid, registry_sha256 = published["election_registry"]
+        entry = registry["elections"]["kunta000"]
+        assert (entry["config_cid"], entry["config_sha256"]) == published["kunta000"]
+        config = json.loads(ipfs.blobs[entry["config_cid"]])["data"]
+        assert config["data_sources"]["questions"]["sha256"]
+
+        installer = installer_factory(ipfs)
+        (tmp_path / "data" / "elections" / "kunta000" / "questions.json").unlink()
+        report = installer.install_elections(registry_cid, registry_sha256=registry_sha256)
+
+        assert report["installed"] == 1
+        questions = tmp_path / "data" / "elections" / "kunta000" / "questions.json"
+        assert json.loads(questions.read_text())["questions"] == [{"id": "q1"}]
+
+    def test_mismatching_config_hash_leaves_election_untouched(self, installer_factory, tmp_path):
+        """Testaa että väärä asetusten tiiviste jättää asennetun vaalin ennalleen"""
+        ipfs = FakeIPFS()
+        registry, published = self._publish(ipfs, tmp_path)
+        registry_cid, registry_sha256 = published["election_registry"]
+        election_dir = tmp_path / "data" / "elections" / "kunta000"
+        before = {path.name: path.read_bytes() for path in election_dir.iterdir()}
+
+        config_cid = registry["elections"]["kunta000"]["config_cid"]
+        ipfs.blobs[config_cid] = ipfs.blobs[config_cid].replace(b"Kunta 0", b"Kunta X")
+        report = installer_factory(ipfs).install_elections(registry_cid, registry_sha256=registry_sha256)
+
+        assert report["elections"]["kunta000"]["status"] == "failed"
+        assert "Tiiviste" in report["elections"]["kunta000"]["error"]
+        assert {path.name: path.read_bytes() for path in election_dir.iterdir()} == before
+
+        # Väärä vaalilistan tiiviste: mitään ei asenneta
+        report = installer_factory(ipfs).install_elections(registry_cid, registry_sha256="0" * 64)
+        assert report["installed"] == 0 and report["elections"] == {}
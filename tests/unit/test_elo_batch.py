@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+Testit ELO-luokitusten eräuudelleenlaskennalle
+"""
+import json
+import random
+
+import pytest
+
+from src.core.elo_store import ELORatingStore
+from src.core.error_handling import ElectionSystemError
+from src.core.elo_batch import (
+    ComparisonHistory, METHOD_BRADLEY_TERRY, fit_bradley_terry, recompute_ratings, replay_elo
+)
+
+
+def _store_with_history(tmp_path, rounds=200, seed=3, ratings=None):
+    questions_file = tmp_path / "questions.json"
+    ratings = ratings or [1000] * 6
+    questions = [{"id": f"q{i}", "elo_rating": rating} for i, rating in enumerate(ratings)]
+    questions_file.write_text(json.dumps({"questions": questions}), encoding="utf-8")
+
+    rng = random.Random(seed)
+    store = ELORatingStore(questions_file, snapshot_interval=50)
+    for _ in range(rounds):
+        a, b = rng.sample(range(6), 2)
+        # Pienempi indeksi voittaa useimmiten
+        winner = "a" if (a < b) == (rng.random() < 0.8) else "b"
+        store.record_comparison(f"q{a}", f"q{b}", winner)
+    store.close()
+    return questions_file, store
+
+
+class TestELOBatch:
+    """Testit vertailuhistorian uudelleenlaskennalle"""
+
+    def test_replay_matches_incremental_store(self, tmp_path):
+        """Testaa että toisto tuottaa samat luokitukset kuin inkrementaalinen päivitys"""
+        questions_file, store = _store_with_history(tmp_path)
+
+        summary = recompute_ratings(questions_file)
+
+        assert summary["comparisons"] == 200
+        for question_id, change in summary["ratings"].items():
+            assert change["new"] == change["old"] == store.get_rating(question_id)
+
+    def test_bradley_terry_orders_by_strength(self, tmp_path):
+        """Testaa että Bradley–Terry-sovitus löytää todellisen järjestyksen"""
+        questions_file, store = _store_with_history(tmp_path, rounds=2000)
+        history = ComparisonHistory.from_log(store.log_file, [f"q{i}" for i in range(6)])
+
+        ratings = fit_bradley_terry(history)
+
+        assert list(ratings.argsort()[::-1]) == [0, 1, 2, 3, 4, 5]
+        assert abs(ratings.mean() - 1000) < 50
+
+    def test_new_k_factor_and_exclusions(self, tmp_path):
+        """Testaa K-kertoimen vaihto ja kiistetyn vertailun poissulku"""
+        questions_file, store = _store_with_history(tmp_path, rounds=10)
+        question_ids = [f"q{i}" for i in range(6)]
+
+        full = ComparisonHistory.from_log(store.log_file, question_ids)
+        without_first = ComparisonHistory.from_log(store.log_file, question_ids, exclude_seqs=[1])
+
+        assert len(without_first) == len(full) - 1
+        assert not (replay_elo(full, k_factor=16) == replay_elo(full)).all()
+
+    def test_apply_writes_snapshot_metadata(self, tmp_path):
+        """Testaa että tallennus päivittää luokitukset ja metadatan"""
+        questions_file, _ = _store_with_history(tmp_path)
+
+        summary = recompute_ratings(questions_file, method=METHOD_BRADLEY_TERRY,
+                                    exclude_seqs=[3], apply=True)
+
+        saved = json.loads(questions_file.read_text(encoding="utf-8"))
+        assert saved["metadata"]["elo_log_seq"] == 200
+        assert saved["metadata"]["elo_excluded_seqs"] == [3]
+        assert saved["questions"][0]["elo_rating"] == summary["ratings"]["q0"]["new"]
+
+        # Uusi store ei toista jo laskettuja vertailuja
+        reloaded = ELORatingStore(questions_file).load()
+        assert reloaded.get_rating("q0") == summary["ratings"]["q0"]["new"]
+
+    def test_replay_starts_from_ratings_before_log(self, tmp_path):
+        """Testaa että toisto alkaa lokia edeltävistä luokituksista eikä oletusarvosta"""
+        questions_file, store = _store_with_history(tmp_path, ratings=[1400, 1200, 1000, 900, 800, 700])
+
+        summary = recompute_ratings(questions_file, apply=True)
+
+        for question_id, change in summary["ratings"].items():
+            assert change["new"] == change["old"] == store.get_rating(question_id)
+        base = json.loads((tmp_path / "elo_comparisons.base.json").read_text(encoding="utf-8"))
+        assert base["q0"] == 1400
+
+    def test_apply_is_refused_without_log_start(self, tmp_path):
+        """Testaa että katkaistusta lokista ei tallenneta uusia luokituksia"""
+        questions_file, store = _store_with_history(tmp_path, rounds=20)
+        lines = store.log_file.read_text(encoding="utf-8").splitlines(keepends=True)
+        store.log_file.write_text("".join(lines[5:]), encoding="utf-8")
+        before = questions_file.read_text(encoding="utf-8")
+
+        assert recompute_ratings(questions_file)["complete"] is False
+        with pytest.raises(ElectionSystemError):
+            recompute_ratings(questions_file, apply=True)
+        assert questions_file.read_text(encoding="utf-8") == before
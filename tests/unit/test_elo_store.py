@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+"""
+Testit inkrementaaliselle ELO-tallennukselle
+"""
+import json
+from pathlib import Path
+
+import pytest
+
+from src.core.elo_store import ELORatingStore, iter_comparison_log
+
+
+def _write_questions(path: Path, legacy: bool = False):
+    if legacy:
+        questions = [
+            {"local_id": f"q{i}", "elo_rating": {"current_rating": 1000, "comparison_delta": 0}}
+            for i in range(3)
+        ]
+    else:
+        questions = [{"id": f"q{i}", "question_fi": f"Kysymys {i}", "elo_rating": 1000} for i in range(3)]
+    path.write_text(json.dumps({"questions": questions}), encoding="utf-8")
+
+
+class TestELORatingStore:
+    """Testit ELORatingStore-luokalle"""
+
+    def test_record_comparison_updates_memory_and_log(self, tmp_path):
+        """Testaa että vertailu päivittää indeksin ja lokin mutta ei snapshotia"""
+        questions_file = tmp_path / "questions.json"
+        _write_questions(questions_file)
+        before = questions_file.read_text(encoding="utf-8")
+
+        store = ELORatingStore(questions_file, snapshot_interval=0)
+        result = store.record_comparison("q0", "q1", "a")
+        store.flush()
+
+        assert result["question_a"]["old"] == 1000
+        assert store.get_rating("q0") == 1016
+        assert store.get_rating("q1") == 984
+        assert questions_file.read_text(encoding="utf-8") == before
+        assert [e["seq"] for e in iter_comparison_log(store.log_file)] == [1]
+
+    def test_reload_replays_log_after_snapshot(self, tmp_path):
+        """Testaa että snapshotin jälkeiset vertailut toistetaan latauksessa"""
+        questions_file = tmp_path / "questions.json"
+        _write_questions(questions_file)
+
+        store = ELORatingStore(questions_file, snapshot_interval=2)
+        store.record_comparison("q0", "q1", "a")
+        store.record_comparison("q0", "q2", "a")
+        store.record_comparison("q1", "q2", "b")
+        store.flush()
+        expected = {qid: store.get_rating(qid) for qid in ("q0", "q1", "q2")}
+
+        saved = json.loads(questions_file.read_text(encoding="utf-8"))
+        assert saved["metadata"]["elo_log_seq"] == 2
+
+        reloaded = ELORatingStore(questions_file).load()
+        assert {qid: reloaded.get_rating(qid) for qid in expected} == expected
+        assert reloaded.last_seq == 3
+
+    def test_legacy_rating_format(self, tmp_path):
+        """Testaa vanhaa {'current_rating': ...} -formaattia"""
+        questions_file = tmp_path / "questions.json"
+        _write_questions(questions_file, legacy=True)
+
+        with ELORatingStore(questions_file) as store:
+            store.record_comparison("q0", "q1", "b")
+
+        saved = json.loads(questions_file.read_text(encoding="utf-8"))
+        assert saved["questions"][1]["elo_rating"] == {"current_rating": 1016, "comparison_delta": 16}
+
+    def test_unknown_question_raises(self, tmp_path):
+        """Testaa tuntematon kysymys"""
+        questions_file = tmp_path / "questions.json"
+        _write_questions(questions_file)
+
+        with pytest.raises(ValueError):
+            ELORatingStore(questions_file).record_comparison("q0", "missing", "a")
+
+    def test_log_is_on_disk_after_each_comparison(self, tmp_path):
+        """Testaa että lokirivi on tiedostossa ilman flush- tai close-kutsua"""
+        questions_file = tmp_path / "questions.json"
+        _write_questions(questions_file)
+
+        store = ELORatingStore(questions_file, fsync=True)
+        store.record_comparison("q0", "q1", "a")
+        store.record_comparison("q1", "q2", "t")
+
+        # Uusi lukija (kuten kaatumisen jälkeen) näkee molemmat vertailut
+        reloaded = ELORatingStore(questions_file).load()
+        assert reloaded.last_seq == 2
+        assert reloaded.get_rating("q0") == store.get_rating("q0")
+
+    def test_replay_skips_excluded_comparisons(self, tmp_path):
+        """Testaa että elo_excluded_seqs-vertailut ohitetaan latauksessa"""
+        questions_file = tmp_path / "questions.json"
+        _write_questions(questions_file)
+        store = ELORatingStore(questions_file, snapshot_interval=0)
+        store.record_comparison("q0", "q1", "a")
+        store.record_comparison("q0", "q2", "a")
+
+        data = json.loads(questions_file.read_text(encoding="utf-8"))
+        data["metadata"] = {"elo_excluded_seqs": [2]}
+        questions_file.write_text(json.dumps(data), encoding="utf-8")
+
+        reloaded = ELORatingStore(questions_file).load()
+        assert reloaded.get_rating("q0") == 1016
+        assert reloaded.get_rating("q2") == 1000
+        assert reloaded.last_seq == 2
+
+    def test_concurrent_stores_keep_every_comparison(self, tmp_path):
+        """Testaa että kaksi samaa tiedostoa käyttävää istuntoa ei hukkaa vertailuja"""
+        questions_file = tmp_path / "questions.json"
+        _write_questions(questions_file)
+
+        store_a = ELORatingStore(questions_file, snapshot_interval=0).load()
+        store_b = ELORatingStore(questions_file, snapshot_interval=0).load()
+        store_a.record_comparison("q0", "q1", "a")
+        store_b.record_comparison("q1", "q2", "a")
+        store_a.record_comparison("q0", "q2", "a")
+        store_b.record_comparison("q2", "q0", "b")
+        store_a.record_comparison("q0", "q1", "t")
+        store_a.close()
+        store_b.close()
+
+        assert [e["seq"] for e in iter_comparison_log(store_a.log_file)] == [1, 2, 3, 4, 5]
+        saved = json.loads(questions_file.read_text(encoding="utf-8"))
+        assert saved["metadata"]["elo_log_seq"] == 5
+
+        # Sama tulos kuin yhdellä istunnolla samassa järjestyksessä
+        single_file = tmp_path / "single" / "questions.json"
+        single_file.parent.mkdir()
+        _write_questions(single_file)
+        with ELORatingStore(single_file) as single:
+            for a, b, winner in [("q0", "q1", "a"), ("q1", "q2", "a"), ("q0", "q2", "a"),
+                                 ("q2", "q0", "b"), ("q0", "q1", "t")]:
+                single.record_comparison(a, b, winner)
+        replayed = ELORatingStore(questions_file).load()
+        assert {q: replayed.get_rating(q) for q in ("q0", "q1", "q2")} == \
+            {q: single.get_rating(q) for q in ("q0", "q1", "q2")}
+
+    def test_torn_log_line_is_not_glued_to_next_entry(self, tmp_path):
+        """Testaa että kesken jäänyt lokirivi ei turmele seuraavaa vertailua"""
+        questions_file = tmp_path / "questions.json"
+        _write_questions(questions_file)
+        store = ELORatingStore(questions_file, snapshot_interval=0)
+        store.record_comparison("q0", "q1", "a")
+        with open(store.log_file, "a", encoding="utf-8") as f:
+            f.write('{"seq": 2, "a": "q0"')
+
+        other = ELORatingStore(questions_file, snapshot_interval=0)
+        other.record_comparison("q1", "q2", "a")
+
+        assert [e["seq"] for e in iter_comparison_log(store.log_file)] == [1, 2]
+
+    def test_elo_manager_context_writes_snapshot(self, tmp_path):
+        """Testaa että ELOManager tallentaa luokitukset suljettaessa"""
+        from src.managers.elo_manager import ELOManager
+
+        questions_file = tmp_path / "questions.json"
+        _write_questions(questions_file)
+
+        with ELOManager("TestElection", questions_file=str(questions_file)) as elo:
+            elo.update_ratings("q0", "q1", "a")
+
+        saved = json.loads(questions_file.read_text(encoding="utf-8"))
+        assert saved["questions"][0]["elo_rating"] == 1016
+        assert saved["metadata"]["elo_log_seq"] == 1
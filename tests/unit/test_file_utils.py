@@ -9,9 +9,9 @@ from pathlib import Path
 
 # KORJATTU: Oikeat importit
 try:
-    from src.core.file_utils import read_json_file, write_json_file, calculate_file_hash
+    from src.core.file_utils import read_json_file, write_json_file, calculate_file_hash, dumps_json
 except ImportError:
-    from core.file_utils import read_json_file, write_json_file, calculate_file_hash
+    from core.file_utils import read_json_file, write_json_file, calculate_file_hash, dumps_json
 
 class TestFileUtils:
     """Testit file_utils-funktioille"""
@@ -51,6 +51,59 @@ class TestFileUtils:
                 data = json.load(f)
             assert data == test_data
 
+    def test_write_json_file_atomic_and_unchanged(self):
+        """Testaa atominen kirjoitus ja muuttumattoman sisällön ohitus"""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            file_path = Path(temp_dir) / "test.json"
+            test_data = {"nimi": "Äänestys", "arvot": [1, 2.5, None]}
+
+            assert write_json_file(str(file_path), test_data) is True
+            assert file_path.read_text(encoding='utf-8') == json.dumps(test_data, indent=2, ensure_ascii=False)
+            assert write_json_file(str(file_path), test_data) is False
+            assert [p.name for p in Path(temp_dir).iterdir()] == ["test.json"]
+
+    def test_write_json_file_compact(self):
+        """Testaa tiivis kirjoitusmuoto"""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            file_path = Path(temp_dir) / "test.json"
+
+            write_json_file(str(file_path), {"a": [1, 2]}, compact=True)
+            assert file_path.read_text(encoding='utf-8') == '{"a":[1,2]}'
+
+    def test_write_json_file_failure_keeps_original(self):
+        """Testaa että epäonnistunut kirjoitus ei katkaise vanhaa tiedostoa"""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            file_path = Path(temp_dir) / "test.json"
+            write_json_file(str(file_path), {"ok": True})
+
+            with pytest.raises(Exception):
+                write_json_file(str(file_path), {"bad": object()})
+            assert read_json_file(str(file_path)) == {"ok": True}
+            assert [p.name for p in Path(temp_dir).iterdir()] == ["test.json"]
+
+    @pytest.mark.parametrize("data", [
+        {"a": 1.5, "b": [0.1, 1e-05, 0.0001, 1e16, 9999999999999998.0, -2.5e-10, 1.7976931348623157e308]},
+        {"nan": float("nan"), "inf": [float("inf"), float("-inf")]},
+        {"big": 2 ** 70, "neg": -2 ** 63, "nested": [[], {}, (1, 2), {"x": None, "y": True}]},
+        {"text": "ääkköset \u2028 \"lainaus\" \\ \x01", "empty": ""},
+        [1, "kaksi", 3.0, False],
+    ])
+    def test_dumps_json_matches_stdlib(self, data):
+        """Testaa että dumps_json tuottaa tavu tavulta saman tuloksen kuin json.dumps"""
+        assert dumps_json(data) == json.dumps(data, indent=2, ensure_ascii=False).encode('utf-8')
+        assert dumps_json(data, compact=True) == json.dumps(
+            data, separators=(',', ':'), ensure_ascii=False).encode('utf-8')
+        assert dumps_json(data, ensure_ascii=True) == json.dumps(data, indent=2).encode('utf-8')
+
+    def test_dumps_json_rejects_unsupported_types_like_stdlib(self):
+        """Testaa että ei-JSON-tyypit nostavat saman virheen kuin standardikirjasto"""
+        from datetime import datetime
+        
+        with pytest.raises(TypeError):
+            dumps_json({"created": datetime(2026, 1, 1)})
+        with pytest.raises(TypeError):
+            dumps_json({"id": {1, 2}})
+
     def test_calculate_file_hash(self):
         """Testaa tiedoston tiivisteen laskeminen"""
         with tempfile.NamedTemporaryFile(mode='w', suffix='.txt', delete=False, encoding='utf-8') as f:
@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""
+Testit gossip-levitykselle ja nähtyjen viestien suodattimelle
+"""
+import asyncio
+import random
+
+from src.nodes.core.network_manager import NetworkManager
+from src.nodes.protocols.gossip import SeenFilter
+from src.nodes.protocols.gossip_simulator import simulate_gossip
+from src.nodes.protocols.message_protocol import MessageProtocol
+from tests.unit.test_consensus import FakeClock
+from tests.unit.test_network_transport import start_nodes, stop_nodes, wait_until
+
+
+class TestSeenFilter:
+    """Testit SeenFilterille"""
+
+    def test_duplicates_are_rejected_within_window(self):
+        """Testaa kaksoiskappaleiden tunnistusta ja vanhojen ikkunoiden pudotusta"""
+        clock = FakeClock()
+        seen = SeenFilter(bucket_seconds=10, buckets=3, clock=clock)
+        assert seen.add("a")
+        assert not seen.add("a")
+
+        clock.now += 25
+        seen.add("b")
+        assert "a" in seen
+        clock.now += 10
+        seen.add("c")
+        assert "a" not in seen and "b" in seen
+
+    def test_memory_is_bounded(self):
+        """Testaa että täysi ikkuna aloittaa uuden ja muisti pysyy rajattuna"""
+        seen = SeenFilter(buckets=4, max_per_bucket=100, clock=FakeClock())
+        for i in range(10_000):
+            seen.add(f"msg{i}")
+        assert len(seen) <= 400
+        assert "msg9999" in seen and "msg0" not in seen
+
+    def test_message_ids_do_not_collide(self):
+        """Testaa että sama payload samalla hetkellä saa eri tunnisteen"""
+        protocol = MessageProtocol()
+        ids = {protocol.create_message("ping", {"x": 1}, "node", "vaali")["message_id"] for _ in range(10_000)}
+        assert len(ids) == 10_000
+
+
+class TestGossipSimulation:
+    """Testit simulaattorilla mitatulle levitykselle"""
+
+    def test_per_node_bandwidth_is_constant(self):
+        """Testaa kattavuutta ja nodekohtaista kaistaa 10 - 1000 nodella"""
+        results = [simulate_gossip(count, messages=3, fanout=8) for count in (10, 100, 1000)]
+        for result in results:
+            assert result["coverage"] >= 0.99
+            assert result["max_sent_per_node"] <= 8
+        assert results[-1]["avg_bytes_per_node"] < 1.2 * results[0]["avg_bytes_per_node"]
+
+        mesh = [simulate_gossip(count, messages=3, view_size=count, mode="mesh") for count in (10, 1000)]
+        assert mesh[1]["max_sent_per_node"] > 10 * mesh[0]["max_sent_per_node"]
+
+
+class TestNetworkGossip:
+    """Testit NetworkManagerin gossip-tilalle oikean transportin yli"""
+
+    def test_broadcast_reaches_all_nodes_once(self):
+        """Testaa että broadcast leviää koko verkkoon ja jokainen käsittelee sen kerran"""
+        async def scenario():
+            nodes = await start_nodes(30)
+            rng = random.Random(1)
+            for i, node in enumerate(nodes):
+                targets = {nodes[(i + 1) % len(nodes)]} | set(rng.sample(nodes, 3))
+                await node.connect_peers([t.address for t in targets if t is not node
+                                          and t.identity.node_id not in node.peers])
+            received = {}
+            for node in nodes:
+                node.enable_gossip(fanout=4, ttl=10)
+                node.register_message_handler(
+                    "data_sync", lambda m, nid=node.identity.node_id: received.setdefault(nid, []).append(m))
+
+            message = nodes[0].broadcast_message("data_sync", {"data_type": "config"})
+            await wait_until(lambda: len(received) == 29)
+            await asyncio.sleep(0.1)
+
+            assert all(len(messages) == 1 for messages in received.values())
+            assert {m[0]["message_id"] for m in received.values()} == {message["message_id"]}
+            assert all(node.gossip.forwarded <= 4 for node in nodes)
+            assert sum(node.gossip.duplicates for node in nodes) > 0
+            await stop_nodes(nodes)
+
+        asyncio.run(scenario())
+
+    def test_gossip_messages_are_signed_and_types_open(self):
+        """Testaa että gossip-viesti allekirjoitetaan ja tuntematonkin tyyppi leviää"""
+        from src.nodes.core.node_identity import NodeIdentity
+
+        async def scenario():
+            nodes = [NetworkManager(NodeIdentity("Testivaali", node_name=f"signer_{i}")) for i in range(3)]
+            await asyncio.gather(*(node.start() for node in nodes))
+            await nodes[0].connect_peers([node.address for node in nodes[1:]])
+            received = []
+            for node in nodes:
+                node.enable_gossip(fanout=2, ttl=3)
+                node.register_message_handler("test_message", received.append)
+
+            payload = {"nested": {"data": [1, 2, 3]}}
+            message = nodes[0].broadcast_message("test_message", payload)
+            await wait_until(lambda: len(received) == 2)
+
+            identity = nodes[0].identity
+            assert all(m["signature"] == message["signature"] for m in received)
+            assert identity.crypto_manager.verify_signature(identity.keys["public_key"], payload,
+                                                            received[0]["signature"])
+            await stop_nodes(nodes)
+
+        asyncio.run(scenario())
@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+"""
+Testit poolatulle IPFS HTTP -clientille paikallista Kubo-API-jäljitelmää vasten
+"""
+import hashlib
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+
+from src.core.ipfs.http_client import IPFSRequestError, PooledIPFSClient
+from src.core.ipfs_client import IPFSClient
+
+
+class FakeKubo(ThreadingHTTPServer):
+    """Kubo API:n /add, /cat ja /version -jäljitelmä"""
+
+    daemon_threads = True
+
+    def __init__(self, delay: float = 0.0):
+        super().__init__(("127.0.0.1", 0), FakeKuboHandler)
+        self.blobs = {}
+        self.delay = delay
+        self.fail_next = 0
+        self.requests = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.connections = set()
+        self.lock = threading.Lock()
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.server_address[1]}"
+
+
+class FakeKuboHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, *args):
+        pass
+
+    def _reply(self, status, body=b"", content_type="application/json"):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_POST(self):
+        server = self.server
+        body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        with server.lock:
+            server.requests += 1
+            server.connections.add(self.client_address)
+            server.in_flight += 1
+            server.max_in_flight = max(server.max_in_flight, server.in_flight)
+            failing = server.fail_next > 0
+            if failing:
+                server.fail_next -= 1
+        try:
+            time.sleep(server.delay)
+            if failing:
+                return self._reply(503, b"busy", "text/plain")
+
+            url = urlparse(self.path)
+            if url.path == "/api/v0/version":
+                return self._reply(200, b'{"Version":"0.0-fake"}')
+            if url.path == "/api/v0/add":
+                boundary = self.headers["Content-Type"].split("boundary=")[1].encode()
+                part = body.split(b"--" + boundary)[1]
+                content = part.split(b"\r\n\r\n", 1)[1][:-2]
+                cid = "Qm" + hashlib.sha256(content).hexdigest()[:44]
+                server.blobs[cid] = content
+                return self._reply(200, ('{"Name":"f","Hash":"%s","Size":"%d"}' % (cid, len(content))).encode())
+            if url.path == "/api/v0/cat":
+                cid = parse_qs(url.query)["arg"][0]
+                if cid not in server.blobs:
+                    return self._reply(500, b'{"Message":"not found"}')
+                return self._reply(200, server.blobs[cid], "text/plain")
+            return self._reply(404, b"")
+        finally:
+            with server.lock:
+                server.in_flight -= 1
+
+
+@pytest.fixture
+def kubo(tmp_path, monkeypatch):
+    # Oletuslohkovälimuisti (data/ipfs_cache) väliaikaishakemistoon
+    monkeypatch.chdir(tmp_path)
+    server = FakeKubo()
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+class TestPooledIPFSClient:
+    """Testit PooledIPFSClientille"""
+
+    def test_add_and_cat_round_trip(self, kubo):
+        """Testaa lisäystä ja hakua"""
+        with PooledIPFSClient(kubo.url, backoff_base=0.001) as client:
+            assert client.is_available()
+            cid = client.add_json({"nimi": "Äänestys"})
+            assert client.get_json(cid) == {"nimi": "Äänestys"}
+            assert client.cat(client.add_bytes(b"raw")) == b"raw"
+
+    def test_add_many_runs_concurrently_and_keeps_order(self, kubo):
+        """Testaa rinnakkaisuutta, järjestystä ja yhteyksien uudelleenkäyttöä"""
+        kubo.delay = 0.05
+        pages = [(f"p{i}.html", f"<p>{i}</p>", "text/html") for i in range(40)]
+        with PooledIPFSClient(kubo.url, max_workers=8) as client:
+            started = time.perf_counter()
+            cids = client.add_many(pages)
+            elapsed = time.perf_counter() - started
+            contents = client.cat_many(cids)
+
+        assert contents == [f"<p>{i}</p>".encode() for i in range(40)]
+        assert 1 < kubo.max_in_flight <= 8
+        assert elapsed < 40 * 0.05 / 2
+        assert len(kubo.connections) <= 8
+
+    def test_transient_errors_are_retried(self, kubo):
+        """Testaa uudelleenyritystä 503-vastauksilla"""
+        kubo.fail_next = 2
+        with PooledIPFSClient(kubo.url, max_retries=3, backoff_base=0.001) as client:
+            cid = client.add_bytes(b"sisalto")
+        assert kubo.blobs[cid] == b"sisalto"
+        assert kubo.requests == 3
+
+    def test_errors_after_retries(self, kubo):
+        """Testaa virheitä uudelleenyritysten jälkeen ja return_exceptions-tilaa"""
+        kubo.fail_next = 100
+        with PooledIPFSClient(kubo.url, max_retries=1, backoff_base=0.001) as client:
+            with pytest.raises(IPFSRequestError):
+                client.add_bytes(b"x")
+            results = client.cat_many(["a", "b"], return_exceptions=True)
+        assert all(isinstance(r, IPFSRequestError) for r in results)
+
+    def test_unavailable_node(self):
+        """Testaa saavuttamatonta solmua ilman konstruktorin verkkokutsua"""
+        client = PooledIPFSClient("http://127.0.0.1:9")
+        assert client.is_available() is False
+
+    def test_backoff_is_bounded(self):
+        """Testaa viiveen ylärajaa"""
+        client = PooledIPFSClient(backoff_base=1.0, backoff_max=4.0)
+        assert all(0 <= client.backoff_delay(10) <= 4.0 for _ in range(50))
+
+
+class TestIPFSClientFacade:
+    """Testit IPFSClient-julkisivulle"""
+
+    def test_lazy_selection_and_publish_html_many(self, kubo):
+        """Testaa että yhteys valitaan vasta käytössä ja sivut julkaistaan erässä"""
+        client = IPFSClient("testi", api_url=kubo.url)
+        assert kubo.requests == 0
+
+        cids = client.publish_html_many({"a.html": "<p>a</p>", "b.html": "<p>b</p>"})
+        assert not client.is_mock
+        assert kubo.blobs[cids["b.html"]] == b"<p>b</p>"
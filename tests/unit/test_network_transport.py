@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+"""
+Testit NetworkManagerin asyncio-transportille
+"""
+import asyncio
+import time
+
+from src.nodes.core.network_manager import NetworkManager
+
+
+class LocalIdentity:
+    """Kevyt identiteetti ilman avaimia (useita nodeja samassa prosessissa)"""
+
+    def __init__(self, node_id, node_type="worker"):
+        self.node_id = node_id
+        self.election_id = "Testivaali"
+        self.node_type = node_type
+
+
+async def start_nodes(count, prefix="node"):
+    nodes = [NetworkManager(LocalIdentity(f"{prefix}_{i:03d}")) for i in range(count)]
+    await asyncio.gather(*(node.start() for node in nodes))
+    return nodes
+
+
+async def stop_nodes(nodes):
+    await asyncio.gather(*(node.stop() for node in nodes))
+
+
+async def wait_until(predicate, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        assert time.monotonic() < deadline, "timeout"
+        await asyncio.sleep(0.005)
+
+
+class TestAsyncTransport:
+    """Testit usean noden verkolle yhdessä prosessissa"""
+
+    def test_peers_are_registered_on_both_sides(self):
+        """Testaa kättelyä ja vertaisen rekisteröintiä molempiin päihin"""
+        async def scenario():
+            a, b = await start_nodes(2)
+            peer_id = await a.connect_peer(*b.address)
+            await wait_until(lambda: a.identity.node_id in b.peers)
+
+            assert peer_id == b.identity.node_id
+            assert a.peers[peer_id]["address"] == b.address
+            assert b.peers[a.identity.node_id]["identity"].node_type == "worker"
+
+            await b.stop()
+            await wait_until(lambda: not a.peers)
+            await a.stop()
+
+        asyncio.run(scenario())
+
+    def test_broadcast_to_200_peers_is_concurrent(self):
+        """Testaa että 200 vertaisen broadcast ja vastaukset kestävät yhden kierroksen"""
+        async def scenario():
+            hub, = await start_nodes(1, "hub")
+            peers = await start_nodes(200)
+            connected = await hub.connect_peers([node.address for node in peers])
+            assert len(connected) == 200
+
+            pongs = []
+            done = asyncio.Event()
+
+            def on_pong(message):
+                pongs.append(message["sender"])
+                if len(pongs) == 200:
+                    done.set()
+
+            hub.register_message_handler("pong", on_pong)
+
+            # Yksi kierros yhdelle vertaiselle vertailukohdaksi
+            hub.send_message(connected[0], "ping", {})
+            await wait_until(lambda: pongs)
+            pongs.clear()
+
+            started = time.perf_counter()
+            await hub.broadcast("ping", {"round": 1})
+            await asyncio.wait_for(done.wait(), 5)
+            elapsed = time.perf_counter() - started
+
+            assert sorted(pongs) == sorted(connected)
+            assert hub.messages_sent == 201
+            # Vanha sarjallinen lähetys: 200 * 0.1 s
+            assert elapsed < 2
+
+            await stop_nodes(peers + [hub])
+
+        asyncio.run(scenario())
+
+    def test_handlers_can_send_synchronously(self):
+        """Testaa synkronisen lähetyksen käsittelijästä ja exclude_nodes-suodatusta"""
+        async def scenario():
+            a, b, c = await start_nodes(3)
+            await a.connect_peers([b.address, c.address])
+            received = {"b": [], "c": []}
+            b.register_message_handler("data_sync", lambda m: received["b"].append(m["payload"]))
+            c.register_message_handler("data_sync", lambda m: received["c"].append(m["payload"]))
+
+            a.broadcast_message("data_sync", {"n": 1}, exclude_nodes=[c.identity.node_id])
+            a.broadcast_message("data_sync", {"n": 2})
+            await a.flush()
+            await wait_until(lambda: len(received["b"]) == 2 and len(received["c"]) == 1)
+
+            assert received["b"] == [{"n": 1}, {"n": 2}]
+            assert received["c"] == [{"n": 2}]
+            await stop_nodes([a, b, c])
+
+        asyncio.run(scenario())
+
+    def test_full_send_queue_applies_backpressure(self):
+        """Testaa että täysi lähetysjono hidastaa lähettäjää"""
+        async def scenario():
+            a, b = await start_nodes(2)
+            peer_id = await a.connect_peer(*b.address)
+            connection = a.transport.connections[peer_id]
+            connection.queue = asyncio.Queue(maxsize=2)
+            # Pysäytä kirjoittaja, jotta jono täyttyy
+            connection._tasks[0].cancel()
+            await asyncio.sleep(0)
+
+            await a.send(peer_id, "ping", {})
+            await a.send(peer_id, "ping", {})
+            blocked = asyncio.ensure_future(a.send(peer_id, "ping", {}))
+            await asyncio.sleep(0.05)
+            assert not blocked.done()
+
+            connection.queue.get_nowait()
+            await asyncio.wait_for(blocked, 1)
+            await stop_nodes([a, b])
+
+        asyncio.run(scenario())
+
+    def test_without_transport_peers_are_local(self):
+        """Testaa aiempaa paikallista toimintaa ilman transportia"""
+        network = NetworkManager(LocalIdentity("paikallinen"))
+        started = time.perf_counter()
+        assert network.connect_to_network([LocalIdentity("toinen")])
+        network.broadcast_message("ping", {})
+        assert time.perf_counter() - started < 0.1
+        assert network.messages_sent == 1
+        assert network.peers["toinen"]["message_count"] == 1
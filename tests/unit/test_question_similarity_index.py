@@ -0,0 +1,219 @@
+#!/usr/bin/env python3
+"""
+Testit kysymysten MinHash-LSH-samankaltaisuusindeksille
+"""
+import itertools
+import json
+import random
+import subprocess
+import sys
+from pathlib import Path
+
+from src.core.question_similarity_index import (
+    QuestionSimilarityIndex, candidate_pairs, minhash_signature, minhash_signatures, normalize_text,
+    estimate_jaccard
+)
+from src.core.question_duplicate_checker import QuestionDuplicateChecker
+
+
+def _questions():
+    return [
+        {"id": "q1", "question_fi": "Pitäisikö Zeusin salamaniskuoikeuksia rajoittaa?",
+         "question_en": "Should Zeus's lightning bolt privileges be restricted?"},
+        {"id": "q2", "question_fi": "Tulisiko jumalilla olla enemmän valtaa maan asioihin?",
+         "question_en": "Should gods have more power in earthly affairs?"},
+        {"id": "q3", "question_fi": "Pitäisikö jumalten saada verohelpotuksia?",
+         "question_en": "Should gods receive tax benefits?"},
+    ]
+
+
+class TestQuestionSimilarityIndex:
+    """Testit QuestionSimilarityIndex-luokalle"""
+
+    def test_normalize_text(self):
+        """Testaa normalisointi"""
+        assert normalize_text("  Pitäisikö   Zeusin (salama)-oikeuksia?  ") == "pitäisikö zeusin salama oikeuksia"
+
+    def test_signature_similarity(self):
+        """Testaa että samankaltaisilla teksteillä on samankaltaiset allekirjoitukset"""
+        a = minhash_signature(normalize_text("Pitäisikö jumalten saada verohelpotuksia?"))
+        b = minhash_signature(normalize_text("Pitäisikö jumalten saada lisää verohelpotuksia?"))
+        c = minhash_signature(normalize_text("Should gods have more power in earthly affairs?"))
+
+        assert estimate_jaccard(a, b[None, :])[0] > estimate_jaccard(a, c[None, :])[0]
+
+    def test_candidates_finds_near_duplicate(self):
+        """Testaa että lähes identtinen kysymys löytyy ehdokkaista"""
+        index = QuestionSimilarityIndex()
+        index.sync(_questions())
+
+        fi_ids = [qid for qid, _ in index.candidates("Pitäisikö jumalten saada verohelpotuksia")]
+        en_ids = [qid for qid, _ in index.candidates("Should gods receive tax benefits", lang="en")]
+
+        assert fi_ids[0] == "q3"
+        assert en_ids[0] == "q3"
+        assert "q1" not in fi_ids
+
+    def test_sync_is_incremental_and_persistent(self, tmp_path):
+        """Testaa inkrementaalinen päivitys ja tallennus"""
+        index_file = tmp_path / "index.npz"
+        index = QuestionSimilarityIndex(index_file)
+
+        assert index.sync(_questions()) == (3, 0)
+        assert index.sync(_questions()) == (0, 0)
+        index.save()
+
+        updated = _questions()[:2]
+        updated[0] = dict(updated[0], question_fi="Kokonaan uusi kysymys meren valtiaasta?")
+        reloaded = QuestionSimilarityIndex.load(index_file)
+
+        assert len(reloaded) == 3
+        assert reloaded.sync(updated) == (1, 1)
+        assert "q3" not in reloaded
+        assert reloaded.candidates("Kokonaan uusi kysymys meren valtiaasta")[0][0] == "q1"
+
+    def test_duplicate_checker_uses_index(self, tmp_path, monkeypatch):
+        """Testaa QuestionDuplicateChecker indeksin kanssa"""
+        election_dir = tmp_path / "data" / "elections" / "TestElection"
+        election_dir.mkdir(parents=True)
+        (election_dir / "questions.json").write_text(
+            json.dumps({"questions": _questions()}, ensure_ascii=False), encoding="utf-8")
+        monkeypatch.chdir(tmp_path)
+
+        # Data projektin juuresta, ei työhakemistosta; indeksi myös pienelle joukolle
+        checker = QuestionDuplicateChecker("TestElection")
+        assert checker.data_path.is_absolute()
+        checker = QuestionDuplicateChecker("TestElection", data_path=tmp_path / "data" / "elections",
+                                           exact_check_limit=0)
+        result = checker.check_duplicate("Pitäisikö jumalten saada verohelpotuksia?")
+
+        assert result["is_duplicate"]
+        assert result["similar_questions"][0]["id"] == "q3"
+        assert (election_dir / "question_similarity_index.npz").exists()
+
+    def test_cluster_new_questions(self, tmp_path):
+        """Testaa tarkistusjonon klusterointi"""
+        election_dir = tmp_path / "data" / "elections" / "TestElection"
+        election_dir.mkdir(parents=True)
+        (election_dir / "questions.json").write_text(
+            json.dumps({"questions": _questions()}, ensure_ascii=False), encoding="utf-8")
+        new_questions = [
+            {"question_fi": "Pitäisikö meren jumalan saada oma ministeriö?", "status": "pending_review"},
+            {"question_fi": "Pitäisikö meren jumalan saada oma ministeriönsä?", "status": "pending_review"},
+            {"question_fi": "Pitäisikö jumalten saada verohelpotuksia", "status": "pending_review"},
+            {"question_fi": "Täysin erillinen kysymys kirjastoista", "status": "pending_review"},
+            {"question_fi": "Pitäisikö meren jumalan saada oma ministeriö?", "status": "approved"},
+        ]
+        (election_dir / "new_questions.json").write_text(
+            json.dumps(new_questions, ensure_ascii=False), encoding="utf-8")
+        elections = tmp_path / "data" / "elections"
+
+        report = QuestionDuplicateChecker("TestElection", verbose=False, data_path=elections).cluster_new_questions()
+        indexed = QuestionDuplicateChecker("TestElection", verbose=False, data_path=elections,
+                                           exact_check_limit=0).cluster_new_questions()
+
+        assert indexed == report
+        assert report["total_pending"] == 4
+        assert report["unique_questions"] == 1
+        assert report["duplicates_of_accepted"] == 1
+        by_size = {len(c["members"]): c for c in report["clusters"]}
+        assert by_size[2]["representative"]["source"] == "new"
+        assert by_size[1]["representative"] == {
+            "source": "accepted", "id": "q3",
+            "question_fi": "Pitäisikö jumalten saada verohelpotuksia?",
+            "question_en": "Should gods receive tax benefits?", "category": ""
+        }
+
+    def test_recall_matches_exhaustive_checker(self):
+        """Testaa että LSH löytää lähes kaikki vanhan (kaikki parit) tarkistimen duplikaatit"""
+        texts = _near_duplicate_corpus(120)
+        checker = QuestionDuplicateChecker(verbose=False)
+        expected = {(i, j) for i, j in itertools.combinations(range(len(texts)), 2)
+                    if checker.calculate_similarity(texts[i], texts[j]) >= 0.7}
+        borderline = {(i, j) for i, j in expected if checker.calculate_similarity(texts[i], texts[j]) < 0.8}
+
+        index = QuestionSimilarityIndex()
+        index.sync({"id": str(i), "question_fi": text} for i, text in enumerate(texts))
+        found = {(i, j) for i, j in expected
+                 if str(j) in {qid for qid, _ in index.candidates(texts[i])}}
+        pairs = {tuple(pair) for pair in candidate_pairs(minhash_signatures(texts)).tolist()}
+
+        assert len(expected) > 100 and len(borderline) > 50
+        assert len(found) >= 0.99 * len(expected)
+        assert len(found & borderline) >= 0.99 * len(borderline)
+        assert len(expected & pairs) >= 0.99 * len(expected)
+
+
+def _near_duplicate_corpus(count, seed=0):
+    """Kysymyksiä ja niiden muunnelmia (sanoja lisätty, poistettu, taivutettu tai vaihdettu)"""
+    rng = random.Random(seed)
+    subjects = ["jumalten", "Zeusin", "Heran", "Poseidonin", "Athenen", "Hermeksen", "kuolevaisten",
+                "temppelien", "oraakkelien", "sankarien", "titaanien"]
+    objects = ["verohelpotuksia", "salamaniskuoikeuksia", "oma ministeriö", "lisää valtaa maan asioihin",
+               "julkista rahoitusta", "äänioikeus", "vastuu sääilmiöistä", "pääsy kirjastoihin",
+               "velvollisuus maksaa veroja", "suojelu merirosvoilta", "valvonta ennustuksille"]
+    tails = ["", "vuoteen 2030 mennessä", "kaikissa kaupungeissa", "nykyistä enemmän", "kriisitilanteissa"]
+    extra = ["lisää", "enemmän", "myös", "jo", "vielä", "kokonaan", "osittain"]
+
+    texts = []
+    while len(texts) < count:
+        words = " ".join([rng.choice(["Pitäisikö", "Tulisiko", "Voiko"]), rng.choice(subjects),
+                          rng.choice(["saada", "olla"]), rng.choice(objects), rng.choice(tails)]).split()
+        texts.append(" ".join(words) + "?")
+        for _ in range(rng.randint(0, 3)):
+            variant = list(words)
+            for _ in range(rng.randint(1, 4)):
+                i = rng.randrange(len(variant))
+                op = rng.random()
+                if op < 0.3:
+                    variant.insert(i, rng.choice(extra))
+                elif op < 0.5 and len(variant) > 3:
+                    del variant[i]
+                elif op < 0.8:
+                    variant[i] += rng.choice(["nsa", "kin", "han", "lle", "ssa", "n"])
+                else:
+                    variant[i] = rng.choice(subjects + extra)
+            texts.append(" ".join(variant) + "?")
+    return texts[:count]
+
+
+class TestReviewNewQuestionsScript:
+    """Testit scripts/review_new_questions.py --cluster -polulle"""
+
+    def _election(self, tmp_path):
+        election_dir = tmp_path / "data" / "elections" / "TestElection"
+        election_dir.mkdir(parents=True)
+        (election_dir / "questions.json").write_text(
+            json.dumps({"questions": _questions()}, ensure_ascii=False), encoding="utf-8")
+        new_questions = [
+            {"question_fi": "Pitäisikö jumalten saada verohelpotuksia", "status": "pending_review"},
+            {"question_fi": "Pitäisikö jumalten saada verohelpotuksia?", "status": "pending_review"},
+            {"question_fi": "Täysin erillinen kysymys kirjastoista", "status": "pending_review"},
+        ]
+        (election_dir / "new_questions.json").write_text(
+            json.dumps(new_questions, ensure_ascii=False), encoding="utf-8")
+        (tmp_path / "config.json").write_text(json.dumps({"current_election": "TestElection"}), encoding="utf-8")
+        return election_dir
+
+    def test_duplicates_of_accepted_counts_questions(self, tmp_path):
+        """Testaa että hyväksyttyjen duplikaatit lasketaan kysymyksinä, ei klustereina"""
+        self._election(tmp_path)
+
+        report = QuestionDuplicateChecker("TestElection", verbose=False,
+                                          data_path=tmp_path / "data" / "elections").cluster_new_questions()
+
+        assert len(report["clusters"]) == 1
+        assert report["duplicates_of_accepted"] == 2
+        assert report["unique_questions"] == 1
+
+    def test_cluster_flag_runs_script(self, tmp_path):
+        """Testaa skriptin --cluster -ajoa erillisessä prosessissa"""
+        self._election(tmp_path)
+        script = Path(__file__).resolve().parents[2] / "scripts" / "review_new_questions.py"
+
+        result = subprocess.run([sys.executable, str(script), "--cluster"], cwd=tmp_path,
+                                input="s\ns\ns\n", capture_output=True, text=True, timeout=60)
+
+        assert result.returncode == 0, result.stderr
+        assert "DUPLIKAATTIKLUSTERIT" in result.stdout
+        assert "1 klusteria, 1 uniikkia kysymystä (3 odottavaa)" in result.stdout
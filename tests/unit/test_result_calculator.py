@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""
+Testit vektoroidulle ehdokasvertailulle (result_calculator)
+"""
+import numpy as np
+import pytest
+
+from src.core.voting.calculators.result_calculator import (
+    CandidateMatrix, MatchingEngine, top_k_indices
+)
+
+
+def _answers():
+    return [
+        {"candidate_id": "cand_a", "question_id": "q1", "value": 5, "confidence": 5},
+        {"candidate_id": "cand_a", "question_id": "q2", "value": -5, "confidence": 5},
+        {"candidate_id": "cand_b", "question_id": "q1", "value": -5, "confidence": 5},
+        {"candidate_id": "cand_b", "question_id": "q2", "value": 5, "confidence": 1},
+        {"candidate_id": "cand_c", "question_id": "q1", "value": 5, "confidence": 3},
+    ]
+
+
+class TestCandidateMatrix:
+    """Testit ehdokasmatriisille"""
+
+    def test_from_answers_builds_mask_and_weights(self):
+        """Testaa että puuttuvat vastaukset maskataan"""
+        matrix = CandidateMatrix.from_answers(_answers())
+
+        assert matrix.shape == (3, 2)
+        assert matrix.mask.tolist() == [[True, True], [True, True], [True, False]]
+        assert matrix.weights[2, 1] == 0.0
+        assert matrix.weights[1, 1] == pytest.approx(0.2)
+
+    def test_invalid_answers_are_skipped(self):
+        """Testaa että asteikon ulkopuoliset vastaukset ohitetaan"""
+        answers = _answers() + [{"candidate_id": "cand_c", "question_id": "q2", "value": 9}]
+        matrix = CandidateMatrix.from_answers(answers)
+
+        assert not matrix.mask[2, 1]
+
+    def test_identical_answers_give_full_match(self):
+        """Testaa että identtiset vastaukset antavat 100 %"""
+        matrix = CandidateMatrix.from_answers(_answers())
+        scores, common = matrix.score({"q1": 5, "q2": -5})
+
+        assert scores[0] == pytest.approx(100.0)
+        assert scores[1] == pytest.approx(0.0, abs=1e-3)
+        assert common.tolist() == [2, 2, 1]
+
+    def test_matches_reference_computation(self):
+        """Testaa matriisilaskennan vastaavuus suoraan silmukkalaskentaan"""
+        rng = np.random.default_rng(1)
+        answers = [
+            {"candidate_id": f"c{c}", "question_id": f"q{q}",
+             "value": int(rng.integers(-5, 6)), "confidence": int(rng.integers(1, 6))}
+            for c in range(20) for q in range(8) if rng.random() < 0.8
+        ]
+        matrix = CandidateMatrix.from_answers(answers)
+        voter = {f"q{q}": int(rng.integers(-5, 6)) for q in range(0, 8, 2)}
+        scores, _ = matrix.score(voter)
+
+        for row, candidate_id in enumerate(matrix.candidate_ids):
+            total = weight = 0.0
+            for answer in answers:
+                if answer["candidate_id"] == candidate_id and answer["question_id"] in voter:
+                    w = answer["confidence"] / 5.0
+                    total += w * (voter[answer["question_id"]] - answer["value"]) ** 2
+                    weight += w
+            expected = (1 - (total / weight) ** 0.5 / 10) * 100 if weight else 0.0
+            assert scores[row] == pytest.approx(expected, abs=1e-2)
+
+    def test_unanswered_voter_scores_zero(self):
+        """Testaa tyhjät äänestäjän vastaukset"""
+        matrix = CandidateMatrix.from_answers(_answers())
+        scores, common = matrix.score({"unknown": 3})
+
+        assert scores.tolist() == [0.0, 0.0, 0.0]
+        assert common.tolist() == [0, 0, 0]
+
+
+class TestRanking:
+    """Testit top-k järjestykselle"""
+
+    def test_top_k_is_stable_for_ties(self):
+        """Testaa että tasapisteet säilyttävät ehdokasjärjestyksen"""
+        scores = np.array([10.0, 50.0, 50.0, 20.0, 50.0])
+
+        assert top_k_indices(scores, 2).tolist() == [1, 2]
+        assert top_k_indices(scores).tolist() == [1, 2, 4, 3, 0]
+
+    def test_engine_rank_output(self):
+        """Testaa tulosrakenne"""
+        matrix = CandidateMatrix.from_answers(_answers())
+        scores, common = matrix.score({"q1": 5})
+        matches = MatchingEngine().rank(matrix, scores, common, top_k=2)
+
+        assert [m["candidate_id"] for m in matches] == ["cand_a", "cand_c"]
+        assert matches[0]["rank"] == 1
+        assert matches[0]["match_percentage"] == 100.0
+
+
+class TestBatchScoring:
+    """Testit usean äänestäjän eräpisteytykselle"""
+
+    def test_batch_matches_single_scoring(self):
+        """Testaa että eräpisteytys vastaa yksittäistä pisteytystä"""
+        matrix = CandidateMatrix.from_answers(_answers())
+        engine = MatchingEngine()
+        voters = [("s1", {"q1": 5}), ("s2", {"q1": -5, "q2": 5}), ("s3", {"q2": 0})]
+
+        chunks = list(engine.iter_score_batches("test", voters, top_k=2, chunk_size=2, matrix=matrix))
+
+        assert [len(chunk[0]) for chunk in chunks] == [2, 1]
+        rows = [(sid, top) for chunk in chunks for sid, top in zip(chunk[0], chunk[1])]
+        for (session_id, user_answers), (batch_id, top) in zip(voters, rows):
+            scores, common = matrix.score(user_answers)
+            single = engine.rank(matrix, scores, common, top_k=2)
+            assert batch_id == session_id
+            assert [m["candidate_id"] for m in single] == [matrix.candidate_ids[i] for i in top]
+
+    def test_score_sessions_batch_saves_results(self, monkeypatch):
+        """Testaa VotingSessionManagerin eräpisteytys"""
+        from src.core.voting.calculators.result_calculator import get_matching_engine
+        from src.core.voting.managers.session_manager import VotingSessionManager
+
+        matrix = CandidateMatrix.from_answers(_answers())
+        monkeypatch.setattr(get_matching_engine(), "get_matrix", lambda election_id: matrix)
+
+        manager = VotingSessionManager("test_election")
+        first = manager.create_session({"answers": {"q1": -5, "q2": 5}})
+        second = manager.create_session({"answers": {"q1": 5}})
+
+        results = manager.score_sessions_batch([first, second, "missing"], top_k=1, chunk_size=1)
+
+        assert set(results) == {first, second}
+        assert results[first]["matches"][0]["candidate_id"] == "cand_b"
+        assert manager.get_session(second)["results"]["matches"][0]["candidate_id"] == "cand_a"
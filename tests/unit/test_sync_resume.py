@@ -0,0 +1,188 @@
+#!/usr/bin/env python3
+"""
+Testit jatkettavalle synkronoinnille ja deltaketjun ylennykselle
+"""
+import copy
+
+import pytest
+
+from src.core.ipfs.sync_orchestrator import SyncOrchestrator
+from tests.unit.test_chunked_archive import MemoryClient, _files
+
+
+class FlakyClient(MemoryClient):
+    """MemoryClient, jonka yhteys katkeaa annetun lisäysmäärän jälkeen"""
+
+    def __init__(self, fail_after=None):
+        super().__init__()
+        self.fail_after = fail_after
+
+    def add_json(self, data):
+        if self.fail_after is not None and self.added >= self.fail_after:
+            raise ConnectionError("IPFS-yhteys katkesi")
+        return super().add_json(data)
+
+
+class FlakyReadClient(MemoryClient):
+    """MemoryClient, jonka haku katkeaa annetun hakumäärän jälkeen"""
+
+    def __init__(self, blobs, fail_after=None):
+        super().__init__()
+        self.blobs = blobs
+        self.fail_after = fail_after
+
+    def get_json(self, cid):
+        if self.fail_after is not None and self.fetched >= self.fail_after:
+            raise ConnectionError("IPFS-yhteys katkesi")
+        return super().get_json(cid)
+
+
+@pytest.fixture
+def workdir(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    return tmp_path
+
+
+class TestResumableSync:
+    """Testit keskeytyneen täyden synkronoinnin jatkamiselle"""
+
+    def test_interrupted_upload_resumes_from_journal(self, workdir):
+        """Testaa että keskeytynyt julkaisu jatkuu viimeisestä vahvistetusta palasta"""
+        files = _files()
+        client = FlakyClient(fail_after=3)
+        orchestrator = SyncOrchestrator("Testivaali", client)
+
+        with pytest.raises(ConnectionError):
+            orchestrator.sync_data(files)
+
+        # Uusi prosessi lukee journalin levyltä
+        resumed = SyncOrchestrator("Testivaali", client)
+        assert len(resumed.sync_state["pending_upload"]["chunks"]) == 3
+        client.fail_after = None
+        added = client.added
+
+        base_cid = resumed.sync_data(files)
+
+        reference = MemoryClient()
+        SyncOrchestrator("Vertailu", reference).sync_data(files)
+        assert client.added - added == reference.added - 3
+        assert "pending_upload" not in resumed.sync_state
+        assert resumed.load_data(base_cid) == files
+
+    def test_completed_sync_clears_journal(self, workdir):
+        """Testaa että onnistunut synkronointi ei jätä journalia"""
+        orchestrator = SyncOrchestrator("Testivaali", MemoryClient())
+        orchestrator.sync_data(_files(300))
+
+        state = SyncOrchestrator("Testivaali", MemoryClient()).sync_state
+        assert "pending_upload" not in state
+        assert state["base_size_bytes"] > 0
+        assert state["deltas_since_base"] == 0
+
+
+    def test_interrupted_load_resumes_from_fetched_chunks(self, workdir):
+        """Testaa että keskeytynyt lataus hakee uudella yrityksellä vain puuttuvat palat"""
+        files = _files()
+        publisher = MemoryClient()
+        base_cid = SyncOrchestrator("Julkaisija", publisher).sync_data(files)
+
+        reference = FlakyReadClient(publisher.blobs)
+        SyncOrchestrator("Vertailu", reference).load_data(base_cid)
+
+        client = FlakyReadClient(publisher.blobs, fail_after=4)
+        with pytest.raises(ConnectionError):
+            SyncOrchestrator("Testivaali", client).load_data(base_cid)
+
+        resumed = SyncOrchestrator("Testivaali", client)
+        assert resumed.sync_state["pending_load"]["cid"] == base_cid
+        client.fail_after = None
+        fetched = client.fetched
+
+        assert resumed.load_data(base_cid) == files
+        # Manifesti haetaan uudelleen, jo haetut 3 palaa luetaan levyltä
+        assert client.fetched - fetched == reference.fetched - 3
+        assert "pending_load" not in resumed.sync_state
+        assert len(resumed.chunk_spool) == 0
+
+    def test_failed_delta_apply_resumes_without_refetching_base(self, workdir, monkeypatch):
+        """Testaa että epäonnistunut delta-päivitys ei hae perusarkiston paloja uudelleen"""
+        files = _files()
+        publisher = MemoryClient()
+        orchestrator = SyncOrchestrator("Julkaisija", publisher)
+        orchestrator.sync_data(files)
+        current = copy.deepcopy(files)
+        current["questions.json"]["questions"][0]["elo_rating"] = 1016
+        delta_cid = orchestrator.sync_data(current)
+
+        client = FlakyReadClient(publisher.blobs)
+        loader = SyncOrchestrator("Testivaali", client)
+        apply = loader.delta_manager.apply_delta_update
+
+        def failing_apply(*args, **kwargs):
+            raise ConnectionError("Delta-haku katkesi")
+
+        monkeypatch.setattr(loader.delta_manager, "apply_delta_update", failing_apply)
+        with pytest.raises(ConnectionError):
+            loader.load_data(delta_cid)
+        spooled = len(loader.chunk_spool)
+        assert spooled > 0
+
+        monkeypatch.setattr(loader.delta_manager, "apply_delta_update", apply)
+        fetched = client.fetched
+        assert loader.load_data(delta_cid) == current
+        # Vain delta, perusarkiston manifesti ja delta-blob haetaan uudelleen
+        assert client.fetched - fetched == 3
+
+
+class TestDeltaPromotion:
+    """Testit deltaketjun ylentämiselle uudeksi perusarkistoksi"""
+
+    def test_long_delta_chain_is_promoted(self, workdir):
+        """Testaa että kynnyksen ylittävä deltaketju julkaistaan uutena perusarkistona"""
+        files = _files(300)
+        orchestrator = SyncOrchestrator("Testivaali", MemoryClient(), promote_ratio=0.05)
+        first_base = orchestrator.sync_data(files)
+
+        current = copy.deepcopy(files)
+        current["questions.json"]["questions"][0]["elo_rating"] = 1016
+        orchestrator.sync_data(current)
+        assert orchestrator.sync_state["last_base_cid"] == first_base
+        assert orchestrator.sync_state["deltas_since_base"] == 1
+
+        for i in range(1, 300, 3):
+            current["questions.json"]["questions"][i]["question_fi"] = f"Muutettu kysymys {i}?"
+        new_base = orchestrator.sync_data(current)
+
+        state = orchestrator.sync_state
+        assert new_base == state["last_base_cid"] != first_base
+        assert state["promotion_count"] == 1
+        assert state["deltas_since_base"] == 0 and state["last_delta_size_bytes"] == 0
+        assert orchestrator.load_data(new_base) == current
+
+    def test_repeated_small_deltas_are_not_promoted(self, workdir):
+        """Testaa että kumulatiivisia deltoja ei lasketa yhteen (sama muutos ei ylennä)"""
+        files = _files(300)
+        orchestrator = SyncOrchestrator("Testivaali", MemoryClient(), promote_ratio=0.05)
+        base_cid = orchestrator.sync_data(files)
+
+        current = copy.deepcopy(files)
+        for rating in range(1001, 1031):
+            current["questions.json"]["questions"][0]["elo_rating"] = rating
+            orchestrator.sync_data(current)
+
+        state = orchestrator.sync_state
+        assert state["last_base_cid"] == base_cid
+        assert state["deltas_since_base"] == 30
+        assert 30 * state["last_delta_size_bytes"] > 0.05 * state["base_size_bytes"]
+
+    def test_promotion_can_be_disabled(self, workdir):
+        """Testaa että promote_ratio=None säilyttää deltat"""
+        files = _files(300)
+        orchestrator = SyncOrchestrator("Testivaali", MemoryClient(), promote_ratio=None)
+        base_cid = orchestrator.sync_data(files)
+
+        current = copy.deepcopy(files)
+        current["questions.json"]["questions"] = current["questions.json"]["questions"][::-1]
+        orchestrator.sync_data(current)
+        assert orchestrator.sync_state["last_base_cid"] == base_cid
+        assert orchestrator.sync_state["deltas_since_base"] == 1
@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""
+Testit monivaaliajastimelle
+"""
+import json
+import os
+import sys
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../../src'))
+
+import pytest
+
+from core.election_isolation_manager import ElectionIsolationManager
+from core.sync.managers import SyncManager
+from core.sync.orchestrators.scheduler import SyncScheduler, election_data_dir, sync_election
+
+
+def slow_worker(election_id, data_dir=None, force=False):
+    """Työprosessissa ajettava hidas julkaisu"""
+    time.sleep(0.05)
+    return {"election_id": election_id, "status": "published", "error": None, "pid": os.getpid()}
+
+
+def _write_registry(tmp_path, election_ids, status="active"):
+    registry = {"elections": {eid: {"election_id": eid, "status": status} for eid in election_ids}}
+    for election_id in election_ids:
+        (tmp_path / "data" / "elections" / election_id).mkdir(parents=True, exist_ok=True)
+    path = tmp_path / "config" / "election_registry.json"
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(registry))
+    return str(path)
+
+
+@pytest.fixture
+def workdir(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "data" / "runtime").mkdir(parents=True)
+    return tmp_path
+
+
+class TestSyncScheduler:
+    """Testit SyncSchedulerille"""
+
+    def test_hundred_elections_run_in_parallel(self, workdir):
+        """Testaa että 100 vaalia käsitellään rinnakkain yhdellä kierroksella"""
+        elections = [f"vaali{i:03d}" for i in range(100)]
+        scheduler = SyncScheduler(_write_registry(workdir, elections), max_workers=8, worker=slow_worker)
+
+        started = time.perf_counter()
+        results = scheduler.run_once()
+        elapsed = time.perf_counter() - started
+
+        assert sorted(r["election_id"] for r in results) == elections
+        assert len({r["pid"] for r in results}) > 1
+        assert elapsed < 100 * 0.05 / 2
+        assert not any(scheduler.isolation.election_locks.values())
+
+    def test_interval_and_status_are_honoured(self, workdir):
+        """Testaa että vain ajankohtaiset ja aktiiviset vaalit käsitellään"""
+        registry = _write_registry(workdir, ["tuleva", "erääntynyt"])
+        data = json.loads(open(registry).read())
+        data["elections"]["suljettu"] = {"status": "archived"}
+        open(registry, "w").write(json.dumps(data))
+
+        now = datetime.now()
+        SyncManager("tuleva").advance_schedule(now)
+        SyncManager("erääntynyt").advance_schedule(now - timedelta(hours=2))
+
+        scheduler = SyncScheduler(registry, max_workers=2, worker=slow_worker)
+        assert scheduler.due_elections(now) == ["erääntynyt"]
+        assert [r["election_id"] for r in scheduler.run_once(now=now)] == ["erääntynyt"]
+        assert len(scheduler.run_once(force=True)) == 2
+
+    def test_locked_election_is_skipped(self, workdir):
+        """Testaa että jo käsittelyssä olevaa vaalia ei aloiteta uudelleen"""
+        isolation = ElectionIsolationManager()
+        isolation.acquire_election_lock("vaali1", "manual_publish")
+        scheduler = SyncScheduler(_write_registry(workdir, ["vaali1", "vaali2"]),
+                                  max_workers=2, isolation=isolation, worker=slow_worker)
+
+        assert [r["election_id"] for r in scheduler.run_once()] == ["vaali2"]
+        assert isolation.election_locks["vaali1"] is True
+
+    def test_runtime_fallback_only_for_its_own_election(self, workdir):
+        """Testaa että jaettu data/runtime ei ole muiden vaalien data-hakemisto"""
+        registry = _write_registry(workdir, ["oma"])
+        data = json.loads(open(registry).read())
+        data["elections"]["asennettu"] = {"status": "active"}
+        data["elections"]["vieras"] = {"status": "active"}
+        open(registry, "w").write(json.dumps(data))
+        (workdir / "data" / "runtime" / "meta.json").write_text(
+            json.dumps({"metadata": {"election_id": "asennettu"}}))
+
+        assert election_data_dir("asennettu") == "data/runtime"
+        assert election_data_dir("vieras") is None
+        assert election_data_dir("vieras", {"data_dir": "muu"}) == "muu"
+
+        results = {r["election_id"]: r for r in
+                   SyncScheduler(registry, max_workers=2, worker=slow_worker).run_once(force=True)}
+        assert results["oma"]["status"] == "published"
+        assert results["asennettu"]["status"] == "published"
+        assert results["vieras"]["status"] == "skipped"
+        assert results["vieras"]["error"] == "no data dir"
+
+
+class TestSyncElection:
+    """Testit yhden vaalin synkronoinnille"""
+
+    def test_publish_then_unchanged(self, workdir):
+        """Testaa julkaisua vaalin omasta hakemistosta ja muuttumattoman datan ohitusta"""
+        election_dir = workdir / "data" / "elections" / "Testivaali"
+        election_dir.mkdir(parents=True)
+        (election_dir / "questions.json").write_text(json.dumps({"questions": [{"id": "q1"}]}))
+
+        first = sync_election("Testivaali", str(election_dir))
+        assert first["status"] == "published"
+        sync_list = json.loads((workdir / "data/runtime/Testivaali_sync_list.json").read_text())
+        assert sync_list["latest_archive_cid"]
+        assert not SyncManager("Testivaali").is_sync_due()
+
+        second = sync_election("Testivaali", str(election_dir))
+        assert second["status"] == "unchanged"